@@ -1,12 +1,12 @@
 from __future__ import annotations
 
-import asyncio
 from datetime import datetime, timezone
 import logging
 
 from fastapi import APIRouter, Depends, HTTPException, status
 
 from ..auth import AuthUser, get_current_user, get_library_user
+from ..config import settings
 from ..deps import get_manager, get_store
 from ..models import (
     Poll,
@@ -20,7 +20,7 @@ from ..models import (
     PollVote,
     SessionActivity,
 )
-from ..realtime import ConnectionManager
+from ..realtime import BroadcastCoalescer, ConnectionManager
 from ..store import ConflictError, InMemoryStore, NotFoundError
 from .slide_presence import SlidePresenceChannel
 
@@ -38,6 +38,11 @@ channel: SlidePresenceChannel[tuple[str, str], tuple[PollMode, PollStatus]] = (
 )
 
 
+# Vote updates carry the whole poll, so only the newest one per window matters:
+# a vote storm costs one frame per poll per tick instead of one per vote.
+vote_coalescer = BroadcastCoalescer(settings.poll_vote_broadcast_window_ms / 1000)
+
+
 def make_activity(activity_type: str, payload: dict) -> SessionActivity:
     return SessionActivity(
         type=activity_type, payload=payload, ts=datetime.now(timezone.utc)
@@ -48,10 +53,22 @@ def _cache_poll(poll: Poll) -> None:
     channel.state[(poll.session_id, poll.id)] = (poll.mode, poll.status)
 
 
+async def _broadcast_poll_activity(
+    session_id: str,
+    poll_id: str,
+    activity: SessionActivity,
+    manager: ConnectionManager,
+) -> None:
+    """Broadcast immediately. A throttled vote update still pending for
+    this poll is flushed first, so it can't land after (and visually undo)
+    a status change."""
+    await vote_coalescer.flush(session_id, poll_id)
+    await manager.broadcast(session_id, activity)
+
+
 async def _broadcast_status_activity(
     session_id: str,
     poll: Poll,
-    store: InMemoryStore,
     manager: ConnectionManager,
 ) -> None:
     """Emit the same poll_opened/poll_closed activities the manual endpoints
@@ -61,8 +78,7 @@ async def _broadcast_status_activity(
         "poll_opened" if poll.status == PollStatus.open else "poll_closed"
     )
     activity = make_activity(activity_type, {"poll": poll.model_dump(mode="json")})
-    await store.record_activity(session_id, activity)
-    await manager.broadcast(session_id, activity)
+    await _broadcast_poll_activity(session_id, poll.id, activity, manager)
 
 
 async def _transition_poll_status(
@@ -78,7 +94,7 @@ async def _transition_poll_status(
         return poll
     poll = await store.set_poll_status(session_id, poll.id, desired, user.id)
     _cache_poll(poll)
-    await _broadcast_status_activity(session_id, poll, store, manager)
+    await _broadcast_status_activity(session_id, poll, manager)
     return poll
 
 
@@ -146,7 +162,7 @@ async def _sweep_stale_auto_polls(
             channel.forget((session_id, poll_id))
             continue
         _cache_poll(poll)
-        await _broadcast_status_activity(session_id, poll, store, manager)
+        await _broadcast_status_activity(session_id, poll, manager)
 
 
 @router.post("", response_model=Poll, status_code=status.HTTP_201_CREATED)
@@ -165,7 +181,6 @@ async def create_poll(
         raise HTTPException(status_code=404, detail=str(exc)) from exc
     _cache_poll(poll)
     activity = make_activity("poll_created", {"poll": poll.model_dump(mode="json")})
-    await store.record_activity(session_id, activity)
     await manager.broadcast(session_id, activity)
     return poll
 
@@ -232,8 +247,7 @@ async def _apply_poll_mode(
     # poll_updated carries the new mode so host UIs stay in sync even when
     # the status did not change.
     activity = make_activity("poll_updated", {"poll": poll.model_dump(mode="json")})
-    await store.record_activity(session_id, activity)
-    await manager.broadcast(session_id, activity)
+    await _broadcast_poll_activity(session_id, poll.id, activity, manager)
     return poll
 
 
@@ -292,7 +306,7 @@ async def report_poll_presence(
                 channel.forget((session_id, poll_id))
                 raise HTTPException(status_code=404, detail=str(exc)) from exc
             _cache_poll(poll)
-            await _broadcast_status_activity(session_id, poll, store, manager)
+            await _broadcast_status_activity(session_id, poll, manager)
             mode, status = poll.mode, poll.status
 
     await _sweep_stale_auto_polls(session_id, poll_id, store, manager, user)
@@ -319,8 +333,7 @@ async def reset_poll(
     activity = make_activity(
         "poll_vote_updated", {"poll": poll.model_dump(mode="json")}
     )
-    await store.record_activity(session_id, activity)
-    await manager.broadcast(session_id, activity)
+    await _broadcast_poll_activity(session_id, poll.id, activity, manager)
     return poll
 
 
@@ -338,8 +351,7 @@ async def delete_poll(
         raise HTTPException(status_code=404, detail=str(exc)) from exc
     channel.forget((session_id, poll_id))
     activity = make_activity("poll_deleted", {"poll_id": poll_id})
-    await store.record_activity(session_id, activity)
-    await manager.broadcast(session_id, activity)
+    await _broadcast_poll_activity(session_id, poll_id, activity, manager)
 
 
 @router.patch("/{poll_id}", response_model=Poll)
@@ -367,8 +379,7 @@ async def update_poll(
     except ConflictError as exc:
         raise HTTPException(status_code=409, detail=str(exc)) from exc
     activity = make_activity("poll_updated", {"poll": poll.model_dump(mode="json")})
-    await store.record_activity(session_id, activity)
-    await manager.broadcast(session_id, activity)
+    await _broadcast_poll_activity(session_id, poll.id, activity, manager)
     return poll
 
 
@@ -397,8 +408,7 @@ async def vote_poll(
         raise HTTPException(status_code=409, detail=str(exc)) from exc
     poll = await _with_authoritative_mode(session_id, poll, store)
     activity = make_activity("poll_vote_updated", {"poll": poll.model_dump(mode="json")})
-    asyncio.create_task(store.record_activity(session_id, activity))
-    asyncio.create_task(manager.broadcast(session_id, activity))
+    await vote_coalescer.submit(manager, session_id, poll.id, activity)
     return poll
 
 
@@ -433,6 +443,5 @@ async def remove_poll_vote(
     activity = make_activity(
         "poll_vote_updated", {"poll": poll.model_dump(mode="json")}
     )
-    asyncio.create_task(store.record_activity(session_id, activity))
-    asyncio.create_task(manager.broadcast(session_id, activity))
+    await vote_coalescer.submit(manager, session_id, poll.id, activity)
     return poll
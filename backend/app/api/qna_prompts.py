@@ -49,7 +49,6 @@ def _cache_prompt(prompt: QnaPrompt) -> None:
 async def _broadcast_status_activity(
     session_id: str,
     prompt: QnaPrompt,
-    store: InMemoryStore,
     manager: ConnectionManager,
 ) -> None:
     activity_type = (
@@ -58,7 +57,6 @@ async def _broadcast_status_activity(
         else "qna_prompt_closed"
     )
     activity = make_activity(activity_type, {"prompt": prompt.model_dump(mode="json")})
-    await store.record_activity(session_id, activity)
     await manager.broadcast(session_id, activity)
 
 
@@ -94,7 +92,7 @@ async def _sweep_stale_auto_prompts(
             channel.forget((session_id, prompt_id))
             continue
         _cache_prompt(prompt)
-        await _broadcast_status_activity(session_id, prompt, store, manager)
+        await _broadcast_status_activity(session_id, prompt, manager)
 
 
 @router.post("", response_model=QnaPrompt, status_code=status.HTTP_201_CREATED)
@@ -114,7 +112,6 @@ async def create_prompt(
     activity = make_activity(
         "qna_prompt_created", {"prompt": prompt.model_dump(mode="json")}
     )
-    await store.record_activity(session_id, activity)
     await manager.broadcast(session_id, activity)
     return prompt
 
@@ -149,14 +146,13 @@ async def _apply_prompt_mode(
         except NotFoundError as exc:
             raise HTTPException(status_code=404, detail=str(exc)) from exc
         _cache_prompt(prompt)
-        await _broadcast_status_activity(session_id, prompt, store, manager)
+        await _broadcast_status_activity(session_id, prompt, manager)
     else:
         _cache_prompt(prompt)
     # Carries the new mode so host UIs stay in sync when status didn't move.
     activity = make_activity(
         "qna_prompt_updated", {"prompt": prompt.model_dump(mode="json")}
     )
-    await store.record_activity(session_id, activity)
     await manager.broadcast(session_id, activity)
     return prompt
 
@@ -180,7 +176,6 @@ async def update_prompt(
     activity = make_activity(
         "qna_prompt_updated", {"prompt": prompt.model_dump(mode="json")}
     )
-    await store.record_activity(session_id, activity)
     await manager.broadcast(session_id, activity)
     return prompt
 
@@ -266,7 +261,7 @@ async def report_prompt_presence(
                 channel.forget((session_id, prompt_id))
                 raise HTTPException(status_code=404, detail=str(exc)) from exc
             _cache_prompt(prompt)
-            await _broadcast_status_activity(session_id, prompt, store, manager)
+            await _broadcast_status_activity(session_id, prompt, manager)
             mode, prompt_status = prompt.mode, prompt.status
 
     await _sweep_stale_auto_prompts(session_id, prompt_id, store, manager, user)
@@ -292,7 +287,6 @@ async def delete_prompt_questions(
         "prompt_questions_deleted",
         {"prompt_id": prompt_id, "question_ids": question_ids},
     )
-    await store.record_activity(session_id, activity)
     await manager.broadcast(session_id, activity)
     return PromptQuestionsDeletedResponse(question_ids=question_ids)
 
@@ -311,5 +305,4 @@ async def delete_prompt(
         raise HTTPException(status_code=404, detail=str(exc)) from exc
     channel.forget((session_id, prompt_id))
     activity = make_activity("qna_prompt_deleted", {"prompt_id": prompt_id})
-    await store.record_activity(session_id, activity)
     await manager.broadcast(session_id, activity)
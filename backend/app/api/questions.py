@@ -37,7 +37,6 @@ async def create_question(
     activity = make_activity(
         "question_submitted", {"question": question.model_dump(mode="json")}
     )
-    await store.record_activity(session_id, activity)
     await manager.broadcast(session_id, activity)
     return question
 
@@ -59,7 +58,6 @@ async def approve_question(
     activity = make_activity(
         "question_approved", {"question": question.model_dump(mode="json")}
     )
-    await store.record_activity(session_id, activity)
     await manager.broadcast(session_id, activity)
     return question
 
@@ -81,7 +79,6 @@ async def hide_question(
     activity = make_activity(
         "question_hidden", {"question": question.model_dump(mode="json")}
     )
-    await store.record_activity(session_id, activity)
     await manager.broadcast(session_id, activity)
     return question
 
@@ -101,6 +98,5 @@ async def vote_question(
     activity = make_activity(
         "question_vote_updated", {"question": question.model_dump(mode="json")}
     )
-    await store.record_activity(session_id, activity)
     await manager.broadcast(session_id, activity)
     return question
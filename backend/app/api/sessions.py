@@ -6,7 +6,12 @@ from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response,
 from pydantic import BaseModel
 
 from ..auth import AuthUser, get_current_user, get_library_user, get_optional_user
-from ..cache_headers import apply_short_cache_headers, compute_etag, is_etag_match
+from ..cache_headers import (
+    apply_short_cache_headers,
+    compute_etag,
+    etag_for_json,
+    is_etag_match,
+)
 from ..config import settings
 from ..deps import get_manager, get_store
 from ..models import (
@@ -39,6 +44,13 @@ from .slide_presence import SlidePresenceChannel
 router = APIRouter(prefix="/sessions", tags=["sessions"])
 
 
+# Rendered /snapshot bodies and their ETags keyed by (session_id, viewer),
+# valid while the store's snapshot version is unchanged. Only stores with
+# versions (InMemoryStore) are cached here.
+SNAPSHOT_BODY_CACHE_SIZE = 1024
+_snapshot_bodies: dict[tuple[str, str | None], tuple[int, bytes, str]] = {}
+
+
 class AudienceQuestionsDeletedResponse(BaseModel):
     question_ids: list[str]
 
@@ -101,7 +113,6 @@ async def update_host_access(
         payload={"session": session.model_dump(mode="json")},
         ts=datetime.now(timezone.utc),
     )
-    await store.record_activity(session_id, activity)
     await manager.broadcast(session_id, activity)
     return session
 
@@ -250,7 +261,6 @@ async def get_snapshots_batch(
 async def get_snapshot(
     session_id: str,
     request: Request,
-    response: Response,
     store: InMemoryStore = Depends(get_store),
     user: AuthUser | None = Depends(get_optional_user),
 ):
@@ -260,22 +270,49 @@ async def get_snapshot(
     polling tick, and every prefetch from the host taskpane. Most of those
     requests resolve to identical bodies, so we hash the rendered payload and
     serve a 304 Not Modified when the client already has the same version.
+    The rendered body and ETag are kept until the store's snapshot version
+    moves, so repeat reads of an unchanged session skip serialization too.
     See ``app.cache_headers`` for the policy details.
     """
+    viewer_id = user.id if user else None
     try:
-        viewer_id = user.id if user else None
-        snapshot = await store.snapshot(session_id, viewer_user_id=viewer_id)
+        body, etag = await _rendered_snapshot(store, session_id, viewer_id)
     except NotFoundError as exc:
         raise HTTPException(status_code=404, detail=str(exc)) from exc
-    snapshot = snapshot.model_copy(update={"session": with_join_url(snapshot.session)})
 
-    etag = compute_etag(snapshot)
     if is_etag_match(request, etag):
         # 304s carry the validator so the next round trip can match again.
         return Response(status_code=304, headers={"ETag": etag})
 
-    apply_short_cache_headers(response, etag=etag)
-    return snapshot
+    rendered = Response(content=body, media_type="application/json")
+    apply_short_cache_headers(rendered, etag=etag)
+    return rendered
+
+
+async def _rendered_snapshot(
+    store: InMemoryStore, session_id: str, viewer_id: str | None
+) -> tuple[bytes, str]:
+    """Serialized snapshot and its ETag, reused until the session changes."""
+    key = (session_id, viewer_id)
+    try:
+        version = await store.snapshot_version(session_id)
+    except NotFoundError:
+        _snapshot_bodies.pop(key, None)
+        raise
+    cached = _snapshot_bodies.get(key)
+    if version is not None and cached is not None and cached[0] == version:
+        return cached[1], cached[2]
+    # Read after the version: a write in between only makes the cached body
+    # newer than its version, which the next version check replaces.
+    snapshot = await store.snapshot(session_id, viewer_user_id=viewer_id)
+    snapshot = snapshot.model_copy(update={"session": with_join_url(snapshot.session)})
+    serialized = snapshot.model_dump_json()
+    body, etag = serialized.encode("utf-8"), etag_for_json(serialized)
+    if version is not None:
+        if key not in _snapshot_bodies and len(_snapshot_bodies) >= SNAPSHOT_BODY_CACHE_SIZE:
+            del _snapshot_bodies[next(iter(_snapshot_bodies))]
+        _snapshot_bodies[key] = (version, body, etag)
+    return body, etag
 
 
 # Slide-driven (auto) session Q&A. Same design as polls/prompts, but the
@@ -293,7 +330,6 @@ def _cache_qna(session: Session) -> None:
 async def _broadcast_qna_status(
     session_id: str,
     session: Session,
-    store: InMemoryStore,
     manager: ConnectionManager,
 ) -> None:
     activity = SessionActivity(
@@ -301,7 +337,6 @@ async def _broadcast_qna_status(
         payload={"session": session.model_dump(mode="json")},
         ts=datetime.now(timezone.utc),
     )
-    await store.record_activity(session_id, activity)
     await manager.broadcast(session_id, activity)
 
 
@@ -329,7 +364,7 @@ async def _apply_qna_control_mode(
             raise HTTPException(status_code=404, detail=str(exc)) from exc
         session = with_join_url(session)
         _cache_qna(session)
-        await _broadcast_qna_status(session_id, session, store, manager)
+        await _broadcast_qna_status(session_id, session, manager)
     else:
         session = with_join_url(session)
         _cache_qna(session)
@@ -340,7 +375,6 @@ async def _apply_qna_control_mode(
             payload={"session": session.model_dump(mode="json")},
             ts=datetime.now(timezone.utc),
         )
-        await store.record_activity(session_id, activity)
         await manager.broadcast(session_id, activity)
     return session
 
@@ -415,7 +449,7 @@ async def report_qna_presence(
             raise HTTPException(status_code=404, detail=str(exc)) from exc
         session = with_join_url(session)
         _cache_qna(session)
-        await _broadcast_qna_status(session_id, session, store, manager)
+        await _broadcast_qna_status(session_id, session, manager)
         mode, qna_open = session.qna_control_mode, session.qna_open
 
     return QnaPresenceAck(mode=mode, qna_open=qna_open)
@@ -441,7 +475,6 @@ async def delete_audience_questions(
         payload={"question_ids": question_ids},
         ts=datetime.now(timezone.utc),
     )
-    await store.record_activity(session_id, activity)
     await manager.broadcast(session_id, activity)
     return AudienceQuestionsDeletedResponse(question_ids=question_ids)
 
@@ -472,6 +505,5 @@ async def set_qna_config(
         payload={"session": session.model_dump(mode="json")},
         ts=datetime.now(timezone.utc),
     )
-    await store.record_activity(session_id, activity)
     await manager.broadcast(session_id, activity)
     return session
@@ -50,6 +50,12 @@ def compute_etag(payload: Any) -> str:
         serialized = payload.model_dump_json()
     else:
         serialized = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return etag_for_json(serialized)
+
+
+def etag_for_json(serialized: str) -> str:
+    """``compute_etag`` for a payload that is already serialized, so a
+    cached body and its validator come from one dump."""
     digest = hashlib.sha256(serialized.encode("utf-8")).hexdigest()[:_ETAG_HASH_BYTES]
     return f'W/"{digest}"'
 
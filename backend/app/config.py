@@ -87,6 +87,68 @@ class Settings(BaseSettings):
     # Storage bucket for AI artifact reference images (user-attached). Public read so the
     # hosted URL can be baked into artifact HTML (<img src>, background-image: url(...)).
     supabase_artifact_images_bucket: str = "artifact-images"
+    # Realtime fan-out: each WebSocket drains its own bounded outbound queue.
+    # Policy for a full queue: "coalesce" (replace a stale vote count for the
+    # same poll/question, else evict), "drop_oldest", or "disconnect".
+    ws_send_queue_size: int = 256
+    ws_send_queue_policy: str = "coalesce"
+    # A single send stuck longer than this evicts the socket (it reconnects).
+    ws_send_timeout_seconds: float = 10.0
+    # poll_vote_updated broadcasts are throttled to one per poll per window;
+    # 0 broadcasts every vote as it lands.
+    poll_vote_broadcast_window_ms: int = 150
+    # Recent frames kept per session (the session's activity log) so a
+    # reconnecting socket can replay what it missed instead of reloading the
+    # snapshot: at most this many, none older than the age limit (0: count
+    # limit only), and dropped once a session has had no sockets for the TTL.
+    ws_resume_buffer_size: int = 256
+    ws_resume_max_age_seconds: float = 3600.0
+    ws_resume_ttl_seconds: float = 300.0
+    # Sockets joining a session at the same seq within this window share one
+    # snapshot load and encoding; 0 loads per socket.
+    ws_snapshot_cache_seconds: float = 1.0
+    # Multiplexed host socket (/ws/host): sessions one socket may watch, and
+    # how often session_stats is recomputed for them.
+    host_socket_max_sessions: int = 50
+    host_socket_stats_interval_seconds: float = 5.0
+    # Broadcast backplane: "memory" for a single worker, "unix" to fan out
+    # across uvicorn workers on one host through datagram sockets in
+    # realtime_broker_dir (required when WEB_CONCURRENCY > 1).
+    realtime_broker: str = "memory"
+    realtime_broker_dir: str = "/tmp/prezo-realtime"
+    # Store backend: "memory" (InMemoryStore, with the WAL and archive
+    # settings below), "sqlite" (SqliteStore, one database file at
+    # sqlite_store_path) or "supabase". Unset picks Supabase when its URL and
+    # key are set, else memory. SQLite synchronous=NORMAL survives a crashed
+    # process; FULL also fsyncs every commit against power loss.
+    store_backend: str | None = None
+    # SupabaseStore write-behind votes: each vote is checked against cached
+    # poll state and answered at once, and accumulated votes are written in
+    # one vote_poll_batch call (sql/vote_poll_batch.sql) per window; 0 writes
+    # each vote as it arrives. Past queue_size waiting votes, voters wait
+    # for a flush.
+    supabase_vote_flush_ms: float = 0.0
+    supabase_vote_queue_size: int = 10_000
+    sqlite_store_path: str = "./data/prezo.db"
+    sqlite_synchronous: str = "NORMAL"
+    # Directory for the InMemoryStore write-ahead log; unset keeps the store
+    # memory-only. Writes are fsynced in groups, one per commit window, and
+    # the log is compacted into a snapshot every snapshot_every records.
+    store_wal_dir: str | None = None
+    store_wal_group_commit_ms: float = 2.0
+    store_wal_fsync: bool = True
+    store_wal_snapshot_every: int = 100_000
+    # Directory InMemoryStore archives evicted sessions to; unset keeps every
+    # session in memory. Ended sessions and sessions untouched for
+    # session_idle_seconds are archived (0: ended only), as are the least
+    # recently used ones whenever the estimated footprint passes the high
+    # watermark, down to the low one (0: no watermark). Archived sessions
+    # load back on their next write or snapshot.
+    session_archive_dir: str | None = None
+    session_idle_seconds: float = 3600.0
+    store_memory_high_watermark_mb: int = 0
+    store_memory_low_watermark_mb: int = 0
+    session_eviction_interval_seconds: float = 60.0
     library_sync_secret: str | None = None
     library_sync_ttl_seconds: int = 604800
     # Dev-only spike/e2e collector endpoints (/spike/*). Unauthenticated by
@@ -120,5 +182,14 @@ class Settings(BaseSettings):
     def cors_origins_list(self) -> list[str]:
         return parse_cors_origins_value(self.cors_origins)
 
+    @property
+    def resolved_store_backend(self) -> str:
+        """store_backend, or the default it stands for when unset."""
+        if self.store_backend:
+            return self.store_backend
+        if self.supabase_url and self.supabase_service_role_key:
+            return "supabase"
+        return "memory"
+
 
 settings = Settings()
@@ -1,17 +1,53 @@
 from __future__ import annotations
 
 from .config import settings
-from .realtime import ConnectionManager
+from .realtime import ConnectionManager, SendQueuePolicy
+from .realtime_broker import InProcessBroker, UnixSocketBroker
 from .store import InMemoryStore
+from .store_sqlite import SqliteStore
 from .store_supabase import SupabaseStore
 
-if settings.supabase_url and settings.supabase_service_role_key:
+store_backend = settings.resolved_store_backend
+if store_backend == "supabase":
     store = SupabaseStore(
-        settings.supabase_url, settings.supabase_service_role_key
+        settings.supabase_url,
+        settings.supabase_service_role_key,
+        vote_flush_seconds=settings.supabase_vote_flush_ms / 1000,
+        vote_queue_size=settings.supabase_vote_queue_size,
     )
+elif store_backend == "sqlite":
+    store = SqliteStore(
+        settings.sqlite_store_path,
+        synchronous=settings.sqlite_synchronous,
+    )
+elif store_backend == "memory":
+    store = InMemoryStore(
+        wal_dir=settings.store_wal_dir,
+        wal_group_commit_seconds=settings.store_wal_group_commit_ms / 1000,
+        wal_fsync=settings.store_wal_fsync,
+        wal_snapshot_every=settings.store_wal_snapshot_every,
+        archive_dir=settings.session_archive_dir,
+        idle_session_seconds=settings.session_idle_seconds,
+        memory_high_watermark_bytes=settings.store_memory_high_watermark_mb * 1024 * 1024,
+        memory_low_watermark_bytes=settings.store_memory_low_watermark_mb * 1024 * 1024,
+        eviction_interval_seconds=settings.session_eviction_interval_seconds,
+    )
+else:
+    raise ValueError(f"unknown STORE_BACKEND {store_backend!r}")
+if settings.realtime_broker == "unix":
+    broker = UnixSocketBroker(settings.realtime_broker_dir)
 else:
-    store = InMemoryStore()
-manager = ConnectionManager()
+    broker = InProcessBroker()
+manager = ConnectionManager(
+    queue_size=settings.ws_send_queue_size,
+    policy=SendQueuePolicy(settings.ws_send_queue_policy),
+    send_timeout_seconds=settings.ws_send_timeout_seconds,
+    resume_buffer_size=settings.ws_resume_buffer_size,
+    resume_ttl_seconds=settings.ws_resume_ttl_seconds,
+    resume_max_age_seconds=settings.ws_resume_max_age_seconds,
+    snapshot_cache_seconds=settings.ws_snapshot_cache_seconds,
+    broker=broker,
+)
 
 
 def get_store() -> InMemoryStore:
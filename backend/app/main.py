@@ -1,22 +1,42 @@
 from __future__ import annotations
 
+import asyncio
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
+import json
 import logging
+import time
 
-from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
 from .api import ai, artifact_images, brand_extract, brand_fonts, brand_logos, embed_instances, library, polls, qna_prompts, questions, sessions, spike
+from .auth import AuthUser, get_current_user_from_supabase_token
 from .config import settings
 from .deps import manager, store
 from .models import SessionActivity, SessionSnapshot
+from .realtime_commands import handle_command
+from .realtime_protocol import parse_protocol, parse_topics
 from .store import NotFoundError
 from .store_supabase import SupabaseError
+from .store_wal import WalUnavailableError
 
 logger = logging.getLogger("prezo.api")
 
-app = FastAPI(title=settings.app_name)
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # Starts periodic session eviction when an archive is configured.
+    await store.start()
+    yield
+    # Unbinds this worker's broker socket so peers stop publishing to it.
+    await manager.close()
+    # Stops eviction and flushes the store's write-ahead log, if any.
+    await store.close()
+
+
+app = FastAPI(title=settings.app_name, lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -57,11 +77,36 @@ async def handle_supabase_error(
     return JSONResponse(status_code=status_code, content={"detail": exc.detail})
 
 
+@app.exception_handler(WalUnavailableError)
+async def handle_wal_unavailable(
+    _request: Request, exc: WalUnavailableError
+) -> JSONResponse:
+    logger.warning("Rejected a write while the store WAL is failing: %s", exc)
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
+
 @app.get("/health")
 async def health() -> dict:
     return {"status": "ok"}
 
 
+@app.get("/health/realtime")
+async def realtime_health() -> dict:
+    """Fan-out counters: frames sent/dropped/coalesced and slow-consumer
+    evictions since process start, plus the current socket count and the
+    process CPU time (for CPU-per-request load test math)."""
+    return {**manager.stats_snapshot(), "process_cpu_seconds": time.process_time()}
+
+
+@app.get("/health/store")
+async def store_health() -> dict:
+    """In-process store footprint: live and archived sessions with their
+    estimated size against the memory watermarks, WAL and archive stats,
+    and process RSS; buffered votes for write-behind Supabase. Always
+    includes the realtime activity log's size."""
+    return {**store.memory_stats(), "activity_log": manager.history_stats()}
+
+
 def with_join_url(snapshot: SessionSnapshot) -> SessionSnapshot:
     session = snapshot.session
     if settings.public_base_url:
@@ -70,29 +115,88 @@ def with_join_url(snapshot: SessionSnapshot) -> SessionSnapshot:
     return snapshot.model_copy(update={"session": session})
 
 
+def _parse_resume_point(websocket: WebSocket, epoch: str) -> int | None:
+    """``resume_from`` seq if the client's ``epoch`` is this process's."""
+    params = websocket.query_params
+    if params.get("epoch") != epoch:
+        return None
+    try:
+        resume_from = int(params.get("resume_from", ""))
+    except ValueError:
+        return None
+    return resume_from if resume_from >= 0 else None
+
+
+def _parse_client_message(message: str) -> dict | None:
+    """Inbound JSON command ({"type": ...}); None for anything else."""
+    if not message.startswith("{"):
+        return None
+    try:
+        data = json.loads(message)
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
 @app.websocket("/ws/sessions/{session_id}")
 async def session_socket(websocket: WebSocket, session_id: str) -> None:
-    await manager.connect(session_id, websocket)
-    try:
+    protocol = parse_protocol(websocket.query_params.get("protocol"))
+    if protocol is None:
+        await websocket.close(code=1003)
+        return
+
+    async def load_snapshot() -> SessionActivity:
         snapshot = with_join_url(await store.snapshot(session_id))
-        activity = SessionActivity(
+        return SessionActivity(
             type="session_snapshot",
             payload={"snapshot": snapshot.model_dump(mode="json")},
             ts=datetime.now(timezone.utc),
         )
-        await websocket.send_json(activity.model_dump(mode="json"))
+
+    resume_from = _parse_resume_point(websocket, manager.epoch)
+    topics_param = websocket.query_params.get("topics")
+    topics = parse_topics(topics_param.split(",")) if topics_param else None
+
+    await manager.connect(session_id, websocket, protocol, topics)
+    try:
+        # Reconnects from this process replay what they missed; anything
+        # else (first connect, restarted server, gap too old) loads a snapshot.
+        if resume_from is None or not manager.resume(
+            session_id, websocket, resume_from
+        ):
+            await manager.send_snapshot(session_id, websocket, load_snapshot)
         while True:
             message = await websocket.receive_text()
             # Heartbeat: clients send "ping" so they can detect half-open
-            # sockets (no traffic despite pings => force reconnect). Any
-            # other inbound text is ignored, as before.
+            # sockets (no traffic despite pings => force reconnect).
             if message == "ping":
                 pong = SessionActivity(
                     type="pong",
                     payload={},
                     ts=datetime.now(timezone.utc),
                 )
-                await websocket.send_json(pong.model_dump(mode="json"))
+                await manager.send(session_id, websocket, pong.model_dump(mode="json"))
+                continue
+            # Clients that notice a seq gap ask for a fresh snapshot;
+            # subscribe narrows which broadcasts reach this socket; audience
+            # writes (votes, questions) are acked by correlation id. Any
+            # other inbound text is ignored, as before.
+            command = _parse_client_message(message)
+            if not command:
+                continue
+            if command.get("type") == "resync":
+                await manager.send_snapshot(session_id, websocket, load_snapshot)
+            elif command.get("type") == "subscribe":
+                requested = command.get("topics")
+                manager.subscribe(
+                    session_id,
+                    websocket,
+                    parse_topics(requested) if isinstance(requested, list) else None,
+                )
+            else:
+                ack = await handle_command(session_id, command, store, manager)
+                if ack is not None:
+                    await manager.send(session_id, websocket, ack)
     except NotFoundError:
         await websocket.close(code=1008)
     except SupabaseError as exc:
@@ -109,3 +213,168 @@ async def session_socket(websocket: WebSocket, session_id: str) -> None:
         await websocket.close(code=1011)
     finally:
         await manager.disconnect(session_id, websocket)
+
+
+# A host socket that hasn't authenticated within this window is dropped.
+HOST_SOCKET_AUTH_TIMEOUT_SECONDS = 10.0
+
+
+def _host_frame(activity_type: str, payload: dict) -> dict:
+    return SessionActivity(
+        type=activity_type, payload=payload, ts=datetime.now(timezone.utc)
+    ).model_dump(mode="json")
+
+
+async def _authenticate_host_socket(websocket: WebSocket) -> AuthUser | None:
+    """First frame must be {"type": "auth", "token": "<access token>"}."""
+    try:
+        message = await asyncio.wait_for(
+            websocket.receive_text(), HOST_SOCKET_AUTH_TIMEOUT_SECONDS
+        )
+    except asyncio.TimeoutError:
+        return None
+    command = _parse_client_message(message)
+    token = command.get("token") if command and command.get("type") == "auth" else None
+    if not isinstance(token, str) or not token:
+        return None
+    try:
+        return await get_current_user_from_supabase_token(token)
+    except HTTPException:
+        return None
+
+
+def _requested_session_ids(value: object) -> list[str]:
+    if not isinstance(value, list):
+        return []
+    ordered: list[str] = []
+    for item in value:
+        if isinstance(item, str) and item.strip() and item.strip() not in ordered:
+            ordered.append(item.strip())
+    return ordered
+
+
+async def _watch_sessions(
+    websocket: WebSocket,
+    user: AuthUser,
+    watched: list[str],
+    session_ids: list[str],
+) -> None:
+    requested = [sid for sid in session_ids if sid not in watched]
+    room = max(0, settings.host_socket_max_sessions - len(watched))
+    # batch_session_stats silently skips sessions the user can't host, so
+    # it doubles as the access check.
+    allowed = await store.batch_session_stats(requested[:room], user.id) if room else {}
+    rejected = [sid for sid in requested if sid not in allowed]
+    for session_id in requested:
+        if session_id not in allowed:
+            continue
+
+        async def load_snapshot(session_id: str = session_id) -> SessionActivity:
+            snapshot = with_join_url(
+                await store.snapshot(session_id, viewer_user_id=user.id)
+            )
+            return SessionActivity(
+                type="session_snapshot",
+                payload={"snapshot": snapshot.model_dump(mode="json")},
+                ts=datetime.now(timezone.utc),
+            )
+
+        try:
+            if await manager.watch(websocket, session_id, load_snapshot):
+                watched.append(session_id)
+        except NotFoundError:
+            rejected.append(session_id)
+    await manager.send(
+        None,
+        websocket,
+        _host_frame("host_watching", {"session_ids": watched, "rejected": rejected}),
+    )
+
+
+async def _push_host_stats(
+    websocket: WebSocket,
+    user: AuthUser,
+    watched: list[str],
+    refresh: asyncio.Event,
+) -> None:
+    """Send session_stats for the watched sessions when they change,
+    checking every interval or right after a watch."""
+    last: dict | None = None
+    while True:
+        try:
+            await asyncio.wait_for(
+                refresh.wait(), settings.host_socket_stats_interval_seconds
+            )
+        except asyncio.TimeoutError:
+            pass
+        refresh.clear()
+        if not watched:
+            continue
+        try:
+            stats = await store.batch_session_stats(list(watched), user.id)
+        except SupabaseError as exc:
+            logger.warning("Host socket stats refresh failed: %s", exc.detail)
+            continue
+        except Exception:
+            # Keep pushing: the next refresh may well succeed, and the
+            # socket's other frames don't depend on this task.
+            logger.exception("Host socket stats refresh failed")
+            continue
+        payload = {sid: value.model_dump(mode="json") for sid, value in stats.items()}
+        if payload != last:
+            last = payload
+            await manager.send(
+                None, websocket, _host_frame("session_stats", {"stats": payload})
+            )
+
+
+@app.websocket("/ws/host")
+async def host_socket(websocket: WebSocket) -> None:
+    """One socket for a host tracking many sessions (taskpane, dashboard).
+
+    After authenticating, the client sends {"type": "watch" | "unwatch",
+    "session_ids": [...]}. Each watched session starts with its snapshot,
+    then streams its broadcasts, all tagged with ``session_id``; stats for
+    the watched sessions are pushed whenever they change.
+    """
+    await manager.connect_host(websocket)
+    stats_task: asyncio.Task[None] | None = None
+    try:
+        user = await _authenticate_host_socket(websocket)
+        if user is None:
+            await websocket.close(code=1008)
+            return
+        watched: list[str] = []
+        refresh = asyncio.Event()
+        stats_task = asyncio.create_task(
+            _push_host_stats(websocket, user, watched, refresh)
+        )
+        while True:
+            message = await websocket.receive_text()
+            if message == "ping":
+                await manager.send(None, websocket, _host_frame("pong", {}))
+                continue
+            command = _parse_client_message(message)
+            if not command:
+                continue
+            session_ids = _requested_session_ids(command.get("session_ids"))
+            if command.get("type") == "watch":
+                await _watch_sessions(websocket, user, watched, session_ids)
+                refresh.set()
+            elif command.get("type") == "unwatch":
+                for session_id in session_ids:
+                    if session_id in watched:
+                        watched.remove(session_id)
+                        await manager.unwatch(websocket, session_id)
+    except SupabaseError as exc:
+        logger.warning("Closing host websocket after Supabase failure: %s", exc.detail)
+        await websocket.close(code=1013)
+    except WebSocketDisconnect:
+        pass
+    except Exception:
+        logger.exception("Unhandled host websocket error")
+        await websocket.close(code=1011)
+    finally:
+        if stats_task is not None:
+            stats_task.cancel()
+        await manager.disconnect_host(websocket)
@@ -1,42 +1,745 @@
+"""Per-session WebSocket fan-out.
+
+Every socket gets its own writer task draining a bounded outbound queue, so
+``broadcast`` only enqueues and returns: the slowest phone in a room no
+longer sets the pace for everyone else, and a socket that stops draining is
+evicted by policy instead of stalling the fan-out until its send raises.
+Each broadcast gets a per-session sequence number and is serialized once per
+wire protocol in use (see ``realtime_protocol``), so every recipient is
+handed the same pre-encoded text. A short per-session history of those
+broadcasts, bounded by count and age, is the session's activity log: a
+reconnecting client resumes from it instead of reloading the whole
+snapshot, and ``activities`` reads it back by seq and type. Broadcasts travel through a broker (see
+``realtime_broker``) so every worker process fans out to its own sockets.
+Counters for sent/dropped/coalesced frames and evictions live on
+``ConnectionManager.stats``.
+"""
+
 from __future__ import annotations
 
 import asyncio
-from collections import defaultdict
+from collections import defaultdict, deque
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from enum import Enum
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable, Iterable
+import uuid
 
 from fastapi import WebSocket
 
 from .models import SessionActivity
+from .realtime_broker import Broker, InProcessBroker
+from .realtime_protocol import WireProtocol, activity_topics, dump_frame, encode_frame
+
+logger = logging.getLogger("prezo.realtime")
+
+# Close code for evicted slow consumers: "try again later". Clients treat
+# any non-1008 close as transient and reconnect, picking up a fresh snapshot.
+CLOSE_CODE_SLOW_CONSUMER = 1013
+
+# History entries sampled to estimate the average serialized size in
+# history_stats().
+HISTORY_SIZE_SAMPLE = 64
+
+
+class SendQueuePolicy(str, Enum):
+    """What happens to a new frame when a socket's outbound queue is full.
+
+    drop_oldest: discard the oldest queued broadcast; the client sees the
+    seq gap and resyncs. Frames addressed to the socket alone (its snapshot)
+    are never dropped; if nothing else is queued, the socket is evicted.
+    coalesce: replace a queued frame for the same entity (an older vote count
+    for the same poll/question); if there is none, evict the socket.
+    disconnect: evict the socket; it reconnects and gets a fresh snapshot.
+    """
+
+    drop_oldest = "drop_oldest"
+    coalesce = "coalesce"
+    disconnect = "disconnect"
+
+
+@dataclass(slots=True)
+class ConnectionStats:
+    frames_sent: int = 0
+    frames_dropped: int = 0
+    frames_coalesced: int = 0
+    send_failures: int = 0
+    evictions: int = 0
+    resumes: int = 0
+    resume_misses: int = 0
+
+
+def coalesce_key(activity: dict[str, Any]) -> str | None:
+    """Frames sharing a key supersede each other: a client only needs the
+    newest vote count for a given poll or question. Everything else (status
+    changes, deletions, snapshots) is never replaced."""
+    kind = activity.get("type")
+    payload = activity.get("payload") or {}
+    if kind == "poll_vote_updated":
+        poll = payload.get("poll")
+        if isinstance(poll, dict) and poll.get("id"):
+            return f"poll:{poll['id']}"
+    elif kind == "question_vote_updated":
+        question = payload.get("question")
+        if isinstance(question, dict) and question.get("id"):
+            return f"question:{question['id']}"
+    return None
+
+
+class _Connection:
+    __slots__ = (
+        "websocket",
+        "protocol",
+        "topics",
+        "sessions",
+        "tagged",
+        "queue",
+        "wakeup",
+        "writer",
+        "paused",
+        "closed",
+    )
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        protocol: WireProtocol,
+        topics: frozenset[str] | None = None,
+    ) -> None:
+        self.websocket = websocket
+        self.protocol = protocol
+        # Broadcasts outside these topics are skipped; None is every activity.
+        self.topics = topics
+        # Sessions the socket is registered under: one for a session socket,
+        # any number for a host socket, whose frames are tagged with
+        # ``session_id`` so the client can tell them apart.
+        self.sessions: set[str] = set()
+        self.tagged = False
+        # (coalesce key, seq, frame) triples, oldest first. seq is None for
+        # frames addressed to this socket alone (snapshots, pongs).
+        self.queue: deque[tuple[str | None, int | None, str | bytes]] = deque()
+        self.wakeup = asyncio.Event()
+        self.writer: asyncio.Task[None] | None = None
+        # Held while a snapshot is being loaded so nothing newer than the
+        # snapshot's seq reaches the client ahead of it.
+        self.paused = True
+        self.closed = False
+
+
+def _wants(connection: _Connection, topics: frozenset[str]) -> bool:
+    return connection.topics is None or not connection.topics.isdisjoint(topics)
 
 
 class ConnectionManager:
-    def __init__(self) -> None:
-        self._connections: dict[str, set[WebSocket]] = defaultdict(set)
+    def __init__(
+        self,
+        *,
+        queue_size: int = 256,
+        policy: SendQueuePolicy = SendQueuePolicy.coalesce,
+        send_timeout_seconds: float = 10.0,
+        resume_buffer_size: int = 256,
+        resume_ttl_seconds: float = 300.0,
+        resume_max_age_seconds: float = 3600.0,
+        snapshot_cache_seconds: float = 1.0,
+        broker: Broker | None = None,
+    ) -> None:
+        self._connections: dict[str, dict[WebSocket, _Connection]] = defaultdict(dict)
+        self._hosts: dict[WebSocket, _Connection] = {}
+        # Per-session broadcast counter, kept while the session has sockets
+        # and dropped with its history. A seq always names the same frame
+        # within a process: counters start from _seq_floor, which is at
+        # least every dropped counter and moves on each broadcast to a
+        # session without one, so a seq from before the drop reads as stale.
+        # The epoch tells a reconnecting client whether its seq came from
+        # this process at all.
+        self._seq: dict[str, int] = {}
+        self._seq_floor = 0
+        self.epoch = uuid.uuid4().hex[:12]
+        # Recent (seq, coalesce key, activity, monotonic time) per session,
+        # at most resume_buffer_size and none older than
+        # resume_max_age_seconds; kept while the session has sockets and for
+        # resume_ttl_seconds after.
+        self._history: dict[
+            str, deque[tuple[int, str | None, dict[str, Any], float]]
+        ] = {}
+        self._history_evicted = 0
+        self._idle_since: dict[str, float] = {}
+        # Encoded session_snapshot text per session, valid while the
+        # session's seq is unchanged (and for at most snapshot_cache_seconds,
+        # for writes that don't broadcast), so a reconnect storm loads and
+        # serializes the snapshot once.
+        self._snapshots: dict[str, tuple[int, float, dict[WireProtocol, str]]] = {}
+        self._next_prune_at = 0.0
         self._lock = asyncio.Lock()
+        self.queue_size = max(1, queue_size)
+        self.policy = policy
+        self.send_timeout_seconds = send_timeout_seconds
+        self.resume_buffer_size = max(0, resume_buffer_size)
+        self.resume_ttl_seconds = resume_ttl_seconds
+        # 0 keeps entries until they are pushed out by count.
+        self.resume_max_age_seconds = resume_max_age_seconds
+        self.snapshot_cache_seconds = snapshot_cache_seconds
+        self.broker = broker or InProcessBroker()
+        self._broker_started: asyncio.Task[None] | None = None
+        self.stats = ConnectionStats()
+
+    async def start(self) -> None:
+        """Subscribe to the broker; done lazily by the first connect or
+        broadcast, so a manager works without an explicit start."""
+        if self._broker_started is None:
+            self._broker_started = asyncio.ensure_future(
+                self.broker.start(self._fan_out)
+            )
+        await asyncio.shield(self._broker_started)
 
-    async def connect(self, session_id: str, websocket: WebSocket) -> None:
+    async def close(self) -> None:
+        await self.broker.close()
+        self._broker_started = None
+
+    async def connect(
+        self,
+        session_id: str,
+        websocket: WebSocket,
+        protocol: WireProtocol = WireProtocol.json,
+        topics: frozenset[str] | None = None,
+    ) -> None:
+        """Accept and register a socket. Broadcasts queue up from here on,
+        but nothing is written until ``send_snapshot`` primes the socket."""
         await websocket.accept()
+        await self.start()
+        connection = _Connection(websocket, protocol, topics)
         async with self._lock:
-            self._connections[session_id].add(websocket)
+            self._register(session_id, connection)
+            if self.resume_buffer_size and session_id not in self._history:
+                self._history[session_id] = deque(maxlen=self.resume_buffer_size)
+            self._prune_history()
+        connection.writer = asyncio.create_task(self._drain(connection))
 
     async def disconnect(self, session_id: str, websocket: WebSocket) -> None:
         async with self._lock:
-            self._connections[session_id].discard(websocket)
+            connection = self._remove(session_id, websocket)
+        if connection is not None:
+            self._stop(connection)
+
+    async def connect_host(self, websocket: WebSocket) -> None:
+        """Accept a multiplexed host socket. It belongs to no session until
+        ``watch``; from then on it gets every broadcast of the watched
+        sessions, tagged with ``session_id``, on one writer."""
+        await websocket.accept()
+        await self.start()
+        connection = _Connection(websocket, WireProtocol.json)
+        connection.tagged = True
+        connection.paused = False
+        self._hosts[websocket] = connection
+        connection.writer = asyncio.create_task(self._drain(connection))
+
+    async def watch(
+        self,
+        websocket: WebSocket,
+        session_id: str,
+        load: Callable[[], Awaitable[SessionActivity]],
+    ) -> bool:
+        """Add a session to a host socket, led by its snapshot.
+
+        Unlike ``send_snapshot`` the writer can't be held back (other
+        sessions keep flowing), so the snapshot is loaded first and the
+        socket registered only if no broadcast landed meanwhile; the load
+        is retried a couple of times otherwise. If the session stays that
+        busy, the client may see a seq gap and can watch it again.
+        Returns False if the socket is gone.
+        """
+        connection = self._hosts.get(websocket)
+        if connection is None or connection.closed:
+            return False
+        for attempt in range(3):
+            seq = self.current_seq(session_id)
+            activity = await load()
+            if connection.closed:
+                return False
+            async with self._lock:
+                if self.current_seq(session_id) != seq and attempt < 2:
+                    continue
+                frame = encode_frame(
+                    connection.protocol, activity.model_dump(mode="json"), seq
+                )
+                frame["session_id"] = session_id
+                self._enqueue(connection, None, None, dump_frame(frame))
+                self._register(session_id, connection)
+                return True
+        return False
+
+    async def unwatch(self, websocket: WebSocket, session_id: str) -> None:
+        async with self._lock:
+            connection = self._hosts.get(websocket)
+            if connection is not None and session_id in connection.sessions:
+                self._remove(session_id, websocket)
+
+    async def disconnect_host(self, websocket: WebSocket) -> None:
+        async with self._lock:
+            connection = self._hosts.get(websocket)
+            if connection is not None:
+                self._detach(connection)
+        if connection is not None:
+            self._stop(connection)
+
+    def subscribe(
+        self, session_id: str, websocket: WebSocket, topics: frozenset[str] | None
+    ) -> None:
+        """Replace a socket's topic filter (None: every activity). Frames
+        already queued are still delivered."""
+        connection = self._connections.get(session_id, {}).get(websocket)
+        if connection is not None:
+            connection.topics = topics
+
+    def resume(self, session_id: str, websocket: WebSocket, since: int) -> bool:
+        """Prime a reconnecting socket by replaying the frames after
+        ``since`` from the session's history instead of loading a snapshot.
+
+        Returns False when the history no longer covers the gap (or the seq
+        is from the future); the caller then falls back to
+        ``send_snapshot``. The first frame is a ``session_resumed`` marker
+        stamped with ``since``, so the client's seq chain stays contiguous.
+        """
+        connection = self._connections.get(session_id, {}).get(websocket)
+        if connection is None:
+            return False
+        current = self.current_seq(session_id)
+        if since > current or since + 1 < self.first_logged_seq(session_id):
+            self.stats.resume_misses += 1
+            return False
+        missed = [
+            entry
+            for entry in self._history.get(session_id, ())
+            if entry[0] > since and _wants(connection, activity_topics(entry[2]))
+        ]
+        marker = SessionActivity(
+            type="session_resumed",
+            payload={"replayed": len(missed)},
+            ts=datetime.now(timezone.utc),
+        )
+        frame = encode_frame(connection.protocol, marker.model_dump(mode="json"), since)
+        frame["epoch"] = self.epoch
+        connection.queue.clear()
+        connection.queue.append((None, None, dump_frame(frame)))
+        for seq, key, payload, _recorded_at in missed:
+            connection.queue.append(
+                (key, seq, dump_frame(encode_frame(connection.protocol, payload, seq)))
+            )
+        self.stats.resumes += 1
+        connection.paused = False
+        connection.wakeup.set()
+        return True
+
+    def current_seq(self, session_id: str) -> int:
+        return self._seq.get(session_id, self._seq_floor)
+
+    def activities(
+        self,
+        session_id: str,
+        since: int = 0,
+        *,
+        types: Iterable[str] | None = None,
+        limit: int | None = None,
+    ) -> list[tuple[int, dict[str, Any]]]:
+        """Logged (seq, activity) pairs after seq ``since``, oldest first,
+        optionally only of ``types``. Only recent ones are kept; a reader
+        whose ``since`` is below ``first_logged_seq`` - 1 missed some."""
+        history = self._history.get(session_id)
+        if history is None:
+            return []
+        self._expire(history, time.monotonic())
+        wanted = None if types is None else set(types)
+        found: list[tuple[int, dict[str, Any]]] = []
+        for seq, _key, payload, _recorded_at in history:
+            if limit is not None and len(found) >= limit:
+                break
+            if seq > since and (wanted is None or payload.get("type") in wanted):
+                found.append((seq, payload))
+        return found
+
+    def first_logged_seq(self, session_id: str) -> int:
+        """Oldest seq still in the session's history (the next seq if
+        there is none)."""
+        history = self._history.get(session_id)
+        if history is not None:
+            self._expire(history, time.monotonic())
+            if history:
+                return history[0][0]
+        return self.current_seq(session_id) + 1
+
+    async def send(
+        self, session_id: str | None, websocket: WebSocket, payload: Any
+    ) -> None:
+        """Queue a frame for one socket (e.g. pong) behind whatever its
+        writer already holds, so it never interleaves with a broadcast.
+        ``session_id`` is None for a host socket."""
+        if session_id is None:
+            connection = self._hosts.get(websocket)
+        else:
+            connection = self._connections.get(session_id, {}).get(websocket)
+        if connection is None:
+            await websocket.send_text(dump_frame(payload))
+            return
+        self._enqueue(connection, None, None, dump_frame(payload))
+
+    async def send_snapshot(
+        self,
+        session_id: str,
+        websocket: WebSocket,
+        load: Callable[[], Awaitable[SessionActivity]],
+    ) -> None:
+        """Load a session_snapshot activity and put it at the head of the
+        socket's queue, stamped with the seq it is current as of.
+
+        The seq is read before ``load`` runs, so the snapshot reflects at
+        least every frame up to it: queued frames at or below it are
+        dropped as redundant and everything newer follows the snapshot.
+        Sockets joining at the same seq share one load and one encoding.
+        """
+        connection = self._connections.get(session_id, {}).get(websocket)
+        if connection is None:
+            return
+        connection.paused = True
+        try:
+            seq = self.current_seq(session_id)
+            frame = self._cached_snapshot(session_id, seq, connection.protocol)
+            if frame is None:
+                activity = await load()
+                if connection.closed:
+                    return
+                frame = self._cache_snapshot(
+                    session_id, seq, connection.protocol, activity
+                )
+            newer = [item for item in connection.queue if item[1] is None or item[1] > seq]
+            connection.queue.clear()
+            connection.queue.append((None, None, frame))
+            connection.queue.extend(newer)
+        finally:
+            connection.paused = False
+            connection.wakeup.set()
 
     async def broadcast(self, session_id: str, activity: SessionActivity) -> None:
+        """Publish to every process's sockets for the session (this one's
+        included) via the broker."""
+        await self.start()
+        await self.broker.publish(session_id, activity.model_dump(mode="json"))
+
+    async def _fan_out(self, session_id: str, payload: dict[str, Any] | None) -> None:
         async with self._lock:
-            recipients: list[WebSocket] = list(self._connections[session_id])
-        if not recipients:
+            recipients = list(self._connections.get(session_id, {}).values())
+            if session_id not in self._seq:
+                # Nobody here watches it and nothing is kept for it.
+                self._seq_floor += 1
+                return
+            self._seq[session_id] += 1
+            seq = self._seq[session_id]
+        self._snapshots.pop(session_id, None)
+        history = self._history.get(session_id)
+        if payload is None:
+            # Lost on the way from another worker: its seq stays unused, so
+            # live sockets resync on the gap, and the history no longer
+            # covers it, so reconnects get a snapshot.
+            if history is not None:
+                self._history_evicted += len(history)
+                history.clear()
             return
-        payload = activity.model_dump(mode="json")
-        results = await asyncio.gather(
-            *(ws.send_json(payload) for ws in recipients),
-            return_exceptions=True,
+        if not recipients and history is None:
+            return
+        key = coalesce_key(payload)
+        if history is not None:
+            now = time.monotonic()
+            self._expire(history, now)
+            if len(history) == history.maxlen:
+                self._history_evicted += 1
+            history.append((seq, key, payload, now))
+        frames: dict[tuple[WireProtocol, bool], str | bytes] = {}
+        topics: frozenset[str] | None = None
+        for connection in recipients:
+            if connection.topics is not None:
+                if topics is None:
+                    topics = activity_topics(payload)
+                if not _wants(connection, topics):
+                    continue
+            variant = (connection.protocol, connection.tagged)
+            frame = frames.get(variant)
+            if frame is None:
+                encoded = encode_frame(connection.protocol, payload, seq)
+                if connection.tagged:
+                    encoded = {**encoded, "session_id": session_id}
+                frame = frames[variant] = dump_frame(encoded)
+            self._enqueue(connection, key, seq, frame)
+
+    def connection_count(self, session_id: str | None = None) -> int:
+        if session_id is not None:
+            return len(self._connections.get(session_id, {}))
+        return sum(len(conns) for conns in self._connections.values())
+
+    def stats_snapshot(self) -> dict[str, int]:
+        return {
+            **asdict(self.stats),
+            "connections": self.connection_count(),
+            "host_connections": len(self._hosts),
+        }
+
+    def history_stats(self) -> dict[str, int]:
+        """Activity log footprint: sessions, entries held, entries evicted
+        so far, and an estimate of their serialized size."""
+        now = time.monotonic()
+        entries = 0
+        sample: list[dict[str, Any]] = []
+        for history in self._history.values():
+            self._expire(history, now)
+            entries += len(history)
+            if history and len(sample) < HISTORY_SIZE_SAMPLE:
+                sample.append(history[-1][2])
+        average = (
+            sum(len(json.dumps(payload)) for payload in sample) / len(sample)
+            if sample
+            else 0
         )
-        stale = [
-            ws for ws, result in zip(recipients, results)
-            if isinstance(result, BaseException)
-        ]
-        if stale:
-            async with self._lock:
-                for ws in stale:
-                    self._connections[session_id].discard(ws)
+        return {
+            "sessions": len(self._history),
+            "entries": entries,
+            "evicted": self._history_evicted,
+            "approx_bytes": int(average * entries),
+        }
+
+    def _enqueue(
+        self,
+        connection: _Connection,
+        key: str | None,
+        seq: int | None,
+        frame: str | bytes,
+    ) -> None:
+        if connection.closed:
+            return
+        queue = connection.queue
+        if len(queue) >= self.queue_size:
+            if self.policy == SendQueuePolicy.drop_oldest:
+                # Broadcasts carry a seq; the seq-less snapshot ahead of them
+                # is what they apply to, so it has to stay.
+                for index, (_key, queued_seq, _frame) in enumerate(queue):
+                    if queued_seq is not None:
+                        del queue[index]
+                        self.stats.frames_dropped += 1
+                        break
+                else:
+                    self._evict(connection, "send queue full")
+                    return
+            elif self.policy == SendQueuePolicy.coalesce and key is not None:
+                # The newer frame goes to the back so seqs stay in order; it
+                # overtaking lower ones would read as a gap to resync from.
+                for index, (queued_key, _seq, _frame) in enumerate(queue):
+                    if queued_key == key:
+                        del queue[index]
+                        self.stats.frames_coalesced += 1
+                        break
+                else:
+                    self._evict(connection, "send queue full")
+                    return
+            else:
+                self._evict(connection, "send queue full")
+                return
+        queue.append((key, seq, frame))
+        if not connection.paused:
+            connection.wakeup.set()
+
+    async def _drain(self, connection: _Connection) -> None:
+        websocket = connection.websocket
+        try:
+            while True:
+                while connection.paused or not connection.queue:
+                    connection.wakeup.clear()
+                    await connection.wakeup.wait()
+                _key, _seq, frame = connection.queue.popleft()
+                send = websocket.send_bytes if isinstance(frame, bytes) else websocket.send_text
+                await asyncio.wait_for(send(frame), self.send_timeout_seconds)
+                self.stats.frames_sent += 1
+        except asyncio.TimeoutError:
+            self._evict(connection, "send timed out")
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Socket already gone; the receive loop's disconnect will find
+            # nothing left to remove.
+            self.stats.send_failures += 1
+            connection.closed = True
+            self._detach(connection)
+
+    def _register(self, session_id: str, connection: _Connection) -> None:
+        self._connections[session_id][connection.websocket] = connection
+        connection.sessions.add(session_id)
+        self._idle_since.pop(session_id, None)
+        self._seq.setdefault(session_id, self._seq_floor)
+
+    def _remove(self, session_id: str, websocket: WebSocket) -> _Connection | None:
+        connections = self._connections.get(session_id)
+        if connections is None:
+            return None
+        connection = connections.pop(websocket, None)
+        if connection is not None:
+            connection.sessions.discard(session_id)
+        if not connections:
+            self._connections.pop(session_id, None)
+            self._idle_since[session_id] = time.monotonic()
+        return connection
+
+    def _prune_history(self) -> None:
+        """Forget the history and seq of sessions nobody has watched for a
+        while; runs at most once a minute, piggybacked on connects."""
+        now = time.monotonic()
+        if now < self._next_prune_at:
+            return
+        self._next_prune_at = now + 60.0
+        cutoff = now - self.resume_ttl_seconds
+        for session_id in [
+            sid for sid, since in self._idle_since.items() if since < cutoff
+        ]:
+            self._idle_since.pop(session_id, None)
+            self._history.pop(session_id, None)
+            self._snapshots.pop(session_id, None)
+            self._seq_floor = max(self._seq_floor, self._seq.pop(session_id, 0))
+
+    def _expire(
+        self, history: deque[tuple[int, str | None, dict[str, Any], float]], now: float
+    ) -> None:
+        if self.resume_max_age_seconds <= 0:
+            return
+        cutoff = now - self.resume_max_age_seconds
+        while history and history[0][3] < cutoff:
+            history.popleft()
+            self._history_evicted += 1
+
+    def _cached_snapshot(
+        self, session_id: str, seq: int, protocol: WireProtocol
+    ) -> str | None:
+        cached = self._snapshots.get(session_id)
+        if cached is None:
+            return None
+        cached_seq, expires_at, frames = cached
+        if cached_seq != seq or time.monotonic() >= expires_at:
+            return None
+        return frames.get(protocol)
+
+    def _cache_snapshot(
+        self,
+        session_id: str,
+        seq: int,
+        protocol: WireProtocol,
+        activity: SessionActivity,
+    ) -> str:
+        frame = encode_frame(protocol, activity.model_dump(mode="json"), seq)
+        frame["epoch"] = self.epoch
+        text = dump_frame(frame)
+        if self.snapshot_cache_seconds <= 0 or self.current_seq(session_id) != seq:
+            # A broadcast landed while loading; the text is still right for
+            # this socket (newer frames follow it) but not worth sharing.
+            return text
+        cached = self._snapshots.get(session_id)
+        if cached is None or cached[0] != seq or time.monotonic() >= cached[1]:
+            cached = (seq, time.monotonic() + self.snapshot_cache_seconds, {})
+            self._snapshots[session_id] = cached
+        cached[2][protocol] = text
+        return text
+
+    def _stop(self, connection: _Connection) -> None:
+        connection.closed = True
+        connection.queue.clear()
+        writer = connection.writer
+        if writer is not None and writer is not asyncio.current_task():
+            writer.cancel()
+
+    def _detach(self, connection: _Connection) -> None:
+        """Unregister a socket from every session (and the host table)."""
+        for session_id in list(connection.sessions):
+            self._remove(session_id, connection.websocket)
+        if self._hosts.get(connection.websocket) is connection:
+            del self._hosts[connection.websocket]
+
+    def _evict(self, connection: _Connection, reason: str) -> None:
+        if connection.closed:
+            return
+        sessions = ", ".join(sorted(connection.sessions)) or "-"
+        self._detach(connection)
+        self._stop(connection)
+        self.stats.evictions += 1
+        logger.warning(
+            "Evicting slow websocket consumer for session %s (%s); evictions=%d",
+            sessions,
+            reason,
+            self.stats.evictions,
+        )
+        asyncio.create_task(self._close_quietly(connection.websocket))
+
+    async def _close_quietly(self, websocket: WebSocket) -> None:
+        try:
+            await websocket.close(code=CLOSE_CODE_SLOW_CONSUMER)
+        except Exception:
+            pass
+
+
+class BroadcastCoalescer:
+    """Throttles a high-frequency state broadcast to one frame per window
+    per (session, key).
+
+    The first update after a quiet period goes out immediately; updates that
+    land inside the following window only overwrite a pending slot, and the
+    latest one is sent when the window closes. Outbound volume therefore
+    scales with the tick rate, not with the rate of votes. Only use it for
+    activities whose payload is the full current state (every vote update
+    carries the whole poll), since intermediate frames are discarded.
+    """
+
+    def __init__(self, window_seconds: float) -> None:
+        self.window_seconds = window_seconds
+        self._pending: dict[tuple[str, str], tuple[ConnectionManager, SessionActivity]] = {}
+        self._timers: dict[tuple[str, str], asyncio.Task[None]] = {}
+
+    async def submit(
+        self,
+        manager: ConnectionManager,
+        session_id: str,
+        key: str,
+        activity: SessionActivity,
+    ) -> None:
+        if self.window_seconds <= 0:
+            await manager.broadcast(session_id, activity)
+            return
+        slot = (session_id, key)
+        timer = self._timers.get(slot)
+        if timer is not None and not timer.done():
+            self._pending[slot] = (manager, activity)
+            return
+        await manager.broadcast(session_id, activity)
+        self._timers[slot] = asyncio.create_task(self._cool_down(slot))
+
+    async def flush(self, session_id: str, key: str) -> None:
+        """Send a pending update now. Call before broadcasting any other
+        activity for the same entity so clients never see an older vote
+        count land after, say, poll_closed."""
+        entry = self._pending.pop((session_id, key), None)
+        if entry is not None:
+            manager, activity = entry
+            await manager.broadcast(session_id, activity)
+
+    def clear(self) -> None:
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        self._pending.clear()
+
+    async def _cool_down(self, slot: tuple[str, str]) -> None:
+        try:
+            while True:
+                await asyncio.sleep(self.window_seconds)
+                entry = self._pending.pop(slot, None)
+                if entry is None:
+                    return
+                manager, activity = entry
+                await manager.broadcast(slot[0], activity)
+        finally:
+            if self._timers.get(slot) is asyncio.current_task():
+                self._timers.pop(slot, None)
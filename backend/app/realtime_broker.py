@@ -0,0 +1,189 @@
+"""Pub/sub backplane under ``ConnectionManager.broadcast``.
+
+Every broadcast is published to the broker, and the broker hands it to the
+fan-out of every process that holds session sockets, this one included.
+With one worker the in-process broker is a direct call. With several
+uvicorn workers on one machine, ``UnixSocketBroker`` joins them into a mesh
+of Unix datagram sockets in a shared directory, so a vote accepted by
+worker A reaches the sockets held by worker B.
+
+Seqs are assigned by each process's own fan-out, so they stay contiguous
+per socket no matter which worker published; the resume epoch is
+per-process, so a client that reconnects to a different worker gets a
+snapshot. A broadcast that can't reach a peer is delivered there as None,
+so the peer's fan-out skips its seq and its sockets resync on the gap.
+"""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+import asyncio
+import json
+import logging
+import os
+import socket
+from typing import Any, Awaitable, Callable
+import uuid
+
+logger = logging.getLogger("prezo.realtime")
+
+# Called with None for an activity that was lost on the way.
+Deliver = Callable[[str, dict[str, Any] | None], Awaitable[None]]
+
+
+class Broker(ABC):
+    """Delivers published activities to every subscribed process."""
+
+    @abstractmethod
+    async def start(self, deliver: Deliver) -> None:
+        """Subscribe ``deliver`` to every published activity."""
+
+    @abstractmethod
+    async def publish(self, session_id: str, activity: dict[str, Any]) -> None:
+        """Hand ``activity`` to every subscribed process, this one included."""
+
+    async def close(self) -> None:
+        return None
+
+
+class InProcessBroker(Broker):
+    """Single-process backplane: publishing is the local fan-out."""
+
+    def __init__(self) -> None:
+        self._deliver: Deliver | None = None
+
+    async def start(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+
+    async def publish(self, session_id: str, activity: dict[str, Any]) -> None:
+        if self._deliver is not None:
+            await self._deliver(session_id, activity)
+
+
+class UnixSocketBroker(Broker):
+    """Same-host backplane for multi-worker deployments.
+
+    Each process binds a datagram socket in ``directory`` and publishes by
+    sending one datagram to every other socket it finds there, then
+    delivering locally. Unix datagrams are reliable and ordered per sender,
+    so each worker sees another worker's broadcasts in publish order.
+    Socket files left behind by dead workers are removed by the first
+    publisher that gets refused.
+
+    A send can still fail: the peer's receive buffer is full because its
+    loop is wedged, or the frame is over the datagram size limit. The
+    sessions affected are then named in a small ``lost`` notice, sent at
+    once if it fits and otherwise ahead of the next datagram to that peer,
+    so the peer knows its sockets missed a frame.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self.path = os.path.join(directory, f"{os.getpid()}-{uuid.uuid4().hex[:8]}.sock")
+        self.dropped = 0
+        # Per peer, sessions with a broadcast it hasn't been told it lost.
+        self._lost: dict[str, set[str]] = {}
+        self._deliver: Deliver | None = None
+        self._socket: socket.socket | None = None
+        self._inbox: asyncio.Queue[tuple[str, dict[str, Any]]] = asyncio.Queue()
+        self._pump: asyncio.Task[None] | None = None
+
+    async def start(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+        os.makedirs(self.directory, exist_ok=True)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.setblocking(False)
+        sock.bind(self.path)
+        self._socket = sock
+        asyncio.get_running_loop().add_reader(sock.fileno(), self._receive)
+        self._pump = asyncio.create_task(self._run_pump())
+
+    async def publish(self, session_id: str, activity: dict[str, Any]) -> None:
+        if self._socket is not None:
+            data = json.dumps({"session_id": session_id, "activity": activity}).encode()
+            for peer in self._peers():
+                self._send(peer, session_id, data)
+        if self._deliver is not None:
+            await self._deliver(session_id, activity)
+
+    async def close(self) -> None:
+        sock, self._socket = self._socket, None
+        if sock is not None:
+            asyncio.get_running_loop().remove_reader(sock.fileno())
+            sock.close()
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+        if self._pump is not None:
+            self._pump.cancel()
+            self._pump = None
+
+    def _peers(self) -> list[str]:
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return [
+            path
+            for path in (os.path.join(self.directory, name) for name in names)
+            if path.endswith(".sock") and path != self.path
+        ]
+
+    def _send(self, peer: str, session_id: str, data: bytes) -> None:
+        lost = self._lost.pop(peer, set())
+        if lost and not self._send_datagram(peer, _lost_notice(lost)):
+            self.dropped += 1
+            self._lost[peer] = lost | {session_id}
+            return
+        if self._send_datagram(peer, data):
+            return
+        self.dropped += 1
+        if not self._send_datagram(peer, _lost_notice({session_id})):
+            self._lost[peer] = {session_id}
+
+    def _send_datagram(self, peer: str, data: bytes) -> bool:
+        """False if the datagram was dropped; a peer that is gone counts as
+        sent, since it has no sockets left to tell."""
+        try:
+            self._socket.sendto(data, peer)
+        except (ConnectionRefusedError, FileNotFoundError):
+            # Nobody bound: a worker that exited without cleaning up.
+            self._lost.pop(peer, None)
+            try:
+                os.unlink(peer)
+            except OSError:
+                pass
+        except OSError as exc:
+            logger.warning("Dropped broadcast for peer %s: %s", peer, exc)
+            return False
+        return True
+
+    def _receive(self) -> None:
+        while self._socket is not None:
+            try:
+                data = self._socket.recv(1 << 20)
+            except (BlockingIOError, InterruptedError):
+                return
+            try:
+                message = json.loads(data)
+                if "lost" in message:
+                    for session_id in message["lost"]:
+                        self._inbox.put_nowait((session_id, None))
+                else:
+                    self._inbox.put_nowait((message["session_id"], message["activity"]))
+            except (ValueError, KeyError, TypeError):
+                logger.warning("Ignoring malformed broadcast datagram")
+
+    async def _run_pump(self) -> None:
+        # One consumer keeps deliveries in arrival order.
+        while True:
+            session_id, activity = await self._inbox.get()
+            try:
+                await self._deliver(session_id, activity)
+            except Exception:
+                logger.exception("Failed to deliver broadcast for session %s", session_id)
+
+
+def _lost_notice(session_ids: set[str]) -> bytes:
+    return json.dumps({"lost": sorted(session_ids)}).encode()
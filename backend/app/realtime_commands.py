@@ -0,0 +1,127 @@
+"""Audience writes sent over the session socket instead of HTTP.
+
+A phone already holds ``/ws/sessions/{session_id}`` open, so votes and
+questions can ride on it instead of paying for a separate request each:
+
+    {"type": "vote", "id": "c1", "poll_id": "...", "option_id": "...", "client_id": "..."}
+    {"type": "unvote", "id": "c2", "poll_id": "...", "option_id": "...", "client_id": "..."}
+    {"type": "question_vote", "id": "c3", "question_id": "...", "client_id": "..."}
+    {"type": "question_submit", "id": "c4", "text": "...", "prompt_id": null, "client_id": "..."}
+
+Each runs the same handler as its HTTP route (same store call, activity and
+broadcast) and is answered with an ``ack`` activity carrying the client's
+``id``: ``{"id", "ok": true, "result": <poll or question>}`` or
+``{"id", "ok": false, "status": <http status>, "detail": "..."}``. A store
+failure (Supabase or the WAL being unavailable) fails that one command the
+same way, with the status its HTTP route would answer; the socket stays
+open.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+import logging
+from typing import Any, Awaitable, Callable
+
+from fastapi import HTTPException
+from pydantic import BaseModel, ValidationError
+
+from .api import polls as polls_api
+from .api import questions as questions_api
+from .models import PollVote, QuestionCreate, QuestionVote, SessionActivity
+from .realtime import ConnectionManager
+from .store import InMemoryStore
+from .store_supabase import SupabaseError
+from .store_wal import WalUnavailableError
+
+logger = logging.getLogger("prezo.realtime")
+
+Handler = Callable[[str, dict[str, Any], InMemoryStore, ConnectionManager], Awaitable[BaseModel]]
+
+
+async def _vote(session_id, command, store, manager) -> BaseModel:
+    return await polls_api.vote_poll(
+        session_id,
+        _required(command, "poll_id"),
+        PollVote.model_validate(command),
+        store=store,
+        manager=manager,
+    )
+
+
+async def _unvote(session_id, command, store, manager) -> BaseModel:
+    return await polls_api.remove_poll_vote(
+        session_id,
+        _required(command, "poll_id"),
+        PollVote.model_validate(command),
+        store=store,
+        manager=manager,
+    )
+
+
+async def _question_vote(session_id, command, store, manager) -> BaseModel:
+    return await questions_api.vote_question(
+        session_id,
+        _required(command, "question_id"),
+        QuestionVote.model_validate(command),
+        store=store,
+        manager=manager,
+    )
+
+
+async def _question_submit(session_id, command, store, manager) -> BaseModel:
+    return await questions_api.create_question(
+        session_id,
+        QuestionCreate.model_validate(command),
+        store=store,
+        manager=manager,
+    )
+
+
+HANDLERS: dict[str, Handler] = {
+    "vote": _vote,
+    "unvote": _unvote,
+    "question_vote": _question_vote,
+    "question_submit": _question_submit,
+}
+
+
+def _required(command: dict[str, Any], field: str) -> str:
+    value = command.get(field)
+    if not isinstance(value, str) or not value:
+        raise HTTPException(status_code=422, detail=f"{field} is required")
+    return value
+
+
+async def handle_command(
+    session_id: str,
+    command: dict[str, Any],
+    store: InMemoryStore,
+    manager: ConnectionManager,
+) -> dict[str, Any] | None:
+    """Run an audience write command; returns the ack activity to send
+    back, or None if ``command`` isn't one."""
+    handler = HANDLERS.get(command.get("type"))
+    if handler is None:
+        return None
+    payload: dict[str, Any] = {"id": command.get("id")}
+    try:
+        result = await handler(session_id, command, store, manager)
+    except HTTPException as exc:
+        payload.update(ok=False, status=exc.status_code, detail=exc.detail)
+    except ValidationError as exc:
+        errors = exc.errors(
+            include_url=False, include_context=False, include_input=False
+        )
+        payload.update(ok=False, status=422, detail=errors)
+    except SupabaseError as exc:
+        logger.warning("Socket %s command failed: %s", command.get("type"), exc.detail)
+        status = exc.status_code if 400 <= exc.status_code <= 599 else 502
+        payload.update(ok=False, status=status, detail=exc.detail)
+    except WalUnavailableError as exc:
+        payload.update(ok=False, status=503, detail=str(exc))
+    else:
+        payload.update(ok=True, result=result.model_dump(mode="json"))
+    return SessionActivity(
+        type="ack", payload=payload, ts=datetime.now(timezone.utc)
+    ).model_dump(mode="json")
@@ -0,0 +1,210 @@
+"""Wire formats spoken on ``/ws/sessions/{session_id}``.
+
+json (default): every activity goes out as ``SessionActivity`` JSON plus
+``seq`` (see below); clients that ignore ``seq`` see the original protocol.
+
+Every broadcast frame carries ``seq``, a per-session counter that increases
+by one per broadcast; snapshot and resume frames also carry the process
+``epoch`` a client hands back (with its last seq) when it reconnects.
+
+delta (opt-in with ``?protocol=delta``): vote updates shrink to the counts
+that change:
+
+    {"type": "poll_votes", "seq": 42, "poll_id": "...", "votes": {"<option_id>": 17, ...}}
+    {"type": "question_votes", "seq": 43, "question_id": "...", "votes": 5}
+
+binary (opt-in with ``?protocol=binary``): the same two updates go out as
+binary frames, big-endian, led by a format version byte:
+
+    poll counts:     u8 version=1, u8 kind=1, u32 seq, u8 n, n bytes poll id,
+                     u8 m, m x u32 vote counts in option order (position)
+    question votes:  u8 version=1, u8 kind=2, u32 seq, u8 n, n bytes
+                     question id, u32 votes
+
+All other activities (and the initial ``session_snapshot``) keep the json
+shape plus ``seq``, as text frames. Poll deltas list every option's count rather than only
+the ones that moved, so they are idempotent and never depend on which
+earlier frame the client happened to see. A client that sees ``seq`` jump
+by more than one sends ``{"type": "resync"}`` and gets a fresh snapshot
+stamped with the seq it is current as of.
+
+A socket can narrow what it receives to topics (``?topics=`` on connect or
+``{"type": "subscribe", "topics": [...]}``); see ``activity_topics``. The
+default is every activity. Filtered sockets see gaps in ``seq`` by design.
+
+Frames are serialized once (``dump_frame``) and the same text is sent to
+every socket that speaks the protocol; orjson is used when installed.
+"""
+
+from __future__ import annotations
+
+from enum import Enum
+import json
+import struct
+from typing import Any, Iterable
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class WireProtocol(str, Enum):
+    json = "json"
+    delta = "delta"
+    binary = "binary"
+
+
+BINARY_FORMAT_VERSION = 1
+BINARY_POLL_VOTES = 1
+BINARY_QUESTION_VOTES = 2
+
+
+def parse_protocol(value: str | None) -> WireProtocol | None:
+    """Protocol requested by a connecting client; None if unsupported."""
+    if not value:
+        return WireProtocol.json
+    try:
+        return WireProtocol(value.strip().lower())
+    except ValueError:
+        return None
+
+
+def encode_frame(protocol: WireProtocol, activity: dict[str, Any], seq: int) -> Any:
+    """Frame for one protocol from an already-dumped ``SessionActivity``."""
+    if protocol == WireProtocol.delta:
+        return _delta_frame(activity, seq)
+    if protocol == WireProtocol.binary:
+        return _binary_frame(activity, seq)
+    return {**activity, "seq": seq}
+
+
+TOPIC_KINDS = ("polls", "qna", "prompts", "session")
+TOPIC_PREFIXES = ("poll:", "prompt:")
+
+
+def parse_topics(values: Iterable[Any] | None) -> frozenset[str] | None:
+    """Subscription from a client; None (every activity) for no topics or
+    ``"*"``. Unknown topics are dropped."""
+    if values is None:
+        return None
+    topics = set()
+    for value in values:
+        if not isinstance(value, str):
+            continue
+        topic = value.strip()
+        if topic == "*":
+            return None
+        if topic in TOPIC_KINDS or (
+            topic.startswith(TOPIC_PREFIXES) and topic.partition(":")[2]
+        ):
+            topics.add(topic)
+    return frozenset(topics) or None
+
+
+def activity_topics(activity: dict[str, Any]) -> frozenset[str]:
+    """Topics a dumped ``SessionActivity`` belongs to: ``polls`` and
+    ``poll:<id>`` for poll activity, ``prompts`` and ``prompt:<id>`` for
+    discussion prompts and their questions, ``qna`` for audience Q&A and
+    ``session`` for everything else."""
+    kind = str(activity.get("type") or "")
+    payload = activity.get("payload") or {}
+    if kind.startswith("poll_"):
+        poll = payload.get("poll")
+        poll_id = poll.get("id") if isinstance(poll, dict) else payload.get("poll_id")
+        return _scoped("polls", "poll", poll_id)
+    if kind.startswith(("qna_prompt_", "prompt_")):
+        prompt = payload.get("prompt")
+        prompt_id = prompt.get("id") if isinstance(prompt, dict) else payload.get("prompt_id")
+        return _scoped("prompts", "prompt", prompt_id)
+    if kind.startswith("question_"):
+        question = payload.get("question")
+        prompt_id = question.get("prompt_id") if isinstance(question, dict) else None
+        if prompt_id:
+            return _scoped("prompts", "prompt", prompt_id)
+        return frozenset({"qna"})
+    if kind.startswith("qna_") or kind == "audience_questions_deleted":
+        return frozenset({"qna"})
+    return frozenset({"session"})
+
+
+def _scoped(kind: str, prefix: str, item_id: Any) -> frozenset[str]:
+    if item_id:
+        return frozenset({kind, f"{prefix}:{item_id}"})
+    return frozenset({kind})
+
+
+def dump_frame(frame: Any) -> str | bytes:
+    """Text for a frame (binary frames are already bytes), produced once
+    and shared by every recipient."""
+    if isinstance(frame, bytes):
+        return frame
+    if orjson is not None:
+        return orjson.dumps(frame).decode()
+    return json.dumps(frame, separators=(",", ":"))
+
+
+def _delta_frame(activity: dict[str, Any], seq: int) -> dict[str, Any]:
+    kind = activity.get("type")
+    payload = activity.get("payload") or {}
+    if kind == "poll_vote_updated":
+        poll = payload.get("poll")
+        if isinstance(poll, dict) and poll.get("id"):
+            return {
+                "type": "poll_votes",
+                "seq": seq,
+                "poll_id": poll["id"],
+                "votes": {
+                    option["id"]: option["votes"]
+                    for option in poll.get("options") or []
+                },
+            }
+    elif kind == "question_vote_updated":
+        question = payload.get("question")
+        if isinstance(question, dict) and question.get("id"):
+            return {
+                "type": "question_votes",
+                "seq": seq,
+                "question_id": question["id"],
+                "votes": question.get("votes", 0),
+            }
+    return {**activity, "seq": seq}
+
+
+def _binary_frame(activity: dict[str, Any], seq: int) -> bytes | dict[str, Any]:
+    delta = _delta_frame(activity, seq)
+    kind = delta.get("type")
+    if kind == "poll_votes":
+        poll_id = delta["poll_id"].encode()
+        counts = list(delta["votes"].values())
+        if len(poll_id) <= 255 and len(counts) <= 255:
+            return struct.pack(
+                f">BBIB{len(poll_id)}sB{len(counts)}I",
+                BINARY_FORMAT_VERSION,
+                BINARY_POLL_VOTES,
+                seq & 0xFFFFFFFF,
+                len(poll_id),
+                poll_id,
+                len(counts),
+                *(_uint32(count) for count in counts),
+            )
+    elif kind == "question_votes":
+        question_id = delta["question_id"].encode()
+        if len(question_id) <= 255:
+            return struct.pack(
+                f">BBIB{len(question_id)}sI",
+                BINARY_FORMAT_VERSION,
+                BINARY_QUESTION_VOTES,
+                seq & 0xFFFFFFFF,
+                len(question_id),
+                question_id,
+                _uint32(delta["votes"]),
+            )
+    else:
+        return delta
+    # Ids or option lists too long for the layout: send the full activity.
+    return {**activity, "seq": seq}
+
+
+def _uint32(value: Any) -> int:
+    return max(0, min(int(value or 0), 0xFFFFFFFF))
@@ -0,0 +1,67 @@
+"""Cold storage for sessions ``InMemoryStore`` has evicted from memory.
+
+Each archived session is one gzip file of the same ``[kind, *fields]``
+records the write-ahead log uses (prompts, questions, polls and their vote
+histories), written atomically and read back in full when the session is
+next touched. The session header, hosts and stats counters never leave
+memory, so listings and dashboards don't load archives.
+"""
+
+from __future__ import annotations
+
+import gzip
+import os
+from typing import Any, Iterable
+
+from .store_wal import Record, decode_record, encode_record
+
+SUFFIX = ".jsonl.gz"
+
+
+class SessionArchive:
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def save(self, session_id: str, records: Iterable[Record]) -> int:
+        """Write (or replace) a session's archive; returns its size."""
+        path = self._path(session_id)
+        with open(path + ".tmp", "wb") as raw:
+            # Level 1: archiving runs under the session lock, and these
+            # records compress well even at the fastest setting.
+            with gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=1, mtime=0) as file:
+                for record in records:
+                    file.write(encode_record(record))
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(path + ".tmp", path)
+        return os.path.getsize(path)
+
+    def load(self, session_id: str) -> list[Record]:
+        with gzip.open(self._path(session_id), "rb") as file:
+            return [decode_record(line) for line in file]
+
+    def delete(self, session_id: str) -> None:
+        try:
+            os.unlink(self._path(session_id))
+        except FileNotFoundError:
+            pass
+
+    def session_ids(self) -> list[str]:
+        return [
+            name[: -len(SUFFIX)]
+            for name in os.listdir(self.directory)
+            if name.endswith(SUFFIX)
+        ]
+
+    def stats(self) -> dict[str, Any]:
+        files = 0
+        size = 0
+        for name in os.listdir(self.directory):
+            if name.endswith(SUFFIX):
+                files += 1
+                size += os.path.getsize(os.path.join(self.directory, name))
+        return {"files": files, "bytes": size}
+
+    def _path(self, session_id: str) -> str:
+        return os.path.join(self.directory, session_id + SUFFIX)
@@ -1,17 +1,23 @@
 from __future__ import annotations
 
 import asyncio
+import logging
+import os
 import secrets
+import time
 import uuid
-from collections import defaultdict
+from collections import Counter, defaultdict
 from copy import deepcopy
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import Any
+from typing import Any, Callable, Iterable, Iterator
 
 from .artifact_package import build_saved_artifact_snapshot_signature
 from .brand_facts import build_brand_facts
 from .prompt_brand_guidelines import build_prompt_brand_guidelines
+from .session_archive import SessionArchive
+from .store_wal import Record, WriteAheadLog
+from .vote_history import ClientIds, PollHistories, QuestionVoters
 from .models import (
     BrandProfile,
     HostDashboardStats,
@@ -30,13 +36,15 @@ from .models import (
     SavedArtifact,
     SavedTheme,
     Session,
-    SessionActivity,
     SessionSnapshot,
     SessionStatus,
     WidgetPresetLibrary,
 )
 
 
+logger = logging.getLogger("prezo.store")
+
+
 class NotFoundError(Exception):
     pass
 
@@ -51,6 +59,27 @@ class PermissionDeniedError(Exception):
 
 ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
 
+# Approximate heap cost per object (tracemalloc, CPython 3.13), used to
+# estimate session footprints against the memory watermarks.
+SESSION_BYTES = 2200
+QUESTION_BYTES = 1400
+QUESTION_VOTE_BYTES = 6
+POLL_BYTES = 1600
+POLL_OPTION_BYTES = 600
+POLL_VOTE_BYTES = 4
+PROMPT_BYTES = 1000
+# An interned client id plus its participant counter entry.
+CLIENT_BYTES = 160
+
+
+def process_rss_bytes() -> int | None:
+    """Resident set size of this process, where /proc provides it."""
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
 
 def utc_now() -> datetime:
     return datetime.now(timezone.utc)
@@ -98,7 +127,8 @@ class PollData:
     id: str
     session_id: str
     question: str
-    options: list[PollOptionData]
+    # Keyed by option id, in display order.
+    options: dict[str, PollOptionData]
     status: PollStatus
     allow_multiple: bool
     created_at: datetime
@@ -115,6 +145,24 @@ class QnaPromptData:
     mode: ControlMode = ControlMode.auto
 
 
+@dataclass(slots=True)
+class SessionCounters:
+    """Running totals behind the stats endpoints, kept in step by every
+    write so reads don't rescan the session.
+
+    ``participants`` counts, per client id, the questions and polls that
+    client currently has votes on; its length is the unique participants.
+    An archived session keeps just the client ids, in
+    ``archived_participants``, so the host dashboard can still de-duplicate
+    them against other sessions'.
+    """
+
+    participants: Counter[str] = field(default_factory=Counter)
+    open_polls: int = 0
+    open_prompts: int = 0
+    archived_participants: frozenset[str] = frozenset()
+
+
 @dataclass(slots=True)
 class BrandProfileData:
     id: str
@@ -175,21 +223,133 @@ class SavedArtifactVersionData:
     created_at: datetime
 
 
+class _Section:
+    """``async with`` around a store operation: takes ``lock``. A session
+    operation first marks the session used and, if it was archived, loads
+    it back. A write then bumps the snapshot version on the way out and,
+    with a WAL, waits for the records it appended to reach disk, after the
+    lock is released so other writers can join the same group commit.
+    Failed and no-op writes bump too; that only costs a rebuild. (A plain
+    class: this wraps every vote, and a generator-based context manager is
+    measurably slower.)"""
+
+    __slots__ = ("store", "lock", "session_id", "write", "position")
+
+    def __init__(
+        self,
+        store: InMemoryStore,
+        lock: asyncio.Lock,
+        session_id: str | None = None,
+        write: bool = True,
+    ) -> None:
+        self.store = store
+        self.lock = lock
+        self.session_id = session_id
+        self.write = write
+        self.position = 0
+
+    async def __aenter__(self) -> None:
+        store = self.store
+        if self.write and store._wal is not None:
+            store._wal.check()
+        await self.lock.acquire()
+        if self.session_id is not None and self.session_id in store._last_access:
+            store._last_access[self.session_id] = store._clock()
+            if self.session_id in store._archived:
+                try:
+                    await store._restore_session(self.session_id)
+                except BaseException:
+                    self.lock.release()
+                    raise
+        if self.write and store._wal is not None:
+            self.position = store._wal.records
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        store = self.store
+        if self.write and self.session_id in store._snapshot_versions:
+            store._snapshot_versions[self.session_id] += 1
+        self.lock.release()
+        wal = store._wal
+        if self.write and wal is not None and wal.records != self.position:
+            await wal.wait()
+
+
 class InMemoryStore:
-    def __init__(self) -> None:
+    """Process-local store.
+
+    Locking is split so that one busy session can't hold up the others:
+
+    * ``_lock`` guards the session registry (ids, join codes, host sets)
+      and is taken by create/delete/join and by lookups across sessions.
+    * Each session has its own lock, taken by everything scoped to that
+      session (votes, questions, polls, prompts, snapshots, activity).
+    * Each user has their own lock for library data (themes, presets,
+      brand profiles, saved artifacts).
+
+    Every write to a session bumps its snapshot version; ``snapshot`` keeps
+    the last viewer-neutral snapshot per session and rebuilds it only when
+    the version has moved.
+
+    When both are needed the registry lock is taken first. Cross-session
+    reads (``list_sessions``, ``host_dashboard_stats``,
+    ``batch_session_stats``) hold only the registry lock and never wait on
+    session locks, so a vote storm can't stall the dashboard. That is safe
+    because write sections never await between reading and mutating
+    state; keep it that way when adding awaits under a session lock.
+
+    With ``wal_dir`` set, every write also appends state records to a
+    write-ahead log (see ``store_wal``) and returns once they are on disk;
+    construction replays the log, so sessions and libraries survive a
+    restart. Snapshot versions are not persisted.
+
+    With ``archive_dir`` set, ``evict_sessions`` (run periodically once
+    ``start`` is called) moves ended sessions, sessions idle for
+    ``idle_session_seconds`` and, above the high memory watermark, the least
+    recently used ones down to the low watermark, into a ``SessionArchive``.
+    An archived session keeps its header, hosts, lock and stats counters in
+    memory; its questions, polls, prompts and vote histories load back the
+    first time a write or ``snapshot`` touches it.
+    """
+
+    def __init__(
+        self,
+        *,
+        wal_dir: str | None = None,
+        wal_group_commit_seconds: float = 0.002,
+        wal_fsync: bool = True,
+        wal_snapshot_every: int = 100_000,
+        archive_dir: str | None = None,
+        idle_session_seconds: float = 3600.0,
+        memory_high_watermark_bytes: int = 0,
+        memory_low_watermark_bytes: int = 0,
+        eviction_interval_seconds: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
         self._lock = asyncio.Lock()
+        self._session_locks: dict[str, asyncio.Lock] = {}
+        self._user_locks: dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
         self._sessions: dict[str, SessionData] = {}
         self._sessions_by_code: dict[str, str] = {}
         self._questions: dict[str, QuestionData] = {}
-        self._questions_by_session: dict[str, list[str]] = defaultdict(list)
+        # The *_by_session and *_by_prompt indexes are ordered id sets: dict
+        # keys keep creation order and delete in O(1).
+        self._questions_by_session: dict[str, dict[str, None]] = defaultdict(dict)
+        # Keyed by (session_id, prompt_id); prompt_id None is audience Q&A.
+        self._questions_by_prompt: dict[
+            tuple[str, str | None], dict[str, None]
+        ] = defaultdict(dict)
         self._polls: dict[str, PollData] = {}
-        self._polls_by_session: dict[str, list[str]] = defaultdict(list)
+        self._polls_by_session: dict[str, dict[str, None]] = defaultdict(dict)
         self._prompts: dict[str, QnaPromptData] = {}
-        self._prompts_by_session: dict[str, list[str]] = defaultdict(list)
-        self._question_votes: dict[str, set[str]] = defaultdict(set)
-        self._poll_votes: dict[str, dict[str, set[str]]] = defaultdict(dict)
-        self._activities_by_session: dict[str, list[SessionActivity]] = defaultdict(list)
+        self._prompts_by_session: dict[str, dict[str, None]] = defaultdict(dict)
+        # Vote histories hold client ids interned per session in _clients.
+        self._clients: dict[str, ClientIds] = defaultdict(ClientIds)
+        self._question_votes: dict[str, QuestionVoters] = defaultdict(QuestionVoters)
+        self._poll_votes: dict[str, PollHistories] = {}
         self._session_hosts: dict[str, set[str]] = defaultdict(set)
+        self._session_counters: dict[str, SessionCounters] = {}
+        self._snapshot_versions: dict[str, int] = {}
+        self._snapshots: dict[str, tuple[int, SessionSnapshot]] = {}
         self._saved_themes_by_user: dict[str, dict[str, SavedThemeData]] = defaultdict(dict)
         self._saved_artifacts_by_user: dict[str, dict[str, SavedArtifactData]] = defaultdict(dict)
         self._brand_profiles_by_user: dict[str, dict[str, BrandProfileData]] = defaultdict(dict)
@@ -198,9 +358,55 @@ class InMemoryStore:
         ] = defaultdict(lambda: defaultdict(list))
         self._widget_presets_by_user: dict[str, dict[str, Any]] = {}
         self._widget_presets_updated_at: dict[str, datetime] = {}
+        self._clock = clock
+        self._last_access: dict[str, float] = {}
+        self._archived: set[str] = set()
+        self._archive = SessionArchive(archive_dir) if archive_dir else None
+        # 0 disables idle eviction / the watermarks respectively.
+        self.idle_session_seconds = idle_session_seconds
+        self.memory_high_watermark_bytes = memory_high_watermark_bytes
+        self.memory_low_watermark_bytes = memory_low_watermark_bytes or memory_high_watermark_bytes
+        self.eviction_interval_seconds = eviction_interval_seconds
+        self._evictions = 0
+        self._restores = 0
+        self._evictor: asyncio.Task[None] | None = None
+        self._wal: WriteAheadLog | None = None
+        if wal_dir:
+            wal = WriteAheadLog(
+                wal_dir,
+                group_commit_seconds=wal_group_commit_seconds,
+                fsync=wal_fsync,
+                snapshot_every=wal_snapshot_every,
+            )
+            self._recover(wal.replay())
+            wal.capture = self._wal_state
+            self._wal = wal
+        if self._archive is not None:
+            # Archives the WAL doesn't mark as archived are stale copies of
+            # sessions that were restored, deleted or never made it to disk.
+            for session_id in self._archive.session_ids():
+                if session_id not in self._archived:
+                    self._archive.delete(session_id)
+
+    async def start(self) -> None:
+        """Start periodic session eviction, if an archive is configured."""
+        if self._archive is not None and self.eviction_interval_seconds > 0:
+            self._evictor = asyncio.create_task(self._evict_periodically())
+
+    async def close(self) -> None:
+        """Stop eviction, then flush and close the WAL, if any."""
+        if self._evictor is not None:
+            self._evictor.cancel()
+            try:
+                await self._evictor
+            except asyncio.CancelledError:
+                pass
+            self._evictor = None
+        if self._wal is not None:
+            await self._wal.close()
 
     async def create_session(self, title: str | None, user_id: str) -> Session:
-        async with self._lock:
+        async with self._write(self._lock):
             session_id = uuid.uuid4().hex
             code = generate_code()
             while code in self._sessions_by_code:
@@ -217,13 +423,19 @@ class InMemoryStore:
                 allow_host_join=False,
                 created_at=utc_now(),
             )
+            self._session_locks[session_id] = asyncio.Lock()
+            self._session_counters[session_id] = SessionCounters()
+            self._snapshot_versions[session_id] = 1
+            self._last_access[session_id] = self._clock()
             self._sessions[session_id] = data
             self._sessions_by_code[code] = session_id
             self._session_hosts[session_id].add(user_id)
+            self._log_row("session", data)
+            self._log("hosts", session_id, [user_id])
             return self._to_session(data, user_id)
 
     async def get_session(self, session_id: str, user_id: str | None = None) -> Session:
-        async with self._lock:
+        async with self._session_lock(session_id):
             if user_id:
                 self._ensure_host_access(session_id, user_id)
             data = self._sessions.get(session_id)
@@ -282,30 +494,10 @@ class InMemoryStore:
                     active_sessions += 1
                 if session.qna_open:
                     active_activities += 1
-                for pid in self._polls_by_session.get(session_id, []):
-                    poll = self._polls.get(pid)
-                    if poll and poll.status == PollStatus.open:
-                        active_activities += 1
-                for prid in self._prompts_by_session.get(session_id, []):
-                    pr = self._prompts.get(prid)
-                    if pr and pr.status == QnaPromptStatus.open:
-                        active_activities += 1
-
-            for qid, clients in self._question_votes.items():
-                q = self._questions.get(qid)
-                if not q or q.session_id not in session_ids:
-                    continue
-                for c in clients:
-                    if c:
-                        unique_clients.add(c)
-
-            for poll_id, client_map in self._poll_votes.items():
-                poll = self._polls.get(poll_id)
-                if not poll or poll.session_id not in session_ids:
-                    continue
-                for c in client_map:
-                    if c:
-                        unique_clients.add(c)
+                counters = self._session_counters[session_id]
+                active_activities += counters.open_polls + counters.open_prompts
+                unique_clients.update(counters.participants)
+                unique_clients.update(counters.archived_participants)
 
             return HostDashboardStats(
                 active_sessions=active_sessions,
@@ -316,7 +508,7 @@ class InMemoryStore:
     async def session_session_stats(
         self, session_id: str, user_id: str
     ) -> SessionSessionStats:
-        async with self._lock:
+        async with self._session_lock(session_id):
             self._ensure_host_access(session_id, user_id)
             return self._compute_session_stats(session_id)
 
@@ -334,62 +526,38 @@ class InMemoryStore:
             return results
 
     def _compute_session_stats(self, session_id: str) -> SessionSessionStats:
-        unique_clients: set[str] = set()
-        for qid in self._questions_by_session.get(session_id, []):
-            for cid in self._question_votes.get(qid, set()):
-                if cid:
-                    unique_clients.add(cid)
-        for pid in self._polls_by_session.get(session_id, []):
-            for cid in self._poll_votes.get(pid, {}):
-                if cid:
-                    unique_clients.add(cid)
-
+        counters = self._session_counters[session_id]
         # Count active activities: open polls + open prompts + qna_open
-        active_activities = 0
-        for pid in self._polls_by_session.get(session_id, []):
-            poll = self._polls.get(pid)
-            if poll and poll.status == PollStatus.open:
-                active_activities += 1
-        for prid in self._prompts_by_session.get(session_id, []):
-            pr = self._prompts.get(prid)
-            if pr and pr.status == QnaPromptStatus.open:
-                active_activities += 1
-        session_data = self._sessions.get(session_id)
-        if session_data and session_data.qna_open:
+        active_activities = counters.open_polls + counters.open_prompts
+        if self._sessions[session_id].qna_open:
             active_activities += 1
-
         return SessionSessionStats(
-            unique_participants=len(unique_clients),
+            unique_participants=len(counters.participants)
+            + len(counters.archived_participants),
             active_activities=active_activities,
         )
 
     async def delete_session(self, session_id: str, user_id: str) -> Session:
-        async with self._lock:
+        async with self._write(self._lock), self._session_lock(session_id):
             self._ensure_owner_access(session_id, user_id)
             session = self._sessions.pop(session_id)
             self._sessions_by_code.pop(session.code, None)
-
-            question_ids = self._questions_by_session.pop(session_id, [])
-            for question_id in question_ids:
-                self._questions.pop(question_id, None)
-                self._question_votes.pop(question_id, None)
-
-            poll_ids = self._polls_by_session.pop(session_id, [])
-            for poll_id in poll_ids:
-                self._polls.pop(poll_id, None)
-                self._poll_votes.pop(poll_id, None)
-
-            prompt_ids = self._prompts_by_session.pop(session_id, [])
-            for prompt_id in prompt_ids:
-                self._prompts.pop(prompt_id, None)
-
-            self._activities_by_session.pop(session_id, None)
+            # Waiters on the old lock wake to a missing session and 404.
+            self._session_locks.pop(session_id, None)
+            self._drop_session_data(session_id)
+            if session_id in self._archived:
+                self._archived.discard(session_id)
+                self._archive.delete(session_id)
             self._session_hosts.pop(session_id, None)
+            self._session_counters.pop(session_id, None)
+            self._snapshot_versions.pop(session_id, None)
+            self._last_access.pop(session_id, None)
+            self._log("del_session", session_id)
 
             return self._to_session(session, user_id)
 
     async def join_session_as_host(self, code: str, user_id: str) -> Session:
-        async with self._lock:
+        async with self._write(self._lock):
             session_id = self._sessions_by_code.get(code.upper())
             if not session_id:
                 raise NotFoundError("session not found")
@@ -402,21 +570,23 @@ class InMemoryStore:
                     "The original host has not allowed additional hosts for this session."
                 )
             hosts.add(user_id)
+            self._log("hosts", session_id, sorted(hosts))
             return self._to_session(session, user_id)
 
     async def set_host_join_access(
         self, session_id: str, allow_host_join: bool, user_id: str
     ) -> Session:
-        async with self._lock:
+        async with self._session_write(session_id):
             self._ensure_owner_access(session_id, user_id)
             session = self._sessions[session_id]
             session.allow_host_join = allow_host_join
+            self._log_row("session", session)
             return self._to_session(session, user_id)
 
     async def create_question(
         self, session_id: str, text: str, prompt_id: str | None = None
     ) -> Question:
-        async with self._lock:
+        async with self._session_write(session_id):
             session = self._sessions.get(session_id)
             if not session:
                 raise NotFoundError("session not found")
@@ -442,25 +612,29 @@ class InMemoryStore:
                 created_at=utc_now(),
             )
             self._questions[question_id] = data
-            self._questions_by_session[session_id].append(question_id)
+            self._questions_by_session[session_id][question_id] = None
+            self._questions_by_prompt[(session_id, prompt_id)][question_id] = None
+            self._log_row("question", data)
             return self._to_question(data)
 
     async def set_qna_status(
         self, session_id: str, is_open: bool, user_id: str
     ) -> Session:
-        async with self._lock:
+        async with self._session_write(session_id):
             self._ensure_host_access(session_id, user_id)
             session = self._sessions[session_id]
             session.qna_open = is_open
+            self._log_row("session", session)
             return self._to_session(session, user_id)
 
     async def set_qna_control_mode(
         self, session_id: str, mode: ControlMode, user_id: str
     ) -> Session:
-        async with self._lock:
+        async with self._session_write(session_id):
             self._ensure_host_access(session_id, user_id)
             session = self._sessions[session_id]
             session.qna_control_mode = mode
+            self._log_row("session", session)
             return self._to_session(session, user_id)
 
     async def set_qna_config(
@@ -470,17 +644,18 @@ class InMemoryStore:
         prompt: str | None,
         user_id: str,
     ) -> Session:
-        async with self._lock:
+        async with self._session_write(session_id):
             self._ensure_host_access(session_id, user_id)
             session = self._sessions[session_id]
             session.qna_mode = mode
             session.qna_prompt = prompt
+            self._log_row("session", session)
             return self._to_session(session, user_id)
 
     async def create_qna_prompt(
         self, session_id: str, prompt: str, user_id: str
     ) -> QnaPrompt:
-        async with self._lock:
+        async with self._session_write(session_id):
             self._ensure_host_access(session_id, user_id)
             prompt_id = uuid.uuid4().hex
             data = QnaPromptData(
@@ -491,7 +666,8 @@ class InMemoryStore:
                 created_at=utc_now(),
             )
             self._prompts[prompt_id] = data
-            self._prompts_by_session[session_id].append(prompt_id)
+            self._prompts_by_session[session_id][prompt_id] = None
+            self._log_row("prompt", data)
             return self._to_prompt(data)
 
     async def set_qna_prompt_status(
@@ -501,10 +677,15 @@ class InMemoryStore:
         status: QnaPromptStatus,
         user_id: str,
     ) -> QnaPrompt:
-        async with self._lock:
+        async with self._session_write(session_id):
             self._ensure_host_access(session_id, user_id)
             prompt = self._get_prompt(session_id, prompt_id)
+            if prompt.status != status:
+                self._session_counters[session_id].open_prompts += (
+                    1 if status == QnaPromptStatus.open else -1
+                )
             prompt.status = status
+            self._log_row("prompt", prompt)
             return self._to_prompt(prompt)
 
     async def set_qna_prompt_mode(
@@ -514,19 +695,21 @@ class InMemoryStore:
         mode: ControlMode,
         user_id: str,
     ) -> QnaPrompt:
-        async with self._lock:
+        async with self._session_write(session_id):
             self._ensure_host_access(session_id, user_id)
             prompt = self._get_prompt(session_id, prompt_id)
             prompt.mode = mode
+            self._log_row("prompt", prompt)
             return self._to_prompt(prompt)
 
     async def update_qna_prompt(
         self, session_id: str, prompt_id: str, user_id: str, *, prompt: str
     ) -> QnaPrompt:
-        async with self._lock:
+        async with self._session_write(session_id):
             self._ensure_host_access(session_id, user_id)
             data = self._get_prompt(session_id, prompt_id)
             data.prompt = prompt
+            self._log_row("prompt", data)
             return self._to_prompt(data)
 
     async def set_question_status(
@@ -536,22 +719,26 @@ class InMemoryStore:
         status: QuestionStatus,
         user_id: str,
     ) -> Question:
-        async with self._lock:
+        async with self._session_write(session_id):
             self._ensure_host_access(session_id, user_id)
             question = self._get_question(session_id, question_id)
             question.status = status
+            self._log_row("question", question)
             return self._to_question(question)
 
     async def vote_question(
         self, session_id: str, question_id: str, client_id: str | None
     ) -> Question:
-        async with self._lock:
+        async with self._session_write(session_id):
             question = self._get_question(session_id, question_id)
             if client_id:
-                if client_id in self._question_votes[question_id]:
+                clients = self._clients[session_id]
+                client = clients.intern(client_id)
+                if not self._question_votes[question_id].add(client):
                     return self._to_question(question)
-                self._question_votes[question_id].add(client_id)
+                self._session_counters[session_id].participants[clients.names[client]] += 1
             question.votes += 1
+            self._log("qvote", question_id, question.votes, client_id)
             return self._to_question(question)
 
     async def create_poll(
@@ -562,13 +749,16 @@ class InMemoryStore:
         allow_multiple: bool,
         user_id: str,
     ) -> Poll:
-        async with self._lock:
+        async with self._session_write(session_id):
             self._ensure_host_access(session_id, user_id)
             poll_id = uuid.uuid4().hex
-            option_objs = [
-                PollOptionData(id=uuid.uuid4().hex, label=label, votes=0)
-                for label in options
-            ]
+            option_objs = {
+                option.id: option
+                for option in (
+                    PollOptionData(id=uuid.uuid4().hex, label=label, votes=0)
+                    for label in options
+                )
+            }
             data = PollData(
                 id=poll_id,
                 session_id=session_id,
@@ -579,25 +769,33 @@ class InMemoryStore:
                 created_at=utc_now(),
             )
             self._polls[poll_id] = data
-            self._polls_by_session[session_id].append(poll_id)
+            self._polls_by_session[session_id][poll_id] = None
+            self._poll_votes[poll_id] = PollHistories(len(option_objs))
+            self._log_poll(data)
             return self._to_poll(data)
 
     async def set_poll_status(
         self, session_id: str, poll_id: str, status: PollStatus, user_id: str
     ) -> Poll:
-        async with self._lock:
+        async with self._session_write(session_id):
             self._ensure_host_access(session_id, user_id)
             poll = self._get_poll(session_id, poll_id)
+            if poll.status != status:
+                self._session_counters[session_id].open_polls += (
+                    1 if status == PollStatus.open else -1
+                )
             poll.status = status
+            self._log_poll(poll)
             return self._to_poll(poll)
 
     async def set_poll_mode(
         self, session_id: str, poll_id: str, mode: PollMode, user_id: str
     ) -> Poll:
-        async with self._lock:
+        async with self._session_write(session_id):
             self._ensure_host_access(session_id, user_id)
             poll = self._get_poll(session_id, poll_id)
             poll.mode = mode
+            self._log_poll(poll)
             return self._to_poll(poll)
 
     async def update_poll(
@@ -612,12 +810,10 @@ class InMemoryStore:
         remove_option_ids: list[str] | None = None,
         allow_multiple: bool | None = None,
     ) -> Poll:
-        async with self._lock:
+        async with self._session_write(session_id):
             self._ensure_host_access(session_id, user_id)
             poll = self._get_poll(session_id, poll_id)
-            removed = {
-                oid for oid in (remove_option_ids or []) if any(o.id == oid for o in poll.options)
-            }
+            removed = {oid for oid in (remove_option_ids or []) if oid in poll.options}
             remaining = len(poll.options) - len(removed) + len(add_options or [])
             if remaining < 2:
                 raise ConflictError("a poll needs at least two options")
@@ -627,7 +823,7 @@ class InMemoryStore:
             if add_options and remaining > 5:
                 raise ConflictError("a poll can have at most five options")
             if allow_multiple is not None and allow_multiple != poll.allow_multiple:
-                if any(opt.votes for opt in poll.options):
+                if any(opt.votes for opt in poll.options.values()):
                     raise ConflictError(
                         "cannot change choice mode after votes are cast"
                     )
@@ -635,21 +831,24 @@ class InMemoryStore:
             if question is not None:
                 poll.question = question
             if option_labels:
-                for opt in poll.options:
+                for opt in poll.options.values():
                     if opt.id in option_labels:
                         opt.label = option_labels[opt.id]
+            histories = self._poll_votes[poll_id]
             if removed:
-                poll.options = [o for o in poll.options if o.id not in removed]
-                histories = self._poll_votes.get(poll_id)
-                if histories:
-                    for client_id in list(histories):
-                        histories[client_id] -= removed
-                        if not histories[client_id]:
-                            del histories[client_id]
+                positions = [i for i, oid in enumerate(poll.options) if oid in removed]
+                for option_id in removed:
+                    del poll.options[option_id]
+                self._drop_participants(session_id, histories.remove_options(positions))
             for label in add_options or []:
-                poll.options.append(
-                    PollOptionData(id=uuid.uuid4().hex, label=label, votes=0)
-                )
+                option = PollOptionData(id=uuid.uuid4().hex, label=label, votes=0)
+                poll.options[option.id] = option
+            histories.ensure_options(len(poll.options))
+            self._log_poll(poll)
+            if removed:
+                # After the poll row: replay maps option ids to bits by the
+                # poll's current options.
+                self._log_poll_votes(poll_id)
             return self._to_poll(poll)
 
     async def vote_poll(
@@ -659,28 +858,32 @@ class InMemoryStore:
         option_id: str,
         client_id: str | None,
     ) -> Poll:
-        async with self._lock:
+        async with self._session_write(session_id):
             poll = self._get_poll(session_id, poll_id)
             if poll.status != PollStatus.open:
                 raise ConflictError("poll is closed")
-            option = next((opt for opt in poll.options if opt.id == option_id), None)
+            option = poll.options.get(option_id)
             if not option:
                 raise NotFoundError("option not found")
             if client_id:
-                history = self._poll_votes[poll_id].get(client_id, set())
-                if option_id in history:
+                clients = self._clients[session_id]
+                client = clients.intern(client_id)
+                histories = self._poll_votes[poll_id]
+                mask = histories.get(client)
+                bit = 1 << list(poll.options).index(option_id)
+                if mask & bit:
                     return self._to_poll(poll)
-                if not poll.allow_multiple and history:
-                    for previous_id in list(history):
-                        previous_option = next(
-                            (opt for opt in poll.options if opt.id == previous_id), None
-                        )
-                        if previous_option:
-                            previous_option.votes = max(0, previous_option.votes - 1)
-                    history = set()
-                history.add(option_id)
-                self._poll_votes[poll_id][client_id] = history
+                if not mask:
+                    participants = self._session_counters[session_id].participants
+                    participants[clients.names[client]] += 1
+                elif not poll.allow_multiple:
+                    for position, previous in enumerate(poll.options.values()):
+                        if mask >> position & 1:
+                            previous.votes = max(0, previous.votes - 1)
+                    mask = 0
+                histories.set(client, mask | bit)
             option.votes += 1
+            self._log_vote(poll, client_id)
             return self._to_poll(poll)
 
     async def remove_poll_vote(
@@ -695,25 +898,27 @@ class InMemoryStore:
         Mirrors vote_poll's shape so the audience toggle path can swap
         between add and remove using the same Poll response contract.
         """
-        async with self._lock:
+        async with self._session_write(session_id):
             poll = self._get_poll(session_id, poll_id)
             if poll.status != PollStatus.open:
                 raise ConflictError("poll is closed")
-            option = next((opt for opt in poll.options if opt.id == option_id), None)
+            option = poll.options.get(option_id)
             if not option:
                 raise NotFoundError("option not found")
             if not client_id:
                 return self._to_poll(poll)
-            history = self._poll_votes[poll_id].get(client_id, set())
-            if option_id not in history:
+            client = self._clients[session_id].get(client_id)
+            histories = self._poll_votes[poll_id]
+            mask = histories.get(client) if client is not None else 0
+            bit = 1 << list(poll.options).index(option_id)
+            if not mask & bit:
                 # No-op — caller's local state was out of sync with server.
                 return self._to_poll(poll)
-            history.discard(option_id)
-            if history:
-                self._poll_votes[poll_id][client_id] = history
-            else:
-                self._poll_votes[poll_id].pop(client_id, None)
+            histories.set(client, mask & ~bit)
+            if mask == bit:
+                self._drop_participants(session_id, [client])
             option.votes = max(0, option.votes - 1)
+            self._log_vote(poll, client_id)
             return self._to_poll(poll)
 
     async def reset_poll_votes(
@@ -724,112 +929,108 @@ class InMemoryStore:
         Clearing history matters: it lets previous voters vote again after the
         reset instead of being treated as already-voted.
         """
-        async with self._lock:
+        async with self._session_write(session_id):
             self._ensure_host_access(session_id, user_id)
             poll = self._get_poll(session_id, poll_id)
-            for option in poll.options:
+            for option in poll.options.values():
                 option.votes = 0
-            self._poll_votes.pop(poll_id, None)
+            histories = self._poll_votes[poll_id]
+            self._drop_participants(session_id, [client for client, _ in histories.items()])
+            self._poll_votes[poll_id] = PollHistories(len(poll.options))
+            self._log_poll(poll)
+            self._log("poll_votes", poll_id, {})
             return self._to_poll(poll)
 
     async def delete_poll(self, session_id: str, poll_id: str, user_id: str) -> None:
-        async with self._lock:
+        async with self._session_write(session_id):
             self._ensure_host_access(session_id, user_id)
-            self._get_poll(session_id, poll_id)
+            poll = self._get_poll(session_id, poll_id)
+            if poll.status == PollStatus.open:
+                self._session_counters[session_id].open_polls -= 1
             del self._polls[poll_id]
-            self._polls_by_session[session_id] = [
-                p for p in self._polls_by_session[session_id] if p != poll_id
-            ]
-            self._poll_votes.pop(poll_id, None)
+            self._polls_by_session[session_id].pop(poll_id, None)
+            histories = self._poll_votes.pop(poll_id)
+            self._drop_participants(session_id, [client for client, _ in histories.items()])
+            self._log("del_poll", poll_id)
 
     async def delete_qna_prompt(self, session_id: str, prompt_id: str, user_id: str) -> None:
-        async with self._lock:
+        async with self._session_write(session_id):
             self._ensure_host_access(session_id, user_id)
-            self._get_prompt(session_id, prompt_id)
-            qids_to_remove = [
-                qid
-                for qid, q in self._questions.items()
-                if q.session_id == session_id and q.prompt_id == prompt_id
-            ]
-            for qid in qids_to_remove:
-                self._questions.pop(qid, None)
-                self._question_votes.pop(qid, None)
-                try:
-                    self._questions_by_session[session_id].remove(qid)
-                except ValueError:
-                    pass
+            prompt = self._get_prompt(session_id, prompt_id)
+            self._remove_questions(session_id, prompt_id)
+            if prompt.status == QnaPromptStatus.open:
+                self._session_counters[session_id].open_prompts -= 1
             del self._prompts[prompt_id]
-            self._prompts_by_session[session_id] = [
-                p for p in self._prompts_by_session[session_id] if p != prompt_id
-            ]
+            self._prompts_by_session[session_id].pop(prompt_id, None)
+            self._log("del_prompt", prompt_id)
 
     async def delete_audience_questions(self, session_id: str, user_id: str) -> list[str]:
         """Remove session questions that are not tied to an open-discussion prompt (audience Q&A)."""
-        async with self._lock:
+        async with self._session_write(session_id):
             self._ensure_host_access(session_id, user_id)
-            qids_to_remove = [
-                qid
-                for qid in self._questions_by_session.get(session_id, [])
-                if self._questions[qid].prompt_id is None
-            ]
-            for qid in qids_to_remove:
-                self._questions.pop(qid, None)
-                self._question_votes.pop(qid, None)
-                try:
-                    self._questions_by_session[session_id].remove(qid)
-                except ValueError:
-                    pass
-            return qids_to_remove
+            return self._remove_questions(session_id, None)
 
     async def delete_prompt_questions(
         self, session_id: str, prompt_id: str, user_id: str
     ) -> list[str]:
         """Remove every question posted to an open-discussion prompt, keeping the prompt itself."""
-        async with self._lock:
+        async with self._session_write(session_id):
             self._ensure_host_access(session_id, user_id)
             self._get_prompt(session_id, prompt_id)
-            qids_to_remove = [
-                qid
-                for qid, q in self._questions.items()
-                if q.session_id == session_id and q.prompt_id == prompt_id
-            ]
-            for qid in qids_to_remove:
-                self._questions.pop(qid, None)
-                self._question_votes.pop(qid, None)
-                try:
-                    self._questions_by_session[session_id].remove(qid)
-                except ValueError:
-                    pass
-            return qids_to_remove
+            return self._remove_questions(session_id, prompt_id)
 
     async def snapshot(
         self, session_id: str, viewer_user_id: str | None = None
     ) -> SessionSnapshot:
-        async with self._lock:
+        """The session's current snapshot. Unchanged sessions are served from
+        cache, so treat the result (and its lists) as read-only."""
+        async with self._session_read(session_id):
             session = self._sessions.get(session_id)
             if not session:
                 raise NotFoundError("session not found")
-            questions = [
+            version = self._snapshot_versions[session_id]
+            cached = self._snapshots.get(session_id)
+            if cached is None or cached[0] != version:
+                cached = (version, self._build_snapshot(session))
+                self._snapshots[session_id] = cached
+            snapshot = cached[1]
+            if viewer_user_id is None:
+                return snapshot
+            # is_original_host is the only per-viewer field.
+            return snapshot.model_copy(
+                update={
+                    "session": snapshot.session.model_copy(
+                        update={"is_original_host": session.user_id == viewer_user_id}
+                    )
+                }
+            )
+
+    async def snapshot_version(self, session_id: str) -> int:
+        """Bumped by every write to the session; equal versions mean equal
+        snapshots."""
+        async with self._session_lock(session_id):
+            self._ensure_session(session_id)
+            return self._snapshot_versions[session_id]
+
+    def _build_snapshot(self, session: SessionData) -> SessionSnapshot:
+        return SessionSnapshot(
+            session=self._to_session(session),
+            questions=[
                 self._to_question(self._questions[qid])
-                for qid in self._questions_by_session[session_id]
-            ]
-            polls = [
+                for qid in self._questions_by_session[session.id]
+            ],
+            polls=[
                 self._to_poll(self._polls[pid])
-                for pid in self._polls_by_session[session_id]
-            ]
-            prompts = [
+                for pid in self._polls_by_session[session.id]
+            ],
+            prompts=[
                 self._to_prompt(self._prompts[pid])
-                for pid in self._prompts_by_session[session_id]
-            ]
-            return SessionSnapshot(
-                session=self._to_session(session, viewer_user_id),
-                questions=questions,
-                polls=polls,
-                prompts=prompts,
-            )
+                for pid in self._prompts_by_session[session.id]
+            ],
+        )
 
     async def list_saved_themes(self, user_id: str) -> list[SavedTheme]:
-        async with self._lock:
+        async with self._user_lock(user_id):
             themes = list(self._saved_themes_by_user.get(user_id, {}).values())
             themes.sort(key=lambda item: item.updated_at, reverse=True)
             return [self._to_saved_theme(item) for item in themes]
@@ -837,12 +1038,13 @@ class InMemoryStore:
     async def save_saved_theme(
         self, user_id: str, name: str, theme: dict[str, Any]
     ) -> SavedTheme:
-        async with self._lock:
+        async with self._write(self._user_lock(user_id)):
             existing = self._saved_themes_by_user[user_id].get(name)
             now = utc_now()
             if existing:
                 existing.theme = clone_dict(theme)
                 existing.updated_at = now
+                self._log_row("theme", existing)
                 return self._to_saved_theme(existing)
             created = SavedThemeData(
                 id=uuid.uuid4().hex,
@@ -853,17 +1055,19 @@ class InMemoryStore:
                 updated_at=now,
             )
             self._saved_themes_by_user[user_id][name] = created
+            self._log_row("theme", created)
             return self._to_saved_theme(created)
 
     async def delete_saved_theme(self, user_id: str, name: str) -> SavedTheme:
-        async with self._lock:
+        async with self._write(self._user_lock(user_id)):
             existing = self._saved_themes_by_user.get(user_id, {}).pop(name, None)
             if not existing:
                 raise NotFoundError("saved theme not found")
+            self._log("del_theme", user_id, name)
             return self._to_saved_theme(existing)
 
     async def get_widget_preset_library(self, user_id: str) -> WidgetPresetLibrary | None:
-        async with self._lock:
+        async with self._user_lock(user_id):
             data = self._widget_presets_by_user.get(user_id)
             if data is None:
                 return None
@@ -875,20 +1079,21 @@ class InMemoryStore:
     async def save_widget_preset_library(
         self, user_id: str, data: dict[str, Any]
     ) -> WidgetPresetLibrary:
-        async with self._lock:
+        async with self._write(self._user_lock(user_id)):
             now = utc_now()
             self._widget_presets_by_user[user_id] = clone_dict(data)
             self._widget_presets_updated_at[user_id] = now
+            self._log("presets", user_id, data, now)
             return WidgetPresetLibrary(data=clone_dict(data), updated_at=now)
 
     async def list_brand_profiles(self, user_id: str) -> list[BrandProfile]:
-        async with self._lock:
+        async with self._user_lock(user_id):
             profiles = list(self._brand_profiles_by_user.get(user_id, {}).values())
             profiles.sort(key=lambda item: item.updated_at, reverse=True)
             return [self._to_brand_profile(item) for item in profiles]
 
     async def get_brand_profile(self, user_id: str, name: str) -> BrandProfile | None:
-        async with self._lock:
+        async with self._user_lock(user_id):
             item = self._brand_profiles_by_user.get(user_id, {}).get(name)
             return self._to_brand_profile(item) if item else None
 
@@ -901,7 +1106,7 @@ class InMemoryStore:
         guidelines: dict[str, Any],
         raw_summary: str,
     ) -> BrandProfile:
-        async with self._lock:
+        async with self._write(self._user_lock(user_id)):
             prompt_bg = build_prompt_brand_guidelines(guidelines)
             facts = build_brand_facts(guidelines)
             existing = self._brand_profiles_by_user[user_id].get(name)
@@ -914,6 +1119,7 @@ class InMemoryStore:
                 existing.prompt_brand_guidelines = prompt_bg
                 existing.brand_facts = clone_dict(facts)
                 existing.updated_at = now
+                self._log_row("brand", existing)
                 return self._to_brand_profile(existing)
             created = BrandProfileData(
                 id=uuid.uuid4().hex,
@@ -929,17 +1135,19 @@ class InMemoryStore:
                 updated_at=now,
             )
             self._brand_profiles_by_user[user_id][name] = created
+            self._log_row("brand", created)
             return self._to_brand_profile(created)
 
     async def delete_brand_profile(self, user_id: str, name: str) -> BrandProfile:
-        async with self._lock:
+        async with self._write(self._user_lock(user_id)):
             existing = self._brand_profiles_by_user.get(user_id, {}).pop(name, None)
             if not existing:
                 raise NotFoundError("brand profile not found")
+            self._log("del_brand", user_id, name)
             return self._to_brand_profile(existing)
 
     async def list_saved_artifacts(self, user_id: str) -> list[SavedArtifact]:
-        async with self._lock:
+        async with self._user_lock(user_id):
             artifacts = list(self._saved_artifacts_by_user.get(user_id, {}).values())
             artifacts.sort(key=lambda item: item.updated_at, reverse=True)
             return [self._to_saved_artifact(item) for item in artifacts]
@@ -956,7 +1164,7 @@ class InMemoryStore:
         style_overrides: dict[str, Any] | None = None,
         kind: str | None = None,
     ) -> SavedArtifact:
-        async with self._lock:
+        async with self._write(self._user_lock(user_id)):
             existing = self._saved_artifacts_by_user[user_id].get(name)
             now = utc_now()
             next_signature = build_saved_artifact_snapshot_signature(
@@ -986,6 +1194,7 @@ class InMemoryStore:
                 existing.theme_snapshot = clone_optional_dict(theme_snapshot)
                 existing.style_overrides = clone_optional_dict(style_overrides)
                 existing.updated_at = now
+                self._log_row("artifact", existing)
                 if changed:
                     self._append_saved_artifact_version(existing, source="save")
                 return self._to_saved_artifact(existing)
@@ -1004,21 +1213,23 @@ class InMemoryStore:
                 updated_at=now,
             )
             self._saved_artifacts_by_user[user_id][name] = created
+            self._log_row("artifact", created)
             self._append_saved_artifact_version(created, source="create")
             return self._to_saved_artifact(created)
 
     async def delete_saved_artifact(self, user_id: str, name: str) -> SavedArtifact:
-        async with self._lock:
+        async with self._write(self._user_lock(user_id)):
             existing = self._saved_artifacts_by_user.get(user_id, {}).pop(name, None)
             if not existing:
                 raise NotFoundError("saved artifact not found")
             self._saved_artifact_versions_by_user.get(user_id, {}).pop(name, None)
+            self._log("del_artifact", user_id, name)
             return self._to_saved_artifact(existing)
 
     async def list_saved_artifact_versions(
         self, user_id: str, name: str, limit: int = 30
     ) -> list[SavedArtifactVersion]:
-        async with self._lock:
+        async with self._user_lock(user_id):
             artifact = self._saved_artifacts_by_user.get(user_id, {}).get(name)
             if not artifact:
                 raise NotFoundError("saved artifact not found")
@@ -1031,7 +1242,7 @@ class InMemoryStore:
     async def restore_saved_artifact_version(
         self, user_id: str, name: str, version: int
     ) -> SavedArtifact:
-        async with self._lock:
+        async with self._write(self._user_lock(user_id)):
             artifact = self._saved_artifacts_by_user.get(user_id, {}).get(name)
             if not artifact:
                 raise NotFoundError("saved artifact not found")
@@ -1064,13 +1275,480 @@ class InMemoryStore:
             artifact.theme_snapshot = clone_optional_dict(target.theme_snapshot)
             artifact.style_overrides = clone_optional_dict(target.style_overrides)
             artifact.updated_at = utc_now()
+            self._log_row("artifact", artifact)
             if existing_signature != target_signature:
                 self._append_saved_artifact_version(artifact, source="restore")
             return self._to_saved_artifact(artifact)
 
-    async def record_activity(self, session_id: str, activity: SessionActivity) -> None:
-        async with self._lock:
-            self._activities_by_session[session_id].append(activity)
+    def memory_stats(self) -> dict[str, Any]:
+        stats: dict[str, Any] = {}
+        if self._wal is not None:
+            stats["wal"] = self._wal.stats()
+        stats["sessions"] = {
+            "live": len(self._sessions) - len(self._archived),
+            "archived": len(self._archived),
+            "approx_bytes": self._approx_bytes(),
+            "high_watermark_bytes": self.memory_high_watermark_bytes,
+            "low_watermark_bytes": self.memory_low_watermark_bytes,
+            "evicted": self._evictions,
+            "restored": self._restores,
+        }
+        if self._archive is not None:
+            stats["archive"] = self._archive.stats()
+        stats["rss_bytes"] = process_rss_bytes()
+        return stats
+
+    async def evict_sessions(self) -> int:
+        """Archive ended sessions, idle sessions and, while the estimated
+        footprint is above the high watermark, the least recently used
+        sessions until it is under the low one. Returns how many went."""
+        if self._archive is None:
+            return 0
+        now = self._clock()
+        live = [sid for sid in self._sessions if sid not in self._archived]
+        chosen = {
+            sid: None
+            for sid in live
+            if self._sessions[sid].status == SessionStatus.ended
+            or (
+                self.idle_session_seconds > 0
+                and now - self._last_access[sid] >= self.idle_session_seconds
+            )
+        }
+        if self.memory_high_watermark_bytes > 0:
+            sizes = {sid: self._session_bytes(sid) for sid in live}
+            usage = self._approx_bytes(sizes)
+            if usage > self.memory_high_watermark_bytes:
+                usage -= sum(sizes[sid] for sid in chosen)
+                for sid in sorted(live, key=self._last_access.__getitem__):
+                    if usage <= self.memory_low_watermark_bytes:
+                        break
+                    if sid not in chosen:
+                        chosen[sid] = None
+                        usage -= sizes[sid]
+        evicted = 0
+        for sid in chosen:
+            if await self._archive_session(sid):
+                evicted += 1
+        if evicted:
+            logger.info("Archived %d sessions; %d now archived", evicted, len(self._archived))
+        return evicted
+
+    def _session_write(self, session_id: str) -> _Section:
+        return _Section(self, self._session_lock(session_id), session_id)
+
+    def _session_read(self, session_id: str) -> _Section:
+        """For reads that need the session's questions, polls and prompts,
+        which an archived session has to load first."""
+        return _Section(self, self._session_lock(session_id), session_id, write=False)
+
+    def _write(self, lock: asyncio.Lock) -> _Section:
+        return _Section(self, lock)
+
+    async def _evict_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.eviction_interval_seconds)
+            try:
+                await self.evict_sessions()
+            except Exception:
+                logger.exception("Session eviction failed")
+
+    async def _archive_session(self, session_id: str) -> bool:
+        async with self._session_lock(session_id):
+            if session_id not in self._sessions or session_id in self._archived:
+                return False
+            records = list(self._session_records(session_id))
+            await asyncio.to_thread(self._archive.save, session_id, records)
+            # Nothing else touches the session's data without its lock, so
+            # the records are still current after the await.
+            counters = self._session_counters[session_id]
+            counters.archived_participants = frozenset(counters.participants)
+            counters.participants = Counter()
+            self._log(
+                "archived",
+                session_id,
+                sorted(counters.archived_participants),
+                counters.open_polls,
+                counters.open_prompts,
+            )
+            self._drop_session_data(session_id)
+            self._archived.add(session_id)
+            self._evictions += 1
+            return True
+
+    async def _restore_session(self, session_id: str) -> None:
+        """Load an archived session back; the caller holds its lock."""
+        records = await asyncio.to_thread(self._archive.load, session_id)
+        for record in records:
+            self._apply_record(record)
+        counters = self._session_counters[session_id]
+        for kind, *fields in records:
+            if kind == "question":
+                self._index_question(self._questions[fields[0][0]])
+            elif kind == "poll":
+                self._polls_by_session[session_id][fields[0][0]] = None
+            elif kind == "prompt":
+                self._prompts_by_session[session_id][fields[0][0]] = None
+            elif kind == "qvoters":
+                counters.participants.update(fields[1])
+            elif kind == "poll_votes":
+                counters.participants.update(fields[1].keys())
+        counters.archived_participants = frozenset()
+        self._archived.discard(session_id)
+        self._restores += 1
+        if self._wal is not None:
+            # The WAL no longer carries this data (compaction skips archived
+            # sessions), so log it again; the archive file stays until the
+            # session is archived again or deleted.
+            for record in records:
+                self._wal.append(record)
+            self._wal.append(["restored", session_id])
+
+    def _drop_session_data(self, session_id: str) -> None:
+        """Forget a session's questions, polls, prompts, vote histories and
+        cached snapshot."""
+        question_ids = self._questions_by_session.pop(session_id, {})
+        for question_id in question_ids:
+            question = self._questions.pop(question_id)
+            self._questions_by_prompt.pop((session_id, question.prompt_id), None)
+            self._question_votes.pop(question_id, None)
+
+        poll_ids = self._polls_by_session.pop(session_id, {})
+        for poll_id in poll_ids:
+            self._polls.pop(poll_id, None)
+            self._poll_votes.pop(poll_id, None)
+
+        prompt_ids = self._prompts_by_session.pop(session_id, {})
+        for prompt_id in prompt_ids:
+            self._prompts.pop(prompt_id, None)
+
+        self._clients.pop(session_id, None)
+        self._snapshots.pop(session_id, None)
+
+    def _session_bytes(self, session_id: str) -> int:
+        """Rough heap cost of what archiving the session would free."""
+        size = PROMPT_BYTES * len(self._prompts_by_session.get(session_id, ()))
+        size += CLIENT_BYTES * len(self._clients.get(session_id, ()))
+        for question_id in self._questions_by_session.get(session_id, ()):
+            voters = self._question_votes.get(question_id)
+            size += QUESTION_BYTES + QUESTION_VOTE_BYTES * (len(voters) if voters else 0)
+        for poll_id in self._polls_by_session.get(session_id, ()):
+            histories = self._poll_votes.get(poll_id)
+            size += (
+                POLL_BYTES
+                + POLL_OPTION_BYTES * len(self._polls[poll_id].options)
+                + POLL_VOTE_BYTES * (len(histories) if histories else 0)
+            )
+        return size
+
+    def _approx_bytes(self, sizes: dict[str, int] | None = None) -> int:
+        """Estimated store footprint: session headers plus live session data
+        (library data is not counted)."""
+        if sizes is None:
+            sizes = {
+                sid: self._session_bytes(sid)
+                for sid in self._sessions
+                if sid not in self._archived
+            }
+        return SESSION_BYTES * len(self._sessions) + sum(sizes.values())
+
+    def _session_lock(self, session_id: str) -> asyncio.Lock:
+        # Unknown ids share the registry lock rather than minting a lock per
+        # bogus id; the operation then fails with NotFoundError anyway.
+        return self._session_locks.get(session_id) or self._lock
+
+    def _user_lock(self, user_id: str) -> asyncio.Lock:
+        return self._user_locks[user_id]
+
+    def _remove_questions(self, session_id: str, prompt_id: str | None) -> list[str]:
+        """Drop every question posted to ``prompt_id`` (None: audience Q&A)."""
+        qids_to_remove = list(self._questions_by_prompt.pop((session_id, prompt_id), {}))
+        by_session = self._questions_by_session[session_id]
+        for qid in qids_to_remove:
+            del self._questions[qid]
+            del by_session[qid]
+            self._drop_participants(session_id, self._question_votes.pop(qid, ()))
+        if qids_to_remove:
+            self._log("del_questions", qids_to_remove)
+        return qids_to_remove
+
+    def _drop_participants(self, session_id: str, clients: Iterable[int]) -> None:
+        """One vote fewer for each of these interned clients."""
+        participants = self._session_counters[session_id].participants
+        names = self._clients[session_id].names
+        for client in clients:
+            client_id = names[client]
+            participants[client_id] -= 1
+            if participants[client_id] <= 0:
+                del participants[client_id]
+
+    def _log(self, *record: Any) -> None:
+        if self._wal is not None:
+            self._wal.append(list(record))
+
+    def _log_row(self, kind: str, data: Any) -> None:
+        if self._wal is not None:
+            self._wal.append([kind, to_row(data)])
+
+    def _log_poll(self, poll: PollData) -> None:
+        if self._wal is not None:
+            self._wal.append(["poll", poll_to_row(poll)])
+
+    def _log_poll_votes(self, poll_id: str) -> None:
+        if self._wal is not None:
+            self._wal.append(["poll_votes", poll_id, self._poll_history_map(poll_id)])
+
+    def _log_vote(self, poll: PollData, client_id: str | None) -> None:
+        # Only the counts and this client's history change on a vote, so log
+        # just those rather than the whole poll.
+        if self._wal is not None:
+            history = None
+            if client_id:
+                client = self._clients[poll.session_id].get(client_id)
+                if client is not None:
+                    mask = self._poll_votes[poll.id].get(client)
+                    history = _mask_options(poll, mask) if mask else None
+            self._wal.append([
+                "vote",
+                poll.id,
+                client_id,
+                history,
+                [[option.id, option.votes] for option in poll.options.values()],
+            ])
+
+    def _poll_history_map(self, poll_id: str) -> dict[str, list[str]]:
+        """A poll's vote histories as ``{client_id: [option_id, ...]}``."""
+        histories = self._poll_votes.get(poll_id)
+        if not histories:
+            return {}
+        poll = self._polls[poll_id]
+        names = self._clients[poll.session_id].names
+        return {names[client]: _mask_options(poll, mask) for client, mask in histories.items()}
+
+    def _wal_state(self) -> Iterator[Record]:
+        """The whole store as WAL records, for compaction snapshots."""
+        for session in self._sessions.values():
+            yield ["session", to_row(session)]
+            yield ["hosts", session.id, sorted(self._session_hosts.get(session.id, ()))]
+            if session.id in self._archived:
+                counters = self._session_counters[session.id]
+                yield [
+                    "archived",
+                    session.id,
+                    sorted(counters.archived_participants),
+                    counters.open_polls,
+                    counters.open_prompts,
+                ]
+            else:
+                yield from self._session_records(session.id)
+        for themes in self._saved_themes_by_user.values():
+            for theme in themes.values():
+                yield ["theme", to_row(theme)]
+        for user_id, data in self._widget_presets_by_user.items():
+            yield ["presets", user_id, data, self._widget_presets_updated_at[user_id]]
+        for profiles in self._brand_profiles_by_user.values():
+            for profile in profiles.values():
+                yield ["brand", to_row(profile)]
+        for artifacts in self._saved_artifacts_by_user.values():
+            for artifact in artifacts.values():
+                yield ["artifact", to_row(artifact)]
+        for by_name in self._saved_artifact_versions_by_user.values():
+            for versions in by_name.values():
+                for version in versions:
+                    yield ["artifact_version", to_row(version)]
+
+    def _session_records(self, session_id: str) -> Iterator[Record]:
+        """A session's prompts, questions and polls, with vote histories."""
+        for prompt_id in self._prompts_by_session.get(session_id, ()):
+            yield ["prompt", to_row(self._prompts[prompt_id])]
+        for question_id in self._questions_by_session.get(session_id, ()):
+            yield ["question", to_row(self._questions[question_id])]
+            voters = self._question_votes.get(question_id)
+            if voters:
+                names = self._clients[session_id].names
+                yield ["qvoters", question_id, [names[client] for client in voters]]
+        for poll_id in self._polls_by_session.get(session_id, ()):
+            yield ["poll", poll_to_row(self._polls[poll_id])]
+            if self._poll_votes.get(poll_id):
+                yield ["poll_votes", poll_id, self._poll_history_map(poll_id)]
+
+    def _recover(self, records: Iterable[Record]) -> None:
+        """Rebuild from WAL records: replay them onto the primary maps, then
+        derive locks, counters, indexes and join codes from the result."""
+        count = 0
+        for record in records:
+            self._apply_record(record)
+            count += 1
+
+        if self._archived and self._archive is None:
+            raise RuntimeError(
+                "the WAL has archived sessions but no session archive directory is set"
+            )
+        live = {sid for sid in self._sessions if sid not in self._archived}
+        for question_id, question in list(self._questions.items()):
+            if question.session_id not in live:
+                del self._questions[question_id]
+        for poll_id, poll in list(self._polls.items()):
+            if poll.session_id not in live:
+                del self._polls[poll_id]
+        for prompt_id, prompt in list(self._prompts.items()):
+            if prompt.session_id not in live:
+                del self._prompts[prompt_id]
+        for question_id in [qid for qid in self._question_votes if qid not in self._questions]:
+            del self._question_votes[question_id]
+        for poll_id in [pid for pid in self._poll_votes if pid not in self._polls]:
+            del self._poll_votes[poll_id]
+        for session_id in [sid for sid in self._clients if sid not in live]:
+            del self._clients[session_id]
+
+        now = self._clock()
+        for session_id, session in self._sessions.items():
+            self._session_locks[session_id] = asyncio.Lock()
+            if session_id in live:
+                # Archived sessions got theirs from the "archived" record.
+                self._session_counters[session_id] = SessionCounters()
+            self._snapshot_versions[session_id] = 1
+            self._last_access[session_id] = now
+            self._sessions_by_code[session.code] = session_id
+        for question_id, question in self._questions.items():
+            self._index_question(question)
+            voters = self._question_votes.get(question_id)
+            if voters:
+                names = self._clients[question.session_id].names
+                participants = self._session_counters[question.session_id].participants
+                participants.update(names[client] for client in voters)
+        for poll_id, poll in self._polls.items():
+            self._polls_by_session[poll.session_id][poll_id] = None
+            counters = self._session_counters[poll.session_id]
+            names = self._clients[poll.session_id].names
+            counters.participants.update(
+                names[client] for client, _ in self._poll_votes[poll_id].items()
+            )
+            if poll.status == PollStatus.open:
+                counters.open_polls += 1
+        for prompt_id, prompt in self._prompts.items():
+            self._prompts_by_session[prompt.session_id][prompt_id] = None
+            if prompt.status == QnaPromptStatus.open:
+                self._session_counters[prompt.session_id].open_prompts += 1
+        if count:
+            logger.info(
+                "Recovered %d sessions from %d WAL records", len(self._sessions), count
+            )
+
+    def _index_question(self, question: QuestionData) -> None:
+        self._questions_by_session[question.session_id][question.id] = None
+        self._questions_by_prompt[(question.session_id, question.prompt_id)][
+            question.id
+        ] = None
+
+    def _apply_record(self, record: Record) -> None:
+        kind, *fields = record
+        if kind == "session":
+            session = from_row(SessionData, fields[0])
+            self._sessions[session.id] = session
+        elif kind == "hosts":
+            self._session_hosts[fields[0]] = set(fields[1])
+        elif kind == "del_session":
+            self._sessions.pop(fields[0], None)
+            self._session_hosts.pop(fields[0], None)
+            self._session_counters.pop(fields[0], None)
+            self._archived.discard(fields[0])
+        elif kind == "archived":
+            session_id, participants, open_polls, open_prompts = fields
+            self._archived.add(session_id)
+            self._session_counters[session_id] = SessionCounters(
+                open_polls=open_polls,
+                open_prompts=open_prompts,
+                archived_participants=frozenset(participants),
+            )
+        elif kind == "restored":
+            self._archived.discard(fields[0])
+        elif kind == "question":
+            question = from_row(QuestionData, fields[0])
+            self._questions[question.id] = question
+        elif kind == "qvote":
+            question_id, votes, client_id = fields
+            question = self._questions.get(question_id)
+            if question:
+                question.votes = votes
+                if client_id:
+                    client = self._clients[question.session_id].intern(client_id)
+                    self._question_votes[question_id].add(client)
+        elif kind == "qvoters":
+            question_id, client_ids = fields
+            question = self._questions.get(question_id)
+            if question:
+                clients = self._clients[question.session_id]
+                self._question_votes[question_id] = QuestionVoters(
+                    clients.intern(client_id) for client_id in client_ids
+                )
+        elif kind == "del_questions":
+            for question_id in fields[0]:
+                self._questions.pop(question_id, None)
+                self._question_votes.pop(question_id, None)
+        elif kind == "prompt":
+            prompt = from_row(QnaPromptData, fields[0])
+            self._prompts[prompt.id] = prompt
+        elif kind == "del_prompt":
+            self._prompts.pop(fields[0], None)
+        elif kind == "poll":
+            poll = from_row(PollData, fields[0])
+            self._polls[poll.id] = poll
+            histories = self._poll_votes.get(poll.id)
+            if histories is None:
+                self._poll_votes[poll.id] = PollHistories(len(poll.options))
+            else:
+                histories.ensure_options(len(poll.options))
+        elif kind == "vote":
+            poll_id, client_id, history, counts = fields
+            poll = self._polls.get(poll_id)
+            if poll:
+                for option_id, votes in counts:
+                    option = poll.options.get(option_id)
+                    if option:
+                        option.votes = votes
+                if client_id:
+                    client = self._clients[poll.session_id].intern(client_id)
+                    self._poll_votes[poll_id].set(client, _options_mask(poll, history or ()))
+        elif kind == "poll_votes":
+            poll_id, history_map = fields
+            poll = self._polls.get(poll_id)
+            if poll:
+                clients = self._clients[poll.session_id]
+                histories = self._poll_votes[poll_id] = PollHistories(len(poll.options))
+                for client_id, history in history_map.items():
+                    histories.set(clients.intern(client_id), _options_mask(poll, history))
+        elif kind == "del_poll":
+            self._polls.pop(fields[0], None)
+            self._poll_votes.pop(fields[0], None)
+        elif kind == "theme":
+            theme = from_row(SavedThemeData, fields[0])
+            self._saved_themes_by_user[theme.user_id][theme.name] = theme
+        elif kind == "del_theme":
+            self._saved_themes_by_user[fields[0]].pop(fields[1], None)
+        elif kind == "presets":
+            user_id, data, updated_at = fields
+            self._widget_presets_by_user[user_id] = data
+            self._widget_presets_updated_at[user_id] = datetime.fromisoformat(updated_at)
+        elif kind == "brand":
+            profile = from_row(BrandProfileData, fields[0])
+            self._brand_profiles_by_user[profile.user_id][profile.name] = profile
+        elif kind == "del_brand":
+            self._brand_profiles_by_user[fields[0]].pop(fields[1], None)
+        elif kind == "artifact":
+            artifact = from_row(SavedArtifactData, fields[0])
+            self._saved_artifacts_by_user[artifact.user_id][artifact.name] = artifact
+        elif kind == "del_artifact":
+            self._saved_artifacts_by_user[fields[0]].pop(fields[1], None)
+            self._saved_artifact_versions_by_user[fields[0]].pop(fields[1], None)
+        elif kind == "artifact_version":
+            version = from_row(SavedArtifactVersionData, fields[0])
+            versions = self._saved_artifact_versions_by_user[version.user_id][version.name]
+            # A snapshot and the segment after it can both carry a version.
+            if not any(item.version == version.version for item in versions):
+                versions.append(version)
+        else:
+            logger.warning("Skipping unknown WAL record %r", kind)
 
     def _ensure_session(self, session_id: str) -> None:
         session = self._sessions.get(session_id)
@@ -1163,7 +1841,7 @@ class InMemoryStore:
             question=data.question,
             options=[
                 PollOption(id=opt.id, label=opt.label, votes=opt.votes)
-                for opt in data.options
+                for opt in data.options.values()
             ],
             status=data.status,
             allow_multiple=data.allow_multiple,
@@ -1214,23 +1892,23 @@ class InMemoryStore:
     ) -> None:
         versions = self._saved_artifact_versions_by_user[data.user_id][data.name]
         next_version = versions[-1].version + 1 if versions else 1
-        versions.append(
-            SavedArtifactVersionData(
-                id=uuid.uuid4().hex,
-                artifact_id=data.id,
-                user_id=data.user_id,
-                name=data.name,
-                version=next_version,
-                html=data.html,
-                artifact_package=clone_optional_dict(data.artifact_package),
-                last_prompt=data.last_prompt,
-                last_answers=clone_dict(data.last_answers),
-                theme_snapshot=clone_optional_dict(data.theme_snapshot),
-                style_overrides=clone_optional_dict(data.style_overrides),
-                source=source,
-                created_at=utc_now(),
-            )
+        version = SavedArtifactVersionData(
+            id=uuid.uuid4().hex,
+            artifact_id=data.id,
+            user_id=data.user_id,
+            name=data.name,
+            version=next_version,
+            html=data.html,
+            artifact_package=clone_optional_dict(data.artifact_package),
+            last_prompt=data.last_prompt,
+            last_answers=clone_dict(data.last_answers),
+            theme_snapshot=clone_optional_dict(data.theme_snapshot),
+            style_overrides=clone_optional_dict(data.style_overrides),
+            source=source,
+            created_at=utc_now(),
         )
+        versions.append(version)
+        self._log_row("artifact_version", version)
 
     def _to_saved_artifact_version(
         self, data: SavedArtifactVersionData
@@ -1251,6 +1929,77 @@ class InMemoryStore:
         )
 
 
+# WAL rows are a dataclass's field values in declaration order; these turn
+# the JSON-decoded strings back into datetimes and enums.
+_ROW_DECODERS: dict[type, dict[str, Callable[[Any], Any]]] = {
+    SessionData: {
+        "status": SessionStatus,
+        "qna_mode": QnaMode,
+        "created_at": datetime.fromisoformat,
+        "qna_control_mode": ControlMode,
+    },
+    QuestionData: {"status": QuestionStatus, "created_at": datetime.fromisoformat},
+    PollData: {
+        "options": lambda rows: {row[0]: PollOptionData(*row) for row in rows},
+        "status": PollStatus,
+        "created_at": datetime.fromisoformat,
+        "mode": PollMode,
+    },
+    QnaPromptData: {
+        "status": QnaPromptStatus,
+        "created_at": datetime.fromisoformat,
+        "mode": ControlMode,
+    },
+    BrandProfileData: {
+        "created_at": datetime.fromisoformat,
+        "updated_at": datetime.fromisoformat,
+    },
+    SavedThemeData: {
+        "created_at": datetime.fromisoformat,
+        "updated_at": datetime.fromisoformat,
+    },
+    SavedArtifactData: {
+        "created_at": datetime.fromisoformat,
+        "updated_at": datetime.fromisoformat,
+    },
+    SavedArtifactVersionData: {"created_at": datetime.fromisoformat},
+}
+_POLL_OPTIONS_INDEX = PollData.__slots__.index("options")
+
+
+def to_row(data: Any) -> list[Any]:
+    return [getattr(data, name) for name in data.__slots__]
+
+
+def poll_to_row(poll: PollData) -> list[Any]:
+    row = to_row(poll)
+    row[_POLL_OPTIONS_INDEX] = [to_row(option) for option in poll.options.values()]
+    return row
+
+
+def from_row(cls: type, row: list[Any]) -> Any:
+    data = cls(*row)
+    for name, decode in _ROW_DECODERS[cls].items():
+        setattr(data, name, decode(getattr(data, name)))
+    return data
+
+
+def _options_mask(poll: PollData, option_ids: Iterable[str]) -> int:
+    """Bitmask of ``option_ids`` by their position in the poll."""
+    positions = {option_id: index for index, option_id in enumerate(poll.options)}
+    mask = 0
+    for option_id in option_ids:
+        index = positions.get(option_id)
+        if index is not None:
+            mask |= 1 << index
+    return mask
+
+
+def _mask_options(poll: PollData, mask: int) -> list[str]:
+    """Option ids whose bits are set in ``mask``, in poll order."""
+    return [option_id for index, option_id in enumerate(poll.options) if mask >> index & 1]
+
+
 def clone_dict(value: dict[str, Any]) -> dict[str, Any]:
     return deepcopy(value)
 
@@ -0,0 +1,1682 @@
+"""SQLite-backed store: durable sessions on one node without a remote database.
+
+Same async interface and semantics as ``InMemoryStore``; the tables mirror
+the Supabase schema. One connection in WAL mode is owned by a single worker
+thread, so every operation runs off the event loop and operations run one at
+a time; a vote does in one savepoint what ``vote_poll_atomic`` does in
+Postgres. Whatever queued up while the worker was busy runs as one
+transaction with one commit (group commit, as the WAL does for
+InMemoryStore), and nobody sees a result before that commit. Statements are
+module constants, so sqlite3's per-connection statement cache prepares each
+one once.
+
+Every write to a session bumps ``sessions.version`` in the same transaction;
+``snapshot`` keeps the last snapshot per session and rebuilds it only when
+that version has moved, so other processes writing the same file are seen.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from typing import Any, Callable, TypeVar
+import uuid
+
+from .artifact_package import build_saved_artifact_snapshot_signature
+from .brand_facts import build_brand_facts
+from .prompt_brand_guidelines import build_prompt_brand_guidelines
+from .models import (
+    BrandProfile,
+    ControlMode,
+    HostDashboardStats,
+    Poll,
+    PollMode,
+    PollOption,
+    PollStatus,
+    QnaMode,
+    QnaPrompt,
+    QnaPromptStatus,
+    Question,
+    QuestionStatus,
+    SavedArtifact,
+    SavedArtifactVersion,
+    SavedTheme,
+    Session,
+    SessionSessionStats,
+    SessionSnapshot,
+    SessionStatus,
+    WidgetPresetLibrary,
+)
+from .store import (
+    ConflictError,
+    NotFoundError,
+    PermissionDeniedError,
+    generate_code,
+    process_rss_bytes,
+    utc_now,
+)
+
+logger = logging.getLogger("prezo.sqlite")
+
+T = TypeVar("T")
+
+SCHEMA_VERSION = 1
+SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+SCHEMA = """
+create table if not exists sessions (
+  id text primary key,
+  user_id text not null,
+  code text not null unique,
+  title text,
+  status text not null,
+  qna_open integer not null default 0,
+  qna_mode text not null,
+  qna_prompt text,
+  qna_control_mode text not null,
+  allow_host_join integer not null default 0,
+  created_at text not null,
+  version integer not null default 1
+);
+
+create table if not exists session_hosts (
+  session_id text not null references sessions(id) on delete cascade,
+  user_id text not null,
+  primary key (session_id, user_id)
+) without rowid;
+create index if not exists session_hosts_user on session_hosts(user_id, session_id);
+
+create table if not exists qna_prompts (
+  id text primary key,
+  session_id text not null references sessions(id) on delete cascade,
+  prompt text not null,
+  status text not null,
+  mode text not null,
+  created_at text not null
+);
+create index if not exists qna_prompts_session on qna_prompts(session_id);
+
+create table if not exists questions (
+  id text primary key,
+  session_id text not null references sessions(id) on delete cascade,
+  prompt_id text,
+  text text not null,
+  status text not null,
+  votes integer not null default 0,
+  created_at text not null
+);
+create index if not exists questions_session on questions(session_id, prompt_id);
+
+create table if not exists question_votes (
+  question_id text not null references questions(id) on delete cascade,
+  client_id text not null,
+  primary key (question_id, client_id)
+) without rowid;
+
+create table if not exists polls (
+  id text primary key,
+  session_id text not null references sessions(id) on delete cascade,
+  question text not null,
+  status text not null,
+  allow_multiple integer not null default 0,
+  mode text not null,
+  created_at text not null
+);
+create index if not exists polls_session on polls(session_id);
+
+create table if not exists poll_options (
+  id text primary key,
+  poll_id text not null references polls(id) on delete cascade,
+  label text not null,
+  votes integer not null default 0,
+  position integer not null
+);
+create index if not exists poll_options_poll on poll_options(poll_id, position);
+
+create table if not exists poll_votes (
+  poll_id text not null references polls(id) on delete cascade,
+  client_id text not null,
+  option_id text not null references poll_options(id) on delete cascade,
+  primary key (poll_id, client_id, option_id)
+) without rowid;
+create index if not exists poll_votes_option on poll_votes(option_id);
+
+create table if not exists saved_themes (
+  id text primary key,
+  user_id text not null,
+  name text not null,
+  theme text not null,
+  created_at text not null,
+  updated_at text not null,
+  unique (user_id, name)
+);
+
+create table if not exists widget_preset_libraries (
+  user_id text primary key,
+  data text not null,
+  updated_at text not null
+);
+
+create table if not exists brand_profiles (
+  id text primary key,
+  user_id text not null,
+  name text not null,
+  source_type text not null,
+  source_filename text not null,
+  guidelines text not null,
+  raw_summary text not null,
+  prompt_brand_guidelines text not null,
+  brand_facts text not null,
+  created_at text not null,
+  updated_at text not null,
+  unique (user_id, name)
+);
+
+create table if not exists saved_artifacts (
+  id text primary key,
+  user_id text not null,
+  name text not null,
+  kind text not null,
+  html text not null,
+  artifact_package text,
+  last_prompt text,
+  last_answers text not null,
+  theme_snapshot text,
+  style_overrides text,
+  created_at text not null,
+  updated_at text not null,
+  unique (user_id, name)
+);
+
+create table if not exists saved_artifact_versions (
+  id text primary key,
+  artifact_id text not null references saved_artifacts(id) on delete cascade,
+  user_id text not null,
+  name text not null,
+  version integer not null,
+  html text not null,
+  artifact_package text,
+  last_prompt text,
+  last_answers text not null,
+  theme_snapshot text,
+  style_overrides text,
+  source text,
+  created_at text not null,
+  unique (artifact_id, version)
+);
+"""
+
+SESSION_COLUMNS = (
+    "s.id, s.user_id, s.code, s.title, s.status, s.qna_open, s.qna_mode,"
+    " s.qna_prompt, s.qna_control_mode, s.allow_host_join, s.created_at"
+)
+QUESTION_COLUMNS = "id, session_id, prompt_id, text, status, votes, created_at"
+POLL_COLUMNS = "id, session_id, question, status, allow_multiple, created_at, mode"
+PROMPT_COLUMNS = "id, session_id, prompt, status, created_at, mode"
+ARTIFACT_COLUMNS = (
+    "id, name, kind, html, artifact_package, last_prompt, last_answers,"
+    " theme_snapshot, style_overrides, created_at, updated_at"
+)
+ARTIFACT_VERSION_COLUMNS = (
+    "id, artifact_id, name, version, html, artifact_package, last_prompt,"
+    " last_answers, theme_snapshot, style_overrides, source, created_at"
+)
+BRAND_COLUMNS = (
+    "id, name, source_type, source_filename, guidelines, raw_summary,"
+    " prompt_brand_guidelines, brand_facts, created_at, updated_at"
+)
+
+SELECT_SESSION = f"select {SESSION_COLUMNS} from sessions s where s.id = ?"
+SELECT_HOSTED_SESSION = (
+    f"select {SESSION_COLUMNS} from sessions s where s.id = ? and exists"
+    " (select 1 from session_hosts h where h.session_id = s.id and h.user_id = ?)"
+)
+SELECT_SESSION_BY_CODE = f"select {SESSION_COLUMNS} from sessions s where s.code = ?"
+SESSION_VERSION = "select version from sessions where id = ?"
+BUMP_SESSION = "update sessions set version = version + 1 where id = ?"
+INSERT_SESSION = (
+    "insert into sessions (id, user_id, code, title, status, qna_open, qna_mode,"
+    " qna_prompt, qna_control_mode, allow_host_join, created_at)"
+    " values (?, ?, ?, ?, ?, 0, ?, null, ?, 0, ?)"
+)
+INSERT_HOST = "insert or ignore into session_hosts (session_id, user_id) values (?, ?)"
+
+SELECT_QUESTION = f"select {QUESTION_COLUMNS} from questions where id = ? and session_id = ?"
+INSERT_QUESTION_VOTE = (
+    "insert or ignore into question_votes (question_id, client_id) values (?, ?)"
+)
+INCREMENT_QUESTION = "update questions set votes = votes + 1 where id = ? returning votes"
+
+SELECT_POLL = f"select {POLL_COLUMNS} from polls where id = ? and session_id = ?"
+SELECT_POLL_OPTIONS = (
+    "select id, label, votes from poll_options where poll_id = ? order by position"
+)
+SELECT_CLIENT_POLL_VOTES = (
+    "select option_id from poll_votes where poll_id = ? and client_id = ?"
+)
+INSERT_POLL_VOTE = (
+    "insert into poll_votes (poll_id, client_id, option_id) values (?, ?, ?)"
+)
+DELETE_CLIENT_POLL_VOTES = "delete from poll_votes where poll_id = ? and client_id = ?"
+DELETE_POLL_VOTE = (
+    "delete from poll_votes where poll_id = ? and client_id = ? and option_id = ?"
+)
+SET_OPTION_VOTES = "update poll_options set votes = ? where id = ?"
+
+SELECT_PROMPT = f"select {PROMPT_COLUMNS} from qna_prompts where id = ? and session_id = ?"
+
+OPEN_ACTIVITIES = (
+    "select (select count(*) from polls where session_id = ?1 and status = 'open')"
+    " + (select count(*) from qna_prompts where session_id = ?1 and status = 'open')"
+    " + (select qna_open from sessions where id = ?1)"
+)
+SESSION_PARTICIPANTS = (
+    "select count(*) from ("
+    " select v.client_id from questions q"
+    " join question_votes v on v.question_id = q.id where q.session_id = ?1"
+    " union"
+    " select v.client_id from polls p"
+    " join poll_votes v on v.poll_id = p.id where p.session_id = ?1)"
+)
+HOST_SESSION_COUNTS = (
+    "select count(*) filter (where s.status = 'active'),"
+    " coalesce(sum(s.qna_open), 0),"
+    " count(*)"
+    " from session_hosts h join sessions s on s.id = h.session_id where h.user_id = ?"
+)
+HOST_OPEN_ACTIVITIES = (
+    "select (select count(*) from session_hosts h join polls p on p.session_id = h.session_id"
+    "  where h.user_id = ?1 and p.status = 'open')"
+    " + (select count(*) from session_hosts h join qna_prompts r on r.session_id = h.session_id"
+    "  where h.user_id = ?1 and r.status = 'open')"
+)
+HOST_PARTICIPANTS = (
+    "select count(*) from ("
+    " select v.client_id from session_hosts h"
+    " join questions q on q.session_id = h.session_id"
+    " join question_votes v on v.question_id = q.id where h.user_id = ?1"
+    " union"
+    " select v.client_id from session_hosts h"
+    " join polls p on p.session_id = h.session_id"
+    " join poll_votes v on v.poll_id = p.id where h.user_id = ?1)"
+)
+
+
+@dataclass(slots=True)
+class _Operation:
+    fn: Callable[[sqlite3.Connection], Any]
+    write: bool
+    future: asyncio.Future[Any]
+    result: Any = None
+    error: BaseException | None = None
+
+
+def _settle(operations: list[_Operation]) -> None:
+    for operation in operations:
+        if operation.future.done():
+            continue
+        if operation.error is not None:
+            operation.future.set_exception(operation.error)
+        else:
+            operation.future.set_result(operation.result)
+
+
+class SqliteStore:
+    def __init__(
+        self,
+        path: str,
+        *,
+        synchronous: str = "NORMAL",
+        busy_timeout_ms: int = 5000,
+        max_batch: int = 256,
+    ) -> None:
+        synchronous = synchronous.upper()
+        if synchronous not in SYNCHRONOUS_MODES:
+            raise ValueError(f"synchronous must be one of {', '.join(SYNCHRONOUS_MODES)}")
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Autocommit mode (isolation_level=None): transactions are explicit,
+        # see _run_batch. Once construction is done the connection is only
+        # used on the worker thread.
+        self._db = sqlite3.connect(
+            path, isolation_level=None, check_same_thread=False, cached_statements=256
+        )
+        self._db.execute("pragma journal_mode = wal")
+        self._db.execute(f"pragma synchronous = {synchronous}")
+        self._db.execute(f"pragma busy_timeout = {int(busy_timeout_ms)}")
+        self._db.execute("pragma foreign_keys = on")
+        if self._db.execute("pragma user_version").fetchone()[0] < SCHEMA_VERSION:
+            self._db.executescript(SCHEMA)
+            self._db.execute(f"pragma user_version = {SCHEMA_VERSION}")
+        self.max_batch = max_batch
+        # Only touched on the worker thread.
+        self._snapshots: dict[str, tuple[int, SessionSnapshot]] = {}
+        self._operations = 0
+        self._transactions = 0
+        self._queue: queue.SimpleQueue[_Operation | None] = queue.SimpleQueue()
+        self._worker = threading.Thread(target=self._work, name="prezo-sqlite", daemon=True)
+        self._worker.start()
+
+    async def start(self) -> None:
+        return None
+
+    async def close(self) -> None:
+        """Finish queued operations, checkpoint and close the database."""
+        if not self._worker.is_alive():
+            return
+        self._queue.put(None)
+        await asyncio.to_thread(self._worker.join)
+
+    async def _read(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        return await self._submit(fn, False)
+
+    async def _write(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        return await self._submit(fn, True)
+
+    def _submit(self, fn: Callable[[sqlite3.Connection], T], write: bool) -> asyncio.Future[T]:
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put(_Operation(fn, write, future))
+        return future
+
+    def _work(self) -> None:
+        db = self._db
+        while True:
+            operation = self._queue.get()
+            batch: list[_Operation] = []
+            while operation is not None:
+                batch.append(operation)
+                if len(batch) >= self.max_batch:
+                    break
+                try:
+                    operation = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self._run_batch(db, batch)
+            if operation is None:
+                # Fold the WAL back into the database so the file stands alone.
+                db.execute("pragma wal_checkpoint(truncate)")
+                db.close()
+                return
+
+    def _run_batch(self, db: sqlite3.Connection, batch: list[_Operation]) -> None:
+        """Run everything queued as one transaction, each write in its own
+        savepoint so a failing operation rolls back alone; one commit (and,
+        with synchronous=FULL, one fsync) covers the lot, and results are
+        only handed back once it is done."""
+        writes = any(operation.write for operation in batch)
+        try:
+            # "begin immediate" takes the write lock up front so a write never
+            # has to upgrade (and possibly deadlock) halfway through; a
+            # deferred "begin" still gives reads one consistent view. Another
+            # process holding the lock past busy_timeout fails this batch
+            # only; the worker carries on with the next one.
+            db.execute("begin immediate" if writes else "begin")
+            for operation in batch:
+                if operation.write:
+                    db.execute("savepoint operation")
+                try:
+                    operation.result = operation.fn(db)
+                except Exception as exc:
+                    operation.error = exc
+                    if operation.write:
+                        db.execute("rollback to operation")
+                if operation.write:
+                    db.execute("release operation")
+            db.execute("commit")
+        except Exception as exc:
+            logger.exception("SQLite transaction failed")
+            if db.in_transaction:
+                db.execute("rollback")
+            # Snapshots built in the batch may show writes that never landed.
+            self._snapshots.clear()
+            for operation in batch:
+                operation.error = exc
+        self._operations += len(batch)
+        self._transactions += 1
+        by_loop: dict[asyncio.AbstractEventLoop, list[_Operation]] = {}
+        for operation in batch:
+            by_loop.setdefault(operation.future.get_loop(), []).append(operation)
+        for loop, operations in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(_settle, operations)
+            except RuntimeError:
+                # The loop closed while the operation was queued.
+                pass
+
+    async def create_session(self, title: str | None, user_id: str) -> Session:
+        def write(db: sqlite3.Connection) -> Session:
+            session_id = uuid.uuid4().hex
+            code = generate_code()
+            while db.execute("select 1 from sessions where code = ?", (code,)).fetchone():
+                code = generate_code()
+            db.execute(
+                INSERT_SESSION,
+                (
+                    session_id,
+                    user_id,
+                    code,
+                    title,
+                    SessionStatus.active.value,
+                    QnaMode.audience.value,
+                    ControlMode.auto.value,
+                    utc_now().isoformat(),
+                ),
+            )
+            db.execute(INSERT_HOST, (session_id, user_id))
+            return _session(db.execute(SELECT_SESSION, (session_id,)).fetchone(), user_id)
+
+        return await self._write(write)
+
+    async def get_session(self, session_id: str, user_id: str | None = None) -> Session:
+        def read(db: sqlite3.Connection) -> Session:
+            if user_id:
+                row = _hosted_session(db, session_id, user_id)
+            else:
+                row = _session_row(db, session_id)
+            return _session(row, user_id)
+
+        return await self._read(read)
+
+    async def get_session_by_code(self, code: str) -> Session:
+        def read(db: sqlite3.Connection) -> Session:
+            row = db.execute(SELECT_SESSION_BY_CODE, (code,)).fetchone()
+            if not row:
+                raise NotFoundError("session not found")
+            return _session(row)
+
+        return await self._read(read)
+
+    async def list_sessions(
+        self,
+        user_id: str,
+        status: SessionStatus | None = None,
+        limit: int | None = None,
+    ) -> list[Session]:
+        def read(db: sqlite3.Connection) -> list[Session]:
+            sql = (
+                f"select {SESSION_COLUMNS} from sessions s"
+                " join session_hosts h on h.session_id = s.id where h.user_id = ?"
+            )
+            params: list[Any] = [user_id]
+            if status is not None:
+                sql += " and s.status = ?"
+                params.append(status.value)
+            sql += " order by s.created_at desc, s.rowid limit ?"
+            params.append(limit or -1)
+            return [_session(row, user_id) for row in db.execute(sql, params)]
+
+        return await self._read(read)
+
+    async def host_dashboard_stats(self, user_id: str) -> HostDashboardStats:
+        def read(db: sqlite3.Connection) -> HostDashboardStats:
+            active_sessions, open_qna, hosted = db.execute(
+                HOST_SESSION_COUNTS, (user_id,)
+            ).fetchone()
+            if not hosted:
+                return HostDashboardStats(
+                    active_sessions=0,
+                    active_activities=0,
+                    unique_participants=0,
+                )
+            return HostDashboardStats(
+                active_sessions=active_sessions,
+                active_activities=open_qna
+                + db.execute(HOST_OPEN_ACTIVITIES, (user_id,)).fetchone()[0],
+                unique_participants=db.execute(HOST_PARTICIPANTS, (user_id,)).fetchone()[0],
+            )
+
+        return await self._read(read)
+
+    async def session_session_stats(
+        self, session_id: str, user_id: str
+    ) -> SessionSessionStats:
+        def read(db: sqlite3.Connection) -> SessionSessionStats:
+            _hosted_session(db, session_id, user_id)
+            return _session_stats(db, session_id)
+
+        return await self._read(read)
+
+    async def batch_session_stats(
+        self, session_ids: list[str], user_id: str
+    ) -> dict[str, SessionSessionStats]:
+        def read(db: sqlite3.Connection) -> dict[str, SessionSessionStats]:
+            results: dict[str, SessionSessionStats] = {}
+            for sid in session_ids:
+                if db.execute(SELECT_HOSTED_SESSION, (sid, user_id)).fetchone():
+                    results[sid] = _session_stats(db, sid)
+            return results
+
+        return await self._read(read)
+
+    async def delete_session(self, session_id: str, user_id: str) -> Session:
+        def write(db: sqlite3.Connection) -> Session:
+            row = _owned_session(db, session_id, user_id)
+            # Hosts, prompts, questions, polls and their votes cascade.
+            db.execute("delete from sessions where id = ?", (session_id,))
+            self._snapshots.pop(session_id, None)
+            return _session(row, user_id)
+
+        return await self._write(write)
+
+    async def join_session_as_host(self, code: str, user_id: str) -> Session:
+        def write(db: sqlite3.Connection) -> Session:
+            row = db.execute(SELECT_SESSION_BY_CODE, (code.upper(),)).fetchone()
+            if not row:
+                raise NotFoundError("session not found")
+            session_id = row[0]
+            if db.execute(SELECT_HOSTED_SESSION, (session_id, user_id)).fetchone():
+                return _session(row, user_id)
+            if not row[9]:
+                raise PermissionDeniedError(
+                    "The original host has not allowed additional hosts for this session."
+                )
+            db.execute(INSERT_HOST, (session_id, user_id))
+            return _session(row, user_id)
+
+        return await self._write(write)
+
+    async def set_host_join_access(
+        self, session_id: str, allow_host_join: bool, user_id: str
+    ) -> Session:
+        def write(db: sqlite3.Connection) -> Session:
+            _owned_session(db, session_id, user_id)
+            return _update_session(
+                db, session_id, user_id, "allow_host_join = ?", (allow_host_join,)
+            )
+
+        return await self._write(write)
+
+    async def create_question(
+        self, session_id: str, text: str, prompt_id: str | None = None
+    ) -> Question:
+        def write(db: sqlite3.Connection) -> Question:
+            session = _session_row(db, session_id)
+            if prompt_id:
+                prompt = db.execute(SELECT_PROMPT, (prompt_id, session_id)).fetchone()
+                if not prompt:
+                    raise NotFoundError("prompt not found")
+                if prompt[3] != QnaPromptStatus.open.value:
+                    raise ConflictError("prompt is closed")
+            elif not session[5]:
+                raise ConflictError("q&a is closed")
+            question_id = uuid.uuid4().hex
+            row = (
+                question_id,
+                session_id,
+                prompt_id,
+                text,
+                QuestionStatus.pending.value,
+                0,
+                utc_now().isoformat(),
+            )
+            db.execute(
+                f"insert into questions ({QUESTION_COLUMNS}) values (?, ?, ?, ?, ?, ?, ?)",
+                row,
+            )
+            db.execute(BUMP_SESSION, (session_id,))
+            return _question(row)
+
+        return await self._write(write)
+
+    async def set_qna_status(
+        self, session_id: str, is_open: bool, user_id: str
+    ) -> Session:
+        def write(db: sqlite3.Connection) -> Session:
+            _hosted_session(db, session_id, user_id)
+            return _update_session(db, session_id, user_id, "qna_open = ?", (is_open,))
+
+        return await self._write(write)
+
+    async def set_qna_control_mode(
+        self, session_id: str, mode: ControlMode, user_id: str
+    ) -> Session:
+        def write(db: sqlite3.Connection) -> Session:
+            _hosted_session(db, session_id, user_id)
+            return _update_session(
+                db, session_id, user_id, "qna_control_mode = ?", (mode.value,)
+            )
+
+        return await self._write(write)
+
+    async def set_qna_config(
+        self,
+        session_id: str,
+        mode: QnaMode,
+        prompt: str | None,
+        user_id: str,
+    ) -> Session:
+        def write(db: sqlite3.Connection) -> Session:
+            _hosted_session(db, session_id, user_id)
+            return _update_session(
+                db, session_id, user_id, "qna_mode = ?, qna_prompt = ?", (mode.value, prompt)
+            )
+
+        return await self._write(write)
+
+    async def create_qna_prompt(
+        self, session_id: str, prompt: str, user_id: str
+    ) -> QnaPrompt:
+        def write(db: sqlite3.Connection) -> QnaPrompt:
+            _hosted_session(db, session_id, user_id)
+            row = (
+                uuid.uuid4().hex,
+                session_id,
+                prompt,
+                QnaPromptStatus.closed.value,
+                utc_now().isoformat(),
+                ControlMode.auto.value,
+            )
+            db.execute(
+                f"insert into qna_prompts ({PROMPT_COLUMNS}) values (?, ?, ?, ?, ?, ?)", row
+            )
+            db.execute(BUMP_SESSION, (session_id,))
+            return _prompt(row)
+
+        return await self._write(write)
+
+    async def set_qna_prompt_status(
+        self,
+        session_id: str,
+        prompt_id: str,
+        status: QnaPromptStatus,
+        user_id: str,
+    ) -> QnaPrompt:
+        return await self._update_prompt(
+            session_id, prompt_id, user_id, "status = ?", status.value
+        )
+
+    async def set_qna_prompt_mode(
+        self,
+        session_id: str,
+        prompt_id: str,
+        mode: ControlMode,
+        user_id: str,
+    ) -> QnaPrompt:
+        return await self._update_prompt(session_id, prompt_id, user_id, "mode = ?", mode.value)
+
+    async def update_qna_prompt(
+        self, session_id: str, prompt_id: str, user_id: str, *, prompt: str
+    ) -> QnaPrompt:
+        return await self._update_prompt(session_id, prompt_id, user_id, "prompt = ?", prompt)
+
+    async def _update_prompt(
+        self, session_id: str, prompt_id: str, user_id: str, assignment: str, value: Any
+    ) -> QnaPrompt:
+        def write(db: sqlite3.Connection) -> QnaPrompt:
+            _hosted_session(db, session_id, user_id)
+            _prompt_row(db, session_id, prompt_id)
+            row = db.execute(
+                f"update qna_prompts set {assignment} where id = ? returning {PROMPT_COLUMNS}",
+                (value, prompt_id),
+            ).fetchone()
+            db.execute(BUMP_SESSION, (session_id,))
+            return _prompt(row)
+
+        return await self._write(write)
+
+    async def set_question_status(
+        self,
+        session_id: str,
+        question_id: str,
+        status: QuestionStatus,
+        user_id: str,
+    ) -> Question:
+        def write(db: sqlite3.Connection) -> Question:
+            _hosted_session(db, session_id, user_id)
+            _question_row(db, session_id, question_id)
+            row = db.execute(
+                f"update questions set status = ? where id = ? returning {QUESTION_COLUMNS}",
+                (status.value, question_id),
+            ).fetchone()
+            db.execute(BUMP_SESSION, (session_id,))
+            return _question(row)
+
+        return await self._write(write)
+
+    async def vote_question(
+        self, session_id: str, question_id: str, client_id: str | None
+    ) -> Question:
+        def write(db: sqlite3.Connection) -> Question:
+            row = _question_row(db, session_id, question_id)
+            if client_id:
+                inserted = db.execute(INSERT_QUESTION_VOTE, (question_id, client_id)).rowcount
+                if not inserted:
+                    return _question(row)
+            votes = db.execute(INCREMENT_QUESTION, (question_id,)).fetchone()[0]
+            db.execute(BUMP_SESSION, (session_id,))
+            return _question((*row[:5], votes, row[6]))
+
+        return await self._write(write)
+
+    async def create_poll(
+        self,
+        session_id: str,
+        question: str,
+        options: list[str],
+        allow_multiple: bool,
+        user_id: str,
+    ) -> Poll:
+        def write(db: sqlite3.Connection) -> Poll:
+            _hosted_session(db, session_id, user_id)
+            poll_id = uuid.uuid4().hex
+            row = (
+                poll_id,
+                session_id,
+                question,
+                PollStatus.closed.value,
+                allow_multiple,
+                utc_now().isoformat(),
+                PollMode.auto.value,
+            )
+            db.execute(f"insert into polls ({POLL_COLUMNS}) values (?, ?, ?, ?, ?, ?, ?)", row)
+            option_rows = [(uuid.uuid4().hex, label, 0) for label in options]
+            db.executemany(
+                "insert into poll_options (id, poll_id, label, votes, position)"
+                " values (?, ?, ?, 0, ?)",
+                [
+                    (oid, poll_id, label, position)
+                    for position, (oid, label, _) in enumerate(option_rows)
+                ],
+            )
+            db.execute(BUMP_SESSION, (session_id,))
+            return _poll(row, option_rows)
+
+        return await self._write(write)
+
+    async def set_poll_status(
+        self, session_id: str, poll_id: str, status: PollStatus, user_id: str
+    ) -> Poll:
+        return await self._update_poll_field(session_id, poll_id, user_id, "status", status.value)
+
+    async def set_poll_mode(
+        self, session_id: str, poll_id: str, mode: PollMode, user_id: str
+    ) -> Poll:
+        return await self._update_poll_field(session_id, poll_id, user_id, "mode", mode.value)
+
+    async def _update_poll_field(
+        self, session_id: str, poll_id: str, user_id: str, column: str, value: Any
+    ) -> Poll:
+        def write(db: sqlite3.Connection) -> Poll:
+            _hosted_session(db, session_id, user_id)
+            _poll_row(db, session_id, poll_id)
+            row = db.execute(
+                f"update polls set {column} = ? where id = ? returning {POLL_COLUMNS}",
+                (value, poll_id),
+            ).fetchone()
+            db.execute(BUMP_SESSION, (session_id,))
+            return _poll(row, db.execute(SELECT_POLL_OPTIONS, (poll_id,)).fetchall())
+
+        return await self._write(write)
+
+    async def update_poll(
+        self,
+        session_id: str,
+        poll_id: str,
+        user_id: str,
+        *,
+        question: str | None = None,
+        option_labels: dict[str, str] | None = None,
+        add_options: list[str] | None = None,
+        remove_option_ids: list[str] | None = None,
+        allow_multiple: bool | None = None,
+    ) -> Poll:
+        def write(db: sqlite3.Connection) -> Poll:
+            _hosted_session(db, session_id, user_id)
+            row = list(_poll_row(db, session_id, poll_id))
+            options = [list(option) for option in db.execute(SELECT_POLL_OPTIONS, (poll_id,))]
+            option_ids = {option[0] for option in options}
+            removed = {oid for oid in (remove_option_ids or []) if oid in option_ids}
+            remaining = len(options) - len(removed) + len(add_options or [])
+            if remaining < 2:
+                raise ConflictError("a poll needs at least two options")
+            # Growth-only cap, as in InMemoryStore.update_poll.
+            if add_options and remaining > 5:
+                raise ConflictError("a poll can have at most five options")
+            if allow_multiple is not None and allow_multiple != bool(row[4]):
+                if any(option[2] for option in options):
+                    raise ConflictError("cannot change choice mode after votes are cast")
+                row[4] = allow_multiple
+            if question is not None:
+                row[2] = question
+            db.execute(
+                "update polls set question = ?, allow_multiple = ? where id = ?",
+                (row[2], row[4], poll_id),
+            )
+            for option in options:
+                if option_labels and option[0] in option_labels:
+                    option[1] = option_labels[option[0]]
+                    db.execute(
+                        "update poll_options set label = ? where id = ?", (option[1], option[0])
+                    )
+            if removed:
+                # Their votes cascade.
+                db.executemany(
+                    "delete from poll_options where id = ?", [(oid,) for oid in removed]
+                )
+                options = [option for option in options if option[0] not in removed]
+            if add_options:
+                position = db.execute(
+                    "select coalesce(max(position), -1) + 1 from poll_options where poll_id = ?",
+                    (poll_id,),
+                ).fetchone()[0]
+                for label in add_options:
+                    option = [uuid.uuid4().hex, label, 0]
+                    db.execute(
+                        "insert into poll_options (id, poll_id, label, votes, position)"
+                        " values (?, ?, ?, 0, ?)",
+                        (option[0], poll_id, label, position),
+                    )
+                    options.append(option)
+                    position += 1
+            db.execute(BUMP_SESSION, (session_id,))
+            return _poll(row, options)
+
+        return await self._write(write)
+
+    async def vote_poll(
+        self,
+        session_id: str,
+        poll_id: str,
+        option_id: str,
+        client_id: str | None,
+    ) -> Poll:
+        """One transaction with the checks and effects of ``vote_poll_atomic``."""
+
+        def write(db: sqlite3.Connection) -> Poll:
+            row = _poll_row(db, session_id, poll_id)
+            if row[3] != PollStatus.open.value:
+                raise ConflictError("poll is closed")
+            options = [list(option) for option in db.execute(SELECT_POLL_OPTIONS, (poll_id,))]
+            option = next((item for item in options if item[0] == option_id), None)
+            if option is None:
+                raise NotFoundError("option not found")
+            if client_id:
+                previous = {
+                    oid for (oid,) in db.execute(SELECT_CLIENT_POLL_VOTES, (poll_id, client_id))
+                }
+                if option_id in previous:
+                    return _poll(row, options)
+                if previous and not row[4]:
+                    db.execute(DELETE_CLIENT_POLL_VOTES, (poll_id, client_id))
+                    for item in options:
+                        if item[0] in previous:
+                            item[2] = max(0, item[2] - 1)
+                            db.execute(SET_OPTION_VOTES, (item[2], item[0]))
+                db.execute(INSERT_POLL_VOTE, (poll_id, client_id, option_id))
+            option[2] += 1
+            db.execute(SET_OPTION_VOTES, (option[2], option_id))
+            db.execute(BUMP_SESSION, (session_id,))
+            return _poll(row, options)
+
+        return await self._write(write)
+
+    async def remove_poll_vote(
+        self,
+        session_id: str,
+        poll_id: str,
+        option_id: str,
+        client_id: str | None,
+    ) -> Poll:
+        """Idempotent un-vote, as in ``InMemoryStore.remove_poll_vote``."""
+
+        def write(db: sqlite3.Connection) -> Poll:
+            row = _poll_row(db, session_id, poll_id)
+            if row[3] != PollStatus.open.value:
+                raise ConflictError("poll is closed")
+            options = [list(option) for option in db.execute(SELECT_POLL_OPTIONS, (poll_id,))]
+            option = next((item for item in options if item[0] == option_id), None)
+            if option is None:
+                raise NotFoundError("option not found")
+            if not client_id:
+                return _poll(row, options)
+            if not db.execute(DELETE_POLL_VOTE, (poll_id, client_id, option_id)).rowcount:
+                return _poll(row, options)
+            option[2] = max(0, option[2] - 1)
+            db.execute(SET_OPTION_VOTES, (option[2], option_id))
+            db.execute(BUMP_SESSION, (session_id,))
+            return _poll(row, options)
+
+        return await self._write(write)
+
+    async def reset_poll_votes(
+        self, session_id: str, poll_id: str, user_id: str
+    ) -> Poll:
+        """Zero every option's count and forget voter history, keeping the poll."""
+
+        def write(db: sqlite3.Connection) -> Poll:
+            _hosted_session(db, session_id, user_id)
+            row = _poll_row(db, session_id, poll_id)
+            db.execute("update poll_options set votes = 0 where poll_id = ?", (poll_id,))
+            db.execute("delete from poll_votes where poll_id = ?", (poll_id,))
+            db.execute(BUMP_SESSION, (session_id,))
+            return _poll(row, db.execute(SELECT_POLL_OPTIONS, (poll_id,)).fetchall())
+
+        return await self._write(write)
+
+    async def delete_poll(self, session_id: str, poll_id: str, user_id: str) -> None:
+        def write(db: sqlite3.Connection) -> None:
+            _hosted_session(db, session_id, user_id)
+            _poll_row(db, session_id, poll_id)
+            db.execute("delete from polls where id = ?", (poll_id,))
+            db.execute(BUMP_SESSION, (session_id,))
+
+        await self._write(write)
+
+    async def delete_qna_prompt(self, session_id: str, prompt_id: str, user_id: str) -> None:
+        def write(db: sqlite3.Connection) -> None:
+            _hosted_session(db, session_id, user_id)
+            _prompt_row(db, session_id, prompt_id)
+            _remove_questions(db, session_id, prompt_id)
+            db.execute("delete from qna_prompts where id = ?", (prompt_id,))
+            db.execute(BUMP_SESSION, (session_id,))
+
+        await self._write(write)
+
+    async def delete_audience_questions(self, session_id: str, user_id: str) -> list[str]:
+        """Remove session questions that are not tied to an open-discussion prompt (audience Q&A)."""
+
+        def write(db: sqlite3.Connection) -> list[str]:
+            _hosted_session(db, session_id, user_id)
+            removed = _remove_questions(db, session_id, None)
+            db.execute(BUMP_SESSION, (session_id,))
+            return removed
+
+        return await self._write(write)
+
+    async def delete_prompt_questions(
+        self, session_id: str, prompt_id: str, user_id: str
+    ) -> list[str]:
+        """Remove every question posted to an open-discussion prompt, keeping the prompt itself."""
+
+        def write(db: sqlite3.Connection) -> list[str]:
+            _hosted_session(db, session_id, user_id)
+            _prompt_row(db, session_id, prompt_id)
+            removed = _remove_questions(db, session_id, prompt_id)
+            db.execute(BUMP_SESSION, (session_id,))
+            return removed
+
+        return await self._write(write)
+
+    async def snapshot(
+        self, session_id: str, viewer_user_id: str | None = None
+    ) -> SessionSnapshot:
+        """The session's current snapshot. Unchanged sessions are served from
+        cache, so treat the result (and its lists) as read-only."""
+
+        def read(db: sqlite3.Connection) -> SessionSnapshot:
+            row = db.execute(
+                f"select version, {SESSION_COLUMNS} from sessions s where s.id = ?",
+                (session_id,),
+            ).fetchone()
+            if not row:
+                raise NotFoundError("session not found")
+            version, session = row[0], row[1:]
+            cached = self._snapshots.get(session_id)
+            if cached is None or cached[0] != version:
+                cached = (version, _build_snapshot(db, session))
+                self._snapshots[session_id] = cached
+            snapshot = cached[1]
+            if viewer_user_id is None:
+                return snapshot
+            # is_original_host is the only per-viewer field.
+            return snapshot.model_copy(
+                update={
+                    "session": snapshot.session.model_copy(
+                        update={"is_original_host": session[1] == viewer_user_id}
+                    )
+                }
+            )
+
+        return await self._read(read)
+
+    async def snapshot_version(self, session_id: str) -> int:
+        """Bumped by every write to the session; equal versions mean equal
+        snapshots."""
+
+        def read(db: sqlite3.Connection) -> int:
+            row = db.execute(SESSION_VERSION, (session_id,)).fetchone()
+            if not row:
+                raise NotFoundError("session not found")
+            return row[0]
+
+        return await self._read(read)
+
+    async def list_saved_themes(self, user_id: str) -> list[SavedTheme]:
+        def read(db: sqlite3.Connection) -> list[SavedTheme]:
+            return [
+                _saved_theme(row)
+                for row in db.execute(
+                    "select id, name, theme, created_at, updated_at from saved_themes"
+                    " where user_id = ? order by updated_at desc, rowid",
+                    (user_id,),
+                )
+            ]
+
+        return await self._read(read)
+
+    async def save_saved_theme(
+        self, user_id: str, name: str, theme: dict[str, Any]
+    ) -> SavedTheme:
+        def write(db: sqlite3.Connection) -> SavedTheme:
+            now = utc_now().isoformat()
+            row = db.execute(
+                "insert into saved_themes (id, user_id, name, theme, created_at, updated_at)"
+                " values (?, ?, ?, ?, ?, ?)"
+                " on conflict (user_id, name) do update"
+                " set theme = excluded.theme, updated_at = excluded.updated_at"
+                " returning id, name, theme, created_at, updated_at",
+                (uuid.uuid4().hex, user_id, name, _dump(theme), now, now),
+            ).fetchone()
+            return _saved_theme(row)
+
+        return await self._write(write)
+
+    async def delete_saved_theme(self, user_id: str, name: str) -> SavedTheme:
+        def write(db: sqlite3.Connection) -> SavedTheme:
+            row = db.execute(
+                "delete from saved_themes where user_id = ? and name = ?"
+                " returning id, name, theme, created_at, updated_at",
+                (user_id, name),
+            ).fetchone()
+            if not row:
+                raise NotFoundError("saved theme not found")
+            return _saved_theme(row)
+
+        return await self._write(write)
+
+    async def get_widget_preset_library(self, user_id: str) -> WidgetPresetLibrary | None:
+        def read(db: sqlite3.Connection) -> WidgetPresetLibrary | None:
+            row = db.execute(
+                "select data, updated_at from widget_preset_libraries where user_id = ?",
+                (user_id,),
+            ).fetchone()
+            if not row:
+                return None
+            return WidgetPresetLibrary(data=json.loads(row[0]), updated_at=_time(row[1]))
+
+        return await self._read(read)
+
+    async def save_widget_preset_library(
+        self, user_id: str, data: dict[str, Any]
+    ) -> WidgetPresetLibrary:
+        def write(db: sqlite3.Connection) -> WidgetPresetLibrary:
+            now = utc_now()
+            text = _dump(data)
+            db.execute(
+                "insert or replace into widget_preset_libraries (user_id, data, updated_at)"
+                " values (?, ?, ?)",
+                (user_id, text, now.isoformat()),
+            )
+            return WidgetPresetLibrary(data=json.loads(text), updated_at=now)
+
+        return await self._write(write)
+
+    async def list_brand_profiles(self, user_id: str) -> list[BrandProfile]:
+        def read(db: sqlite3.Connection) -> list[BrandProfile]:
+            return [
+                _brand_profile(row)
+                for row in db.execute(
+                    f"select {BRAND_COLUMNS} from brand_profiles"
+                    " where user_id = ? order by updated_at desc, rowid",
+                    (user_id,),
+                )
+            ]
+
+        return await self._read(read)
+
+    async def get_brand_profile(self, user_id: str, name: str) -> BrandProfile | None:
+        def read(db: sqlite3.Connection) -> BrandProfile | None:
+            row = db.execute(
+                f"select {BRAND_COLUMNS} from brand_profiles where user_id = ? and name = ?",
+                (user_id, name),
+            ).fetchone()
+            return _brand_profile(row) if row else None
+
+        return await self._read(read)
+
+    async def save_brand_profile(
+        self,
+        user_id: str,
+        name: str,
+        source_type: str,
+        source_filename: str,
+        guidelines: dict[str, Any],
+        raw_summary: str,
+    ) -> BrandProfile:
+        prompt_bg = build_prompt_brand_guidelines(guidelines)
+        facts = build_brand_facts(guidelines)
+
+        def write(db: sqlite3.Connection) -> BrandProfile:
+            now = utc_now().isoformat()
+            row = db.execute(
+                "insert into brand_profiles (id, user_id, name, source_type, source_filename,"
+                " guidelines, raw_summary, prompt_brand_guidelines, brand_facts,"
+                " created_at, updated_at) values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                " on conflict (user_id, name) do update set"
+                " source_type = excluded.source_type,"
+                " source_filename = excluded.source_filename,"
+                " guidelines = excluded.guidelines,"
+                " raw_summary = excluded.raw_summary,"
+                " prompt_brand_guidelines = excluded.prompt_brand_guidelines,"
+                " brand_facts = excluded.brand_facts,"
+                " updated_at = excluded.updated_at"
+                f" returning {BRAND_COLUMNS}",
+                (
+                    uuid.uuid4().hex,
+                    user_id,
+                    name,
+                    source_type,
+                    source_filename,
+                    _dump(guidelines),
+                    raw_summary,
+                    prompt_bg,
+                    _dump(facts),
+                    now,
+                    now,
+                ),
+            ).fetchone()
+            return _brand_profile(row)
+
+        return await self._write(write)
+
+    async def delete_brand_profile(self, user_id: str, name: str) -> BrandProfile:
+        def write(db: sqlite3.Connection) -> BrandProfile:
+            row = db.execute(
+                f"delete from brand_profiles where user_id = ? and name = ? returning {BRAND_COLUMNS}",
+                (user_id, name),
+            ).fetchone()
+            if not row:
+                raise NotFoundError("brand profile not found")
+            return _brand_profile(row)
+
+        return await self._write(write)
+
+    async def list_saved_artifacts(self, user_id: str) -> list[SavedArtifact]:
+        def read(db: sqlite3.Connection) -> list[SavedArtifact]:
+            return [
+                _saved_artifact(row)
+                for row in db.execute(
+                    f"select {ARTIFACT_COLUMNS} from saved_artifacts"
+                    " where user_id = ? order by updated_at desc, rowid",
+                    (user_id,),
+                )
+            ]
+
+        return await self._read(read)
+
+    async def save_saved_artifact(
+        self,
+        user_id: str,
+        name: str,
+        html: str,
+        artifact_package: dict[str, Any] | None,
+        last_prompt: str | None,
+        last_answers: dict[str, Any],
+        theme_snapshot: dict[str, Any] | None,
+        style_overrides: dict[str, Any] | None = None,
+        kind: str | None = None,
+    ) -> SavedArtifact:
+        content = (
+            html,
+            _dump_optional(artifact_package),
+            last_prompt,
+            _dump(last_answers),
+            _dump_optional(theme_snapshot),
+            _dump_optional(style_overrides),
+        )
+
+        def write(db: sqlite3.Connection) -> SavedArtifact:
+            now = utc_now().isoformat()
+            existing = db.execute(
+                f"select {ARTIFACT_COLUMNS} from saved_artifacts where user_id = ? and name = ?",
+                (user_id, name),
+            ).fetchone()
+            if existing:
+                changed = _signature(existing[3:9]) != _signature(content)
+                row = db.execute(
+                    "update saved_artifacts set kind = coalesce(?, kind), html = ?,"
+                    " artifact_package = ?, last_prompt = ?, last_answers = ?,"
+                    " theme_snapshot = ?, style_overrides = ?, updated_at = ?"
+                    f" where id = ? returning {ARTIFACT_COLUMNS}",
+                    (kind, *content, now, existing[0]),
+                ).fetchone()
+                if changed:
+                    _append_artifact_version(db, user_id, row, "save")
+                return _saved_artifact(row)
+            row = db.execute(
+                "insert into saved_artifacts (id, user_id, name, kind, html, artifact_package,"
+                " last_prompt, last_answers, theme_snapshot, style_overrides, created_at,"
+                " updated_at) values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                f" returning {ARTIFACT_COLUMNS}",
+                (uuid.uuid4().hex, user_id, name, kind or "poll", *content, now, now),
+            ).fetchone()
+            _append_artifact_version(db, user_id, row, "create")
+            return _saved_artifact(row)
+
+        return await self._write(write)
+
+    async def delete_saved_artifact(self, user_id: str, name: str) -> SavedArtifact:
+        def write(db: sqlite3.Connection) -> SavedArtifact:
+            # Versions cascade.
+            row = db.execute(
+                "delete from saved_artifacts where user_id = ? and name = ?"
+                f" returning {ARTIFACT_COLUMNS}",
+                (user_id, name),
+            ).fetchone()
+            if not row:
+                raise NotFoundError("saved artifact not found")
+            return _saved_artifact(row)
+
+        return await self._write(write)
+
+    async def list_saved_artifact_versions(
+        self, user_id: str, name: str, limit: int = 30
+    ) -> list[SavedArtifactVersion]:
+        def read(db: sqlite3.Connection) -> list[SavedArtifactVersion]:
+            artifact = db.execute(
+                "select id from saved_artifacts where user_id = ? and name = ?",
+                (user_id, name),
+            ).fetchone()
+            if not artifact:
+                raise NotFoundError("saved artifact not found")
+            return [
+                _saved_artifact_version(row)
+                for row in db.execute(
+                    f"select {ARTIFACT_VERSION_COLUMNS} from saved_artifact_versions"
+                    " where artifact_id = ? order by version desc limit ?",
+                    (artifact[0], limit if limit > 0 else -1),
+                )
+            ]
+
+        return await self._read(read)
+
+    async def restore_saved_artifact_version(
+        self, user_id: str, name: str, version: int
+    ) -> SavedArtifact:
+        def write(db: sqlite3.Connection) -> SavedArtifact:
+            artifact = db.execute(
+                f"select {ARTIFACT_COLUMNS} from saved_artifacts where user_id = ? and name = ?",
+                (user_id, name),
+            ).fetchone()
+            if not artifact:
+                raise NotFoundError("saved artifact not found")
+            target = db.execute(
+                "select html, artifact_package, last_prompt, last_answers, theme_snapshot,"
+                " style_overrides from saved_artifact_versions"
+                " where artifact_id = ? and version = ?",
+                (artifact[0], version),
+            ).fetchone()
+            if not target:
+                raise NotFoundError("saved artifact version not found")
+            changed = _signature(artifact[3:9]) != _signature(target)
+            row = db.execute(
+                "update saved_artifacts set html = ?, artifact_package = ?, last_prompt = ?,"
+                " last_answers = ?, theme_snapshot = ?, style_overrides = ?, updated_at = ?"
+                f" where id = ? returning {ARTIFACT_COLUMNS}",
+                (*target, utc_now().isoformat(), artifact[0]),
+            ).fetchone()
+            if changed:
+                _append_artifact_version(db, user_id, row, "restore")
+            return _saved_artifact(row)
+
+        return await self._write(write)
+
+    def memory_stats(self) -> dict[str, Any]:
+        files = {}
+        for suffix in ("", "-wal"):
+            try:
+                files[f"db{suffix}_bytes"] = os.path.getsize(self.path + suffix)
+            except OSError:
+                files[f"db{suffix}_bytes"] = 0
+        return {
+            "sqlite": {
+                "path": self.path,
+                "operations": self._operations,
+                "transactions": self._transactions,
+                "cached_snapshots": len(self._snapshots),
+                **files,
+            },
+            "rss_bytes": process_rss_bytes(),
+        }
+
+
+def _session_row(db: sqlite3.Connection, session_id: str) -> tuple:
+    row = db.execute(SELECT_SESSION, (session_id,)).fetchone()
+    if not row:
+        raise NotFoundError("session not found")
+    return row
+
+
+def _hosted_session(db: sqlite3.Connection, session_id: str, user_id: str) -> tuple:
+    row = db.execute(SELECT_HOSTED_SESSION, (session_id, user_id)).fetchone()
+    if not row:
+        raise NotFoundError("session not found")
+    return row
+
+
+def _owned_session(db: sqlite3.Connection, session_id: str, user_id: str) -> tuple:
+    row = _session_row(db, session_id)
+    if row[1] != user_id:
+        raise PermissionDeniedError("Only the original host can perform this action.")
+    return row
+
+
+def _update_session(
+    db: sqlite3.Connection,
+    session_id: str,
+    viewer_user_id: str,
+    assignments: str,
+    values: tuple,
+) -> Session:
+    db.execute(
+        f"update sessions set {assignments}, version = version + 1 where id = ?",
+        (*values, session_id),
+    )
+    return _session(db.execute(SELECT_SESSION, (session_id,)).fetchone(), viewer_user_id)
+
+
+def _question_row(db: sqlite3.Connection, session_id: str, question_id: str) -> tuple:
+    row = db.execute(SELECT_QUESTION, (question_id, session_id)).fetchone()
+    if not row:
+        _session_row(db, session_id)
+        raise NotFoundError("question not found")
+    return row
+
+
+def _poll_row(db: sqlite3.Connection, session_id: str, poll_id: str) -> tuple:
+    row = db.execute(SELECT_POLL, (poll_id, session_id)).fetchone()
+    if not row:
+        _session_row(db, session_id)
+        raise NotFoundError("poll not found")
+    return row
+
+
+def _prompt_row(db: sqlite3.Connection, session_id: str, prompt_id: str) -> tuple:
+    row = db.execute(SELECT_PROMPT, (prompt_id, session_id)).fetchone()
+    if not row:
+        _session_row(db, session_id)
+        raise NotFoundError("prompt not found")
+    return row
+
+
+def _remove_questions(
+    db: sqlite3.Connection, session_id: str, prompt_id: str | None
+) -> list[str]:
+    """Drop every question posted to ``prompt_id`` (None: audience Q&A)."""
+    return [
+        question_id
+        for (question_id,) in db.execute(
+            "delete from questions where session_id = ? and prompt_id is ? returning id",
+            (session_id, prompt_id),
+        ).fetchall()
+    ]
+
+
+def _session_stats(db: sqlite3.Connection, session_id: str) -> SessionSessionStats:
+    return SessionSessionStats(
+        unique_participants=db.execute(SESSION_PARTICIPANTS, (session_id,)).fetchone()[0],
+        active_activities=db.execute(OPEN_ACTIVITIES, (session_id,)).fetchone()[0],
+    )
+
+
+def _build_snapshot(db: sqlite3.Connection, session: tuple) -> SessionSnapshot:
+    session_id = session[0]
+    options: dict[str, list[tuple]] = {}
+    for poll_id, *option in db.execute(
+        "select o.poll_id, o.id, o.label, o.votes from poll_options o"
+        " join polls p on p.id = o.poll_id where p.session_id = ? order by o.position",
+        (session_id,),
+    ):
+        options.setdefault(poll_id, []).append(option)
+    return SessionSnapshot(
+        session=_session(session),
+        questions=[
+            _question(row)
+            for row in db.execute(
+                f"select {QUESTION_COLUMNS} from questions where session_id = ? order by rowid",
+                (session_id,),
+            )
+        ],
+        polls=[
+            _poll(row, options.get(row[0], []))
+            for row in db.execute(
+                f"select {POLL_COLUMNS} from polls where session_id = ? order by rowid",
+                (session_id,),
+            )
+        ],
+        prompts=[
+            _prompt(row)
+            for row in db.execute(
+                f"select {PROMPT_COLUMNS} from qna_prompts where session_id = ? order by rowid",
+                (session_id,),
+            )
+        ],
+    )
+
+
+def _append_artifact_version(
+    db: sqlite3.Connection, user_id: str, artifact: tuple, source: str
+) -> None:
+    artifact_id, name = artifact[0], artifact[1]
+    db.execute(
+        "insert into saved_artifact_versions (id, artifact_id, user_id, name, version, html,"
+        " artifact_package, last_prompt, last_answers, theme_snapshot, style_overrides,"
+        " source, created_at) select ?, ?, ?, ?, coalesce(max(version), 0) + 1,"
+        " ?, ?, ?, ?, ?, ?, ?, ? from saved_artifact_versions where artifact_id = ?",
+        (
+            uuid.uuid4().hex,
+            artifact_id,
+            user_id,
+            name,
+            *artifact[3:9],
+            source,
+            utc_now().isoformat(),
+            artifact_id,
+        ),
+    )
+
+
+def _signature(content: tuple) -> Any:
+    """Version signature of stored (html, package, prompt, answers, theme,
+    overrides) columns."""
+    html, artifact_package, last_prompt, last_answers, theme_snapshot, style_overrides = content
+    return build_saved_artifact_snapshot_signature(
+        html=html,
+        artifact_package=_load_optional(artifact_package),
+        last_prompt=last_prompt,
+        last_answers=json.loads(last_answers),
+        theme_snapshot=_load_optional(theme_snapshot),
+        style_overrides=_load_optional(style_overrides),
+    )
+
+
+def _dump(value: dict[str, Any]) -> str:
+    return json.dumps(value, separators=(",", ":"))
+
+
+def _dump_optional(value: dict[str, Any] | None) -> str | None:
+    return None if value is None else _dump(value)
+
+
+def _load_optional(value: str | None) -> Any:
+    return None if value is None else json.loads(value)
+
+
+def _time(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+def _session(row: tuple, viewer_user_id: str | None = None) -> Session:
+    (
+        session_id,
+        user_id,
+        code,
+        title,
+        status,
+        qna_open,
+        qna_mode,
+        qna_prompt,
+        qna_control_mode,
+        allow_host_join,
+        created_at,
+    ) = row
+    return Session(
+        id=session_id,
+        code=code,
+        title=title,
+        status=SessionStatus(status),
+        qna_open=bool(qna_open),
+        qna_mode=QnaMode(qna_mode),
+        qna_prompt=qna_prompt,
+        qna_control_mode=ControlMode(qna_control_mode),
+        allow_host_join=bool(allow_host_join),
+        is_original_host=(user_id == viewer_user_id if viewer_user_id is not None else None),
+        created_at=_time(created_at),
+    )
+
+
+def _question(row: tuple) -> Question:
+    question_id, session_id, prompt_id, text, status, votes, created_at = row
+    return Question(
+        id=question_id,
+        session_id=session_id,
+        prompt_id=prompt_id,
+        text=text,
+        status=QuestionStatus(status),
+        votes=votes,
+        created_at=_time(created_at),
+    )
+
+
+def _poll(row: tuple | list, options: list) -> Poll:
+    poll_id, session_id, question, status, allow_multiple, created_at, mode = row
+    return Poll(
+        id=poll_id,
+        session_id=session_id,
+        question=question,
+        options=[PollOption(id=oid, label=label, votes=votes) for oid, label, votes in options],
+        status=PollStatus(status),
+        allow_multiple=bool(allow_multiple),
+        created_at=_time(created_at),
+        mode=PollMode(mode),
+    )
+
+
+def _prompt(row: tuple) -> QnaPrompt:
+    prompt_id, session_id, prompt, status, created_at, mode = row
+    return QnaPrompt(
+        id=prompt_id,
+        session_id=session_id,
+        prompt=prompt,
+        status=QnaPromptStatus(status),
+        created_at=_time(created_at),
+        mode=ControlMode(mode),
+    )
+
+
+def _saved_theme(row: tuple) -> SavedTheme:
+    theme_id, name, theme, created_at, updated_at = row
+    return SavedTheme(
+        id=theme_id,
+        name=name,
+        theme=json.loads(theme),
+        created_at=_time(created_at),
+        updated_at=_time(updated_at),
+    )
+
+
+def _brand_profile(row: tuple) -> BrandProfile:
+    (
+        profile_id,
+        name,
+        source_type,
+        source_filename,
+        guidelines,
+        raw_summary,
+        prompt_brand_guidelines,
+        brand_facts,
+        created_at,
+        updated_at,
+    ) = row
+    return BrandProfile(
+        id=profile_id,
+        name=name,
+        source_type=source_type,
+        source_filename=source_filename,
+        guidelines=json.loads(guidelines),
+        raw_summary=raw_summary,
+        prompt_brand_guidelines=prompt_brand_guidelines,
+        brand_facts=json.loads(brand_facts),
+        created_at=_time(created_at),
+        updated_at=_time(updated_at),
+    )
+
+
+def _saved_artifact(row: tuple) -> SavedArtifact:
+    (
+        artifact_id,
+        name,
+        kind,
+        html,
+        artifact_package,
+        last_prompt,
+        last_answers,
+        theme_snapshot,
+        style_overrides,
+        created_at,
+        updated_at,
+    ) = row
+    return SavedArtifact(
+        id=artifact_id,
+        name=name,
+        kind=kind,
+        html=html,
+        artifact_package=_load_optional(artifact_package),
+        last_prompt=last_prompt,
+        last_answers=json.loads(last_answers),
+        theme_snapshot=_load_optional(theme_snapshot),
+        style_overrides=_load_optional(style_overrides),
+        created_at=_time(created_at),
+        updated_at=_time(updated_at),
+    )
+
+
+def _saved_artifact_version(row: tuple) -> SavedArtifactVersion:
+    (
+        version_id,
+        artifact_id,
+        name,
+        version,
+        html,
+        artifact_package,
+        last_prompt,
+        last_answers,
+        theme_snapshot,
+        style_overrides,
+        source,
+        created_at,
+    ) = row
+    return SavedArtifactVersion(
+        id=version_id,
+        artifact_id=artifact_id,
+        name=name,
+        version=version,
+        html=html,
+        artifact_package=_load_optional(artifact_package),
+        last_prompt=last_prompt,
+        last_answers=json.loads(last_answers),
+        theme_snapshot=_load_optional(theme_snapshot),
+        style_overrides=_load_optional(style_overrides),
+        source=source,
+        created_at=_time(created_at),
+    )
@@ -4,6 +4,8 @@ import asyncio
 import logging
 import time
 import uuid
+from collections import Counter
+from dataclasses import dataclass, field
 from typing import Any
 
 import httpx
@@ -12,6 +14,19 @@ logger = logging.getLogger("prezo.supabase")
 SNAPSHOT_CACHE_TTL_SECONDS = 1.0
 SNAPSHOT_STALE_MAX_SECONDS = 30.0
 SUPABASE_TRANSPORT_BACKOFF_SECONDS = 15.0
+# How long to keep using the fallback path after finding one of the sql/
+# functions missing (not applied yet) before asking for it again.
+MISSING_RPC_RETRY_SECONDS = 300.0
+# PostgREST's "function not found" (PGRST202), and Postgres' own
+# undefined_function from older PostgREST versions.
+MISSING_FUNCTION_CODES = frozenset({"PGRST202", "42883"})
+# The same for a missing table or view (PGRST205, or undefined_table).
+MISSING_RELATION_CODES = frozenset({"PGRST205", "42P01"})
+# Write-behind votes: a poll's cached state is re-read after this long so
+# closes and edits from other processes are noticed, and buffered votes go
+# out at most this many per vote_poll_batch call.
+VOTE_BUFFER_POLL_TTL_SECONDS = 5.0
+VOTE_FLUSH_BATCH_SIZE = 1000
 
 from .artifact_package import build_saved_artifact_snapshot_signature
 from .brand_facts import build_brand_facts
@@ -55,8 +70,48 @@ class SupabaseError(Exception):
         self.code = code
 
 
+@dataclass(slots=True)
+class _BufferedVote:
+    args: dict[str, str | None]
+    # Change to each option's count already shown to voters.
+    effect: dict[str, int]
+
+
+@dataclass(slots=True)
+class _BufferedPoll:
+    """What write-behind votes for one poll are checked against.
+
+    poll holds the stored counts from the last load or flush plus the effect
+    of every vote not yet written; choices holds the options each client has
+    picked as far as this process knows.
+    """
+
+    poll: Poll
+    loaded_at: float
+    choices: dict[str, set[str]] = field(default_factory=dict)
+    pending: list[_BufferedVote] = field(default_factory=list)
+    # Set while the poll's votes are written ahead of another change to it;
+    # new votes for it wait for this.
+    settling: asyncio.Event | None = None
+
+
 class SupabaseStore:
-    def __init__(self, supabase_url: str, service_role_key: str) -> None:
+    def __init__(
+        self,
+        supabase_url: str,
+        service_role_key: str,
+        *,
+        transport: httpx.AsyncBaseTransport | None = None,
+        vote_flush_seconds: float = 0.0,
+        vote_queue_size: int = 10_000,
+    ) -> None:
+        """vote_flush_seconds > 0 turns on write-behind votes: vote_poll
+        checks votes against cached poll state, answers at once, and a
+        background task writes what has accumulated every vote_flush_seconds
+        in vote_poll_batch calls (sql/vote_poll_batch.sql). Once
+        vote_queue_size votes are waiting, voters wait for a flush; close()
+        flushes what is left.
+        """
         self._base_url = supabase_url.rstrip("/") + "/rest/v1"
         self._headers = {
             "apikey": service_role_key,
@@ -65,6 +120,7 @@ class SupabaseStore:
         }
         self._client = httpx.AsyncClient(
             timeout=httpx.Timeout(30.0, connect=15.0),
+            transport=transport,
         )
         # Key: (session_id, viewer_user_id) — session embeds is_original_host per viewer.
         self._snapshot_cache: dict[
@@ -75,6 +131,16 @@ class SupabaseStore:
         ] = {}
         self._transport_unavailable_until = 0.0
         self._transport_failure_detail = ""
+        self._missing_rpcs_until: dict[str, float] = {}
+        self._vote_flush_seconds = vote_flush_seconds
+        self._vote_queue_size = max(1, vote_queue_size)
+        self._buffered_polls: dict[str, _BufferedPoll] = {}
+        self._buffered_vote_count = 0
+        self._vote_flush_lock = asyncio.Lock()
+        self._vote_flush_requested = asyncio.Event()
+        self._vote_flushed = asyncio.Condition()
+        self._vote_flush_failure: str | None = None
+        self._vote_flush_task: asyncio.Task[None] | None = None
 
     async def _request(
         self,
@@ -185,6 +251,50 @@ class SupabaseStore:
         response = await self._request("POST", f"rpc/{function_name}", json=payload)
         return response.json()
 
+    async def _optional_rpc(
+        self, function_name: str, payload: dict[str, Any]
+    ) -> tuple[bool, Any]:
+        """Call a function from sql/ that may not be applied yet.
+
+        Returns (False, None) when PostgREST reports it missing, and for
+        MISSING_RPC_RETRY_SECONDS after that without asking, so the caller
+        can take its table-by-table path.
+        """
+        if time.monotonic() < self._missing_rpcs_until.get(function_name, 0.0):
+            return False, None
+        try:
+            return True, await self._rpc(function_name, payload)
+        except SupabaseError as exc:
+            if exc.code not in MISSING_FUNCTION_CODES:
+                raise
+        logger.warning(
+            "%s RPC is missing; using the fallback path (apply sql/%s.sql)",
+            function_name,
+            function_name,
+        )
+        self._missing_rpcs_until[function_name] = (
+            time.monotonic() + MISSING_RPC_RETRY_SECONDS
+        )
+        return False, None
+
+    async def _select_poll_options(self, params: dict[str, str]) -> list[dict[str, Any]]:
+        """poll_options rows with votes summed over their counter shards
+        (sql/poll_option_vote_shards.sql), or the bare table while that view
+        is missing."""
+        view = "poll_option_vote_totals"
+        if time.monotonic() >= self._missing_rpcs_until.get(view, 0.0):
+            try:
+                return await self._select(view, params)
+            except SupabaseError as exc:
+                if exc.code not in MISSING_RELATION_CODES:
+                    raise
+            logger.warning(
+                "%s view is missing; reading poll_options (apply sql/poll_option_vote_shards.sql)",
+                view,
+            )
+            self._missing_rpcs_until[view] = time.monotonic() + MISSING_RPC_RETRY_SECONDS
+        return await self._select("poll_options", params)
+
     def _invalidate_session_snapshot(self, session_id: str) -> None:
         to_remove = [k for k in self._snapshot_cache if k[0] == session_id]
         for k in to_remove:
@@ -221,6 +331,39 @@ class SupabaseStore:
 
     async def _load_snapshot(
         self, session_id: str, viewer_user_id: str | None = None
+    ) -> SessionSnapshot:
+        """One session_snapshot RPC when the database has it (see
+        sql/session_snapshot.sql), else five table reads."""
+        found, payload = await self._optional_rpc(
+            "session_snapshot", {"p_session_id": session_id}
+        )
+        if found:
+            return self._snapshot_from_payload(payload, viewer_user_id)
+        return await self._load_snapshot_tables(session_id, viewer_user_id)
+
+    def _snapshot_from_payload(
+        self, payload: Any, viewer_user_id: str | None
+    ) -> SessionSnapshot:
+        if payload is None:
+            raise NotFoundError("session not found")
+        if not isinstance(payload, dict) or not isinstance(payload.get("session"), dict):
+            raise SupabaseError(500, "session_snapshot returned an invalid payload")
+        polls = payload.get("polls") or []
+        return SessionSnapshot(
+            session=self._to_session(payload["session"], viewer_user_id),
+            questions=[self._to_question(item) for item in payload.get("questions") or []],
+            polls=[
+                self._to_poll(
+                    {key: value for key, value in poll.items() if key != "options"},
+                    poll.get("options") or [],
+                )
+                for poll in polls
+            ],
+            prompts=[self._to_prompt(item) for item in payload.get("prompts") or []],
+        )
+
+    async def _load_snapshot_tables(
+        self, session_id: str, viewer_user_id: str | None = None
     ) -> SessionSnapshot:
         sessions = await self._select(
             "sessions", {"select": "*", "id": f"eq.{session_id}"}
@@ -245,8 +388,7 @@ class SupabaseStore:
         options: list[dict[str, Any]] = []
         if poll_ids:
             in_list = ",".join(f'"{poll_id}"' for poll_id in poll_ids)
-            options = await self._select(
-                "poll_options",
+            options = await self._select_poll_options(
                 {"select": "*", "poll_id": f"in.({in_list})", "order": "position.asc"},
             )
         options_by_poll: dict[str, list[dict[str, Any]]] = {}
@@ -530,6 +672,23 @@ class SupabaseStore:
         return [self._to_session(row, user_id) for row in rows]
 
     async def host_dashboard_stats(self, user_id: str) -> HostDashboardStats:
+        """One host_dashboard_stats RPC (sql/host_stats.sql) when the
+        database has it, else counting participants in Python."""
+        await self._flush_buffered_votes_for_read()
+        found, payload = await self._optional_rpc(
+            "host_dashboard_stats", {"p_user_id": user_id}
+        )
+        if not found:
+            return await self._host_dashboard_stats_tables(user_id)
+        if not isinstance(payload, dict):
+            raise SupabaseError(500, "host_dashboard_stats returned an invalid payload")
+        return HostDashboardStats(
+            active_sessions=int(payload.get("active_sessions") or 0),
+            active_activities=int(payload.get("active_activities") or 0),
+            unique_participants=int(payload.get("unique_participants") or 0),
+        )
+
+    async def _host_dashboard_stats_tables(self, user_id: str) -> HostDashboardStats:
         sessions = await self.list_sessions(user_id, None, None)
         if not sessions:
             return HostDashboardStats(
@@ -692,15 +851,65 @@ class SupabaseStore:
             active_activities=active_activities,
         )
 
+    async def _session_stats_rpc(
+        self, session_ids: list[str], user_id: str
+    ) -> dict[str, SessionSessionStats] | None:
+        """Stats for the given sessions the user hosts, from one session_stats
+        RPC (sql/host_stats.sql), or None while the function is missing.
+
+        Ids that aren't UUIDs can't name a session and are dropped here, so
+        one bad id from a client doesn't fail the whole call.
+        """
+        await self._flush_buffered_votes_for_read()
+        requested: dict[str, str] = {}
+        for sid in session_ids:
+            try:
+                requested.setdefault(str(uuid.UUID(sid)), sid)
+            except (TypeError, ValueError):
+                continue
+        if not requested:
+            return {}
+        found, rows = await self._optional_rpc(
+            "session_stats",
+            {"p_session_ids": list(requested), "p_user_id": user_id},
+        )
+        if not found:
+            return None
+        if not isinstance(rows, list):
+            raise SupabaseError(500, "session_stats returned an invalid payload")
+        stats_by_id = {
+            str(row.get("session_id")): SessionSessionStats(
+                unique_participants=int(row.get("unique_participants") or 0),
+                active_activities=int(row.get("active_activities") or 0),
+            )
+            for row in rows
+            if isinstance(row, dict)
+        }
+        return {
+            sid: stats_by_id[key]
+            for key, sid in requested.items()
+            if key in stats_by_id
+        }
+
     async def session_session_stats(
         self, session_id: str, user_id: str
     ) -> SessionSessionStats:
-        await self._ensure_host_access(session_id, user_id)
-        return await self._compute_session_stats(session_id)
+        stats = await self._session_stats_rpc([session_id], user_id)
+        if stats is None:
+            await self._ensure_host_access(session_id, user_id)
+            return await self._compute_session_stats(session_id)
+        if session_id not in stats:
+            raise NotFoundError("session not found")
+        return stats[session_id]
 
     async def batch_session_stats(
         self, session_ids: list[str], user_id: str
     ) -> dict[str, SessionSessionStats]:
+        """All requested sessions in one session_stats RPC when the database
+        has it; sessions the user can't host are left out either way."""
+        stats = await self._session_stats_rpc(session_ids, user_id)
+        if stats is not None:
+            return stats
         results: dict[str, SessionSessionStats] = {}
         valid_ids: list[str] = []
         for sid in session_ids:
@@ -1057,6 +1266,31 @@ class SupabaseStore:
 
     async def vote_question(
         self, session_id: str, question_id: str, client_id: str | None
+    ) -> Question:
+        """One vote_question_atomic RPC (sql/vote_question_atomic.sql) when
+        the database has it, else the racy read-then-write path."""
+        try:
+            found, payload = await self._optional_rpc(
+                "vote_question_atomic",
+                {
+                    "p_session_id": session_id,
+                    "p_question_id": question_id,
+                    "p_client_id": client_id,
+                },
+            )
+        except SupabaseError as exc:
+            if exc.code == "P0002" or "not found" in exc.detail.lower():
+                raise NotFoundError(exc.detail) from exc
+            raise
+        if not found:
+            return await self._vote_question_tables(session_id, question_id, client_id)
+        if not isinstance(payload, dict):
+            raise SupabaseError(500, "vote_question_atomic returned an invalid payload")
+        self._invalidate_session_snapshot(session_id)
+        return self._to_question(payload)
+
+    async def _vote_question_tables(
+        self, session_id: str, question_id: str, client_id: str | None
     ) -> Question:
         question_rows = await self._select(
             "questions",
@@ -1143,6 +1377,7 @@ class SupabaseStore:
         self, session_id: str, poll_id: str, status: PollStatus, user_id: str
     ) -> Poll:
         await self.get_session(session_id, user_id)
+        await self._settle_buffered_votes(poll_id)
         response = await self._request(
             "PATCH",
             "polls",
@@ -1153,8 +1388,7 @@ class SupabaseStore:
         data = response.json()
         if not data:
             raise NotFoundError("poll not found")
-        options = await self._select(
-            "poll_options",
+        options = await self._select_poll_options(
             {"select": "*", "poll_id": f"eq.{poll_id}", "order": "position.asc"},
         )
         self._invalidate_session_snapshot(session_id)
@@ -1164,6 +1398,7 @@ class SupabaseStore:
         self, session_id: str, poll_id: str, mode: PollMode, user_id: str
     ) -> Poll:
         await self.get_session(session_id, user_id)
+        await self._settle_buffered_votes(poll_id)
         response = await self._request(
             "PATCH",
             "polls",
@@ -1174,8 +1409,7 @@ class SupabaseStore:
         data = response.json()
         if not data:
             raise NotFoundError("poll not found")
-        options = await self._select(
-            "poll_options",
+        options = await self._select_poll_options(
             {"select": "*", "poll_id": f"eq.{poll_id}", "order": "position.asc"},
         )
         self._invalidate_session_snapshot(session_id)
@@ -1194,6 +1428,7 @@ class SupabaseStore:
         allow_multiple: bool | None = None,
     ) -> Poll:
         await self.get_session(session_id, user_id)
+        await self._settle_buffered_votes(poll_id)
         rows = await self._select(
             "polls",
             {"select": "*", "id": f"eq.{poll_id}", "session_id": f"eq.{session_id}"},
@@ -1201,8 +1436,7 @@ class SupabaseStore:
         if not rows:
             raise NotFoundError("poll not found")
         data = rows
-        current_options = await self._select(
-            "poll_options",
+        current_options = await self._select_poll_options(
             {"select": "*", "poll_id": f"eq.{poll_id}", "order": "position.asc"},
         )
         current_ids = {opt["id"] for opt in current_options}
@@ -1276,8 +1510,7 @@ class SupabaseStore:
                 json=option_payload,
                 prefer="return=representation",
             )
-        options = await self._select(
-            "poll_options",
+        options = await self._select_poll_options(
             {"select": "*", "poll_id": f"eq.{poll_id}", "order": "position.asc"},
         )
         self._invalidate_session_snapshot(session_id)
@@ -1290,6 +1523,8 @@ class SupabaseStore:
         option_id: str,
         client_id: str | None,
     ) -> Poll:
+        if self._vote_flush_seconds > 0:
+            return await self._buffer_poll_vote(session_id, poll_id, option_id, client_id)
         try:
             payload = await self._rpc(
                 "vote_poll_atomic",
@@ -1316,6 +1551,292 @@ class SupabaseStore:
         self._invalidate_session_snapshot(session_id)
         return self._to_poll(poll_data, option_rows)
 
+    async def _buffer_poll_vote(
+        self,
+        session_id: str,
+        poll_id: str,
+        option_id: str,
+        client_id: str | None,
+    ) -> Poll:
+        """vote_poll in write-behind mode, applying vote_poll_atomic's rules
+        to the cached poll. The flush writes the vote through the same
+        function, so the stored counts stay exact even where this process's
+        view of a client's earlier votes is not; the next flush corrects the
+        counts shown here."""
+        await self._wait_for_vote_buffer()
+        state = await self._buffered_poll(session_id, poll_id)
+        poll = state.poll
+        if poll.status != PollStatus.open:
+            raise ConflictError("poll is closed")
+        if not any(option.id == option_id for option in poll.options):
+            raise NotFoundError("option not found")
+
+        client = (client_id or "").strip() or None
+        effect = {option_id: 1}
+        if client is not None:
+            chosen = state.choices.setdefault(client, set())
+            if option_id in chosen:
+                return poll.model_copy(deep=True)
+            if not poll.allow_multiple:
+                effect.update({previous: -1 for previous in chosen})
+                chosen.clear()
+            chosen.add(option_id)
+        for option in poll.options:
+            if option.id in effect:
+                option.votes = max(0, option.votes + effect[option.id])
+
+        state.pending.append(
+            _BufferedVote(
+                {
+                    "session_id": session_id,
+                    "poll_id": poll_id,
+                    "option_id": option_id,
+                    "client_id": client,
+                },
+                effect,
+            )
+        )
+        self._buffered_vote_count += 1
+        if self._vote_flush_task is None:
+            self._vote_flush_task = asyncio.create_task(self._flush_votes_periodically())
+        return poll.model_copy(deep=True)
+
+    def _cancel_buffered_vote(
+        self, state: _BufferedPoll, session_id: str, option_id: str, client: str | None
+    ) -> Poll | None:
+        """Drop a client's unwritten vote for an option, as remove_poll_vote.
+        Returns None when there is none to drop, or when it moved the
+        client's earlier single-choice vote, which only the database can put
+        back."""
+        if client is None or option_id not in state.choices.get(client, ()):
+            return None
+        if state.poll.session_id != session_id:
+            raise NotFoundError("poll not found")
+        if state.poll.status != PollStatus.open:
+            raise ConflictError("poll is closed")
+        for index in range(len(state.pending) - 1, -1, -1):
+            vote = state.pending[index]
+            if vote.args["client_id"] == client and vote.args["option_id"] == option_id:
+                break
+        else:
+            return None
+        if vote.effect != {option_id: 1}:
+            return None
+        del state.pending[index]
+        self._buffered_vote_count -= 1
+        state.choices[client].discard(option_id)
+        for option in state.poll.options:
+            if option.id == option_id:
+                option.votes = max(0, option.votes - 1)
+        return state.poll.model_copy(deep=True)
+
+    async def _wait_for_vote_buffer(self) -> None:
+        """Backpressure: hold a vote while the buffer is full, asking for an
+        early flush, and fail it if flushing is failing."""
+        if self._buffered_vote_count < self._vote_queue_size:
+            return
+        async with self._vote_flushed:
+            while self._buffered_vote_count >= self._vote_queue_size:
+                self._vote_flush_requested.set()
+                await self._vote_flushed.wait()
+                failure = self._vote_flush_failure
+                if failure and self._buffered_vote_count >= self._vote_queue_size:
+                    raise SupabaseError(
+                        503,
+                        f"Vote buffer is full and flushing it failed: {failure}",
+                        "supabase_unavailable",
+                    )
+
+    async def _buffered_poll(self, session_id: str, poll_id: str) -> _BufferedPoll:
+        state = self._buffered_polls.get(poll_id)
+        while state is not None and state.settling is not None:
+            await state.settling.wait()
+            state = self._buffered_polls.get(poll_id)
+        now = time.monotonic()
+        if state is not None:
+            if state.poll.session_id != session_id:
+                raise NotFoundError("poll not found")
+            if now - state.loaded_at < VOTE_BUFFER_POLL_TTL_SECONDS:
+                return state
+        snapshot = await self._cached_snapshot(session_id)
+        poll = next((poll for poll in snapshot.polls if poll.id == poll_id), None)
+        if poll is None:
+            raise NotFoundError("poll not found")
+        state = self._buffered_polls.get(poll_id)
+        if state is None:
+            state = self._buffered_polls[poll_id] = _BufferedPoll(poll, now)
+        else:
+            stored = {option.id: option.votes for option in poll.options}
+            state.poll = poll
+            state.loaded_at = now
+            self._set_buffered_counts(state, stored)
+        return state
+
+    @staticmethod
+    def _set_buffered_counts(state: _BufferedPoll, stored: dict[str, int]) -> None:
+        """Stored counts plus the effect of the votes still buffered."""
+        unwritten: Counter[str] = Counter()
+        for vote in state.pending:
+            unwritten.update(vote.effect)
+        for option in state.poll.options:
+            votes = stored.get(option.id, option.votes)
+            option.votes = max(0, votes + unwritten[option.id])
+
+    async def _flush_votes_periodically(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._vote_flush_requested.wait(), self._vote_flush_seconds
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._vote_flush_requested.clear()
+            await self._flush_votes()
+
+    async def _flush_votes(self) -> None:
+        """Write every buffered vote, oldest first. Votes that can't be
+        written stay buffered for the next flush."""
+        async with self._vote_flush_lock:
+            batch = [
+                (poll_id, state, state.pending)
+                for poll_id, state in self._buffered_polls.items()
+                if state.pending
+            ]
+            for _, state, _ in batch:
+                state.pending = []
+            votes = [vote for _, _, pending in batch for vote in pending]
+            written, stored_polls = await self._write_votes(
+                [vote.args for vote in votes]
+            )
+            self._buffered_vote_count -= written
+
+            unwritten = {id(vote) for vote in votes[written:]}
+            sessions: set[str] = set()
+            for poll_id, state, pending in batch:
+                kept = [vote for vote in pending if id(vote) in unwritten]
+                state.pending = kept + state.pending
+                if len(kept) == len(pending):
+                    continue
+                sessions.add(state.poll.session_id)
+                stored = stored_polls.get(poll_id)
+                if stored is None:
+                    # Rejected or deleted: check it again on the next vote.
+                    state.loaded_at = float("-inf")
+                    continue
+                try:
+                    state.poll.status = PollStatus(stored.get("status"))
+                except ValueError:
+                    state.loaded_at = float("-inf")
+                options = stored.get("options")
+                self._set_buffered_counts(
+                    state,
+                    {
+                        str(option.get("id")): int(option.get("votes") or 0)
+                        for option in (options if isinstance(options, list) else [])
+                    },
+                )
+            for session_id in sessions:
+                self._invalidate_session_snapshot(session_id)
+
+            idle_since = time.monotonic() - 60 * VOTE_BUFFER_POLL_TTL_SECONDS
+            for poll_id, state in list(self._buffered_polls.items()):
+                if not state.pending and state.loaded_at < idle_since:
+                    del self._buffered_polls[poll_id]
+        async with self._vote_flushed:
+            self._vote_flushed.notify_all()
+
+    async def _write_votes(
+        self, votes: list[dict[str, str | None]]
+    ) -> tuple[int, dict[str, dict[str, Any]]]:
+        """Write votes in order through vote_poll_batch, or one
+        vote_poll_atomic call each while that is missing. Returns how many
+        were written before any failure, and the stored state of the polls
+        they touched. Failures are logged and kept for waiting voters."""
+        written = 0
+        stored_polls: dict[str, dict[str, Any]] = {}
+        try:
+            while written < len(votes):
+                chunk = votes[written : written + VOTE_FLUSH_BATCH_SIZE]
+                found, payload = await self._optional_rpc(
+                    "vote_poll_batch", {"p_votes": chunk}
+                )
+                if found:
+                    if not isinstance(payload, dict):
+                        raise SupabaseError(500, "vote_poll_batch returned an invalid payload")
+                    polls = payload.get("polls")
+                    for poll in polls if isinstance(polls, list) else []:
+                        stored_polls[str(poll.get("id"))] = poll
+                    written += len(chunk)
+                    continue
+                vote = votes[written]
+                try:
+                    payload = await self._rpc(
+                        "vote_poll_atomic", {f"p_{key}": value for key, value in vote.items()}
+                    )
+                except SupabaseError as exc:
+                    # Rejected like vote_poll_batch would: poll closed or gone.
+                    if exc.code not in ("P0001", "P0002"):
+                        raise
+                else:
+                    if isinstance(payload, dict):
+                        stored_polls[str(payload.get("id"))] = payload
+                written += 1
+        except Exception as exc:
+            logger.exception(
+                "Writing buffered votes failed; %d stay buffered", len(votes) - written
+            )
+            self._vote_flush_failure = str(exc) or exc.__class__.__name__
+        else:
+            self._vote_flush_failure = None
+        return written, stored_polls
+
+    async def _settle_buffered_votes(self, poll_id: str) -> None:
+        """Write a poll's buffered votes before it is changed another way,
+        and forget its cached state. Votes for the poll arriving meanwhile
+        wait, then check against the changed poll."""
+        state = self._buffered_polls.get(poll_id)
+        if state is None:
+            return
+        if state.settling is not None:
+            await state.settling.wait()
+            return await self._settle_buffered_votes(poll_id)
+        state.settling = asyncio.Event()
+        try:
+            # Flushing at least once also waits out a flush that is already
+            # writing this poll's votes.
+            while True:
+                await self._flush_votes()
+                if not state.pending:
+                    break
+                if self._vote_flush_failure is not None:
+                    raise SupabaseError(
+                        503,
+                        "Buffered votes for this poll could not be written: "
+                        f"{self._vote_flush_failure}",
+                        "supabase_unavailable",
+                    )
+            if self._buffered_polls.get(poll_id) is state:
+                del self._buffered_polls[poll_id]
+        finally:
+            state.settling.set()
+            state.settling = None
+
+    async def _flush_buffered_votes_for_read(self) -> None:
+        """Stats count voters in the database, so they write buffered votes
+        first."""
+        if self._buffered_vote_count:
+            await self._flush_votes()
+
+    def _overlay_buffered_votes(self, snapshot: SessionSnapshot) -> None:
+        """Show the counts voters were answered with in snapshots too."""
+        for poll in snapshot.polls:
+            state = self._buffered_polls.get(poll.id)
+            if state is None:
+                continue
+            counts = {option.id: option.votes for option in state.poll.options}
+            for option in poll.options:
+                option.votes = counts.get(option.id, option.votes)
+
     async def remove_poll_vote(
         self,
         session_id: str,
@@ -1326,7 +1847,24 @@ class SupabaseStore:
         """Calls the remove_poll_vote_atomic RPC. Same payload shape as
         vote_poll so the audience toggle path treats add and remove
         identically downstream.
+
+        In write-behind mode a vote still in the buffer is cancelled there
+        instead; the buffer is only written first when the client has other
+        unwritten votes on the poll, so the removal lands after them.
         """
+        client = (client_id or "").strip() or None
+        state = self._buffered_polls.get(poll_id)
+        while state is not None and state.settling is not None:
+            await state.settling.wait()
+            state = self._buffered_polls.get(poll_id)
+        if state is not None:
+            cancelled = self._cancel_buffered_vote(state, session_id, option_id, client)
+            if cancelled is not None:
+                return cancelled
+            if client is None or self._vote_flush_lock.locked() or any(
+                vote.args["client_id"] == client for vote in state.pending
+            ):
+                await self._settle_buffered_votes(poll_id)
         try:
             payload = await self._rpc(
                 "remove_poll_vote_atomic",
@@ -1353,6 +1891,13 @@ class SupabaseStore:
         option_rows = options if isinstance(options, list) else []
         poll_data = {key: value for key, value in payload.items() if key != "options"}
         self._invalidate_session_snapshot(session_id)
+        state = self._buffered_polls.get(poll_id)
+        if state is not None and client is not None:
+            state.choices.get(client, set()).discard(option_id)
+            self._set_buffered_counts(
+                state,
+                {str(row.get("id")): int(row.get("votes") or 0) for row in option_rows},
+            )
         return self._to_poll(poll_data, option_rows)
 
     async def reset_poll_votes(
@@ -1364,6 +1909,7 @@ class SupabaseStore:
         reset instead of being treated as already-voted.
         """
         await self.get_session(session_id, user_id)
+        await self._settle_buffered_votes(poll_id)
         rows = await self._select(
             "polls",
             {
@@ -1385,8 +1931,17 @@ class SupabaseStore:
             "poll_votes",
             params={"poll_id": f"eq.{poll_id}"},
         )
-        options = await self._select(
-            "poll_options",
+        try:
+            await self._request(
+                "DELETE",
+                "poll_option_vote_shards",
+                params={"poll_id": f"eq.{poll_id}"},
+            )
+        except SupabaseError as exc:
+            # Counters aren't sharded until sql/poll_option_vote_shards.sql.
+            if exc.code not in MISSING_RELATION_CODES:
+                raise
+        options = await self._select_poll_options(
             {"select": "*", "poll_id": f"eq.{poll_id}", "order": "position.asc"},
         )
         self._invalidate_session_snapshot(session_id)
@@ -1394,6 +1949,7 @@ class SupabaseStore:
 
     async def delete_poll(self, session_id: str, poll_id: str, user_id: str) -> None:
         await self.get_session(session_id, user_id)
+        await self._settle_buffered_votes(poll_id)
         existing = await self._select(
             "polls",
             {
@@ -1413,6 +1969,14 @@ class SupabaseStore:
 
     async def snapshot(
         self, session_id: str, viewer_user_id: str | None = None
+    ) -> SessionSnapshot:
+        snapshot = await self._cached_snapshot(session_id, viewer_user_id)
+        if self._buffered_polls:
+            self._overlay_buffered_votes(snapshot)
+        return snapshot
+
+    async def _cached_snapshot(
+        self, session_id: str, viewer_user_id: str | None = None
     ) -> SessionSnapshot:
         cache_key = (session_id, viewer_user_id)
         now = time.monotonic()
@@ -1838,5 +2402,34 @@ class SupabaseStore:
             )
         return restored
 
-    async def record_activity(self, session_id: str, activity: object) -> None:
+    def memory_stats(self) -> dict[str, object]:
+        if self._vote_flush_seconds <= 0:
+            return {}
+        return {
+            "buffered_votes": self._buffered_vote_count,
+            "buffered_polls": len(self._buffered_polls),
+        }
+
+    async def snapshot_version(self, session_id: str) -> None:
+        # Writes can come from other processes, so there is no local
+        # version to key a cache on; snapshot() has its own TTL cache.
         return None
+
+    async def start(self) -> None:
+        return None
+
+    async def close(self) -> None:
+        task, self._vote_flush_task = self._vote_flush_task, None
+        if task is not None:
+            # Not mid-flush: a cancelled write may or may not have landed.
+            async with self._vote_flush_lock:
+                task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        if self._buffered_vote_count:
+            await self._flush_votes()
+            if self._buffered_vote_count:
+                logger.error(
+                    "Dropping %d buffered votes that could not be written",
+                    self._buffered_vote_count,
+                )
+        await self._client.aclose()
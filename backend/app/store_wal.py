@@ -0,0 +1,296 @@
+"""Write-ahead log that lets ``InMemoryStore`` survive a restart.
+
+Each store write appends one or more records, ``[kind, *fields]`` JSON
+lists, one per line. Records carry resulting state rather than the
+operation ("this poll now looks like X", "client C's votes on poll P are
+now H"), so applying one twice is harmless. That makes recovery simple:
+load the newest snapshot, replay every WAL segment written since, and
+ignore any overlap between the two.
+
+Durability is group-committed. Appends only buffer; a flusher task writes
+the buffer and fsyncs it once per ``group_commit_seconds`` window, and
+writers wait for the batch holding their records after their store lock
+is released, so one fsync covers every write that landed in the window.
+
+Every ``snapshot_every`` records the log is compacted. The store's full
+state is captured as the same kind of records into ``snapshot-<n>.jsonl``
+while appends move on to ``wal-<n>.log``. Older segments and snapshots are
+deleted once the new snapshot is on disk, so a crash mid-compaction
+recovers from the previous pair. A torn final line is skipped on replay.
+
+A failed write keeps its records buffered and is retried every
+``retry_seconds`` on a fresh segment, since the failed one may end in a
+torn line. Until a retry lands the log fails closed: ``check`` refuses new
+writes, and writers whose records were in the failed batch keep waiting,
+since their change is applied in memory and lands with the retry. Only
+``close`` gives up on a batch it can't write and hands them the error.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from typing import Any, Callable, Iterable, Iterator
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+
+logger = logging.getLogger("prezo.store")
+
+Record = list[Any]
+
+_FILE_NAME = re.compile(r"^(wal|snapshot)-(\d+)\.(?:log|jsonl)$")
+
+
+class WalUnavailableError(Exception):
+    """The log can't write right now, so the store takes no writes."""
+
+
+def encode_record(record: Record) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(record) + b"\n"
+    return (json.dumps(record, separators=(",", ":"), default=_json_default) + "\n").encode()
+
+
+def decode_record(line: bytes) -> Record:
+    return orjson.loads(line) if orjson is not None else json.loads(line)
+
+
+def _json_default(value: Any) -> Any:
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    raise TypeError(f"cannot encode {type(value).__name__}")
+
+
+class WriteAheadLog:
+    def __init__(
+        self,
+        directory: str,
+        *,
+        group_commit_seconds: float = 0.002,
+        fsync: bool = True,
+        snapshot_every: int = 100_000,
+        retry_seconds: float = 1.0,
+    ) -> None:
+        self.directory = directory
+        self.group_commit_seconds = group_commit_seconds
+        self.fsync = fsync
+        self.snapshot_every = snapshot_every
+        self.retry_seconds = retry_seconds
+        # The last write failure, until a write succeeds again.
+        self.error: Exception | None = None
+        # Returns the store's full state as records; set by the store.
+        self.capture: Callable[[], Iterable[Record]] | None = None
+        self.records = 0
+        self.durable = 0
+        self.batches = 0
+        self.bytes_written = 0
+        self.snapshots = 0
+        self.last_commit_ms = 0.0
+        self._since_snapshot = 0
+        self._buffer: list[bytes] = []
+        self._waiters: list[tuple[int, asyncio.Future[None]]] = []
+        self._pending = asyncio.Event()
+        self._flusher: asyncio.Task[None] | None = None
+        self._compaction: asyncio.Task[None] | None = None
+        self._closing = False
+        self._file = None
+        self._segment = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def replay(self) -> Iterator[Record]:
+        """Records of the newest snapshot, then of every segment since, in
+        order. Appending starts on a fresh segment once this is exhausted."""
+        snapshots, segments = self._files()
+        start = snapshots[-1] if snapshots else 0
+        if snapshots:
+            yield from self._read(self._path("snapshot", start))
+        for number in segments:
+            if number >= start:
+                yield from self._read(self._path("wal", number))
+        # Never append after a possibly torn last line.
+        self._segment = max([start, *segments], default=-1) + 1
+        self._file = open(self._path("wal", self._segment), "ab")
+
+    def append(self, record: Record) -> None:
+        self._buffer.append(encode_record(record))
+        self.records += 1
+        self._since_snapshot += 1
+        self._pending.set()
+        if self._flusher is None:
+            self._flusher = asyncio.get_running_loop().create_task(self._run())
+
+    def check(self) -> None:
+        """Raise unless the log is taking writes."""
+        if self.error is not None:
+            raise WalUnavailableError(f"Store WAL write failed: {self.error}")
+
+    async def wait(self, position: int | None = None) -> None:
+        """Until the first ``position`` records (default: all appended so
+        far) are on disk."""
+        position = self.records if position is None else position
+        if self.durable >= position:
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((position, future))
+        await future
+
+    async def close(self) -> None:
+        self._closing = True
+        self._pending.set()
+        if self._flusher is not None:
+            await self._flusher
+            self._flusher = None
+        if self._compaction is not None:
+            await self._compaction
+        try:
+            await self._flush()
+        except Exception as exc:
+            # Nothing retries after this, so the buffered writes are lost.
+            self._settle(self.records, exc)
+            raise
+        finally:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "records": self.records,
+            "durable": self.durable,
+            "batches": self.batches,
+            "bytes_written": self.bytes_written,
+            "snapshots": self.snapshots,
+            "segment": self._segment,
+            "last_commit_ms": round(self.last_commit_ms, 3),
+            "buffered": len(self._buffer),
+            "error": None if self.error is None else str(self.error),
+        }
+
+    async def _run(self) -> None:
+        while not self._closing:
+            await self._pending.wait()
+            if self.group_commit_seconds > 0 and not self._closing:
+                await asyncio.sleep(self.group_commit_seconds)
+            try:
+                await self._flush()
+            except Exception:
+                logger.exception(
+                    "Store WAL write failed; retrying in %.1f s", self.retry_seconds
+                )
+                await asyncio.sleep(self.retry_seconds)
+                self._pending.set()
+                continue
+            if (
+                self._since_snapshot >= self.snapshot_every
+                and self.capture is not None
+                and self._compaction is None
+            ):
+                self._start_compaction()
+
+    async def _flush(self) -> None:
+        self._pending.clear()
+        if not self._buffer:
+            return
+        data, self._buffer = b"".join(self._buffer), []
+        upto = self.records
+        started = time.perf_counter()
+        try:
+            if self.error is not None:
+                self._next_segment()
+            await asyncio.to_thread(self._write, self._file, data)
+        except Exception as exc:
+            self._buffer.insert(0, data)
+            self.error = exc
+            raise
+        self.error = None
+        self.durable = upto
+        self.batches += 1
+        self.bytes_written += len(data)
+        self.last_commit_ms = (time.perf_counter() - started) * 1000
+        self._settle(upto, None)
+
+    def _settle(self, upto: int, error: Exception | None) -> None:
+        waiting = []
+        for position, future in self._waiters:
+            if position > upto:
+                waiting.append((position, future))
+            elif not future.done():
+                if error is None:
+                    future.set_result(None)
+                else:
+                    future.set_exception(error)
+        self._waiters = waiting
+
+    def _start_compaction(self) -> None:
+        # Captured between awaits, so it is a consistent image of the store.
+        # Records appended from here on go to the new segment; those already
+        # reflected in the capture replay harmlessly.
+        lines = [encode_record(record) for record in self.capture()]
+        self._next_segment()
+        self._since_snapshot = 0
+        self._compaction = asyncio.get_running_loop().create_task(
+            self._write_snapshot(self._segment, lines)
+        )
+
+    async def _write_snapshot(self, number: int, lines: list[bytes]) -> None:
+        try:
+            await asyncio.to_thread(self._write_snapshot_file, number, lines)
+            self.snapshots += 1
+            snapshots, segments = self._files()
+            for kind, numbers in (("snapshot", snapshots), ("wal", segments)):
+                for old in numbers:
+                    if old < number:
+                        os.unlink(self._path(kind, old))
+        except Exception:
+            logger.exception("Store WAL snapshot failed")
+        finally:
+            self._compaction = None
+
+    def _next_segment(self) -> None:
+        self._segment += 1
+        self._file.close()
+        self._file = open(self._path("wal", self._segment), "ab")
+
+    def _write(self, file, data: bytes) -> None:
+        file.write(data)
+        file.flush()
+        if self.fsync:
+            os.fsync(file.fileno())
+
+    def _write_snapshot_file(self, number: int, lines: list[bytes]) -> None:
+        path = self._path("snapshot", number)
+        with open(path + ".tmp", "wb") as file:
+            file.writelines(lines)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(path + ".tmp", path)
+
+    def _files(self) -> tuple[list[int], list[int]]:
+        snapshots: list[int] = []
+        segments: list[int] = []
+        for name in os.listdir(self.directory):
+            match = _FILE_NAME.match(name)
+            if match:
+                numbers = snapshots if match.group(1) == "snapshot" else segments
+                numbers.append(int(match.group(2)))
+        return sorted(snapshots), sorted(segments)
+
+    def _path(self, kind: str, number: int) -> str:
+        suffix = "jsonl" if kind == "snapshot" else "log"
+        return os.path.join(self.directory, f"{kind}-{number:08d}.{suffix}")
+
+    @staticmethod
+    def _read(path: str) -> Iterator[Record]:
+        with open(path, "rb") as file:
+            for line in file:
+                if not line.endswith(b"\n"):
+                    logger.warning("Ignoring torn record at the end of %s", path)
+                    return
+                yield decode_record(line)
@@ -0,0 +1,134 @@
+"""Compact vote histories for ``InMemoryStore``.
+
+Client ids are interned per session (``ClientIds``), so an audience
+member's id string is held once per session rather than once per question
+and poll they vote on. Question voters are then a sorted ``array('I')`` of
+those small ints, 4 bytes a vote, and a poll's history is one option
+bitmask per client (bit ``i`` is the poll's ``i``-th option, 0 means no
+vote) packed into an array indexed by client: 1 byte per client for polls
+of up to 8 options, widening only if a poll grows past that.
+"""
+
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left
+from typing import Iterable, Iterator
+
+# Mask array typecodes by the number of options they can hold; past the
+# last one masks fall back to a list of Python ints.
+_MASK_TYPES = (("B", 8), ("H", 16), ("Q", 64))
+
+
+class ClientIds:
+    __slots__ = ("_index", "names")
+
+    def __init__(self) -> None:
+        self._index: dict[str, int] = {}
+        # Position i holds the id interned as i.
+        self.names: list[str] = []
+
+    def intern(self, client_id: str) -> int:
+        index = self._index.get(client_id)
+        if index is None:
+            index = self._index[client_id] = len(self.names)
+            self.names.append(client_id)
+        return index
+
+    def get(self, client_id: str) -> int | None:
+        return self._index.get(client_id)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+class QuestionVoters:
+    """Set of interned client ids, kept as a sorted int array."""
+
+    __slots__ = ("_ids",)
+
+    def __init__(self, ids: Iterable[int] = ()) -> None:
+        self._ids = array("I", sorted(set(ids)))
+
+    def add(self, index: int) -> bool:
+        """Add ``index``; False if it was already there."""
+        ids = self._ids
+        at = bisect_left(ids, index)
+        if at < len(ids) and ids[at] == index:
+            return False
+        ids.insert(at, index)
+        return True
+
+    def __contains__(self, index: int) -> bool:
+        ids = self._ids
+        at = bisect_left(ids, index)
+        return at < len(ids) and ids[at] == index
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._ids)
+
+
+class PollHistories:
+    """Option bitmask per interned client id for one poll."""
+
+    __slots__ = ("_masks", "_bits", "_count")
+
+    def __init__(self, options: int) -> None:
+        self._masks: array | list[int] = array("B")
+        self._bits = 8
+        self._count = 0
+        self.ensure_options(options)
+
+    def ensure_options(self, options: int) -> None:
+        """Make room for masks over ``options`` options."""
+        if options <= self._bits:
+            return
+        for typecode, bits in _MASK_TYPES:
+            if options <= bits:
+                self._masks = array(typecode, self._masks)
+                self._bits = bits
+                return
+        self._masks = list(self._masks)
+        self._bits = options
+
+    def get(self, index: int) -> int:
+        masks = self._masks
+        return masks[index] if index < len(masks) else 0
+
+    def set(self, index: int, mask: int) -> None:
+        masks = self._masks
+        if index >= len(masks):
+            if not mask:
+                return
+            masks.extend([0] * (index + 1 - len(masks)))
+        previous = masks[index]
+        masks[index] = mask
+        self._count += (mask != 0) - (previous != 0)
+
+    def items(self) -> Iterator[tuple[int, int]]:
+        """(client index, mask) for every client with a vote."""
+        return ((index, mask) for index, mask in enumerate(self._masks) if mask)
+
+    def remove_options(self, positions: Iterable[int]) -> list[int]:
+        """Drop the options at ``positions``, shifting later options' bits
+        down; returns the clients left with no vote."""
+        removed = sorted(positions, reverse=True)
+        emptied = []
+        masks = self._masks
+        for index, mask in enumerate(masks):
+            if not mask:
+                continue
+            for position in removed:
+                low = mask & ((1 << position) - 1)
+                mask = ((mask >> (position + 1)) << position) | low
+            masks[index] = mask
+            if not mask:
+                emptied.append(index)
+        self._count -= len(emptied)
+        return emptied
+
+    def __len__(self) -> int:
+        return self._count
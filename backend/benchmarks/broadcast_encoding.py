@@ -0,0 +1,113 @@
+"""CPU per broadcast with encode-once frames vs per-recipient json.dumps.
+
+Run from backend/:  python benchmarks/broadcast_encoding.py
+
+"shared" drives the real ConnectionManager: one serialization per
+broadcast, the same text handed to every socket. "per-recipient" adds what
+the old send_json path cost on top: Starlette's json.dumps of the frame
+dict once per socket. Sockets are no-ops, so the numbers are fan-out CPU
+only (no network).
+"""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timezone
+import json
+from pathlib import Path
+import sys
+import time
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.models import SessionActivity
+from app.realtime import ConnectionManager
+from app.realtime_protocol import WireProtocol, encode_frame, orjson
+
+RECIPIENTS = (100, 1_000, 5_000)
+BROADCASTS = 50
+
+
+class NullSocket:
+    async def accept(self) -> None:
+        return None
+
+    async def send_text(self, data: str) -> None:
+        return None
+
+    async def close(self, code: int = 1000) -> None:
+        return None
+
+
+def vote_activity(votes: int) -> SessionActivity:
+    return SessionActivity(
+        type="poll_vote_updated",
+        payload={
+            "poll": {
+                "id": "poll-1",
+                "question": "Which feature should we build next?",
+                "status": "open",
+                "allow_multiple": False,
+                "options": [
+                    {"id": f"option-{index}", "label": f"Option {index}", "votes": votes + index}
+                    for index in range(6)
+                ],
+                "created_at": "2026-01-01T00:00:00Z",
+            }
+        },
+        ts=datetime.now(timezone.utc),
+    )
+
+
+async def shared_cpu_per_broadcast(recipients: int) -> float:
+    manager = ConnectionManager(queue_size=BROADCASTS + 1)
+
+    async def load() -> SessionActivity:
+        return SessionActivity(type="session_snapshot", payload={}, ts=datetime.now(timezone.utc))
+
+    for _ in range(recipients):
+        socket = NullSocket()
+        await manager.connect("s1", socket)
+        await manager.send_snapshot("s1", socket, load)
+    await asyncio.sleep(0)
+
+    start = time.process_time()
+    for votes in range(BROADCASTS):
+        await manager.broadcast("s1", vote_activity(votes))
+        # Let every writer drain before the next broadcast.
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+    elapsed = time.process_time() - start
+
+    for connections in list(manager._connections.values()):
+        for connection in list(connections.values()):
+            manager._stop(connection)
+    return elapsed / BROADCASTS
+
+
+def per_recipient_dumps_cpu(recipients: int) -> float:
+    frame = encode_frame(WireProtocol.json, vote_activity(1).model_dump(mode="json"), 1)
+    start = time.process_time()
+    for _ in range(BROADCASTS):
+        for _ in range(recipients):
+            json.dumps(frame, ensure_ascii=False, separators=(",", ":"))
+    return (time.process_time() - start) / BROADCASTS
+
+
+async def main() -> None:
+    encoder = "orjson" if orjson is not None else "json"
+    print(f"encoder: {encoder}, {BROADCASTS} broadcasts per size")
+    print(f"{'recipients':>10}  {'shared ms':>10}  {'per-recipient ms':>16}  {'saved':>6}")
+    for recipients in RECIPIENTS:
+        shared = await shared_cpu_per_broadcast(recipients)
+        legacy = shared + per_recipient_dumps_cpu(recipients)
+        print(
+            f"{recipients:>10}  {shared * 1000:>10.2f}  {legacy * 1000:>16.2f}"
+            f"  {1 - shared / legacy:>6.0%}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,163 @@
+"""Votes/s on one hot poll through SupabaseStore, before and after sharding.
+
+Run from backend/:  python benchmarks/poll_vote_contention.py --label before
+                        [--supabase-url URL --supabase-key KEY] [--voters 5000]
+                        [--options 3] [--concurrency 64] [--output FILE]
+
+Meant for a local Supabase stack (``supabase start``: PostgREST in front of a
+local Postgres, at http://127.0.0.1:54321 by default) with supabase/schema.sql
+and the sql/ files applied. Run it once as ``--label before``, apply
+sql/poll_option_vote_shards.sql, and run it again as ``--label after``:
+
+- before, vote_poll_atomic locks the poll row for update and bumps the
+  option's row, so votes on the poll apply one at a time;
+- after, votes add to one of 16 counter rows per option under a shared poll
+  lock, and the totals view sums them.
+
+Each run creates a session with one open poll of ``--options`` options,
+then ``--voters`` clients each cast one vote, ``--concurrency`` at a time,
+with 60% of them on the first option so it is the hot row. Reports votes/s
+and p50/p99 latency, checks the stored totals add up to the votes cast, and
+records whether the shard table was there. The session is deleted at the
+end.
+
+``--standin`` runs against the local PostgREST stand-in instead, to check
+the script itself: it runs on SQLite, one request at a time, so its numbers
+say nothing about Postgres row locks.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+from pathlib import Path
+import platform
+import statistics
+import sys
+import time
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.models import PollStatus
+from app.store_supabase import SupabaseError, SupabaseStore
+from benchmarks.postgrest_standin import BASE_URL, PostgrestStandin
+
+HOST = "00000000-0000-0000-0000-0000000c0de0"
+LOCAL_SUPABASE_URL = "http://127.0.0.1:54321"
+
+
+def pick_option(voter: int, options: int) -> int:
+    """60% of voters on option 0, the rest spread over the others."""
+    if options == 1 or voter % 10 < 6:
+        return 0
+    return 1 + voter % (options - 1)
+
+
+async def run(store: SupabaseStore, args: argparse.Namespace) -> dict[str, object]:
+    session = await store.create_session("Vote contention", HOST)
+    try:
+        labels = [f"Option {index + 1}" for index in range(args.options)]
+        poll = await store.create_poll(session.id, "Which one?", labels, False, HOST)
+        await store.set_poll_status(session.id, poll.id, PollStatus.open, HOST)
+        option_ids = [option.id for option in poll.options]
+
+        latencies: list[float] = []
+        errors: list[str] = []
+        next_voter = iter(range(args.voters))
+
+        async def worker() -> None:
+            for voter in next_voter:
+                option_id = option_ids[pick_option(voter, args.options)]
+                start = time.perf_counter()
+                try:
+                    await store.vote_poll(session.id, poll.id, option_id, f"voter-{voter}")
+                except Exception as exc:
+                    errors.append(f"{exc.__class__.__name__}: {exc}")
+                    continue
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+
+        closed = await store.set_poll_status(session.id, poll.id, PollStatus.closed, HOST)
+        try:
+            shard_rows = len(
+                await store._select(
+                    "poll_option_vote_shards",
+                    {"select": "shard", "poll_id": f"eq.{poll.id}"},
+                )
+            )
+        except SupabaseError:
+            shard_rows = None
+    finally:
+        await store.delete_session(session.id, HOST)
+
+    cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else None
+    totals = [option.votes for option in closed.options]
+    return {
+        "label": args.label,
+        "voters": args.voters,
+        "options": args.options,
+        "concurrency": args.concurrency,
+        "votes": len(latencies),
+        "errors": len(errors),
+        "error": errors[0] if errors else None,
+        "seconds": round(elapsed, 3),
+        "votes_per_second": round(len(latencies) / elapsed, 1) if latencies else None,
+        "p50_ms": round(cuts[49] * 1000, 2) if cuts else None,
+        "p99_ms": round(cuts[98] * 1000, 2) if cuts else None,
+        "totals": totals,
+        "totals_match": sum(totals) == len(latencies),
+        # None: the shard table is missing (sql/poll_option_vote_shards.sql
+        # not applied).
+        "shard_rows": shard_rows,
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    if args.standin:
+        transport = PostgrestStandin().transport()
+        store = SupabaseStore(BASE_URL, "service-role-key", transport=transport)
+    elif args.supabase_key:
+        store = SupabaseStore(args.supabase_url, args.supabase_key)
+    else:
+        sys.exit("pass --supabase-key (or SUPABASE_SERVICE_ROLE_KEY), or --standin")
+    try:
+        result = await run(store, args)
+    finally:
+        await store.close()
+    result["target"] = "stand-in" if args.standin else args.supabase_url
+    result["python"] = platform.python_version()
+    print(
+        f"{result['label']}: {result['votes']} votes in {result['seconds']} s,"
+        f" {result['votes_per_second']} votes/s, p50 {result['p50_ms']} ms,"
+        f" p99 {result['p99_ms']} ms, totals {result['totals']}"
+        f" ({'match' if result['totals_match'] else 'MISMATCH'}),"
+        f" shard rows {result['shard_rows']}"
+    )
+    if result["errors"]:
+        print(f"{result['errors']} errors, first: {result['error']}")
+    output = args.output or f"poll_vote_contention_{args.label}.json"
+    with open(output, "w", encoding="utf-8") as handle:
+        json.dump(result, handle, indent=2)
+    print(f"wrote {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--label", default="run")
+    parser.add_argument(
+        "--supabase-url", default=os.environ.get("SUPABASE_URL", LOCAL_SUPABASE_URL)
+    )
+    parser.add_argument("--supabase-key", default=os.environ.get("SUPABASE_SERVICE_ROLE_KEY"))
+    parser.add_argument("--standin", action="store_true")
+    parser.add_argument("--voters", type=int, default=5000)
+    parser.add_argument("--options", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--output")
+    asyncio.run(main(parser.parse_args()))
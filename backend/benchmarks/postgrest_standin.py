@@ -0,0 +1,769 @@
+"""A local PostgREST stand-in, so SupabaseStore can run without a project.
+
+Serves the part of the PostgREST API that SupabaseStore uses, over an
+in-memory SQLite copy of supabase/schema.sql (plus the sql/ additions):
+
+- GET with ``select``, ``order``, ``limit``/``offset`` and ``eq``/``neq``/
+  ``gt``/``gte``/``lt``/``lte``/``in``/``is`` filters;
+- POST inserts, including ``resolution=merge-duplicates`` upserts with
+  ``on_conflict``;
+- PATCH and DELETE;
+- ``return=representation``;
+- the RPC functions in ``PostgrestStandin.functions``, which count poll
+  votes in sharded counter rows like sql/poll_option_vote_shards.sql.
+
+Each request runs in one transaction. Errors come back in PostgREST's JSON
+shape, carrying the Postgres error codes the store checks. ``jsonb`` columns
+and booleans round-trip as JSON types.
+
+It is an ASGI app: pass ``transport()`` to ``SupabaseStore(transport=...)``
+and no socket is needed; closing the store closes the stand-in. ``latency``
+sleeps before every request to stand in for the network round trip to a
+real project, and ``calls`` counts requests by method and path.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+import csv
+from datetime import datetime, timezone
+import json
+import random
+import sqlite3
+from typing import Any, Callable
+import uuid
+
+import httpx
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+
+BASE_URL = "http://postgrest.local"
+API_PREFIX = "/rest/v1/"
+
+SCHEMA = """
+create table sessions (
+  id text primary key,
+  user_id text not null,
+  code text not null unique,
+  title text,
+  status text not null default 'active',
+  allow_host_join integer not null default 0,
+  qna_open integer not null default 0,
+  qna_mode text not null default 'audience',
+  qna_prompt text,
+  qna_control_mode text not null default 'auto',
+  created_at text not null
+);
+create index sessions_user_id_idx on sessions (user_id);
+
+create table session_hosts (
+  session_id text not null references sessions(id) on delete cascade,
+  user_id text not null,
+  approved_by text,
+  created_at text not null,
+  primary key (session_id, user_id)
+);
+create index session_hosts_user_id_idx on session_hosts (user_id);
+
+create table saved_poll_game_themes (
+  id text primary key,
+  user_id text not null,
+  name text not null,
+  theme text not null,
+  created_at text not null,
+  updated_at text not null,
+  unique (user_id, name)
+);
+
+create table saved_poll_game_artifacts (
+  id text primary key,
+  user_id text not null,
+  name text not null,
+  kind text not null default 'poll',
+  html text not null,
+  artifact_package text,
+  last_prompt text,
+  last_answers text not null default '{}',
+  theme_snapshot text,
+  style_overrides text,
+  created_at text not null,
+  updated_at text not null,
+  unique (user_id, name)
+);
+
+create table saved_poll_game_artifact_versions (
+  id text primary key,
+  artifact_id text not null references saved_poll_game_artifacts(id) on delete cascade,
+  user_id text not null,
+  name text not null,
+  version integer not null,
+  html text not null,
+  artifact_package text,
+  last_prompt text,
+  last_answers text not null default '{}',
+  theme_snapshot text,
+  style_overrides text,
+  source text,
+  created_at text not null,
+  unique (artifact_id, version)
+);
+
+create table brand_profiles (
+  id text primary key,
+  user_id text not null,
+  name text not null,
+  source_type text not null default '',
+  source_filename text not null default '',
+  guidelines text not null default '{}',
+  raw_summary text not null default '',
+  prompt_brand_guidelines text not null default '',
+  brand_facts text not null default '{}',
+  created_at text not null,
+  updated_at text not null,
+  unique (user_id, name)
+);
+
+create table widget_preset_libraries (
+  user_id text primary key,
+  data text not null default '{}',
+  updated_at text not null
+);
+
+create table qna_prompts (
+  id text primary key,
+  session_id text not null references sessions(id) on delete cascade,
+  prompt text not null,
+  status text not null default 'closed',
+  mode text not null default 'auto',
+  created_at text not null
+);
+create index qna_prompts_session_id_idx on qna_prompts (session_id);
+
+create table questions (
+  id text primary key,
+  session_id text not null references sessions(id) on delete cascade,
+  prompt_id text references qna_prompts(id) on delete cascade,
+  text text not null,
+  status text not null default 'pending',
+  votes integer not null default 0,
+  created_at text not null
+);
+create index questions_session_id_idx on questions (session_id);
+create index questions_prompt_id_idx on questions (prompt_id);
+
+create table question_votes (
+  id text primary key,
+  question_id text not null references questions(id) on delete cascade,
+  client_id text not null,
+  created_at text not null,
+  unique (question_id, client_id)
+);
+
+create table polls (
+  id text primary key,
+  session_id text not null references sessions(id) on delete cascade,
+  question text not null,
+  status text not null default 'closed',
+  allow_multiple integer not null default 0,
+  mode text not null default 'auto',
+  created_at text not null
+);
+create index polls_session_id_idx on polls (session_id);
+
+create table poll_options (
+  id text primary key,
+  poll_id text not null references polls(id) on delete cascade,
+  label text not null,
+  votes integer not null default 0,
+  position integer not null default 0
+);
+create index poll_options_poll_id_idx on poll_options (poll_id);
+
+create table poll_votes (
+  id text primary key,
+  poll_id text not null references polls(id) on delete cascade,
+  option_id text not null references poll_options(id) on delete cascade,
+  client_id text not null,
+  created_at text not null,
+  unique (poll_id, client_id, option_id)
+);
+create index poll_votes_poll_client_idx on poll_votes (poll_id, client_id);
+
+create table poll_option_vote_shards (
+  option_id text not null references poll_options(id) on delete cascade,
+  shard integer not null,
+  poll_id text not null references polls(id) on delete cascade,
+  votes integer not null default 0,
+  primary key (option_id, shard)
+);
+create index poll_option_vote_shards_poll_id_idx on poll_option_vote_shards (poll_id);
+
+create view poll_option_vote_totals as
+select po.id, po.poll_id, po.label, po.position,
+       max(0, po.votes + coalesce(sum(s.votes), 0)) as votes
+  from poll_options po
+  left join poll_option_vote_shards s on s.option_id = po.id
+ group by po.id;
+"""
+# Counter rows per poll option (sql/poll_option_vote_shards.sql).
+VOTE_SHARDS = 16
+
+# Column types SQLite has no equivalent for, by column name (the names are
+# unambiguous across the schema).
+BOOLEAN_COLUMNS = frozenset({"allow_host_join", "qna_open", "allow_multiple"})
+JSON_COLUMNS = frozenset(
+    {
+        "theme",
+        "artifact_package",
+        "last_answers",
+        "theme_snapshot",
+        "style_overrides",
+        "guidelines",
+        "brand_facts",
+        "data",
+    }
+)
+
+COMPARISONS = {"eq": "=", "neq": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+RESERVED_PARAMS = frozenset({"select", "order", "limit", "offset", "on_conflict", "columns"})
+
+RpcFunction = Callable[[sqlite3.Connection, dict[str, Any]], Any]
+
+
+class PostgrestError(Exception):
+    def __init__(self, status_code: int, code: str, message: str) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+        self.code = code
+        self.message = message
+
+
+def _raise(code: str, message: str) -> PostgrestError:
+    # What PostgREST answers for a plpgsql ``raise exception ... using errcode``.
+    return PostgrestError(400, code, message)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _to_json(row: sqlite3.Row) -> dict[str, Any]:
+    data = dict(row)
+    for key, value in data.items():
+        if value is None:
+            continue
+        if key in BOOLEAN_COLUMNS:
+            data[key] = bool(value)
+        elif key in JSON_COLUMNS:
+            data[key] = json.loads(value)
+    return data
+
+
+def _to_sql(column: str, value: Any) -> Any:
+    if column in JSON_COLUMNS and value is not None:
+        return json.dumps(value)
+    return value
+
+
+def _add_votes(db: sqlite3.Connection, poll_id: str, option_id: str, delta: int) -> None:
+    db.execute(
+        "insert into poll_option_vote_shards (option_id, shard, poll_id, votes)"
+        " values (?, ?, ?, ?)"
+        " on conflict (option_id, shard) do update set votes = votes + excluded.votes",
+        (option_id, random.randrange(VOTE_SHARDS), poll_id, delta),
+    )
+
+
+def _poll_payload(db: sqlite3.Connection, poll: sqlite3.Row) -> dict[str, Any]:
+    options = db.execute(
+        "select id, label, votes from poll_option_vote_totals where poll_id = ?"
+        " order by position",
+        (poll["id"],),
+    ).fetchall()
+    return {
+        "id": poll["id"],
+        "session_id": poll["session_id"],
+        "question": poll["question"],
+        "status": poll["status"],
+        "allow_multiple": bool(poll["allow_multiple"]),
+        "created_at": poll["created_at"],
+        "options": [dict(option) for option in options],
+    }
+
+
+def _open_poll_option(
+    db: sqlite3.Connection, args: dict[str, Any]
+) -> tuple[sqlite3.Row, str | None]:
+    poll = db.execute(
+        "select * from polls where id = ? and session_id = ?",
+        (args.get("p_poll_id"), args.get("p_session_id")),
+    ).fetchone()
+    if poll is None:
+        raise _raise("P0002", "poll not found")
+    if poll["status"] != "open":
+        raise _raise("P0001", "poll is closed")
+    option = db.execute(
+        "select id from poll_options where id = ? and poll_id = ?",
+        (args.get("p_option_id"), poll["id"]),
+    ).fetchone()
+    if option is None:
+        raise _raise("P0002", "option not found")
+    client_id = (args.get("p_client_id") or "").strip() or None
+    return poll, client_id
+
+
+def vote_poll_atomic(db: sqlite3.Connection, args: dict[str, Any]) -> Any:
+    """supabase/schema.sql's vote_poll_atomic."""
+    poll, client_id = _open_poll_option(db, args)
+    poll_id, option_id = poll["id"], args["p_option_id"]
+    if client_id is not None:
+        if not poll["allow_multiple"]:
+            previous = [
+                row[0]
+                for row in db.execute(
+                    "select option_id from poll_votes where poll_id = ? and client_id = ?",
+                    (poll_id, client_id),
+                )
+            ]
+            if option_id in previous:
+                return _poll_payload(db, poll)
+            if previous:
+                db.execute(
+                    "delete from poll_votes where poll_id = ? and client_id = ?",
+                    (poll_id, client_id),
+                )
+                for previous_id in sorted(previous):
+                    _add_votes(db, poll_id, previous_id, -1)
+        inserted = db.execute(
+            "insert into poll_votes (id, poll_id, option_id, client_id, created_at)"
+            " values (?, ?, ?, ?, ?) on conflict do nothing",
+            (str(uuid.uuid4()), poll_id, option_id, client_id, _now()),
+        ).rowcount
+        if not inserted:
+            return _poll_payload(db, poll)
+    _add_votes(db, poll_id, option_id, 1)
+    return _poll_payload(db, poll)
+
+
+def remove_poll_vote_atomic(db: sqlite3.Connection, args: dict[str, Any]) -> Any:
+    """sql/remove_poll_vote_atomic.sql."""
+    poll, client_id = _open_poll_option(db, args)
+    if client_id is not None:
+        deleted = db.execute(
+            "delete from poll_votes where poll_id = ? and option_id = ? and client_id = ?",
+            (poll["id"], args["p_option_id"], client_id),
+        ).rowcount
+        if deleted:
+            _add_votes(db, poll["id"], args["p_option_id"], -1)
+    return _poll_payload(db, poll)
+
+
+def vote_question_atomic(db: sqlite3.Connection, args: dict[str, Any]) -> Any:
+    """sql/vote_question_atomic.sql."""
+    key = (args.get("p_question_id"), args.get("p_session_id"))
+    exists = db.execute("select 1 from questions where id = ? and session_id = ?", key)
+    if exists.fetchone() is None:
+        raise _raise("P0002", "question not found")
+    client_id = (args.get("p_client_id") or "").strip() or None
+    inserted = 1
+    if client_id is not None:
+        inserted = db.execute(
+            "insert into question_votes (id, question_id, client_id, created_at)"
+            " values (?, ?, ?, ?) on conflict (question_id, client_id) do nothing",
+            (str(uuid.uuid4()), key[0], client_id, _now()),
+        ).rowcount
+    if inserted:
+        db.execute("update questions set votes = votes + 1 where id = ? and session_id = ?", key)
+    return _to_json(
+        db.execute("select * from questions where id = ? and session_id = ?", key).fetchone()
+    )
+
+
+def vote_poll_batch(db: sqlite3.Connection, args: dict[str, Any]) -> Any:
+    """sql/vote_poll_batch.sql."""
+    votes = args.get("p_votes") or []
+    rejected = 0
+    for vote in votes:
+        try:
+            vote_poll_atomic(db, {f"p_{key}": value for key, value in vote.items()})
+        except PostgrestError:
+            rejected += 1
+    poll_ids = list(dict.fromkeys(vote.get("poll_id") for vote in votes))
+    polls = db.execute(
+        "select * from polls where id in (select value from json_each(?))",
+        (json.dumps(poll_ids),),
+    )
+    return {
+        "rejected": rejected,
+        "polls": [
+            {key: payload[key] for key in ("id", "status", "options")}
+            for payload in (_poll_payload(db, poll) for poll in polls)
+        ],
+    }
+
+
+def session_snapshot(db: sqlite3.Connection, args: dict[str, Any]) -> Any:
+    """sql/session_snapshot.sql."""
+    session_id = args.get("p_session_id")
+    session = db.execute("select * from sessions where id = ?", (session_id,)).fetchone()
+    if session is None:
+        return None
+
+    def newest_first(table: str) -> list[dict[str, Any]]:
+        rows = db.execute(
+            f"select * from {table} where session_id = ? order by created_at desc",
+            (session_id,),
+        )
+        return [_to_json(row) for row in rows]
+
+    polls = newest_first("polls")
+    for poll in polls:
+        options = db.execute(
+            "select id, label, votes from poll_option_vote_totals where poll_id = ?"
+            " order by position",
+            (poll["id"],),
+        )
+        poll["options"] = [dict(option) for option in options]
+    return {
+        "session": _to_json(session),
+        "questions": newest_first("questions"),
+        "prompts": newest_first("qna_prompts"),
+        "polls": polls,
+    }
+
+
+# Distinct voters and active activities (open polls, open prompts, an open
+# Q&A) of the sessions in the json array bound to the first parameter.
+SESSION_STATS_SQL = """
+select
+  s.id,
+  (
+    select count(distinct voters.client_id)
+      from (
+        select qv.client_id
+          from question_votes qv join questions q on q.id = qv.question_id
+         where q.session_id = s.id
+        union all
+        select pv.client_id
+          from poll_votes pv join polls p on p.id = pv.poll_id
+         where p.session_id = s.id
+      ) voters
+     where voters.client_id <> ''
+  ) as unique_participants,
+  (select count(*) from polls p where p.session_id = s.id and p.status = 'open')
+  + (select count(*) from qna_prompts qp where qp.session_id = s.id and qp.status = 'open')
+  + s.qna_open as active_activities,
+  s.status
+  from sessions s
+ where s.id in (select value from json_each(?))
+"""
+
+HOSTED_SESSION_IDS_SQL = """
+select id from sessions where user_id = ?
+union
+select session_id from session_hosts where user_id = ?
+"""
+
+
+def host_dashboard_stats(db: sqlite3.Connection, args: dict[str, Any]) -> Any:
+    """sql/host_stats.sql."""
+    user_id = args.get("p_user_id")
+    hosted = [row["id"] for row in db.execute(HOSTED_SESSION_IDS_SQL, (user_id, user_id))]
+    rows = db.execute(SESSION_STATS_SQL, (json.dumps(hosted),)).fetchall()
+    voters = db.execute(
+        "select count(distinct voters.client_id) from ("
+        " select qv.client_id from question_votes qv"
+        " join questions q on q.id = qv.question_id"
+        " where q.session_id in (select value from json_each(?))"
+        " union all"
+        " select pv.client_id from poll_votes pv"
+        " join polls p on p.id = pv.poll_id"
+        " where p.session_id in (select value from json_each(?))"
+        ") voters where voters.client_id <> ''",
+        (json.dumps(hosted), json.dumps(hosted)),
+    ).fetchone()[0]
+    return {
+        "active_sessions": sum(1 for row in rows if row["status"] == "active"),
+        "active_activities": sum(row["active_activities"] for row in rows),
+        "unique_participants": voters,
+    }
+
+
+def session_stats(db: sqlite3.Connection, args: dict[str, Any]) -> Any:
+    """sql/host_stats.sql."""
+    user_id = args.get("p_user_id")
+    hosted = {row["id"] for row in db.execute(HOSTED_SESSION_IDS_SQL, (user_id, user_id))}
+    requested = [sid for sid in args.get("p_session_ids") or [] if sid in hosted]
+    rows = db.execute(SESSION_STATS_SQL, (json.dumps(requested),))
+    return [
+        {
+            "session_id": row["id"],
+            "unique_participants": row["unique_participants"],
+            "active_activities": row["active_activities"],
+        }
+        for row in rows
+    ]
+
+
+class StandinTransport(httpx.ASGITransport):
+    """Closes the stand-in's database along with the client using it."""
+
+    def __init__(self, standin: PostgrestStandin) -> None:
+        super().__init__(app=standin)
+        self.standin = standin
+
+    async def aclose(self) -> None:
+        self.standin.close()
+
+
+class PostgrestStandin:
+    def __init__(self, *, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.calls: Counter[str] = Counter()
+        # Drop an entry to test a store against a database that lacks it.
+        self.functions: dict[str, RpcFunction] = {
+            "vote_poll_atomic": vote_poll_atomic,
+            "vote_poll_batch": vote_poll_batch,
+            "remove_poll_vote_atomic": remove_poll_vote_atomic,
+            "session_snapshot": session_snapshot,
+            "vote_question_atomic": vote_question_atomic,
+            "host_dashboard_stats": host_dashboard_stats,
+            "session_stats": session_stats,
+        }
+        self.db = sqlite3.connect(":memory:", isolation_level=None, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("pragma foreign_keys = on")
+        self.db.executescript(SCHEMA)
+        self._columns: dict[str, list[str]] = {}
+        self._primary_keys: dict[str, list[str]] = {}
+        tables = self.db.execute(
+            "select name from sqlite_master where type in ('table', 'view')"
+        )
+        for (table,) in tables.fetchall():
+            info = self.db.execute(f"pragma table_info({table})").fetchall()
+            self._columns[table] = [row["name"] for row in info]
+            self._primary_keys[table] = [
+                row["name"] for row in sorted(info, key=lambda row: row["pk"]) if row["pk"]
+            ]
+
+    def transport(self) -> StandinTransport:
+        return StandinTransport(self)
+
+    def close(self) -> None:
+        self.db.close()
+
+    @property
+    def request_count(self) -> int:
+        return sum(self.calls.values())
+
+    async def __call__(self, scope: dict[str, Any], receive: Any, send: Any) -> None:
+        request = Request(scope, receive)
+        body = await request.body()
+        path = request.url.path.removeprefix(API_PREFIX)
+        self.calls[f"{request.method} {path}"] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        prefer = {part.strip() for part in request.headers.get("prefer", "").split(",")}
+        try:
+            status, payload = self._handle(
+                request.method,
+                path,
+                request.query_params.multi_items(),
+                json.loads(body) if body else None,
+                prefer,
+            )
+        except PostgrestError as exc:
+            response: Response = JSONResponse(
+                {"code": exc.code, "message": exc.message, "details": None, "hint": None},
+                status_code=exc.status_code,
+            )
+        else:
+            # RPC results are always a JSON body, even null.
+            response = (
+                Response(status_code=status)
+                if payload is None and status != 200
+                else JSONResponse(payload, status_code=status)
+            )
+        await response(scope, receive, send)
+
+    def _handle(
+        self,
+        method: str,
+        path: str,
+        params: list[tuple[str, str]],
+        body: Any,
+        prefer: set[str],
+    ) -> tuple[int, Any]:
+        db = self.db
+        db.execute("begin")
+        try:
+            if path.startswith("rpc/") and method == "POST":
+                result = self._call(path.removeprefix("rpc/"), body or {})
+            else:
+                result = self._table(method, path, params, body, prefer)
+        except sqlite3.IntegrityError as exc:
+            db.execute("rollback")
+            message = str(exc)
+            if "UNIQUE" in message:
+                raise PostgrestError(409, "23505", f"duplicate key value: {message}") from exc
+            if "FOREIGN KEY" in message:
+                raise PostgrestError(409, "23503", message) from exc
+            if "NOT NULL" in message:
+                raise PostgrestError(400, "23502", message) from exc
+            raise PostgrestError(400, "23514", message) from exc
+        except sqlite3.Error as exc:
+            db.execute("rollback")
+            raise PostgrestError(400, "42601", str(exc)) from exc
+        except BaseException:
+            db.execute("rollback")
+            raise
+        db.execute("commit")
+        return result
+
+    def _call(self, name: str, args: dict[str, Any]) -> tuple[int, Any]:
+        function = self.functions.get(name)
+        if function is None:
+            raise PostgrestError(
+                404,
+                "PGRST202",
+                f"Could not find the function public.{name} in the schema cache",
+            )
+        return 200, function(self.db, args)
+
+    def _table(
+        self,
+        method: str,
+        table: str,
+        params: list[tuple[str, str]],
+        body: Any,
+        prefer: set[str],
+    ) -> tuple[int, Any]:
+        if table not in self._columns:
+            raise PostgrestError(404, "42P01", f'relation "public.{table}" does not exist')
+        options = {key: value for key, value in params if key in RESERVED_PARAMS}
+        where, args = self._where(
+            table, [(key, value) for key, value in params if key not in RESERVED_PARAMS]
+        )
+        represent = "return=representation" in prefer
+        if method == "GET":
+            sql = f"select {self._select(table, options.get('select', '*'))} from {table}{where}"
+            sql += self._order(table, options.get("order"))
+            if "limit" in options or "offset" in options:
+                limit, offset = int(options.get("limit", -1)), int(options.get("offset", 0))
+                sql += f" limit {limit} offset {offset}"
+            return 200, [_to_json(row) for row in self.db.execute(sql, args)]
+        if method == "POST":
+            rows = body if isinstance(body, list) else [body]
+            upsert = "resolution=merge-duplicates" in prefer
+            conflict = (
+                options["on_conflict"].split(",")
+                if "on_conflict" in options
+                else self._primary_keys[table]
+            )
+            created = [self._insert(table, row, conflict if upsert else None) for row in rows]
+            return 201, created if represent else None
+        if method == "PATCH":
+            values = {key: _to_sql(key, value) for key, value in (body or {}).items()}
+            if "updated_at" in self._columns[table]:
+                values.setdefault("updated_at", _now())
+            assignments = ", ".join(f"{self._column(table, key)} = ?" for key in values)
+            cursor = self.db.execute(
+                f"update {table} set {assignments}{where} returning *",
+                [*values.values(), *args],
+            )
+        elif method == "DELETE":
+            cursor = self.db.execute(f"delete from {table}{where} returning *", args)
+        else:
+            raise PostgrestError(405, "PGRST117", f"unsupported method {method}")
+        rows = [_to_json(row) for row in cursor.fetchall()]
+        return (200, rows) if represent else (204, None)
+
+    def _insert(
+        self, table: str, row: dict[str, Any], conflict: list[str] | None
+    ) -> dict[str, Any]:
+        columns = self._columns[table]
+        values = {self._column(table, key): _to_sql(key, value) for key, value in row.items()}
+        # The defaults SQLite can't express: gen_random_uuid() and now().
+        defaults: dict[str, Any] = {}
+        if "id" in columns and "id" not in values:
+            defaults["id"] = str(uuid.uuid4())
+        for column in ("created_at", "updated_at"):
+            if column in columns and column not in values:
+                defaults[column] = _now()
+        names = [*values, *defaults]
+        sql = (
+            f"insert into {table} ({', '.join(names)})"
+            f" values ({', '.join('?' for _ in names)})"
+        )
+        if conflict is not None:
+            # Only the columns sent are merged, plus the updated_at trigger.
+            updated = [key for key in values if key not in conflict]
+            if "updated_at" in defaults:
+                updated.append("updated_at")
+            assignments = ", ".join(
+                f"{key} = excluded.{key}" for key in updated or conflict[:1]
+            )
+            sql += f" on conflict ({', '.join(conflict)}) do update set {assignments}"
+        cursor = self.db.execute(f"{sql} returning *", [*values.values(), *defaults.values()])
+        return _to_json(cursor.fetchone())
+
+    def _column(self, table: str, column: str) -> str:
+        if column not in self._columns[table]:
+            raise PostgrestError(
+                400, "42703", f'column {table}.{column} does not exist'
+            )
+        return column
+
+    def _select(self, table: str, select: str) -> str:
+        if select.strip() == "*":
+            return "*"
+        return ", ".join(self._column(table, column.strip()) for column in select.split(","))
+
+    def _where(
+        self, table: str, filters: list[tuple[str, str]]
+    ) -> tuple[str, list[Any]]:
+        clauses: list[str] = []
+        args: list[Any] = []
+        for column, expression in filters:
+            column = self._column(table, column)
+            operator, _, value = expression.partition(".")
+            if operator in COMPARISONS:
+                clauses.append(f"{column} {COMPARISONS[operator]} ?")
+                args.append(self._value(column, value))
+            elif operator == "in":
+                inner = value.removeprefix("(").removesuffix(")")
+                values = next(csv.reader([inner])) if inner else []
+                clauses.append(f"{column} in ({', '.join('?' for _ in values)})")
+                args.extend(self._value(column, item) for item in values)
+            elif operator == "is" and value in ("null", "true", "false"):
+                clauses.append(
+                    f"{column} is null" if value == "null" else f"{column} = {int(value == 'true')}"
+                )
+            else:
+                raise PostgrestError(
+                    400, "PGRST100", f'"failed to parse filter ({expression})"'
+                )
+        return (" where " + " and ".join(clauses) if clauses else ""), args
+
+    def _value(self, column: str, value: str) -> Any:
+        if column in BOOLEAN_COLUMNS:
+            return int(value == "true")
+        return value
+
+    def _order(self, table: str, order: str | None) -> str:
+        if not order:
+            return ""
+        terms = []
+        for term in order.split(","):
+            column, *modifiers = term.split(".")
+            direction = "desc" if "desc" in modifiers else "asc"
+            # Postgres puts nulls last ascending and first descending.
+            nulls = "nullsfirst" in modifiers or (
+                direction == "desc" and "nullslast" not in modifiers
+            )
+            terms.append(
+                f"{self._column(table, column)} {direction}"
+                f" nulls {'first' if nulls else 'last'}"
+            )
+        return " order by " + ", ".join(terms)
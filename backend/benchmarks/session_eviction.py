@@ -0,0 +1,90 @@
+"""InMemoryStore footprint over many events, with and without session archiving.
+
+Run from backend/:  python benchmarks/session_eviction.py [--events 2000] [--participants 200]
+
+Each simulated event is a session with a five-option poll, 20 questions and
+``--participants`` clients voting on both, after which the event goes quiet
+and the (fake) clock moves on an hour. Without an archive every event stays
+in memory; with one, sessions idle for 30 minutes are archived on the next
+sweep. Prints the store's estimated footprint and process RSS as events
+accumulate; with archiving both should level off.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from pathlib import Path
+import sys
+import tempfile
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.models import PollStatus
+from app.store import InMemoryStore
+
+HOST = "bench-host"
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def run_event(store: InMemoryStore, participants: int) -> None:
+    session = await store.create_session("Event", HOST)
+    await store.set_qna_status(session.id, True, HOST)
+    poll = await store.create_poll(session.id, "Q?", list("ABCDE"), False, HOST)
+    await store.set_poll_status(session.id, poll.id, PollStatus.open, HOST)
+    questions = [
+        await store.create_question(session.id, f"Question {index} from the floor?")
+        for index in range(20)
+    ]
+    for index in range(participants):
+        client_id = f"{session.id[:8]}-client-{index}"
+        await store.vote_poll(session.id, poll.id, poll.options[index % 5].id, client_id)
+        await store.vote_question(session.id, questions[index % 20].id, client_id)
+
+
+async def run(label: str, events: int, participants: int, archive_dir: str | None) -> None:
+    clock = FakeClock()
+    store = InMemoryStore(
+        archive_dir=archive_dir, idle_session_seconds=1800, clock=clock
+    )
+    print(f"\n{label}")
+    print(f"{'events':>8}  {'live':>6}  {'archived':>8}  {'store MB':>9}  {'RSS MB':>7}")
+    step = max(1, events // 10)
+    for event in range(1, events + 1):
+        await run_event(store, participants)
+        clock.now += 3600
+        await store.evict_sessions()
+        if event % step == 0:
+            stats = store.memory_stats()
+            sessions = stats["sessions"]
+            rss = stats["rss_bytes"]
+            print(
+                f"{event:>8}  {sessions['live']:>6}  {sessions['archived']:>8}"
+                f"  {sessions['approx_bytes'] / 1e6:>9.1f}"
+                f"  {rss / 1e6 if rss else float('nan'):>7.1f}"
+            )
+    await store.close()
+
+
+async def main(events: int, participants: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        await run("archiving idle sessions", events, participants, directory)
+    # Last, so its growth doesn't inflate the other run's RSS.
+    await run("no archive", events, participants, None)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--participants", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.events, args.participants))
@@ -0,0 +1,434 @@
+"""The same store scenarios, run and timed on every backend.
+
+Run from backend/:  python benchmarks/store_backends.py [--scale 1.0] [--output store_backends.json]
+                    [--standin-latency-ms 1] [--supabase-url URL --supabase-key KEY]
+
+Backends:
+
+- InMemoryStore, with and without its fsynced WAL;
+- SqliteStore, with synchronous NORMAL and FULL;
+- SupabaseStore against the local PostgREST stand-in in postgrest_standin.py,
+  which adds ``--standin-latency-ms`` to every request as a network round
+  trip, writing each vote at once and with write-behind votes flushed every
+  200 ms;
+- SupabaseStore against a real project, when one is given. Each scenario
+  adds sessions to that project and leaves them there.
+
+Scenarios (client counts are at ``--scale 1``):
+
+- vote storm: 200 clients vote on one open poll, switching option on every
+  vote;
+- read mix: 200 clients read snapshots of a busy session. Every tenth
+  operation is a vote and every tenth a new question, so cached snapshots
+  keep going stale;
+- question flood: 200 clients post questions into one open Q&A and
+  upvote the top ten, some of them twice;
+- host stats: 20 host sockets ask for the dashboard and for 50-session
+  stats batches, for a host with 500 sessions.
+
+Reports ops/s, p50/p99 latency and database round trips per operation:
+
+- SupabaseStore: HTTP requests;
+- SqliteStore: operations handed to its database thread;
+- InMemoryStore: none.
+
+The table is printed and the results are written to ``--output`` as JSON.
+Every backend's end state is checked against InMemoryStore's;
+tests/test_store_backends.py runs the same scenarios at a small scale as a
+conformance test.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from dataclasses import dataclass
+import json
+import os
+from pathlib import Path
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Awaitable, Callable
+
+import httpx
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.models import PollStatus, QuestionStatus
+from app.store import InMemoryStore
+from app.store_sqlite import SqliteStore
+from app.store_supabase import SupabaseStore
+from benchmarks.postgrest_standin import BASE_URL, PostgrestStandin
+
+HOST = "00000000-0000-0000-0000-00000000b0b0"
+STATS_BATCH = 50
+WRITE_BEHIND_FLUSH_SECONDS = 0.2
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    clients: int
+    operations_per_client: int
+    # setup(store) -> state; operation(store, state, client, step);
+    # outcome(store, state) -> a comparable summary of the end state.
+    setup: Callable[[Any], Awaitable[Any]]
+    operation: Callable[[Any, Any, int, int], Awaitable[Any]]
+    outcome: Callable[[Any, Any], Awaitable[Any]]
+
+
+@dataclass(frozen=True)
+class Backend:
+    name: str
+    # open(directory) -> (store, round trips so far)
+    open: Callable[[str], tuple[Any, Callable[[], int]]]
+
+
+class CountingTransport(httpx.AsyncBaseTransport):
+    def __init__(self, transport: httpx.AsyncBaseTransport) -> None:
+        self.transport = transport
+        self.requests = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        return await self.transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+def summarize_snapshot(snapshot: Any) -> dict[str, Any]:
+    """The parts of a snapshot every backend should agree on, in an order
+    that does not depend on creation-time ties."""
+    return {
+        "qna_open": snapshot.session.qna_open,
+        "questions": sorted(
+            (question.text, question.status.value, question.votes)
+            for question in snapshot.questions
+        ),
+        "polls": sorted(
+            (poll.question, poll.status.value, [(o.label, o.votes) for o in poll.options])
+            for poll in snapshot.polls
+        ),
+    }
+
+
+async def open_poll(store: Any, session_id: str, labels: list[str]) -> tuple[str, list[str]]:
+    poll = await store.create_poll(session_id, "Which one?", labels, False, HOST)
+    await store.set_poll_status(session_id, poll.id, PollStatus.open, HOST)
+    return poll.id, [option.id for option in poll.options]
+
+
+def scenarios(scale: float = 1.0) -> list[Scenario]:
+    def scaled(count: int) -> int:
+        return max(2, round(count * scale))
+
+    async def vote_storm_setup(store: Any) -> tuple[str, str, list[str]]:
+        session = await store.create_session("Vote storm", HOST)
+        poll_id, option_ids = await open_poll(store, session.id, ["A", "B", "C"])
+        return session.id, poll_id, option_ids
+
+    async def vote_storm(store: Any, state: Any, client: int, step: int) -> None:
+        session_id, poll_id, option_ids = state
+        option_id = option_ids[(client + step) % len(option_ids)]
+        await store.vote_poll(session_id, poll_id, option_id, f"voter-{client}")
+
+    async def read_mix_setup(store: Any) -> tuple[str, list[tuple[str, list[str]]], list[str]]:
+        session = await store.create_session("Read mix", HOST)
+        await store.set_qna_status(session.id, True, HOST)
+        polls = [await open_poll(store, session.id, list("ABCDE")) for _ in range(3)]
+        questions = [
+            (await store.create_question(session.id, f"Seeded question {index}")).id
+            for index in range(20)
+        ]
+        return session.id, polls, questions
+
+    async def read_mix(store: Any, state: Any, client: int, step: int) -> None:
+        session_id, polls, _ = state
+        if step % 10 == 0:
+            poll_id, option_ids = polls[client % len(polls)]
+            option_id = option_ids[(client + step) % len(option_ids)]
+            await store.vote_poll(session_id, poll_id, option_id, f"reader-{client}")
+        elif step % 10 == 5:
+            await store.create_question(session_id, f"Question {client}-{step}")
+        else:
+            await store.snapshot(session_id)
+
+    async def question_flood_setup(store: Any) -> tuple[str, list[str]]:
+        session = await store.create_session("Question flood", HOST)
+        await store.set_qna_status(session.id, True, HOST)
+        questions = [
+            (await store.create_question(session.id, f"Top question {index}")).id
+            for index in range(10)
+        ]
+        return session.id, questions
+
+    async def question_flood(store: Any, state: Any, client: int, step: int) -> None:
+        session_id, questions = state
+        if step % 2 == 0:
+            await store.create_question(session_id, f"Question {client}-{step} from the floor")
+        else:
+            # Clients come back to the same few questions, so some upvotes
+            # are repeats that must not count.
+            question_id = questions[(client + step // 4) % len(questions)]
+            await store.vote_question(session_id, question_id, f"asker-{client}")
+
+    async def session_outcome(store: Any, state: Any) -> dict[str, Any]:
+        session_id = state if isinstance(state, str) else state[0]
+        stats = await store.session_session_stats(session_id, HOST)
+        return {
+            "snapshot": summarize_snapshot(await store.snapshot(session_id)),
+            "stats": stats.model_dump(),
+        }
+
+    async def host_stats_setup(store: Any) -> list[str]:
+        async def add_session(index: int) -> str:
+            session = await store.create_session(f"Talk {index}", HOST)
+            if index % 2 == 0:
+                poll_id, option_ids = await open_poll(store, session.id, ["Yes", "No"])
+                for voter in range(index % 5):
+                    await store.vote_poll(
+                        session.id, poll_id, option_ids[voter % 2], f"guest-{voter}"
+                    )
+            if index % 3 == 0:
+                await store.set_qna_status(session.id, True, HOST)
+                question = await store.create_question(session.id, "Anything else?")
+                await store.vote_question(session.id, question.id, f"guest-{index}")
+                await store.set_question_status(
+                    session.id, question.id, QuestionStatus.approved, HOST
+                )
+            return session.id
+
+        session_ids: list[str] = []
+        sessions = scaled(500)
+        for start in range(0, sessions, 50):
+            session_ids += await asyncio.gather(
+                *(add_session(index) for index in range(start, min(start + 50, sessions)))
+            )
+        return session_ids
+
+    async def host_stats(store: Any, session_ids: list[str], client: int, step: int) -> None:
+        if step % 2 == 0:
+            await store.host_dashboard_stats(HOST)
+        else:
+            start = (client * STATS_BATCH) % len(session_ids)
+            await store.batch_session_stats(session_ids[start : start + STATS_BATCH], HOST)
+
+    async def host_stats_outcome(store: Any, session_ids: list[str]) -> dict[str, Any]:
+        batch = await store.batch_session_stats(session_ids, HOST)
+        return {
+            "dashboard": (await store.host_dashboard_stats(HOST)).model_dump(),
+            "sessions": [batch[session_id].model_dump() for session_id in session_ids],
+        }
+
+    return [
+        Scenario("vote storm", scaled(200), 20, vote_storm_setup, vote_storm, session_outcome),
+        Scenario("read mix", scaled(200), 20, read_mix_setup, read_mix, session_outcome),
+        Scenario(
+            "question flood",
+            scaled(200),
+            10,
+            question_flood_setup,
+            question_flood,
+            session_outcome,
+        ),
+        Scenario(
+            "host stats", scaled(20), 4, host_stats_setup, host_stats, host_stats_outcome
+        ),
+    ]
+
+
+def backends(
+    *,
+    standin_latency: float = 0.0,
+    supabase_url: str | None = None,
+    supabase_key: str | None = None,
+) -> list[Backend]:
+    def memory(directory: str) -> tuple[Any, Callable[[], int]]:
+        return InMemoryStore(), lambda: 0
+
+    def memory_wal(directory: str) -> tuple[Any, Callable[[], int]]:
+        return InMemoryStore(wal_dir=os.path.join(directory, "wal")), lambda: 0
+
+    def sqlite(synchronous: str) -> Callable[[str], tuple[Any, Callable[[], int]]]:
+        def open_store(directory: str) -> tuple[Any, Callable[[], int]]:
+            store = SqliteStore(os.path.join(directory, "prezo.db"), synchronous=synchronous)
+            return store, lambda: store.memory_stats()["sqlite"]["operations"]
+
+        return open_store
+
+    def supabase(
+        url: str,
+        key: str,
+        transport: Callable[[], httpx.AsyncBaseTransport],
+        vote_flush_seconds: float = 0.0,
+    ) -> Callable[[str], tuple[Any, Callable[[], int]]]:
+        def open_store(directory: str) -> tuple[Any, Callable[[], int]]:
+            counting = CountingTransport(transport())
+            store = SupabaseStore(
+                url, key, transport=counting, vote_flush_seconds=vote_flush_seconds
+            )
+            return store, lambda: counting.requests
+
+        return open_store
+
+    def standin() -> httpx.AsyncBaseTransport:
+        return PostgrestStandin(latency=standin_latency).transport()
+
+    found = [
+        Backend("memory", memory),
+        Backend("memory + wal", memory_wal),
+        Backend("sqlite (normal)", sqlite("NORMAL")),
+        Backend("sqlite (full)", sqlite("FULL")),
+        Backend("supabase (stand-in)", supabase(BASE_URL, "service-role-key", standin)),
+        Backend(
+            "supabase (stand-in, write-behind)",
+            supabase(BASE_URL, "service-role-key", standin, WRITE_BEHIND_FLUSH_SECONDS),
+        ),
+    ]
+    if supabase_url and supabase_key:
+        found.append(
+            Backend(
+                "supabase", supabase(supabase_url, supabase_key, httpx.AsyncHTTPTransport)
+            )
+        )
+    return found
+
+
+async def run_scenario(backend: Backend, scenario: Scenario, directory: str) -> dict[str, Any]:
+    """Set up, time and summarize one scenario on a fresh store.
+
+    A failing operation is counted in ``errors`` (the first one is kept in
+    ``error``) and left out of the latencies, so one backend hitting a limit
+    doesn't stop the run.
+    """
+    store, round_trips = backend.open(directory)
+    latencies: list[float] = []
+    errors: list[str] = []
+    try:
+        state = await scenario.setup(store)
+
+        async def client(index: int) -> None:
+            for step in range(scenario.operations_per_client):
+                start = time.perf_counter()
+                try:
+                    await scenario.operation(store, state, index, step)
+                except Exception as exc:
+                    errors.append(f"{exc.__class__.__name__}: {exc}")
+                    continue
+                latencies.append(time.perf_counter() - start)
+
+        trips_before = round_trips()
+        start = time.perf_counter()
+        await asyncio.gather(*(client(index) for index in range(scenario.clients)))
+        elapsed = time.perf_counter() - start
+        trips = round_trips() - trips_before
+        try:
+            outcome = await scenario.outcome(store, state)
+        except Exception as exc:
+            outcome = {"error": f"{exc.__class__.__name__}: {exc}"}
+    finally:
+        trips_before = round_trips()
+        await store.close()
+    # Writes a store defers to close() (buffered votes) belong to the run.
+    trips += round_trips() - trips_before
+    result: dict[str, Any] = {
+        "backend": backend.name,
+        "scenario": scenario.name,
+        "operations": len(latencies),
+        "errors": len(errors),
+        "error": errors[0] if errors else None,
+        "seconds": round(elapsed, 4),
+        "ops_per_second": None,
+        "p50_ms": None,
+        "p99_ms": None,
+        "round_trips_per_operation": round(trips / (len(latencies) + len(errors)), 3),
+        "outcome": outcome,
+    }
+    if len(latencies) > 1:
+        cuts = statistics.quantiles(latencies, n=100)
+        result["ops_per_second"] = round(len(latencies) / elapsed, 1)
+        result["p50_ms"] = round(cuts[49] * 1000, 3)
+        result["p99_ms"] = round(cuts[98] * 1000, 3)
+    return result
+
+
+async def run_suite(
+    scenario_list: list[Scenario], backend_list: list[Backend], directory: str
+) -> list[dict[str, Any]]:
+    """Every scenario on every backend; the first backend is the reference
+    the others' outcomes are compared with (``matches_reference``)."""
+    results: list[dict[str, Any]] = []
+    for scenario in scenario_list:
+        reference = None
+        for backend in backend_list:
+            store_directory = os.path.join(directory, f"{len(results)}")
+            os.makedirs(store_directory)
+            result = await run_scenario(backend, scenario, store_directory)
+            if reference is None:
+                reference = result["outcome"]
+            result["matches_reference"] = result["outcome"] == reference
+            results.append(result)
+    return results
+
+
+async def main(args: argparse.Namespace) -> None:
+    backend_list = backends(
+        standin_latency=args.standin_latency_ms / 1000,
+        supabase_url=args.supabase_url,
+        supabase_key=args.supabase_key,
+    )
+    print(
+        f"{'scenario':>14}  {'backend':>20}  {'ops/s':>10}  {'p50 ms':>8}"
+        f"  {'p99 ms':>8}  {'trips/op':>8}  same"
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        results = await run_suite(scenarios(args.scale), backend_list, directory)
+    for result in results:
+        line = f"{result['scenario']:>14}  {result['backend']:>20}"
+        if result["ops_per_second"] is None:
+            line += f"  {'failed':>10}  {'':>8}  {'':>8}"
+        else:
+            line += (
+                f"  {result['ops_per_second']:>10,.0f}  {result['p50_ms']:>8.2f}"
+                f"  {result['p99_ms']:>8.2f}"
+            )
+        line += f"  {result['round_trips_per_operation']:>8.2f}"
+        line += f"  {'yes' if result['matches_reference'] else 'NO'}"
+        if result["errors"]:
+            line += f"  ({result['errors']} errors: {result['error'][:80]})"
+        if "error" in result["outcome"]:
+            line += f"  (end state unreadable: {result['outcome']['error'][:80]})"
+        print(line)
+        result["outcome_error"] = result.pop("outcome").get("error")
+    if not (args.supabase_url and args.supabase_key):
+        print("(real Supabase skipped: pass --supabase-url and --supabase-key)")
+    with open(args.output, "w", encoding="utf-8") as handle:
+        json.dump(
+            {
+                "scale": args.scale,
+                "standin_latency_ms": args.standin_latency_ms,
+                "python": platform.python_version(),
+                "sqlite": sqlite3.sqlite_version,
+                "results": results,
+            },
+            handle,
+            indent=2,
+        )
+    print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--output", default="store_backends.json")
+    parser.add_argument("--standin-latency-ms", type=float, default=1.0)
+    parser.add_argument("--supabase-url", default=os.environ.get("SUPABASE_URL"))
+    parser.add_argument("--supabase-key", default=os.environ.get("SUPABASE_SERVICE_ROLE_KEY"))
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,126 @@
+"""InMemoryStore per-call cost of votes and question deletes vs store size.
+
+Run from backend/:  python benchmarks/store_index_scaling.py [--questions-per-session 100]
+
+Fills the store with 10, 100 and 1000 sessions (100k questions at the top
+size by default). Each session has an open five-option poll, two prompts,
+and its questions split between audience Q&A and the prompts. Reports
+microseconds per call for a poll vote, a question vote, clearing one
+prompt's questions, deleting a prompt, and clearing audience questions.
+The deletes run on 100 sampled sessions. Every column should stay flat as
+the store grows.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from pathlib import Path
+import sys
+import time
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.models import PollStatus, QnaPromptStatus
+from app.store import InMemoryStore
+
+HOST = "bench-host"
+SAMPLE = 100
+
+
+async def fill(sessions: int, questions_per_session: int) -> tuple[InMemoryStore, list[dict]]:
+    store = InMemoryStore()
+    seeds = []
+    for _ in range(sessions):
+        session = await store.create_session("Bench", HOST)
+        await store.set_qna_status(session.id, True, HOST)
+        poll = await store.create_poll(session.id, "Q?", list("ABCDE"), False, HOST)
+        await store.set_poll_status(session.id, poll.id, PollStatus.open, HOST)
+        prompt_ids = []
+        for _ in range(2):
+            prompt = await store.create_qna_prompt(session.id, "P", HOST)
+            await store.set_qna_prompt_status(
+                session.id, prompt.id, QnaPromptStatus.open, HOST
+            )
+            prompt_ids.append(prompt.id)
+        question_ids = []
+        for index in range(questions_per_session):
+            prompt_id = (None, *prompt_ids)[index % 3]
+            question = await store.create_question(session.id, "Why?", prompt_id)
+            question_ids.append(question.id)
+        seeds.append(
+            {
+                "session_id": session.id,
+                "poll_id": poll.id,
+                "option_ids": [option.id for option in poll.options],
+                "prompt_ids": prompt_ids,
+                "question_ids": question_ids,
+            }
+        )
+    return store, seeds
+
+
+async def per_call(calls) -> float:
+    start = time.perf_counter()
+    for call in calls:
+        await call
+    return (time.perf_counter() - start) / len(calls) * 1_000_000
+
+
+async def measure(sessions: int, questions_per_session: int) -> dict[str, float]:
+    store, seeds = await fill(sessions, questions_per_session)
+    sample = seeds[:: max(1, sessions // SAMPLE)][:SAMPLE]
+    return {
+        "poll vote": await per_call(
+            [
+                store.vote_poll(
+                    seed["session_id"], seed["poll_id"], seed["option_ids"][i % 5], f"c{i}"
+                )
+                for seed in sample
+                for i in range(20)
+            ]
+        ),
+        "question vote": await per_call(
+            [
+                store.vote_question(seed["session_id"], qid, f"c{i}")
+                for seed in sample
+                for i, qid in enumerate(seed["question_ids"][:20])
+            ]
+        ),
+        "clear prompt": await per_call(
+            [
+                store.delete_prompt_questions(seed["session_id"], seed["prompt_ids"][0], HOST)
+                for seed in sample
+            ]
+        ),
+        "delete prompt": await per_call(
+            [
+                store.delete_qna_prompt(seed["session_id"], seed["prompt_ids"][1], HOST)
+                for seed in sample
+            ]
+        ),
+        "clear audience": await per_call(
+            [store.delete_audience_questions(seed["session_id"], HOST) for seed in sample]
+        ),
+    }
+
+
+async def main(questions_per_session: int) -> None:
+    print(f"{questions_per_session} questions per session; microseconds per call")
+    header = None
+    for sessions in (10, 100, 1000):
+        results = await measure(sessions, questions_per_session)
+        if header is None:
+            header = f"{'questions':>10}" + "".join(f"  {name:>14}" for name in results)
+            print(header)
+        row = f"{sessions * questions_per_session:>10,}"
+        print(row + "".join(f"  {value:>14.1f}" for value in results.values()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions-per-session", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(main(args.questions_per_session))
@@ -0,0 +1,91 @@
+"""InMemoryStore vote throughput vs number of live sessions, by lock layout.
+
+Run from backend/:  python benchmarks/store_lock_scaling.py [--voters 8] [--seconds 1] [--io-ms 1]
+
+Every session gets an open poll and ``--voters`` concurrent voters; each
+vote is ``vote_poll`` followed by an awaited ``--io-ms`` append held under
+the session lock (the shape of a durable write). "global" routes every
+session and user lock to the registry lock, as the store did before it
+had per-session locks; "per-session" is the store as shipped. With
+``--io-ms 0`` the sections never await and both layouts are CPU-bound.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from pathlib import Path
+import sys
+import time
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.models import PollStatus
+from app.store import InMemoryStore
+
+HOST = "bench-host"
+
+
+class JournalingStore(InMemoryStore):
+    def __init__(self, io_seconds: float) -> None:
+        super().__init__()
+        self.io_seconds = io_seconds
+
+    async def vote_poll(self, session_id, poll_id, option_id, client_id):
+        poll = await super().vote_poll(session_id, poll_id, option_id, client_id)
+        if self.io_seconds:
+            async with self._session_lock(session_id):
+                await asyncio.sleep(self.io_seconds)
+        return poll
+
+
+class GlobalLockStore(JournalingStore):
+    def _session_lock(self, session_id):
+        return self._lock
+
+    def _user_lock(self, user_id):
+        return self._lock
+
+
+async def measure(store_cls, sessions: int, voters: int, seconds: float, io_ms: float) -> float:
+    store = store_cls(io_ms / 1000)
+    polls = []
+    for _ in range(sessions):
+        session = await store.create_session("Bench", HOST)
+        poll = await store.create_poll(session.id, "Q?", ["A", "B"], True, HOST)
+        await store.set_poll_status(session.id, poll.id, PollStatus.open, HOST)
+        polls.append((session.id, poll.id, poll.options[0].id))
+
+    votes = 0
+    deadline = time.perf_counter() + seconds
+
+    async def voter(session_id, poll_id, option_id) -> None:
+        nonlocal votes
+        while time.perf_counter() < deadline:
+            # Anonymous votes: no per-client history, so every call counts.
+            await store.vote_poll(session_id, poll_id, option_id, None)
+            votes += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(voter(*poll) for poll in polls for _ in range(voters)))
+    return votes / (time.perf_counter() - start)
+
+
+async def main(voters: int, seconds: float, io_ms: float) -> None:
+    print(f"{voters} voters per session, {io_ms:g} ms awaited write per vote")
+    print(f"{'sessions':>8}  {'global votes/s':>15}  {'per-session votes/s':>20}")
+    for sessions in (1, 4, 16, 64, 256):
+        shared = await measure(GlobalLockStore, sessions, voters, seconds, io_ms)
+        split = await measure(JournalingStore, sessions, voters, seconds, io_ms)
+        print(f"{sessions:>8}  {shared:>15,.0f}  {split:>20,.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--voters", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=1.0)
+    parser.add_argument("--io-ms", type=float, default=1.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.voters, args.seconds, args.io_ms))
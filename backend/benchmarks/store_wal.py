@@ -0,0 +1,131 @@
+"""InMemoryStore vote throughput with and without the write-ahead log, and recovery time.
+
+Run from backend/:  python benchmarks/store_wal.py [--concurrency 256] [--mutations 1000000]
+
+Throughput: ``--concurrency`` voters each cast ``--votes-per-voter`` votes on
+one of 10 open polls, switching option every time so every vote is a real
+write. Runs with the WAL off, on without fsync, and on with fsync, and
+reports votes/s and fsyncs (batches) per vote; group commit should keep the
+fsync run within a small factor of the no-WAL run while fsyncing once per
+batch rather than once per vote.
+
+Recovery: logs ``--mutations`` votes across 100 sessions, then times
+building a fresh store from the directory, once with compaction off (the
+whole log is replayed) and once with the default snapshot interval (latest
+snapshot plus the tail after it).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+from pathlib import Path
+import sys
+import tempfile
+import time
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.models import PollStatus
+from app.store import InMemoryStore
+
+HOST = "bench-host"
+
+
+async def open_polls(store: InMemoryStore, sessions: int) -> list[tuple[str, str, list[str]]]:
+    polls = []
+    for _ in range(sessions):
+        session = await store.create_session("Bench", HOST)
+        poll = await store.create_poll(session.id, "Q?", list("ABCDE"), False, HOST)
+        await store.set_poll_status(session.id, poll.id, PollStatus.open, HOST)
+        polls.append((session.id, poll.id, [option.id for option in poll.options]))
+    return polls
+
+
+async def vote_storm(
+    store: InMemoryStore,
+    polls: list[tuple[str, str, list[str]]],
+    concurrency: int,
+    votes_per_voter: int,
+    offset: int = 0,
+) -> float:
+    async def voter(index: int) -> None:
+        session_id, poll_id, option_ids = polls[index % len(polls)]
+        client_id = f"c{offset + index}"
+        for vote in range(votes_per_voter):
+            await store.vote_poll(session_id, poll_id, option_ids[vote % 5], client_id)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(voter(index) for index in range(concurrency)))
+    return time.perf_counter() - start
+
+
+async def throughput(concurrency: int, votes_per_voter: int) -> None:
+    print(f"{concurrency} concurrent voters x {votes_per_voter} votes")
+    print(f"{'mode':>12}  {'votes/s':>10}  {'votes/fsync':>12}")
+    for label, options in (
+        ("no wal", None),
+        ("wal, no sync", {"wal_fsync": False}),
+        ("wal, fsync", {"wal_fsync": True}),
+    ):
+        with tempfile.TemporaryDirectory() as directory:
+            store = InMemoryStore(**({"wal_dir": directory, **options} if options else {}))
+            polls = await open_polls(store, 10)
+            elapsed = await vote_storm(store, polls, concurrency, votes_per_voter)
+            votes = concurrency * votes_per_voter
+            stats = store.memory_stats().get("wal")
+            per_batch = f"{votes / stats['batches']:>12.1f}" if stats else f"{'-':>12}"
+            print(f"{label:>12}  {votes / elapsed:>10,.0f}  {per_batch}")
+            await store.close()
+
+
+async def fill_log(directory: str, mutations: int, snapshot_every: int) -> None:
+    store = InMemoryStore(
+        wal_dir=directory,
+        wal_fsync=False,
+        wal_group_commit_seconds=0.01,
+        wal_snapshot_every=snapshot_every,
+    )
+    polls = await open_polls(store, 100)
+    concurrency = 1000
+    written = 0
+    while written < mutations:
+        batch = min(concurrency * 10, mutations - written)
+        await vote_storm(store, polls, concurrency, batch // concurrency or 1, written)
+        written += batch
+    await store.close()
+
+
+def recover(directory: str) -> tuple[float, int]:
+    start = time.perf_counter()
+    store = InMemoryStore(wal_dir=directory)
+    elapsed = time.perf_counter() - start
+    size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+    asyncio.run(store.close())
+    return elapsed, size
+
+
+def recovery(mutations: int) -> None:
+    print(f"\nrecovery after {mutations:,} logged votes")
+    print(f"{'layout':>20}  {'seconds':>8}  {'on disk MB':>10}")
+    for label, snapshot_every in (
+        ("whole log", 10**12),
+        ("snapshot + tail", 100_000),
+    ):
+        with tempfile.TemporaryDirectory() as directory:
+            asyncio.run(fill_log(directory, mutations, snapshot_every))
+            elapsed, size = recover(directory)
+            print(f"{label:>20}  {elapsed:>8.2f}  {size / 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=256)
+    parser.add_argument("--votes-per-voter", type=int, default=100)
+    parser.add_argument("--mutations", type=int, default=1_000_000)
+    args = parser.parse_args()
+    asyncio.run(throughput(args.concurrency, args.votes_per_voter))
+    recovery(args.mutations)
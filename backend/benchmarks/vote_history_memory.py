@@ -0,0 +1,102 @@
+"""InMemoryStore heap cost per vote in one large session.
+
+Run from backend/:  python benchmarks/vote_history_memory.py [--participants 5000] [--polls 50]
+
+Opens ``--polls`` five-option polls (every third one multiple-choice) and
+``--questions`` questions in one session, then has each of ``--participants``
+clients vote on every poll and upvote ``--upvotes`` questions. Client ids
+are built fresh for every request, as they would be when parsed from a
+request body. Reports the store's traced heap growth (tracemalloc) during
+the voting phase divided by the number of votes, for polls and questions
+separately; the polls and questions themselves are created beforehand and
+not counted.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from pathlib import Path
+import sys
+import time
+import tracemalloc
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.models import PollStatus
+from app.store import InMemoryStore
+
+HOST = "bench-host"
+
+
+def client_id(index: int) -> str:
+    # A new string object per call, like an id decoded from JSON.
+    return "".join(("audience-", f"{index:08d}", "-phone"))
+
+
+async def run(participants: int, polls: int, questions: int, upvotes: int) -> None:
+    store = InMemoryStore()
+    session = await store.create_session("Keynote", HOST)
+    await store.set_qna_status(session.id, True, HOST)
+    poll_options = []
+    for index in range(polls):
+        poll = await store.create_poll(
+            session.id, f"Poll {index}?", list("ABCDE"), index % 3 == 0, HOST
+        )
+        await store.set_poll_status(session.id, poll.id, PollStatus.open, HOST)
+        poll_options.append((poll.id, [option.id for option in poll.options], index % 3 == 0))
+    question_ids = [
+        (await store.create_question(session.id, f"Question {index} from the floor?")).id
+        for index in range(questions)
+    ]
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    before = tracemalloc.get_traced_memory()[0]
+    poll_votes = 0
+    for participant in range(participants):
+        for poll_id, option_ids, multiple in poll_options:
+            await store.vote_poll(
+                session.id, poll_id, option_ids[participant % 5], client_id(participant)
+            )
+            poll_votes += 1
+            if multiple:
+                await store.vote_poll(
+                    session.id, poll_id, option_ids[(participant + 2) % 5], client_id(participant)
+                )
+                poll_votes += 1
+    after_polls = tracemalloc.get_traced_memory()[0]
+    question_votes = 0
+    for participant in range(participants):
+        for offset in range(upvotes):
+            question_id = question_ids[(participant * 7 + offset) % questions]
+            await store.vote_question(session.id, question_id, client_id(participant))
+            question_votes += 1
+    after_questions = tracemalloc.get_traced_memory()[0]
+    elapsed = time.perf_counter() - start
+    tracemalloc.stop()
+
+    print(
+        f"{participants} participants, {polls} polls, {questions} questions"
+        f" ({elapsed:.1f}s with tracing)"
+    )
+    print(f"{'votes':>16}  {'count':>10}  {'heap MB':>8}  {'bytes/vote':>10}")
+    for label, count, grown in (
+        ("poll", poll_votes, after_polls - before),
+        ("question", question_votes, after_questions - after_polls),
+        ("all", poll_votes + question_votes, after_questions - before),
+    ):
+        print(f"{label:>16}  {count:>10,}  {grown / 1e6:>8.1f}  {grown / count:>10.1f}")
+    await store.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--participants", type=int, default=5000)
+    parser.add_argument("--polls", type=int, default=50)
+    parser.add_argument("--questions", type=int, default=200)
+    parser.add_argument("--upvotes", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.participants, args.polls, args.questions, args.upvotes))
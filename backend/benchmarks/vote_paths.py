@@ -0,0 +1,185 @@
+"""Vote latency and server CPU per vote: HTTP POST vs session socket.
+
+Run from backend/:  python benchmarks/vote_paths.py [--voters 50] [--votes 20]
+
+Starts the API (in-memory store, one uvicorn worker) in a subprocess with a
+seeded open poll. Every voter holds a session socket open in both runs, as
+a phone does; the HTTP run votes with POST .../vote over a keep-alive
+client, the socket run sends {"type": "vote"} and waits for its ack.
+Server CPU comes from /health/realtime before and after each run.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+from pathlib import Path
+import socket
+import statistics
+import subprocess
+import sys
+import textwrap
+import time
+import uuid
+
+import httpx
+import websockets
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+
+SERVER = textwrap.dedent(
+    """
+    import asyncio, json, sys
+    sys.path.insert(0, sys.argv[1])
+    import uvicorn
+    from app import deps
+    from app.main import app
+    from app.models import PollStatus
+
+    async def main(port):
+        store = deps.store
+        session = await store.create_session("Bench", "bench-host")
+        poll = await store.create_poll(session.id, "Q?", ["A", "B", "C", "D"], False, "bench-host")
+        await store.set_poll_status(session.id, poll.id, PollStatus.open, "bench-host")
+        print(json.dumps({
+            "session_id": session.id,
+            "poll_id": poll.id,
+            "option_ids": [option.id for option in poll.options],
+        }), flush=True)
+        await uvicorn.Server(uvicorn.Config(app, port=port, log_level="warning")).serve()
+
+    asyncio.run(main(int(sys.argv[2])))
+    """
+)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_until_up(client: httpx.AsyncClient) -> None:
+    for _ in range(100):
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError("server did not start")
+
+
+async def server_cpu(client: httpx.AsyncClient) -> float:
+    return (await client.get("/health/realtime")).json()["process_cpu_seconds"]
+
+
+async def drain(ws) -> None:
+    async for _message in ws:
+        pass
+
+
+async def http_voter(client, seed, votes, latencies) -> None:
+    url = f"/sessions/{seed['session_id']}/polls/{seed['poll_id']}/vote"
+    for index in range(votes):
+        body = {
+            "option_id": seed["option_ids"][index % len(seed["option_ids"])],
+            "client_id": uuid.uuid4().hex,
+        }
+        start = time.perf_counter()
+        response = await client.post(url, json=body)
+        latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+
+
+async def ws_voter(ws, seed, votes, latencies) -> None:
+    for index in range(votes):
+        command_id = uuid.uuid4().hex
+        command = {
+            "type": "vote",
+            "id": command_id,
+            "poll_id": seed["poll_id"],
+            "option_id": seed["option_ids"][index % len(seed["option_ids"])],
+            "client_id": uuid.uuid4().hex,
+        }
+        start = time.perf_counter()
+        await ws.send(json.dumps(command))
+        while True:
+            frame = json.loads(await ws.recv())
+            if frame["type"] == "ack" and frame["payload"]["id"] == command_id:
+                break
+        latencies.append(time.perf_counter() - start)
+        if not frame["payload"]["ok"]:
+            raise RuntimeError(frame["payload"])
+
+
+async def run(mode: str, base_url: str, seed: dict, voters: int, votes: int) -> dict:
+    ws_url = base_url.replace("http", "ws", 1) + f"/ws/sessions/{seed['session_id']}"
+    limits = httpx.Limits(max_connections=voters, max_keepalive_connections=voters)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits) as client:
+        sockets = [await websockets.connect(ws_url) for _ in range(voters)]
+        for ws in sockets:
+            await ws.recv()  # session_snapshot
+        latencies: list[float] = []
+        listeners = []
+        if mode == "http":
+            listeners = [asyncio.create_task(drain(ws)) for ws in sockets]
+            # Warm the keep-alive pool so connects don't count as votes.
+            await asyncio.gather(*(client.get("/health") for _ in range(voters)))
+        cpu_before = await server_cpu(client)
+        if mode == "http":
+            await asyncio.gather(
+                *(http_voter(client, seed, votes, latencies) for _ in range(voters))
+            )
+        else:
+            await asyncio.gather(
+                *(ws_voter(ws, seed, votes, latencies) for ws in sockets)
+            )
+        cpu_after = await server_cpu(client)
+        for task in listeners:
+            task.cancel()
+        for ws in sockets:
+            await ws.close()
+    latencies.sort()
+    total = len(latencies)
+    return {
+        "mode": mode,
+        "votes": total,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(total * 0.95) - 1] * 1000,
+        "cpu_us_per_vote": (cpu_after - cpu_before) / total * 1_000_000,
+    }
+
+
+async def main(voters: int, votes: int) -> None:
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-c", SERVER, str(BACKEND_ROOT), str(port)],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        seed = json.loads(server.stdout.readline())
+        base_url = f"http://127.0.0.1:{port}"
+        async with httpx.AsyncClient(base_url=base_url) as client:
+            await wait_until_up(client)
+        print(f"{voters} voters x {votes} votes, one socket open per voter")
+        print(f"{'path':>6}  {'p50 ms':>8}  {'p95 ms':>8}  {'server CPU us/vote':>18}")
+        for mode in ("http", "ws"):
+            result = await run(mode, base_url, seed, voters, votes)
+            print(
+                f"{result['mode']:>6}  {result['p50_ms']:>8.2f}  {result['p95_ms']:>8.2f}"
+                f"  {result['cpu_us_per_vote']:>18.0f}"
+            )
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--voters", type=int, default=50)
+    parser.add_argument("--votes", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.voters, args.votes))
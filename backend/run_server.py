@@ -4,6 +4,8 @@ import os
 
 import uvicorn
 
+from app.config import settings
+
 
 def resolve_port() -> int:
     raw_value = os.getenv("PORT", "8080").strip()
@@ -14,11 +16,38 @@ def resolve_port() -> int:
     return max(1, min(65535, port))
 
 
+def resolve_workers() -> int:
+    try:
+        return max(1, int(os.getenv("WEB_CONCURRENCY", "1").strip()))
+    except ValueError:
+        return 1
+
+
+def check_workers(workers: int) -> None:
+    """Refuse to start several workers on state that lives in one process:
+    each worker would hold its own in-memory sessions, and broadcasts from
+    the in-process broker only reach the publishing worker's sockets."""
+    if workers <= 1:
+        return
+    problems = []
+    if settings.resolved_store_backend == "memory":
+        problems.append("the in-memory store is not shared between workers (STORE_BACKEND)")
+    if settings.realtime_broker != "unix":
+        problems.append("broadcasts need REALTIME_BROKER=unix to reach other workers")
+    if problems:
+        raise SystemExit(
+            f"WEB_CONCURRENCY={workers} is unsafe: " + "; ".join(problems)
+        )
+
+
 if __name__ == "__main__":
+    workers = resolve_workers()
+    check_workers(workers)
     uvicorn.run(
         "app.main:app",
         host=os.getenv("HOST", "0.0.0.0").strip() or "0.0.0.0",
         port=resolve_port(),
+        workers=workers,
         proxy_headers=True,
         forwarded_allow_ips="*",
     )
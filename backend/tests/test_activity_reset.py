@@ -14,7 +14,7 @@ if str(BACKEND_ROOT) not in sys.path:
 from app.api import polls as polls_api
 from app.api import qna_prompts as qna_prompts_api
 from app.auth import AuthUser
-from app.models import PollStatus, QnaPromptStatus
+from app.models import PollStatus, QnaPromptStatus, SessionActivity
 from app.realtime import ConnectionManager
 from app.store import InMemoryStore
 
@@ -25,11 +25,20 @@ def run(coro):
     return asyncio.run(coro)
 
 
+class RecordingManager(ConnectionManager):
+    def __init__(self) -> None:
+        super().__init__()
+        self.broadcasts: list[SessionActivity] = []
+
+    async def broadcast(self, session_id: str, activity: SessionActivity) -> None:
+        self.broadcasts.append(activity)
+
+
 class PollResetTests(TestCase):
     def setUp(self) -> None:
         polls_api.channel.clear()
         self.store = InMemoryStore()
-        self.manager = ConnectionManager()
+        self.manager = RecordingManager()
         self.session = run(self.store.create_session("Deck", HOST.id))
         self.poll = run(
             self.store.create_poll(
@@ -82,12 +91,11 @@ class PollResetTests(TestCase):
         poll = self.vote(option_a.id, "client-1")
         self.assertEqual(poll.options[0].votes, 1)
 
-    def test_reset_records_poll_vote_updated_activity(self) -> None:
+    def test_reset_broadcasts_poll_vote_updated_activity(self) -> None:
         self.vote(self.poll.options[0].id, "client-1")
         self.reset()
 
-        activities = self.store._activities_by_session[self.session.id]
-        activity = activities[-1]
+        activity = self.manager.broadcasts[-1]
         self.assertEqual(activity.type, "poll_vote_updated")
         payload_poll = activity.payload["poll"]
         self.assertEqual(payload_poll["id"], self.poll.id)
@@ -103,7 +111,7 @@ class DiscussionResetTests(TestCase):
     def setUp(self) -> None:
         qna_prompts_api.channel.clear()
         self.store = InMemoryStore()
-        self.manager = ConnectionManager()
+        self.manager = RecordingManager()
         self.session = run(self.store.create_session("Deck", HOST.id))
         self.prompt = run(
             self.store.create_qna_prompt(self.session.id, "Discuss?", HOST.id)
@@ -148,12 +156,11 @@ class DiscussionResetTests(TestCase):
         # The prompt itself survives the reset.
         self.assertIn(self.prompt.id, {p.id for p in snapshot.prompts})
 
-    def test_reset_records_prompt_questions_deleted_activity(self) -> None:
+    def test_reset_broadcasts_prompt_questions_deleted_activity(self) -> None:
         q1 = self.add_question("First", self.prompt.id)
         self.reset()
 
-        activities = self.store._activities_by_session[self.session.id]
-        activity = activities[-1]
+        activity = self.manager.broadcasts[-1]
         self.assertEqual(activity.type, "prompt_questions_deleted")
         self.assertEqual(activity.payload["prompt_id"], self.prompt.id)
         self.assertEqual(activity.payload["question_ids"], [q1.id])
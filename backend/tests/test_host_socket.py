@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timezone
+from pathlib import Path
+import sys
+import unittest
+from unittest.mock import patch
+
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from app import deps
+from app.api import polls as polls_api
+from app.auth import AuthUser
+from app.main import app
+from app.models import PollStatus, SessionActivity
+from app.realtime import ConnectionManager
+
+from test_realtime_send_queues import FakeWebSocket, settle, status_activity
+
+HOST = AuthUser(id="host-1", email="host@example.com")
+OTHER = AuthUser(id="host-2", email="other@example.com")
+
+
+async def fake_token_lookup(token: str) -> AuthUser:
+    if token == "host-token":
+        return HOST
+    raise HTTPException(status_code=401, detail="Invalid auth token")
+
+
+def receive_until(socket, frame_type: str) -> dict:
+    for _ in range(20):
+        frame = socket.receive_json()
+        if frame["type"] == frame_type:
+            return frame
+    raise AssertionError(f"no {frame_type} frame")
+
+
+class HostConnectionTests(unittest.IsolatedAsyncioTestCase):
+    async def snapshot(self) -> SessionActivity:
+        return SessionActivity(type="session_snapshot", payload={}, ts=datetime.now(timezone.utc))
+
+    async def test_host_socket_gets_tagged_frames_for_watched_sessions(self) -> None:
+        manager = ConnectionManager()
+        host = FakeWebSocket()
+        await manager.connect_host(host)
+        self.assertTrue(await manager.watch(host, "s1", self.snapshot))
+        self.assertTrue(await manager.watch(host, "s2", self.snapshot))
+
+        await manager.broadcast("s1", status_activity("p1"))
+        await manager.broadcast("s2", status_activity("p2"))
+        await manager.broadcast("s3", status_activity("p3"))
+        await settle()
+
+        self.assertEqual(
+            [(frame["type"], frame["session_id"]) for frame in host.sent],
+            [
+                ("session_snapshot", "s1"),
+                ("session_snapshot", "s2"),
+                ("poll_opened", "s1"),
+                ("poll_opened", "s2"),
+            ],
+        )
+
+        await manager.unwatch(host, "s1")
+        await manager.broadcast("s1", status_activity("p4"))
+        await settle()
+        self.assertEqual(len(host.sent), 4)
+
+    async def test_evicting_host_socket_leaves_every_session(self) -> None:
+        manager = ConnectionManager(send_timeout_seconds=0.01)
+        host = FakeWebSocket(stuck=True)
+        await manager.connect_host(host)
+        await manager.watch(host, "s1", self.snapshot)
+        await manager.watch(host, "s2", self.snapshot)
+        await asyncio.sleep(0.05)
+
+        self.assertEqual(manager.stats.evictions, 1)
+        self.assertEqual(manager.connection_count(), 0)
+        self.assertEqual(manager.stats_snapshot()["host_connections"], 0)
+
+
+class HostSocketEndpointTests(unittest.TestCase):
+    def setUp(self) -> None:
+        polls_api.channel.clear()
+        polls_api.vote_coalescer.clear()
+        self.client = TestClient(app)
+        lookup = patch("app.main.get_current_user_from_supabase_token", fake_token_lookup)
+        lookup.start()
+        self.addCleanup(lookup.stop)
+
+    def test_bad_token_is_refused(self) -> None:
+        with self.client as client:
+            with self.assertRaises(Exception):
+                with client.websocket_connect("/ws/host") as socket:
+                    socket.send_json({"type": "auth", "token": "nope"})
+                    socket.receive_json()
+
+    def test_watch_streams_snapshots_activity_and_stats(self) -> None:
+        with self.client as client:
+            store = deps.store
+            mine = client.portal.call(store.create_session, "Mine", HOST.id)
+            theirs = client.portal.call(store.create_session, "Theirs", OTHER.id)
+            poll = client.portal.call(
+                lambda: store.create_poll(mine.id, "Q?", ["A", "B"], False, HOST.id)
+            )
+            client.portal.call(
+                lambda: store.set_poll_status(mine.id, poll.id, PollStatus.open, HOST.id)
+            )
+            with client.websocket_connect("/ws/host") as socket:
+                socket.send_json({"type": "auth", "token": "host-token"})
+                socket.send_json({"type": "watch", "session_ids": [mine.id, theirs.id]})
+
+                snapshot = receive_until(socket, "session_snapshot")
+                self.assertEqual(snapshot["session_id"], mine.id)
+                watching = receive_until(socket, "host_watching")
+                self.assertEqual(watching["payload"]["session_ids"], [mine.id])
+                self.assertEqual(watching["payload"]["rejected"], [theirs.id])
+                stats = receive_until(socket, "session_stats")
+                self.assertEqual(list(stats["payload"]["stats"]), [mine.id])
+
+                response = client.post(
+                    f"/sessions/{mine.id}/polls/{poll.id}/vote",
+                    json={"option_id": poll.options[0].id, "client_id": "phone-1"},
+                )
+                self.assertEqual(response.status_code, 200)
+                vote = receive_until(socket, "poll_vote_updated")
+                self.assertEqual(vote["session_id"], mine.id)
+                self.assertEqual(vote["seq"], snapshot["seq"] + 1)
+
+
+    def test_stats_keep_coming_after_a_failed_refresh(self) -> None:
+        with self.client as client:
+            store = deps.store
+            mine = client.portal.call(store.create_session, "Mine", HOST.id)
+            batch_session_stats = store.batch_session_stats
+            failed: list[str] = []
+
+            async def flaky(session_ids, user_id):
+                # Fail the stats task's first refresh; watch's access check
+                # goes through.
+                task = asyncio.current_task().get_coro().__qualname__
+                if task == "_push_host_stats" and not failed:
+                    failed.append(task)
+                    raise RuntimeError("boom")
+                return await batch_session_stats(session_ids, user_id)
+
+            with patch.object(store, "batch_session_stats", flaky):
+                with client.websocket_connect("/ws/host") as socket:
+                    socket.send_json({"type": "auth", "token": "host-token"})
+                    with self.assertLogs("prezo", "ERROR"):
+                        socket.send_json({"type": "watch", "session_ids": [mine.id]})
+                        receive_until(socket, "host_watching")
+                        # Watching again asks for another refresh.
+                        socket.send_json({"type": "watch", "session_ids": [mine.id]})
+                        stats = receive_until(socket, "session_stats")
+            self.assertEqual(list(stats["payload"]["stats"]), [mine.id])
+            self.assertEqual(failed, ["_push_host_stats"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+import sys
+import unittest
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.api import polls as polls_api
+from app.auth import AuthUser
+from app.models import PollStatus, PollVote, SessionActivity
+from app.realtime import BroadcastCoalescer, ConnectionManager
+from app.store import InMemoryStore
+
+HOST = AuthUser(id="host-1", email="host@example.com")
+
+
+class RecordingManager(ConnectionManager):
+    def __init__(self) -> None:
+        super().__init__()
+        self.broadcasts: list[SessionActivity] = []
+
+    async def broadcast(self, session_id: str, activity: SessionActivity) -> None:
+        self.broadcasts.append(activity)
+
+
+class PollVoteCoalescingTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        polls_api.channel.clear()
+        self.original_coalescer = polls_api.vote_coalescer
+        polls_api.vote_coalescer = BroadcastCoalescer(0.05)
+        self.store = InMemoryStore()
+        self.manager = RecordingManager()
+        self.session = await self.store.create_session("Deck", HOST.id)
+        self.poll = await self.store.create_poll(
+            self.session.id, "Q?", ["A", "B"], False, HOST.id
+        )
+        await self.store.set_poll_status(
+            self.session.id, self.poll.id, PollStatus.open, HOST.id
+        )
+
+    async def asyncTearDown(self) -> None:
+        polls_api.vote_coalescer.clear()
+        polls_api.vote_coalescer = self.original_coalescer
+
+    async def vote(self, client_id: str, option_index: int = 0):
+        return await polls_api.vote_poll(
+            self.session.id,
+            self.poll.id,
+            PollVote(option_id=self.poll.options[option_index].id, client_id=client_id),
+            store=self.store,
+            manager=self.manager,
+        )
+
+    def vote_counts(self, activity: SessionActivity) -> list[int]:
+        return [opt["votes"] for opt in activity.payload["poll"]["options"]]
+
+    async def test_burst_sends_first_vote_then_latest_state_once(self) -> None:
+        for index in range(20):
+            await self.vote(f"client-{index}")
+
+        self.assertEqual(len(self.manager.broadcasts), 1)
+        self.assertEqual(self.vote_counts(self.manager.broadcasts[0]), [1, 0])
+
+        await asyncio.sleep(0.08)
+        self.assertEqual(len(self.manager.broadcasts), 2)
+        self.assertEqual(self.vote_counts(self.manager.broadcasts[1]), [20, 0])
+
+    async def test_status_change_goes_out_immediately_after_pending_votes(self) -> None:
+        await self.vote("client-1")
+        await self.vote("client-2")
+        await polls_api.close_poll(
+            self.session.id,
+            self.poll.id,
+            store=self.store,
+            manager=self.manager,
+            user=HOST,
+        )
+
+        types = [activity.type for activity in self.manager.broadcasts]
+        self.assertEqual(
+            types,
+            ["poll_vote_updated", "poll_vote_updated", "poll_closed", "poll_updated"],
+        )
+        self.assertEqual(self.vote_counts(self.manager.broadcasts[1]), [2, 0])
+
+        await asyncio.sleep(0.08)
+        self.assertEqual(len(self.manager.broadcasts), 4)
+
+    async def test_zero_window_broadcasts_every_vote(self) -> None:
+        polls_api.vote_coalescer = BroadcastCoalescer(0)
+        for index in range(3):
+            await self.vote(f"client-{index}")
+        self.assertEqual(len(self.manager.broadcasts), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from pathlib import Path
+import struct
+import sys
+import unittest
+
+from fastapi.testclient import TestClient
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from app import deps
+from app.api import polls as polls_api
+from app.auth import AuthUser
+from app.main import app
+from app.models import PollStatus
+from app.realtime_protocol import (
+    BINARY_FORMAT_VERSION,
+    BINARY_POLL_VOTES,
+    BINARY_QUESTION_VOTES,
+    WireProtocol,
+    encode_frame,
+    parse_protocol,
+)
+
+from test_realtime_delta_protocol import poll_vote_activity
+
+HOST = AuthUser(id="host-1", email="host@example.com")
+
+
+def decode_poll_counts(frame: bytes) -> tuple[int, int, int, str, list[int]]:
+    version, kind, seq, id_length = struct.unpack_from(">BBIB", frame)
+    offset = 7
+    poll_id = frame[offset : offset + id_length].decode()
+    offset += id_length
+    (count,) = struct.unpack_from(">B", frame, offset)
+    counts = list(struct.unpack_from(f">{count}I", frame, offset + 1))
+    return version, kind, seq, poll_id, counts
+
+
+class BinaryEncodingTests(unittest.TestCase):
+    def test_poll_vote_update_packs_counts_in_option_order(self) -> None:
+        frame = encode_frame(WireProtocol.binary, poll_vote_activity(), 7)
+        self.assertIsInstance(frame, bytes)
+        self.assertEqual(
+            decode_poll_counts(frame),
+            (BINARY_FORMAT_VERSION, BINARY_POLL_VOTES, 7, "p1", [3, 1]),
+        )
+        self.assertEqual(len(frame), 7 + 2 + 1 + 8)
+
+    def test_question_vote_update(self) -> None:
+        activity = {
+            "type": "question_vote_updated",
+            "payload": {"question": {"id": "q1", "text": "Why?", "votes": 4}},
+            "ts": "2026-01-01T00:00:00Z",
+        }
+        frame = encode_frame(WireProtocol.binary, activity, 9)
+        self.assertEqual(
+            struct.unpack(">BBIB2sI", frame),
+            (BINARY_FORMAT_VERSION, BINARY_QUESTION_VOTES, 9, 2, b"q1", 4),
+        )
+
+    def test_other_activities_stay_json(self) -> None:
+        activity = {"type": "poll_closed", "payload": {"poll": {"id": "p1"}}, "ts": "x"}
+        self.assertEqual(encode_frame(WireProtocol.binary, activity, 3), {**activity, "seq": 3})
+
+    def test_oversized_id_falls_back_to_full_activity(self) -> None:
+        activity = poll_vote_activity()
+        activity["payload"]["poll"]["id"] = "p" * 300
+        self.assertEqual(encode_frame(WireProtocol.binary, activity, 1), {**activity, "seq": 1})
+
+    def test_parse_protocol(self) -> None:
+        self.assertEqual(parse_protocol("binary"), WireProtocol.binary)
+
+
+class BinarySocketTests(unittest.TestCase):
+    def setUp(self) -> None:
+        polls_api.channel.clear()
+        polls_api.vote_coalescer.clear()
+        self.client = TestClient(app)
+
+    def test_vote_updates_arrive_as_binary_frames(self) -> None:
+        with self.client as client:
+            store = deps.store
+            session = client.portal.call(store.create_session, "Deck", HOST.id)
+            poll = client.portal.call(
+                lambda: store.create_poll(session.id, "Q?", ["A", "B", "C"], False, HOST.id)
+            )
+            client.portal.call(
+                lambda: store.set_poll_status(session.id, poll.id, PollStatus.open, HOST.id)
+            )
+            with client.websocket_connect(
+                f"/ws/sessions/{session.id}?protocol=binary"
+            ) as socket:
+                snapshot = socket.receive_json()
+                self.assertEqual(snapshot["type"], "session_snapshot")
+                response = client.post(
+                    f"/sessions/{session.id}/polls/{poll.id}/vote",
+                    json={"option_id": poll.options[2].id, "client_id": "phone-1"},
+                )
+                self.assertEqual(response.status_code, 200)
+                _version, kind, seq, poll_id, counts = decode_poll_counts(
+                    socket.receive_bytes()
+                )
+                self.assertEqual(
+                    (kind, seq, poll_id, counts),
+                    (BINARY_POLL_VOTES, snapshot["seq"] + 1, poll.id, [0, 0, 1]),
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
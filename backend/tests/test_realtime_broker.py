@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from pathlib import Path
+import queue
+import subprocess
+import sys
+import tempfile
+import textwrap
+import threading
+import time
+import unittest
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.realtime import ConnectionManager
+from app.realtime_broker import Broker, UnixSocketBroker
+
+from test_realtime_send_queues import FakeWebSocket, join, settle, status_activity
+
+# One "uvicorn worker": a manager on the shared broker directory holding one
+# socket for session s1 that prints every frame it is sent. Reads
+# "publish <poll id>" commands from stdin.
+WORKER = textwrap.dedent(
+    """
+    import asyncio, sys
+    from datetime import datetime, timezone
+    sys.path.insert(0, sys.argv[1])
+    from app.models import SessionActivity
+    from app.realtime import ConnectionManager
+    from app.realtime_broker import UnixSocketBroker
+
+    class PrintingSocket:
+        async def accept(self):
+            return None
+        async def send_text(self, data):
+            print(data, flush=True)
+        async def close(self, code=1000):
+            return None
+
+    async def main():
+        manager = ConnectionManager(broker=UnixSocketBroker(sys.argv[2]))
+        socket = PrintingSocket()
+        await manager.connect("s1", socket)
+        manager.resume("s1", socket, 0)
+        print("ready", flush=True)
+        loop = asyncio.get_running_loop()
+        while True:
+            line = (await loop.run_in_executor(None, sys.stdin.readline)).strip()
+            if not line or line == "exit":
+                break
+            poll_id = line.split()[1]
+            await manager.broadcast("s1", SessionActivity(
+                type="poll_opened",
+                payload={"poll": {"id": poll_id}},
+                ts=datetime.now(timezone.utc),
+            ))
+        await manager.close()
+
+    asyncio.run(main())
+    """
+)
+
+
+class Worker:
+    def __init__(self, directory: str) -> None:
+        self.process = subprocess.Popen(
+            [sys.executable, "-c", WORKER, str(BACKEND_ROOT), directory],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        self.lines: queue.Queue[str] = queue.Queue()
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def _read(self) -> None:
+        for line in self.process.stdout:
+            self.lines.put(line.strip())
+
+    def command(self, line: str) -> None:
+        self.process.stdin.write(line + "\n")
+        self.process.stdin.flush()
+
+    def wait_for(self, predicate, timeout: float = 10.0) -> str:
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise AssertionError("worker produced no matching line")
+            line = self.lines.get(timeout=remaining)
+            if predicate(line):
+                return line
+
+    def stop(self) -> None:
+        try:
+            self.command("exit")
+            self.process.wait(timeout=5)
+        except Exception:
+            self.process.kill()
+        finally:
+            self.process.stdin.close()
+            self.process.stdout.close()
+
+
+def opened_poll(line: str) -> str | None:
+    try:
+        frame = json.loads(line)
+    except ValueError:
+        return None
+    if frame.get("type") != "poll_opened":
+        return None
+    return frame["payload"]["poll"]["id"]
+
+
+class InProcessBrokerTests(unittest.IsolatedAsyncioTestCase):
+    async def test_default_manager_fans_out_locally(self) -> None:
+        manager = ConnectionManager()
+        socket = FakeWebSocket()
+        await join(manager, "s1", socket)
+        await manager.broadcast("s1", status_activity("p1"))
+        await settle()
+        self.assertEqual([frame["seq"] for frame in socket.sent], [1])
+
+    def test_broker_without_publish_cannot_be_created(self) -> None:
+        class Incomplete(Broker):
+            async def start(self, deliver) -> None:
+                return None
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+
+class UnixSocketBrokerTests(unittest.IsolatedAsyncioTestCase):
+    async def test_two_managers_on_one_directory_share_broadcasts(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            first = ConnectionManager(broker=UnixSocketBroker(directory))
+            second = ConnectionManager(broker=UnixSocketBroker(directory))
+            phone_a, phone_b = FakeWebSocket(), FakeWebSocket()
+            await join(first, "s1", phone_a)
+            await join(second, "s1", phone_b)
+
+            await first.broadcast("s1", status_activity("p1"))
+            await second.broadcast("s1", status_activity("p2"))
+            await asyncio.sleep(0.05)
+
+            # Each side sees its own publish first; seqs stay contiguous.
+            for phone in (phone_a, phone_b):
+                self.assertEqual(
+                    sorted(frame["payload"]["poll"]["id"] for frame in phone.sent),
+                    ["p1", "p2"],
+                )
+                self.assertEqual([frame["seq"] for frame in phone.sent], [1, 2])
+            await first.close()
+            await second.close()
+
+    async def test_frame_over_the_datagram_limit_shows_up_as_a_seq_gap(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            first = ConnectionManager(broker=UnixSocketBroker(directory))
+            second = ConnectionManager(broker=UnixSocketBroker(directory))
+            phone_a, phone_b = FakeWebSocket(), FakeWebSocket()
+            await join(first, "s1", phone_a)
+            await join(second, "s1", phone_b)
+
+            huge = status_activity("p1")
+            huge.payload["poll"]["question"] = "x" * (4 << 20)
+            with self.assertLogs("prezo.realtime", "WARNING"):
+                await first.broadcast("s1", huge)
+            await first.broadcast("s1", status_activity("p2"))
+            await asyncio.sleep(0.05)
+
+            self.assertEqual([frame["seq"] for frame in phone_a.sent], [1, 2])
+            self.assertEqual([frame["seq"] for frame in phone_b.sent], [2])
+            self.assertEqual(first.broker.dropped, 1)
+            await first.close()
+            await second.close()
+
+    async def test_lost_notice_waits_for_the_next_datagram_when_the_peer_is_full(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            first = ConnectionManager(broker=UnixSocketBroker(directory))
+            second = ConnectionManager(broker=UnixSocketBroker(directory))
+            phone = FakeWebSocket()
+            await join(second, "s1", phone)
+            await first.start()
+            broker = first.broker
+            send = broker._send_datagram
+            broker._send_datagram = lambda peer, data: False
+            await first.broadcast("s1", status_activity("p1"))
+            await first.broadcast("s2", status_activity("p2"))
+            broker._send_datagram = send
+            await first.broadcast("s1", status_activity("p3"))
+            await asyncio.sleep(0.05)
+
+            self.assertEqual([frame["seq"] for frame in phone.sent], [2])
+            self.assertEqual(second.current_seq("s2"), 1)
+            self.assertEqual(broker.dropped, 2)
+            # The history lost the frame too, so resuming before it misses.
+            self.assertFalse(second.resume("s1", phone, 0))
+            await first.close()
+            await second.close()
+
+    async def test_stale_socket_file_is_removed(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            stale = Path(directory) / "999999-dead.sock"
+            stale.touch()
+            manager = ConnectionManager(broker=UnixSocketBroker(directory))
+            await manager.broadcast("s1", status_activity("p1"))
+            self.assertFalse(stale.exists())
+            await manager.close()
+            self.assertEqual(list(Path(directory).iterdir()), [])
+
+
+class MultiWorkerTests(unittest.TestCase):
+    def test_broadcast_in_one_worker_reaches_sockets_in_all_workers(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            workers = [Worker(directory) for _ in range(3)]
+            try:
+                for worker in workers:
+                    worker.wait_for(lambda line: line == "ready")
+
+                workers[0].command("publish p1")
+                workers[2].command("publish p2")
+                for worker in workers:
+                    # Publishers race each other; only per-publisher order holds.
+                    seen: set[str] = set()
+                    while seen != {"p1", "p2"}:
+                        seen.add(opened_poll(worker.wait_for(opened_poll)))
+            finally:
+                for worker in workers:
+                    worker.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+import unittest
+
+from fastapi.testclient import TestClient
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from app import deps
+from app.api import polls as polls_api
+from app.auth import AuthUser
+from app.main import app
+from app.models import PollStatus
+from app.realtime_protocol import WireProtocol, encode_frame, parse_protocol
+
+HOST = AuthUser(id="host-1", email="host@example.com")
+
+
+def poll_vote_activity() -> dict:
+    return {
+        "type": "poll_vote_updated",
+        "payload": {
+            "poll": {
+                "id": "p1",
+                "question": "Q?",
+                "options": [
+                    {"id": "a", "label": "A", "votes": 3},
+                    {"id": "b", "label": "B", "votes": 1},
+                ],
+            }
+        },
+        "ts": "2026-01-01T00:00:00Z",
+    }
+
+
+class DeltaEncodingTests(unittest.TestCase):
+    def test_json_protocol_keeps_activity_and_adds_seq(self) -> None:
+        activity = poll_vote_activity()
+        self.assertEqual(encode_frame(WireProtocol.json, activity, 7), {**activity, "seq": 7})
+
+    def test_poll_vote_update_becomes_counts_only(self) -> None:
+        frame = encode_frame(WireProtocol.delta, poll_vote_activity(), 7)
+        self.assertEqual(
+            frame,
+            {"type": "poll_votes", "seq": 7, "poll_id": "p1", "votes": {"a": 3, "b": 1}},
+        )
+
+    def test_question_vote_update_becomes_count_only(self) -> None:
+        activity = {
+            "type": "question_vote_updated",
+            "payload": {"question": {"id": "q1", "text": "Why?", "votes": 4}},
+            "ts": "2026-01-01T00:00:00Z",
+        }
+        frame = encode_frame(WireProtocol.delta, activity, 9)
+        self.assertEqual(
+            frame, {"type": "question_votes", "seq": 9, "question_id": "q1", "votes": 4}
+        )
+
+    def test_other_activities_keep_full_payload_plus_seq(self) -> None:
+        activity = {"type": "poll_closed", "payload": {"poll": {"id": "p1"}}, "ts": "x"}
+        frame = encode_frame(WireProtocol.delta, activity, 3)
+        self.assertEqual(frame, {**activity, "seq": 3})
+
+    def test_parse_protocol(self) -> None:
+        self.assertEqual(parse_protocol(None), WireProtocol.json)
+        self.assertEqual(parse_protocol("DELTA"), WireProtocol.delta)
+        self.assertIsNone(parse_protocol("carrier-pigeon"))
+
+
+class DeltaSocketTests(unittest.TestCase):
+    def setUp(self) -> None:
+        polls_api.channel.clear()
+        polls_api.vote_coalescer.clear()
+        self.client = TestClient(app)
+
+    def test_snapshot_then_sequenced_vote_deltas(self) -> None:
+        with self.client as client:
+            store = deps.store
+            session = client.portal.call(store.create_session, "Deck", HOST.id)
+            poll = client.portal.call(
+                lambda: store.create_poll(session.id, "Q?", ["A", "B"], False, HOST.id)
+            )
+            client.portal.call(
+                lambda: store.set_poll_status(session.id, poll.id, PollStatus.open, HOST.id)
+            )
+            with client.websocket_connect(
+                f"/ws/sessions/{session.id}?protocol=delta"
+            ) as socket:
+                snapshot = socket.receive_json()
+                self.assertEqual(snapshot["type"], "session_snapshot")
+                base_seq = snapshot["seq"]
+
+                option_a = poll.options[0].id
+                response = client.post(
+                    f"/sessions/{session.id}/polls/{poll.id}/vote",
+                    json={"option_id": option_a, "client_id": "phone-1"},
+                )
+                self.assertEqual(response.status_code, 200)
+                delta = socket.receive_json()
+                self.assertEqual(delta["type"], "poll_votes")
+                self.assertEqual(delta["seq"], base_seq + 1)
+                self.assertEqual(delta["votes"][option_a], 1)
+
+                socket.send_json({"type": "resync"})
+                resync = socket.receive_json()
+                self.assertEqual(resync["type"], "session_snapshot")
+                self.assertEqual(resync["seq"], base_seq + 1)
+
+    def test_unknown_protocol_is_refused(self) -> None:
+        with self.client as client:
+            session = client.portal.call(deps.store.create_session, "Deck", HOST.id)
+            with self.assertRaises(Exception):
+                with client.websocket_connect(
+                    f"/ws/sessions/{session.id}?protocol=bogus"
+                ) as socket:
+                    socket.receive_json()
+
+
+if __name__ == "__main__":
+    unittest.main()
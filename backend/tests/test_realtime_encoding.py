@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from pathlib import Path
+import sys
+import unittest
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.models import SessionActivity
+from app.realtime import ConnectionManager
+from app.realtime_protocol import WireProtocol
+
+from test_realtime_send_queues import FakeWebSocket, settle, status_activity
+
+
+class RawWebSocket(FakeWebSocket):
+    """Keeps the exact text objects it was handed."""
+
+    async def send_text(self, data: str) -> None:
+        self.sent.append(data)
+
+
+class EncodeOnceTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.loads = 0
+
+    async def load(self) -> SessionActivity:
+        self.loads += 1
+        return SessionActivity(
+            type="session_snapshot",
+            payload={"snapshot": {"loads": self.loads}},
+            ts=datetime.now(timezone.utc),
+        )
+
+    async def join(
+        self,
+        manager: ConnectionManager,
+        socket: RawWebSocket,
+        protocol: WireProtocol = WireProtocol.json,
+    ) -> None:
+        await manager.connect("s1", socket, protocol)
+        await manager.send_snapshot("s1", socket, self.load)
+        await settle()
+
+    async def test_recipients_share_one_encoded_frame_per_protocol(self) -> None:
+        manager = ConnectionManager()
+        json_sockets = [RawWebSocket() for _ in range(3)]
+        delta_socket = RawWebSocket()
+        for socket in json_sockets:
+            await self.join(manager, socket)
+        await self.join(manager, delta_socket, WireProtocol.delta)
+
+        await manager.broadcast("s1", status_activity("p1"))
+        await settle()
+
+        frames = [socket.sent[-1] for socket in json_sockets]
+        self.assertTrue(all(frame is frames[0] for frame in frames))
+        self.assertEqual(delta_socket.sent[-1], frames[0])
+        self.assertIsNot(delta_socket.sent[-1], frames[0])
+
+    async def test_snapshot_is_loaded_once_per_seq(self) -> None:
+        manager = ConnectionManager()
+        first, second = RawWebSocket(), RawWebSocket()
+        await self.join(manager, first)
+        await self.join(manager, second)
+        self.assertEqual(self.loads, 1)
+        self.assertIs(first.sent[0], second.sent[0])
+
+        await manager.broadcast("s1", status_activity("p1"))
+        third = RawWebSocket()
+        await self.join(manager, third)
+        self.assertEqual(self.loads, 2)
+        self.assertIn('"loads":2', third.sent[0])
+
+    async def test_snapshot_cache_can_be_disabled(self) -> None:
+        manager = ConnectionManager(snapshot_cache_seconds=0)
+        for _ in range(2):
+            await self.join(manager, RawWebSocket())
+        self.assertEqual(self.loads, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
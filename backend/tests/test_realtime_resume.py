@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from pathlib import Path
+import sys
+import unittest
+from unittest import mock
+
+from fastapi.testclient import TestClient
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from app import deps
+from app.api import polls as polls_api
+from app.auth import AuthUser
+from app.main import app
+from app.models import PollStatus, SessionActivity
+from app.realtime import ConnectionManager
+
+from test_realtime_send_queues import FakeWebSocket, join, settle, status_activity
+
+HOST = AuthUser(id="host-1", email="host@example.com")
+
+
+class ResumeBufferTests(unittest.IsolatedAsyncioTestCase):
+    async def test_resume_replays_only_missed_frames(self) -> None:
+        manager = ConnectionManager()
+        watcher = FakeWebSocket()
+        await join(manager, "s1", watcher)
+        for poll_id in ("p1", "p2", "p3"):
+            await manager.broadcast("s1", status_activity(poll_id))
+        await settle()
+
+        phone = FakeWebSocket()
+        await manager.connect("s1", phone)
+        self.assertTrue(manager.resume("s1", phone, 1))
+        await settle()
+
+        self.assertEqual(
+            [(frame["type"], frame["seq"]) for frame in phone.sent],
+            [("session_resumed", 1), ("poll_opened", 2), ("poll_opened", 3)],
+        )
+        self.assertEqual(phone.sent[0]["epoch"], manager.epoch)
+        self.assertEqual(phone.sent[0]["payload"], {"replayed": 2})
+        self.assertEqual(manager.stats.resumes, 1)
+
+    async def test_history_survives_a_session_with_no_sockets(self) -> None:
+        manager = ConnectionManager()
+        phone = FakeWebSocket()
+        await join(manager, "s1", phone)
+        await manager.disconnect("s1", phone)
+        await manager.broadcast("s1", status_activity("p1"))
+
+        phone = FakeWebSocket()
+        await manager.connect("s1", phone)
+        self.assertTrue(manager.resume("s1", phone, 0))
+        await settle()
+        self.assertEqual([frame["type"] for frame in phone.sent], ["session_resumed", "poll_opened"])
+
+    async def test_resume_refused_when_history_no_longer_covers_gap(self) -> None:
+        manager = ConnectionManager(resume_buffer_size=2)
+        watcher = FakeWebSocket()
+        await join(manager, "s1", watcher)
+        for poll_id in ("p1", "p2", "p3"):
+            await manager.broadcast("s1", status_activity(poll_id))
+
+        phone = FakeWebSocket()
+        await manager.connect("s1", phone)
+        self.assertFalse(manager.resume("s1", phone, 0))
+        self.assertFalse(manager.resume("s1", phone, 7))
+        self.assertTrue(manager.resume("s1", phone, 1))
+        self.assertEqual(manager.stats.resume_misses, 2)
+
+    async def test_idle_history_is_pruned_after_ttl(self) -> None:
+        manager = ConnectionManager(resume_ttl_seconds=0)
+        phone = FakeWebSocket()
+        await join(manager, "s1", phone)
+        await manager.disconnect("s1", phone)
+
+        manager._next_prune_at = 0.0
+        await join(manager, "s2", FakeWebSocket())
+        self.assertNotIn("s1", manager._history)
+        self.assertIn("s2", manager._history)
+
+    async def test_seq_is_dropped_with_the_history(self) -> None:
+        manager = ConnectionManager(resume_ttl_seconds=0)
+        await manager.broadcast("s3", status_activity("p0"))
+        await settle()
+        self.assertNotIn("s3", manager._seq)
+
+        phone = FakeWebSocket()
+        await join(manager, "s1", phone)
+        await manager.broadcast("s1", status_activity("p1"))
+        await manager.disconnect("s1", phone)
+        manager._next_prune_at = 0.0
+        await join(manager, "s2", FakeWebSocket())
+        self.assertNotIn("s1", manager._seq)
+
+        # A seq from before the drop must not pass for current.
+        await manager.broadcast("s1", status_activity("p2"))
+        await settle()
+        phone = FakeWebSocket()
+        await manager.connect("s1", phone)
+        self.assertFalse(manager.resume("s1", phone, 2))
+
+
+def activity(kind: str, index: int = 0) -> SessionActivity:
+    return SessionActivity(type=kind, payload={"index": index}, ts=datetime.now(timezone.utc))
+
+
+class ActivityLogTests(unittest.IsolatedAsyncioTestCase):
+    async def test_keeps_only_the_newest_entries_per_session(self) -> None:
+        manager = ConnectionManager(resume_buffer_size=3, resume_max_age_seconds=0)
+        await join(manager, "s1", FakeWebSocket())
+        await join(manager, "s2", FakeWebSocket())
+        for index in range(5):
+            await manager.broadcast("s1", activity("poll_vote_updated", index))
+        await manager.broadcast("s2", activity("poll_opened"))
+
+        self.assertEqual([seq for seq, _ in manager.activities("s1")], [3, 4, 5])
+        self.assertEqual(manager.first_logged_seq("s1"), 3)
+        self.assertEqual([seq for seq, _ in manager.activities("s2")], [1])
+        stats = manager.history_stats()
+        self.assertEqual((stats["sessions"], stats["entries"], stats["evicted"]), (2, 4, 2))
+        self.assertGreater(stats["approx_bytes"], 0)
+
+    async def test_expires_entries_past_the_age_limit(self) -> None:
+        manager = ConnectionManager(resume_max_age_seconds=60)
+        phone = FakeWebSocket()
+        await join(manager, "s1", phone)
+        now = 1000.0
+        with mock.patch("app.realtime.time.monotonic", lambda: now):
+            await manager.broadcast("s1", activity("poll_opened"))
+            now = 1045.0
+            await manager.broadcast("s1", activity("poll_vote_updated"))
+            now = 1090.0
+            self.assertEqual([seq for seq, _ in manager.activities("s1")], [2])
+            self.assertFalse(manager.resume("s1", phone, 0))
+            now = 1200.0
+            self.assertEqual(manager.activities("s1"), [])
+            self.assertEqual(manager.first_logged_seq("s1"), 3)
+            self.assertEqual(manager.history_stats()["evicted"], 2)
+
+    async def test_activities_filter_by_seq_type_and_limit(self) -> None:
+        manager = ConnectionManager(resume_buffer_size=4, resume_max_age_seconds=0)
+        await join(manager, "s1", FakeWebSocket())
+        kinds = ["poll_opened", "poll_vote_updated", "question_added", "poll_vote_updated",
+                 "poll_closed", "poll_vote_updated"]
+        for index, kind in enumerate(kinds):
+            await manager.broadcast("s1", activity(kind, index))
+
+        self.assertEqual([seq for seq, _ in manager.activities("s1", 4)], [5, 6])
+        # Asking from before the oldest retained seq returns what's left.
+        self.assertEqual([seq for seq, _ in manager.activities("s1", 1)], [3, 4, 5, 6])
+        votes = manager.activities("s1", types=["poll_vote_updated"])
+        self.assertEqual([seq for seq, _ in votes], [4, 6])
+        self.assertEqual(votes[0][1]["payload"], {"index": 3})
+        self.assertEqual([seq for seq, _ in manager.activities("s1", limit=2)], [3, 4])
+        self.assertEqual(manager.activities("s1", 6), [])
+        self.assertEqual(manager.activities("missing"), [])
+
+
+class ResumeSocketTests(unittest.TestCase):
+    def setUp(self) -> None:
+        polls_api.channel.clear()
+        polls_api.vote_coalescer.clear()
+        self.client = TestClient(app)
+
+    def test_reconnect_with_epoch_replays_instead_of_snapshot(self) -> None:
+        with self.client as client:
+            store = deps.store
+            session = client.portal.call(store.create_session, "Deck", HOST.id)
+            poll = client.portal.call(
+                lambda: store.create_poll(session.id, "Q?", ["A", "B"], False, HOST.id)
+            )
+            with client.websocket_connect(f"/ws/sessions/{session.id}") as socket:
+                snapshot = socket.receive_json()
+                self.assertEqual(snapshot["type"], "session_snapshot")
+                epoch, last_seq = snapshot["epoch"], snapshot["seq"]
+
+            client.portal.call(
+                lambda: store.set_poll_status(session.id, poll.id, PollStatus.open, HOST.id)
+            )
+            response = client.post(
+                f"/sessions/{session.id}/polls/{poll.id}/vote",
+                json={"option_id": poll.options[0].id, "client_id": "phone-1"},
+            )
+            self.assertEqual(response.status_code, 200)
+
+            with client.websocket_connect(
+                f"/ws/sessions/{session.id}?resume_from={last_seq}&epoch={epoch}"
+            ) as socket:
+                marker = socket.receive_json()
+                self.assertEqual(marker["type"], "session_resumed")
+                self.assertEqual(marker["seq"], last_seq)
+                replayed = socket.receive_json()
+                self.assertEqual(replayed["type"], "poll_vote_updated")
+                self.assertEqual(replayed["seq"], last_seq + 1)
+
+            with client.websocket_connect(
+                f"/ws/sessions/{session.id}?resume_from={last_seq}&epoch=stale"
+            ) as socket:
+                self.assertEqual(socket.receive_json()["type"], "session_snapshot")
+
+            footprint = client.get("/health/store").json()["activity_log"]
+            self.assertGreaterEqual(footprint["entries"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timezone
+import json
+from pathlib import Path
+import sys
+import unittest
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.models import SessionActivity
+from app.realtime import ConnectionManager, SendQueuePolicy
+
+
+class FakeWebSocket:
+    """Minimal stand-in for a Starlette WebSocket. ``stuck`` sockets never
+    finish a send, modelling a phone that stopped reading."""
+
+    def __init__(self, *, stuck: bool = False, broken: bool = False) -> None:
+        self.stuck = stuck
+        self.broken = broken
+        self.sent: list[object] = []
+        self.close_code: int | None = None
+
+    async def accept(self) -> None:
+        return None
+
+    async def send_text(self, data: str) -> None:
+        if self.broken:
+            raise RuntimeError("socket closed")
+        if self.stuck:
+            await asyncio.Event().wait()
+        self.sent.append(json.loads(data))
+
+    async def close(self, code: int = 1000) -> None:
+        self.close_code = code
+
+
+def vote_activity(poll_id: str, votes: int) -> SessionActivity:
+    return SessionActivity(
+        type="poll_vote_updated",
+        payload={"poll": {"id": poll_id, "options": [{"id": "a", "votes": votes}]}},
+        ts=datetime.now(timezone.utc),
+    )
+
+
+def status_activity(poll_id: str) -> SessionActivity:
+    return SessionActivity(
+        type="poll_opened",
+        payload={"poll": {"id": poll_id}},
+        ts=datetime.now(timezone.utc),
+    )
+
+
+async def settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def join(manager: ConnectionManager, session_id: str, socket: FakeWebSocket) -> None:
+    """Connect and prime the socket the way the endpoint does."""
+
+    async def load() -> SessionActivity:
+        return SessionActivity(type="session_snapshot", payload={}, ts=datetime.now(timezone.utc))
+
+    await manager.connect(session_id, socket)
+    await manager.send_snapshot(session_id, socket, load)
+    await settle()
+    if socket.sent and socket.sent[0]["type"] == "session_snapshot":
+        socket.sent.clear()
+
+
+class ConnectionManagerQueueTests(unittest.IsolatedAsyncioTestCase):
+    async def test_stuck_socket_does_not_delay_healthy_sockets(self) -> None:
+        manager = ConnectionManager(queue_size=4, policy=SendQueuePolicy.disconnect)
+        healthy, stuck = FakeWebSocket(), FakeWebSocket(stuck=True)
+        await join(manager, "s1", healthy)
+        await join(manager, "s1", stuck)
+
+        for votes in range(10):
+            await manager.broadcast("s1", vote_activity("p1", votes))
+            await settle()
+
+        self.assertEqual(len(healthy.sent), 10)
+        self.assertEqual(manager.stats.evictions, 1)
+        self.assertEqual(stuck.close_code, 1013)
+        self.assertEqual(manager.connection_count("s1"), 1)
+
+    async def test_drop_oldest_keeps_newest_frames(self) -> None:
+        manager = ConnectionManager(queue_size=2, policy=SendQueuePolicy.drop_oldest)
+        socket = FakeWebSocket()
+        await join(manager, "s1", socket)
+
+        # No awaits between broadcasts' enqueues: the writer can't drain yet.
+        connection = manager._connections["s1"][socket]
+        for votes in range(5):
+            manager._enqueue(connection, None, votes, json.dumps({"n": votes}))
+        await settle()
+
+        self.assertEqual(socket.sent, [{"n": 3}, {"n": 4}])
+        self.assertEqual(manager.stats.frames_dropped, 3)
+        self.assertEqual(manager.stats.evictions, 0)
+
+    async def test_drop_oldest_never_drops_the_snapshot(self) -> None:
+        manager = ConnectionManager(queue_size=2, policy=SendQueuePolicy.drop_oldest)
+        socket = FakeWebSocket()
+        await manager.connect("s1", socket)
+        connection = manager._connections["s1"][socket]
+        manager._enqueue(connection, None, None, json.dumps({"snapshot": True}))
+        for votes in range(1, 5):
+            manager._enqueue(connection, None, votes, json.dumps({"n": votes}))
+        connection.paused = False
+        connection.wakeup.set()
+        await settle()
+
+        self.assertEqual(socket.sent, [{"snapshot": True}, {"n": 4}])
+        self.assertEqual(manager.stats.frames_dropped, 3)
+
+        # With only the snapshot queued there is nothing to drop.
+        manager = ConnectionManager(queue_size=1, policy=SendQueuePolicy.drop_oldest)
+        socket = FakeWebSocket()
+        await manager.connect("s1", socket)
+        connection = manager._connections["s1"][socket]
+        manager._enqueue(connection, None, None, json.dumps({"snapshot": True}))
+        manager._enqueue(connection, None, 1, json.dumps({"n": 1}))
+        await settle()
+
+        self.assertEqual(manager.stats.evictions, 1)
+        self.assertEqual(socket.close_code, 1013)
+        self.assertEqual(manager.connection_count("s1"), 0)
+
+    async def test_coalesce_replaces_queued_frame_for_same_poll(self) -> None:
+        manager = ConnectionManager(queue_size=2, policy=SendQueuePolicy.coalesce)
+        socket = FakeWebSocket()
+        await join(manager, "s1", socket)
+
+        await asyncio.gather(
+            manager.broadcast("s1", status_activity("p1")),
+            manager.broadcast("s1", vote_activity("p1", 1)),
+            manager.broadcast("s1", vote_activity("p1", 2)),
+            manager.broadcast("s1", vote_activity("p1", 3)),
+        )
+        await settle()
+
+        self.assertEqual([frame["type"] for frame in socket.sent], ["poll_opened", "poll_vote_updated"])
+        self.assertEqual(socket.sent[1]["payload"]["poll"]["options"][0]["votes"], 3)
+        self.assertEqual(manager.stats.frames_coalesced, 2)
+
+    async def test_coalesce_keeps_seqs_increasing(self) -> None:
+        manager = ConnectionManager(queue_size=3, policy=SendQueuePolicy.coalesce)
+        socket = FakeWebSocket()
+        await join(manager, "s1", socket)
+
+        connection = manager._connections["s1"][socket]
+        for seq, key in enumerate(["poll:p1", None, None, "poll:p1"], start=1):
+            manager._enqueue(connection, key, seq, json.dumps({"seq": seq}))
+        await settle()
+
+        self.assertEqual([frame["seq"] for frame in socket.sent], [2, 3, 4])
+        self.assertEqual(manager.stats.frames_coalesced, 1)
+
+    async def test_coalesce_evicts_when_nothing_can_be_replaced(self) -> None:
+        manager = ConnectionManager(queue_size=1, policy=SendQueuePolicy.coalesce)
+        socket = FakeWebSocket(stuck=True)
+        await join(manager, "s1", socket)
+        await manager.broadcast("s1", status_activity("p1"))
+        await settle()  # writer now blocked inside send
+        await manager.broadcast("s1", status_activity("p2"))
+        await manager.broadcast("s1", status_activity("p3"))
+        await settle()
+
+        self.assertEqual(manager.stats.evictions, 1)
+        self.assertEqual(manager.connection_count(), 0)
+
+    async def test_send_timeout_evicts_socket(self) -> None:
+        manager = ConnectionManager(send_timeout_seconds=0.01)
+        socket = FakeWebSocket(stuck=True)
+        await join(manager, "s1", socket)
+        await manager.broadcast("s1", status_activity("p1"))
+        await asyncio.sleep(0.05)
+
+        self.assertEqual(manager.stats.evictions, 1)
+        self.assertEqual(socket.close_code, 1013)
+
+    async def test_failed_send_drops_connection(self) -> None:
+        manager = ConnectionManager()
+        socket = FakeWebSocket(broken=True)
+        await join(manager, "s1", socket)
+        await manager.broadcast("s1", status_activity("p1"))
+        await settle()
+
+        self.assertEqual(manager.stats.send_failures, 1)
+        self.assertEqual(manager.connection_count(), 0)
+
+    async def test_disconnect_stops_writer(self) -> None:
+        manager = ConnectionManager()
+        socket = FakeWebSocket()
+        await join(manager, "s1", socket)
+        writer = manager._connections["s1"][socket].writer
+        await manager.disconnect("s1", socket)
+        await settle()
+
+        self.assertTrue(writer.cancelled())
+        self.assertEqual(manager.connection_count(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+import unittest
+
+from fastapi.testclient import TestClient
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from app import deps
+from app.api import polls as polls_api
+from app.auth import AuthUser
+from app.main import app
+from app.models import PollStatus
+from app.realtime import ConnectionManager
+from app.realtime_protocol import activity_topics, parse_topics
+
+from test_realtime_send_queues import FakeWebSocket, join, settle, status_activity, vote_activity
+
+HOST = AuthUser(id="host-1", email="host@example.com")
+
+
+class TopicTests(unittest.TestCase):
+    def test_activity_topics(self) -> None:
+        self.assertEqual(
+            activity_topics({"type": "poll_vote_updated", "payload": {"poll": {"id": "p1"}}}),
+            {"polls", "poll:p1"},
+        )
+        self.assertEqual(
+            activity_topics({"type": "poll_deleted", "payload": {"poll_id": "p2"}}),
+            {"polls", "poll:p2"},
+        )
+        self.assertEqual(
+            activity_topics(
+                {"type": "question_vote_updated", "payload": {"question": {"id": "q", "prompt_id": "d1"}}}
+            ),
+            {"prompts", "prompt:d1"},
+        )
+        self.assertEqual(
+            activity_topics({"type": "question_submitted", "payload": {"question": {"id": "q"}}}),
+            {"qna"},
+        )
+        self.assertEqual(activity_topics({"type": "qna_config_updated", "payload": {}}), {"qna"})
+        self.assertEqual(activity_topics({"type": "host_access_updated", "payload": {}}), {"session"})
+
+    def test_parse_topics(self) -> None:
+        self.assertIsNone(parse_topics(None))
+        self.assertIsNone(parse_topics([]))
+        self.assertIsNone(parse_topics(["qna", "*"]))
+        self.assertIsNone(parse_topics(["bogus", "poll:"]))
+        self.assertEqual(parse_topics([" poll:p1 ", "qna", 3, "bogus"]), {"poll:p1", "qna"})
+
+
+class TopicFilterTests(unittest.IsolatedAsyncioTestCase):
+    async def test_filtered_socket_only_gets_its_topics(self) -> None:
+        manager = ConnectionManager()
+        firehose, embed = FakeWebSocket(), FakeWebSocket()
+        await join(manager, "s1", firehose)
+        await join(manager, "s1", embed)
+        manager.subscribe("s1", embed, frozenset({"poll:p1"}))
+
+        await manager.broadcast("s1", vote_activity("p1", 1))
+        await manager.broadcast("s1", vote_activity("p2", 1))
+        await manager.broadcast("s1", status_activity("p1"))
+        await settle()
+
+        self.assertEqual(len(firehose.sent), 3)
+        self.assertEqual([frame["seq"] for frame in embed.sent], [1, 3])
+
+        manager.subscribe("s1", embed, None)
+        await manager.broadcast("s1", vote_activity("p2", 2))
+        await settle()
+        self.assertEqual(embed.sent[-1]["seq"], 4)
+
+    async def test_resume_replays_only_subscribed_topics(self) -> None:
+        manager = ConnectionManager()
+        await join(manager, "s1", FakeWebSocket())
+        await manager.broadcast("s1", vote_activity("p1", 1))
+        await manager.broadcast("s1", vote_activity("p2", 1))
+
+        embed = FakeWebSocket()
+        await manager.connect("s1", embed, topics=frozenset({"poll:p2"}))
+        self.assertTrue(manager.resume("s1", embed, 0))
+        await settle()
+        self.assertEqual([frame["seq"] for frame in embed.sent], [0, 2])
+
+
+class TopicSocketTests(unittest.TestCase):
+    def setUp(self) -> None:
+        polls_api.channel.clear()
+        polls_api.vote_coalescer.clear()
+        self.client = TestClient(app)
+
+    def test_topics_query_param_filters_broadcasts(self) -> None:
+        with self.client as client:
+            store = deps.store
+            session = client.portal.call(store.create_session, "Deck", HOST.id)
+            polls = [
+                client.portal.call(
+                    lambda: store.create_poll(session.id, question, ["A", "B"], False, HOST.id)
+                )
+                for question in ("One?", "Two?")
+            ]
+            for poll in polls:
+                client.portal.call(
+                    lambda: store.set_poll_status(session.id, poll.id, PollStatus.open, HOST.id)
+                )
+            with client.websocket_connect(
+                f"/ws/sessions/{session.id}?topics=poll:{polls[1].id}"
+            ) as socket:
+                self.assertEqual(socket.receive_json()["type"], "session_snapshot")
+                for index, poll in enumerate(polls):
+                    response = client.post(
+                        f"/sessions/{session.id}/polls/{poll.id}/vote",
+                        json={"option_id": poll.options[0].id, "client_id": f"phone-{index}"},
+                    )
+                    self.assertEqual(response.status_code, 200)
+                frame = socket.receive_json()
+                self.assertEqual(frame["type"], "poll_vote_updated")
+                self.assertEqual(frame["payload"]["poll"]["id"], polls[1].id)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.models import PollStatus, QnaPromptStatus
+from app.store import SESSION_BYTES, InMemoryStore, NotFoundError
+
+HOST = "host-1"
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class SessionArchiveTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.archive_dir = os.path.join(tmp.name, "archive")
+        self.wal_dir = os.path.join(tmp.name, "wal")
+        self.clock = FakeClock()
+
+    def open_store(self, **kwargs) -> InMemoryStore:
+        kwargs.setdefault("idle_session_seconds", 600)
+        return InMemoryStore(archive_dir=self.archive_dir, clock=self.clock, **kwargs)
+
+    async def seed(self, store: InMemoryStore, questions: int = 3) -> dict:
+        session = await store.create_session("Talk", HOST)
+        await store.set_qna_status(session.id, True, HOST)
+        prompt = await store.create_qna_prompt(session.id, "Ideas?", HOST)
+        await store.set_qna_prompt_status(session.id, prompt.id, QnaPromptStatus.open, HOST)
+        question_ids = []
+        for index in range(questions):
+            question = await store.create_question(
+                session.id, f"Q{index}", prompt.id if index % 2 else None
+            )
+            await store.vote_question(session.id, question.id, f"c{index}")
+            question_ids.append(question.id)
+        poll = await store.create_poll(session.id, "Q?", ["A", "B"], False, HOST)
+        await store.set_poll_status(session.id, poll.id, PollStatus.open, HOST)
+        await store.vote_poll(session.id, poll.id, poll.options[0].id, "c0")
+        return {
+            "session": session,
+            "poll": poll,
+            "question_ids": question_ids,
+        }
+
+    async def test_idle_sessions_are_archived_and_load_back_on_access(self) -> None:
+        store = self.open_store()
+        idle = await self.seed(store)
+        busy = await self.seed(store)
+        idle_id = idle["session"].id
+        before = (await store.snapshot(idle_id)).model_dump()
+        stats_before = await store.session_session_stats(idle_id, HOST)
+        footprint = store.memory_stats()["sessions"]["approx_bytes"]
+
+        self.clock.now = 500
+        await store.snapshot(busy["session"].id)
+        self.clock.now = 700
+        self.assertEqual(await store.evict_sessions(), 1)
+        stats = store.memory_stats()
+        self.assertEqual(stats["sessions"]["live"], 1)
+        self.assertEqual(stats["sessions"]["archived"], 1)
+        self.assertLess(stats["sessions"]["approx_bytes"], footprint)
+        self.assertEqual(stats["archive"]["files"], 1)
+
+        # Listings and stats are served without loading the archive.
+        self.assertEqual(len(await store.list_sessions(HOST)), 2)
+        self.assertEqual(await store.session_session_stats(idle_id, HOST), stats_before)
+        self.assertEqual(
+            (await store.get_session_by_code(idle["session"].code)).id, idle_id
+        )
+        self.assertEqual(store.memory_stats()["sessions"]["restored"], 0)
+
+        self.assertEqual((await store.snapshot(idle_id)).model_dump(), before)
+        self.assertEqual(store.memory_stats()["sessions"]["restored"], 1)
+        # Vote history came back: a repeat vote is still a no-op.
+        question = await store.vote_question(idle_id, idle["question_ids"][0], "c0")
+        self.assertEqual(question.votes, 1)
+        removed = await store.delete_audience_questions(idle_id, HOST)
+        self.assertEqual(removed, idle["question_ids"][::2])
+
+    async def test_dashboard_counts_a_client_of_archived_and_live_sessions_once(self) -> None:
+        store = self.open_store()
+        idle = await self.seed(store)
+        busy = await self.seed(store)
+        self.assertEqual((await store.host_dashboard_stats(HOST)).unique_participants, 3)
+
+        self.clock.now = 500
+        await store.snapshot(busy["session"].id)
+        self.clock.now = 700
+        self.assertEqual(await store.evict_sessions(), 1)
+        self.assertEqual(store.memory_stats()["sessions"]["archived"], 1)
+        self.assertEqual((await store.host_dashboard_stats(HOST)).unique_participants, 3)
+        await store.vote_question(busy["session"].id, busy["question_ids"][0], "c9")
+        self.assertEqual((await store.host_dashboard_stats(HOST)).unique_participants, 4)
+        self.assertEqual(store.memory_stats()["sessions"]["archived"], 1)
+        self.assertIn(idle["session"].id, store._archived)
+
+    async def test_writes_restore_an_archived_session(self) -> None:
+        store = self.open_store()
+        seeded = await self.seed(store)
+        session_id = seeded["session"].id
+        self.clock.now = 1000
+        await store.evict_sessions()
+        poll = seeded["poll"]
+        updated = await store.vote_poll(session_id, poll.id, poll.options[1].id, "c0")
+        self.assertEqual([o.votes for o in updated.options], [0, 1])
+        self.assertEqual(store.memory_stats()["sessions"]["archived"], 0)
+
+    async def test_high_watermark_archives_least_recently_used_first(self) -> None:
+        store = self.open_store(idle_session_seconds=0)
+        seeds = []
+        for index in range(4):
+            self.clock.now = index
+            seeds.append(await self.seed(store, questions=20))
+        total = store.memory_stats()["sessions"]["approx_bytes"]
+        # What archiving one session frees; its header stays in memory.
+        per_session = (total - 4 * SESSION_BYTES) // 4
+        store.memory_high_watermark_bytes = total - per_session // 2
+        store.memory_low_watermark_bytes = total - 2 * per_session
+
+        self.clock.now = 10
+        await store.snapshot(seeds[0]["session"].id)
+        self.assertEqual(await store.evict_sessions(), 2)
+        stats = store.memory_stats()["sessions"]
+        self.assertLessEqual(stats["approx_bytes"], store.memory_low_watermark_bytes)
+        # Sessions 1 and 2 were the least recently used.
+        self.assertEqual(await store.evict_sessions(), 0)
+        for index in (0, 3):
+            self.assertEqual(
+                len((await store.snapshot(seeds[index]["session"].id)).questions), 20
+            )
+        self.assertEqual(store.memory_stats()["sessions"]["restored"], 0)
+
+    async def test_deleting_an_archived_session_removes_its_file(self) -> None:
+        store = self.open_store()
+        seeded = await self.seed(store)
+        self.clock.now = 1000
+        await store.evict_sessions()
+        await store.delete_session(seeded["session"].id, HOST)
+        self.assertEqual(os.listdir(self.archive_dir), [])
+        with self.assertRaises(NotFoundError):
+            await store.snapshot(seeded["session"].id)
+
+    async def test_archived_sessions_survive_a_restart_with_the_wal(self) -> None:
+        options = {"wal_dir": self.wal_dir, "wal_group_commit_seconds": 0}
+        store = self.open_store(wal_snapshot_every=5, **options)
+        archived = await self.seed(store)
+        restored = await self.seed(store)
+        expected = {
+            seed["session"].id: (await store.snapshot(seed["session"].id)).model_dump()
+            for seed in (archived, restored)
+        }
+        self.clock.now = 1000
+        self.assertEqual(await store.evict_sessions(), 2)
+        await store.snapshot(restored["session"].id)
+        await store.close()
+
+        recovered = self.open_store(**options)
+        self.assertEqual(recovered.memory_stats()["sessions"]["archived"], 1)
+        # The restored session's stale archive file was cleaned up.
+        self.assertEqual(len(os.listdir(self.archive_dir)), 1)
+        stats = await recovered.session_session_stats(archived["session"].id, HOST)
+        self.assertEqual(stats.unique_participants, 3)
+        dashboard = await recovered.host_dashboard_stats(HOST)
+        self.assertEqual(dashboard.unique_participants, 3)
+        for session_id, snapshot in expected.items():
+            self.assertEqual((await recovered.snapshot(session_id)).model_dump(), snapshot)
+        await recovered.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import random
+import sys
+import unittest
+from pathlib import Path
+
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.models import PollStatus, QnaPromptStatus
+from app.store import ConflictError, InMemoryStore, NotFoundError
+
+HOST = "host-1"
+CLIENTS = [f"phone-{index}" for index in range(6)]
+
+
+def rescanned_stats(store: InMemoryStore, session_ids: list[str]) -> tuple[int, int]:
+    """The full-scan computation the stats endpoints used before counters."""
+    clients: set[str] = set()
+    active = 0
+    for session_id in session_ids:
+        names = store._clients[session_id].names
+        for qid in store._questions_by_session.get(session_id, []):
+            clients.update(names[client] for client in store._question_votes.get(qid, ()))
+        for pid in store._polls_by_session.get(session_id, []):
+            clients.update(names[client] for client, _ in store._poll_votes[pid].items())
+            if store._polls[pid].status == PollStatus.open:
+                active += 1
+        for prid in store._prompts_by_session.get(session_id, []):
+            if store._prompts[prid].status == QnaPromptStatus.open:
+                active += 1
+        if store._sessions[session_id].qna_open:
+            active += 1
+    return len(clients), active
+
+
+class SessionStatsCounterTests(unittest.IsolatedAsyncioTestCase):
+    async def test_counters_match_a_full_rescan_after_random_writes(self) -> None:
+        rng = random.Random(12)
+        store = InMemoryStore()
+        sessions = [(await store.create_session(f"S{i}", HOST)).id for i in range(3)]
+        polls: dict[str, list] = {sid: [] for sid in sessions}
+        prompts: dict[str, list[str]] = {sid: [] for sid in sessions}
+        questions: dict[str, list[str]] = {sid: [] for sid in sessions}
+        for sid in sessions:
+            await store.set_qna_status(sid, True, HOST)
+
+        for _ in range(600):
+            sid = rng.choice(sessions)
+            client = rng.choice(CLIENTS)
+            action = rng.randrange(12)
+            try:
+                if action == 0 or not polls[sid]:
+                    poll = await store.create_poll(
+                        sid, "Q?", ["A", "B", "C"], rng.random() < 0.5, HOST
+                    )
+                    polls[sid].append(poll)
+                elif action == 1 or not prompts[sid]:
+                    prompts[sid].append((await store.create_qna_prompt(sid, "P", HOST)).id)
+                elif action == 2:
+                    poll = rng.choice(polls[sid])
+                    status = rng.choice([PollStatus.open, PollStatus.closed])
+                    await store.set_poll_status(sid, poll.id, status, HOST)
+                elif action == 3:
+                    status = rng.choice([QnaPromptStatus.open, QnaPromptStatus.closed])
+                    await store.set_qna_prompt_status(sid, rng.choice(prompts[sid]), status, HOST)
+                elif action in (4, 5):
+                    poll = rng.choice(polls[sid])
+                    option = rng.choice(poll.options)
+                    await store.vote_poll(sid, poll.id, option.id, client)
+                elif action == 6:
+                    poll = rng.choice(polls[sid])
+                    option = rng.choice(poll.options)
+                    await store.remove_poll_vote(sid, poll.id, option.id, client)
+                elif action == 7:
+                    prompt_id = rng.choice([None, *prompts[sid]])
+                    question = await store.create_question(sid, "Why?", prompt_id)
+                    questions[sid].append(question.id)
+                elif action == 8 and questions[sid]:
+                    await store.vote_question(sid, rng.choice(questions[sid]), client)
+                elif action == 9:
+                    poll = rng.choice(polls[sid])
+                    if rng.random() < 0.5:
+                        await store.reset_poll_votes(sid, poll.id, HOST)
+                    else:
+                        await store.delete_poll(sid, poll.id, HOST)
+                        polls[sid].remove(poll)
+                elif action == 10:
+                    prompt_id = rng.choice(prompts[sid])
+                    if rng.random() < 0.5:
+                        await store.delete_prompt_questions(sid, prompt_id, HOST)
+                    else:
+                        await store.delete_qna_prompt(sid, prompt_id, HOST)
+                        prompts[sid].remove(prompt_id)
+                elif action == 11:
+                    poll = rng.choice(polls[sid])
+                    polls[sid][polls[sid].index(poll)] = await store.update_poll(
+                        sid, poll.id, HOST, remove_option_ids=[poll.options[0].id]
+                    )
+            except (ConflictError, NotFoundError):
+                pass
+
+            stats = await store.session_session_stats(sid, HOST)
+            unique, active = rescanned_stats(store, [sid])
+            self.assertEqual(
+                (stats.unique_participants, stats.active_activities), (unique, active)
+            )
+
+        dashboard = await store.host_dashboard_stats(HOST)
+        unique, active = rescanned_stats(store, sessions)
+        self.assertEqual(dashboard.unique_participants, unique)
+        self.assertEqual(dashboard.active_activities, active)
+        self.assertGreater(unique, 0)
+
+        await store.delete_session(sessions[0], HOST)
+        dashboard = await store.host_dashboard_stats(HOST)
+        unique, active = rescanned_stats(store, sessions[1:])
+        self.assertEqual(
+            (dashboard.unique_participants, dashboard.active_activities), (unique, active)
+        )
+
+    async def test_switching_a_single_choice_vote_keeps_one_participant(self) -> None:
+        store = InMemoryStore()
+        session = await store.create_session("Talk", HOST)
+        poll = await store.create_poll(session.id, "Q?", ["A", "B"], False, HOST)
+        await store.set_poll_status(session.id, poll.id, PollStatus.open, HOST)
+        first, second = poll.options
+
+        await store.vote_poll(session.id, poll.id, first.id, "phone-1")
+        await store.vote_poll(session.id, poll.id, second.id, "phone-1")
+        stats = await store.session_session_stats(session.id, HOST)
+        self.assertEqual((stats.unique_participants, stats.active_activities), (1, 1))
+
+        await store.remove_poll_vote(session.id, poll.id, second.id, "phone-1")
+        stats = await store.session_session_stats(session.id, HOST)
+        self.assertEqual(stats.unique_participants, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+import unittest
+
+from fastapi.testclient import TestClient
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from app import deps
+from app.api import sessions as sessions_api
+from app.cache_headers import compute_etag
+from app.main import app
+from app.models import PollStatus
+from app.store import InMemoryStore
+
+HOST = "host-1"
+
+
+class SnapshotVersionTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.store = InMemoryStore()
+        self.session = await self.store.create_session("Deck", HOST)
+        self.poll = await self.store.create_poll(
+            self.session.id, "Q?", ["A", "B"], False, HOST
+        )
+        await self.store.set_poll_status(self.session.id, self.poll.id, PollStatus.open, HOST)
+
+    async def test_unchanged_session_reuses_the_built_snapshot(self) -> None:
+        first = await self.store.snapshot(self.session.id)
+        self.assertIs(await self.store.snapshot(self.session.id), first)
+
+        version = await self.store.snapshot_version(self.session.id)
+        await self.store.vote_poll(self.session.id, self.poll.id, self.poll.options[0].id, "c1")
+        self.assertGreater(await self.store.snapshot_version(self.session.id), version)
+        rebuilt = await self.store.snapshot(self.session.id)
+        self.assertIsNot(rebuilt, first)
+        self.assertEqual(rebuilt.polls[0].options[0].votes, 1)
+
+    async def test_viewer_overlay_leaves_the_shared_snapshot_alone(self) -> None:
+        owner = await self.store.snapshot(self.session.id, viewer_user_id=HOST)
+        other = await self.store.snapshot(self.session.id, viewer_user_id="someone")
+        shared = await self.store.snapshot(self.session.id)
+        self.assertTrue(owner.session.is_original_host)
+        self.assertFalse(other.session.is_original_host)
+        self.assertIsNone(shared.session.is_original_host)
+        self.assertIs(owner.polls, shared.polls)
+
+
+class SnapshotEndpointTests(unittest.TestCase):
+    def setUp(self) -> None:
+        sessions_api._snapshot_bodies.clear()
+        self.client = TestClient(app)
+
+    def test_body_and_etag_are_reused_until_the_session_changes(self) -> None:
+        with self.client as client:
+            store = deps.store
+            session = client.portal.call(store.create_session, "Deck", HOST)
+            poll = client.portal.call(
+                lambda: store.create_poll(session.id, "Q?", ["A", "B"], False, HOST)
+            )
+            client.portal.call(
+                lambda: store.set_poll_status(session.id, poll.id, PollStatus.open, HOST)
+            )
+            url = f"/sessions/{session.id}/snapshot"
+
+            first = client.get(url)
+            self.assertEqual(first.status_code, 200)
+            snapshot = client.portal.call(store.snapshot, session.id)
+            snapshot = snapshot.model_copy(
+                update={"session": sessions_api.with_join_url(snapshot.session)}
+            )
+            self.assertEqual(first.json(), snapshot.model_dump(mode="json"))
+            self.assertEqual(first.headers["etag"], compute_etag(snapshot))
+            self.assertIn("max-age", first.headers["cache-control"])
+
+            self.assertEqual(client.get(url).content, first.content)
+            not_modified = client.get(url, headers={"If-None-Match": first.headers["etag"]})
+            self.assertEqual(not_modified.status_code, 304)
+
+            client.portal.call(
+                lambda: store.vote_poll(session.id, poll.id, poll.options[1].id, "c1")
+            )
+            changed = client.get(url, headers={"If-None-Match": first.headers["etag"]})
+            self.assertEqual(changed.status_code, 200)
+            self.assertNotEqual(changed.headers["etag"], first.headers["etag"])
+            self.assertEqual(changed.json()["polls"][0]["options"][1]["votes"], 1)
+
+            self.assertEqual(client.get("/sessions/missing/snapshot").status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
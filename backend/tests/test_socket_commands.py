@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+import unittest
+
+from fastapi.testclient import TestClient
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from app import deps
+from app.api import polls as polls_api
+from app.auth import AuthUser
+from app.main import app
+from app.models import PollStatus
+from app.realtime_commands import handle_command
+from app.store import InMemoryStore
+from app.store_supabase import SupabaseError
+
+from test_poll_vote_coalescing import RecordingManager
+
+HOST = AuthUser(id="host-1", email="host@example.com")
+
+
+class HandleCommandTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        polls_api.channel.clear()
+        polls_api.vote_coalescer.clear()
+        self.store = InMemoryStore()
+        self.manager = RecordingManager()
+        self.session = await self.store.create_session("Deck", HOST.id)
+        self.poll = await self.store.create_poll(
+            self.session.id, "Q?", ["A", "B"], False, HOST.id
+        )
+        await self.store.set_poll_status(
+            self.session.id, self.poll.id, PollStatus.open, HOST.id
+        )
+
+    async def run_command(self, command: dict) -> dict:
+        ack = await handle_command(self.session.id, command, self.store, self.manager)
+        self.assertEqual(ack["type"], "ack")
+        return ack["payload"]
+
+    async def test_vote_and_unvote_go_through_the_store(self) -> None:
+        option = self.poll.options[0].id
+        vote = {"id": "c1", "poll_id": self.poll.id, "option_id": option, "client_id": "phone"}
+        ack = await self.run_command({"type": "vote", **vote})
+        self.assertEqual(ack["id"], "c1")
+        self.assertTrue(ack["ok"])
+        self.assertEqual(ack["result"]["options"][0]["votes"], 1)
+        self.assertEqual(self.manager.broadcasts[-1].type, "poll_vote_updated")
+
+        ack = await self.run_command({"type": "unvote", **vote, "id": "c2"})
+        self.assertEqual(ack["result"]["options"][0]["votes"], 0)
+
+    async def test_question_submit_and_vote(self) -> None:
+        await self.store.set_qna_status(self.session.id, True, HOST.id)
+        ack = await self.run_command(
+            {"type": "question_submit", "id": "q", "text": "Why?", "client_id": "phone"}
+        )
+        self.assertTrue(ack["ok"])
+        question_id = ack["result"]["id"]
+        ack = await self.run_command(
+            {"type": "question_vote", "id": "v", "question_id": question_id, "client_id": "phone"}
+        )
+        self.assertEqual(ack["result"]["votes"], 1)
+        self.assertEqual(
+            [activity.type for activity in self.manager.broadcasts],
+            ["question_submitted", "question_vote_updated"],
+        )
+
+    async def test_failures_are_acked_with_http_status(self) -> None:
+        ack = await self.run_command(
+            {"type": "vote", "id": "x", "poll_id": "missing", "option_id": "o", "client_id": "p"}
+        )
+        self.assertEqual((ack["id"], ack["ok"], ack["status"]), ("x", False, 404))
+
+        ack = await self.run_command({"type": "vote", "id": "y", "poll_id": self.poll.id})
+        self.assertEqual((ack["ok"], ack["status"]), (False, 422))
+
+        ack = await self.run_command({"type": "question_submit", "id": "z", "text": ""})
+        self.assertEqual(ack["status"], 422)
+
+    async def test_store_failure_is_acked_and_later_commands_still_run(self) -> None:
+        vote_poll = self.store.vote_poll
+
+        async def unavailable(*args, **kwargs):
+            raise SupabaseError(503, "Supabase is unavailable", "supabase_unavailable")
+
+        self.store.vote_poll = unavailable
+        vote = {"poll_id": self.poll.id, "option_id": self.poll.options[0].id, "client_id": "p"}
+        with self.assertLogs("prezo.realtime", "WARNING"):
+            ack = await self.run_command({"type": "vote", "id": "a", **vote})
+        self.assertEqual((ack["ok"], ack["status"]), (False, 503))
+        self.assertEqual(ack["detail"], "Supabase is unavailable")
+
+        self.store.vote_poll = vote_poll
+        ack = await self.run_command({"type": "vote", "id": "b", **vote})
+        self.assertTrue(ack["ok"])
+
+    async def test_unknown_command_is_not_acked(self) -> None:
+        self.assertIsNone(
+            await handle_command(self.session.id, {"type": "dance"}, self.store, self.manager)
+        )
+
+
+class SocketCommandEndpointTests(unittest.TestCase):
+    def setUp(self) -> None:
+        polls_api.channel.clear()
+        polls_api.vote_coalescer.clear()
+        self.client = TestClient(app)
+
+    def test_vote_over_socket_is_acked_and_broadcast(self) -> None:
+        with self.client as client:
+            store = deps.store
+            session = client.portal.call(store.create_session, "Deck", HOST.id)
+            poll = client.portal.call(
+                lambda: store.create_poll(session.id, "Q?", ["A", "B"], False, HOST.id)
+            )
+            client.portal.call(
+                lambda: store.set_poll_status(session.id, poll.id, PollStatus.open, HOST.id)
+            )
+            with client.websocket_connect(f"/ws/sessions/{session.id}") as socket:
+                self.assertEqual(socket.receive_json()["type"], "session_snapshot")
+                socket.send_json(
+                    {
+                        "type": "vote",
+                        "id": "c1",
+                        "poll_id": poll.id,
+                        "option_id": poll.options[1].id,
+                        "client_id": "phone-1",
+                    }
+                )
+                frames = [socket.receive_json(), socket.receive_json()]
+                by_type = {frame["type"]: frame for frame in frames}
+                self.assertEqual(set(by_type), {"ack", "poll_vote_updated"})
+                self.assertEqual(by_type["ack"]["payload"]["id"], "c1")
+                self.assertTrue(by_type["ack"]["payload"]["ok"])
+                self.assertEqual(
+                    by_type["poll_vote_updated"]["payload"]["poll"]["options"][1]["votes"], 1
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.store import ConflictError
+from app.store_supabase import SupabaseError, SupabaseStore
+from benchmarks.postgrest_standin import BASE_URL, PostgrestStandin
+from benchmarks.store_backends import backends, run_scenario, run_suite, scenarios
+
+
+class StoreBackendConformanceTests(unittest.IsolatedAsyncioTestCase):
+    async def test_every_backend_ends_each_scenario_like_the_memory_store(self) -> None:
+        backend_list = backends()
+        self.assertEqual(backend_list[0].name, "memory")
+        scenario_list = scenarios(scale=0.05)
+        with tempfile.TemporaryDirectory() as directory:
+            results = await run_suite(scenario_list, backend_list, directory)
+        self.assertEqual(len(results), len(scenario_list) * len(backend_list))
+        for result in results:
+            with self.subTest(scenario=result["scenario"], backend=result["backend"]):
+                self.assertTrue(result["matches_reference"])
+
+    async def test_round_trips_are_counted_per_backend(self) -> None:
+        vote_storm = scenarios(scale=0.05)[0]
+        trips = {}
+        with tempfile.TemporaryDirectory() as directory:
+            for backend in backends():
+                store_directory = Path(directory) / str(len(trips))
+                store_directory.mkdir()
+                result = await run_scenario(backend, vote_storm, str(store_directory))
+                trips[backend.name] = result["round_trips_per_operation"]
+        # Loading the poll once and a vote_poll_batch call per flush.
+        self.assertLess(trips.pop("supabase (stand-in, write-behind)"), 0.1)
+        # One vote_poll_atomic call, or one operation on the SQLite thread.
+        self.assertEqual(
+            trips,
+            {
+                "memory": 0,
+                "memory + wal": 0,
+                "sqlite (normal)": 1,
+                "sqlite (full)": 1,
+                "supabase (stand-in)": 1,
+            },
+        )
+
+
+class PostgrestStandinTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.standin = PostgrestStandin()
+        self.store = SupabaseStore(BASE_URL, "key", transport=self.standin.transport())
+        self.addAsyncCleanup(self.store.close)
+
+    async def test_filters_order_and_upserts(self) -> None:
+        session = await self.store.create_session("Talk", "host")
+        await self.store.set_qna_status(session.id, True, "host")
+        for text in ("first", "second"):
+            await self.store.create_question(session.id, text)
+        rows = await self.store._select(
+            "questions",
+            {"select": "text", "session_id": f"eq.{session.id}", "order": "created_at.desc"},
+        )
+        self.assertEqual(rows, [{"text": "second"}, {"text": "first"}])
+        rows = await self.store._select(
+            "sessions", {"select": "qna_open", "id": f'in.("{session.id}","missing")'}
+        )
+        self.assertEqual(rows, [{"qna_open": True}])
+
+        first = await self.store.save_saved_theme("host", "Dark", {"bg": "#000"})
+        second = await self.store.save_saved_theme("host", "Dark", {"bg": "#111"})
+        self.assertEqual(second.id, first.id)
+        self.assertEqual(second.theme, {"bg": "#111"})
+
+    async def test_vote_rpc_errors_carry_postgres_codes(self) -> None:
+        session = await self.store.create_session("Talk", "host")
+        poll = await self.store.create_poll(session.id, "Q?", ["A", "B"], False, "host")
+        with self.assertRaisesRegex(ConflictError, "poll is closed"):
+            await self.store.vote_poll(session.id, poll.id, poll.options[0].id, "c1")
+        self.standin.functions.pop("vote_poll_atomic")
+        with self.assertRaises(SupabaseError) as raised:
+            await self.store.vote_poll(session.id, poll.id, poll.options[0].id, "c1")
+        self.assertEqual(raised.exception.code, "PGRST202")
+        self.assertEqual(self.standin.calls["POST rpc/vote_poll_atomic"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import sys
+import unittest
+from pathlib import Path
+
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.models import PollStatus, QnaPromptStatus
+from app.store import InMemoryStore, NotFoundError
+
+HOST = "host-1"
+
+
+class StoreIndexTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.store = InMemoryStore()
+        self.session = await self.store.create_session("Talk", HOST)
+        self.other = await self.store.create_session("Other", HOST)
+        await self.store.set_qna_status(self.session.id, True, HOST)
+        await self.store.set_qna_status(self.other.id, True, HOST)
+        self.prompts = []
+        for _ in range(2):
+            prompt = await self.store.create_qna_prompt(self.session.id, "P", HOST)
+            await self.store.set_qna_prompt_status(
+                self.session.id, prompt.id, QnaPromptStatus.open, HOST
+            )
+            self.prompts.append(prompt.id)
+        self.questions: dict[str | None, list[str]] = {None: [], **{p: [] for p in self.prompts}}
+        self.created: list[str] = []
+        for index in range(9):
+            prompt_id = (None, *self.prompts)[index % 3]
+            question = await self.store.create_question(self.session.id, f"Q{index}", prompt_id)
+            self.questions[prompt_id].append(question.id)
+            self.created.append(question.id)
+        self.other_question = await self.store.create_question(self.other.id, "Elsewhere")
+
+    async def question_ids(self, session_id: str) -> list[str]:
+        return [q.id for q in (await self.store.snapshot(session_id)).questions]
+
+    async def test_clearing_a_prompt_removes_only_its_questions_in_order(self) -> None:
+        first = self.prompts[0]
+        removed = await self.store.delete_prompt_questions(self.session.id, first, HOST)
+        self.assertEqual(removed, self.questions[first])
+        self.assertEqual(
+            await self.question_ids(self.session.id),
+            [qid for qid in self.created if qid not in removed],
+        )
+        self.assertEqual(await self.question_ids(self.other.id), [self.other_question.id])
+
+        # The prompt stays and takes new questions.
+        question = await self.store.create_question(self.session.id, "Again", first)
+        self.assertEqual(
+            await self.store.delete_prompt_questions(self.session.id, first, HOST),
+            [question.id],
+        )
+
+    async def test_clearing_audience_questions_keeps_prompt_questions(self) -> None:
+        removed = await self.store.delete_audience_questions(self.session.id, HOST)
+        self.assertEqual(removed, self.questions[None])
+        self.assertEqual(
+            await self.question_ids(self.session.id),
+            [qid for qid in self.created if qid not in removed],
+        )
+        self.assertEqual(await self.question_ids(self.other.id), [self.other_question.id])
+
+    async def test_deleting_a_prompt_drops_its_questions(self) -> None:
+        prompt_id = self.prompts[1]
+        await self.store.delete_qna_prompt(self.session.id, prompt_id, HOST)
+        snapshot = await self.store.snapshot(self.session.id)
+        self.assertEqual([p.id for p in snapshot.prompts], [self.prompts[0]])
+        self.assertFalse(set(self.questions[prompt_id]) & {q.id for q in snapshot.questions})
+        with self.assertRaises(NotFoundError):
+            await self.store.vote_question(self.session.id, self.questions[prompt_id][0], "c1")
+
+    async def test_poll_options_keep_order_through_edits(self) -> None:
+        poll = await self.store.create_poll(self.session.id, "Q?", ["A", "B", "C"], False, HOST)
+        await self.store.set_poll_status(self.session.id, poll.id, PollStatus.open, HOST)
+        _, b, c = poll.options
+        poll = await self.store.update_poll(
+            self.session.id, poll.id, HOST, remove_option_ids=[b.id], add_options=["D"]
+        )
+        self.assertEqual([o.label for o in poll.options], ["A", "C", "D"])
+
+        poll = await self.store.vote_poll(self.session.id, poll.id, c.id, "c1")
+        self.assertEqual([o.votes for o in poll.options], [0, 1, 0])
+        with self.assertRaises(NotFoundError):
+            await self.store.vote_poll(self.session.id, poll.id, b.id, "c2")
+
+
+if __name__ == "__main__":
+    unittest.main()
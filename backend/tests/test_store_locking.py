@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.models import PollStatus
+from app.store import InMemoryStore, NotFoundError
+
+HOST = "host-1"
+
+
+async def open_poll(store: InMemoryStore) -> tuple[str, str, str]:
+    session = await store.create_session("Talk", HOST)
+    poll = await store.create_poll(session.id, "Q?", ["A", "B"], False, HOST)
+    await store.set_poll_status(session.id, poll.id, PollStatus.open, HOST)
+    return session.id, poll.id, poll.options[0].id
+
+
+class StoreLockingTests(unittest.IsolatedAsyncioTestCase):
+    async def test_busy_session_does_not_block_other_sessions(self) -> None:
+        store = InMemoryStore()
+        busy, _, _ = await open_poll(store)
+        quiet, poll_id, option_id = await open_poll(store)
+
+        async with store._session_lock(busy):
+            poll = await asyncio.wait_for(
+                store.vote_poll(quiet, poll_id, option_id, "phone-1"), 1
+            )
+            await asyncio.wait_for(store.snapshot(quiet), 1)
+            await asyncio.wait_for(store.host_dashboard_stats(HOST), 1)
+            await asyncio.wait_for(store.list_sessions(HOST), 1)
+            await asyncio.wait_for(
+                store.save_saved_theme(HOST, "Dark", {"bg": "#000"}), 1
+            )
+        self.assertEqual(poll.options[0].votes, 1)
+
+    async def test_session_operations_wait_for_their_own_lock(self) -> None:
+        store = InMemoryStore()
+        session_id, poll_id, option_id = await open_poll(store)
+
+        async with store._session_lock(session_id):
+            vote = asyncio.create_task(
+                store.vote_poll(session_id, poll_id, option_id, "phone-1")
+            )
+            await asyncio.sleep(0.01)
+            self.assertFalse(vote.done())
+        poll = await vote
+        self.assertEqual(poll.options[0].votes, 1)
+
+    async def test_busy_user_library_does_not_block_other_users(self) -> None:
+        store = InMemoryStore()
+        async with store._user_lock("user-a"):
+            await asyncio.wait_for(
+                store.save_saved_theme("user-b", "Light", {"bg": "#fff"}), 1
+            )
+            save = asyncio.create_task(
+                store.save_saved_theme("user-a", "Dark", {"bg": "#000"})
+            )
+            await asyncio.sleep(0.01)
+            self.assertFalse(save.done())
+        await save
+
+    async def test_waiters_on_a_deleted_session_see_not_found(self) -> None:
+        store = InMemoryStore()
+        session_id, poll_id, option_id = await open_poll(store)
+
+        async with store._session_lock(session_id):
+            delete = asyncio.create_task(store.delete_session(session_id, HOST))
+            await asyncio.sleep(0)
+            vote = asyncio.create_task(
+                store.vote_poll(session_id, poll_id, option_id, "phone-1")
+            )
+            await asyncio.sleep(0)
+        await delete
+        with self.assertRaises(NotFoundError):
+            await vote
+        with self.assertRaises(NotFoundError):
+            await store.snapshot(session_id)
+        self.assertNotIn(session_id, store._session_locks)
+
+
+if __name__ == "__main__":
+    unittest.main()
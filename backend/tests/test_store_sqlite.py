@@ -0,0 +1,305 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from typing import Any
+
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from pydantic import BaseModel
+
+from app.models import (
+    ControlMode,
+    PollMode,
+    PollStatus,
+    QnaMode,
+    QnaPromptStatus,
+    QuestionStatus,
+    SessionStatus,
+)
+from app.store import InMemoryStore, NotFoundError
+from app.store_sqlite import SqliteStore
+
+HOST = "host-1"
+CO_HOST = "host-2"
+STRANGER = "host-3"
+# Generated per store, so left out of the comparison.
+VOLATILE = {
+    "id",
+    "code",
+    "created_at",
+    "updated_at",
+    "artifact_id",
+    "session_id",
+    "prompt_id",
+}
+
+
+def normalize(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        value = value.model_dump()
+    if isinstance(value, dict):
+        return {k: normalize(v) for k, v in value.items() if k not in VOLATILE}
+    if isinstance(value, (list, tuple)):
+        return [normalize(item) for item in value]
+    return value
+
+
+async def scenario(store: Any) -> list[Any]:
+    """Drive most of the store interface, recording every result (errors
+    as their type and message) for comparison across backends."""
+    results: list[Any] = []
+
+    async def call(coro: Any) -> Any:
+        try:
+            result = await coro
+        except Exception as exc:  # noqa: BLE001 - recorded for comparison
+            results.append((type(exc).__name__, str(exc)))
+            return None
+        results.append(normalize(result))
+        return result
+
+    session = await call(store.create_session("Talk", HOST))
+    other = await call(store.create_session("Other", HOST))
+    sid = session.id
+    await call(store.create_question(sid, "Too early?"))
+    await call(store.set_qna_status(sid, True, HOST))
+    await call(store.set_qna_status(sid, True, STRANGER))
+    await call(store.set_qna_control_mode(sid, ControlMode.open, HOST))
+    await call(store.set_qna_config(sid, QnaMode.prompt, "Ask away", HOST))
+    await call(store.join_session_as_host(session.code, CO_HOST))
+    await call(store.set_host_join_access(sid, True, CO_HOST))
+    await call(store.set_host_join_access(sid, True, HOST))
+    await call(store.join_session_as_host(session.code.lower(), CO_HOST))
+    await call(store.join_session_as_host("NOPE00", CO_HOST))
+    await call(store.get_session(sid, CO_HOST))
+    await call(store.get_session(sid, STRANGER))
+    await call(store.get_session_by_code(session.code))
+
+    prompt = await call(store.create_qna_prompt(sid, "Ideas?", HOST))
+    await call(store.create_question(sid, "Idea", prompt.id))
+    await call(store.set_qna_prompt_status(sid, prompt.id, QnaPromptStatus.open, HOST))
+    await call(store.set_qna_prompt_mode(sid, prompt.id, ControlMode.closed, HOST))
+    await call(store.update_qna_prompt(sid, prompt.id, HOST, prompt="Better ideas?"))
+    await call(store.set_qna_prompt_status(sid, "missing", QnaPromptStatus.open, HOST))
+    questions = []
+    for index in range(6):
+        question = await call(
+            store.create_question(sid, f"Q{index}", prompt.id if index % 2 else None)
+        )
+        questions.append(question)
+    for index, question in enumerate(questions):
+        for client in range(index % 3 + 1):
+            await call(store.vote_question(sid, question.id, f"c{client}"))
+        await call(store.vote_question(sid, question.id, "c0"))
+        await call(store.vote_question(sid, question.id, None))
+    await call(store.vote_question(sid, "missing", "c0"))
+    await call(store.vote_question("missing", questions[0].id, "c0"))
+    await call(store.set_question_status(sid, questions[0].id, QuestionStatus.approved, HOST))
+
+    single = await call(store.create_poll(sid, "Pick one", ["A", "B", "C"], False, HOST))
+    multi = await call(store.create_poll(sid, "Pick any", ["A", "B", "C", "D"], True, HOST))
+    await call(store.vote_poll(sid, single.id, single.options[0].id, "c0"))
+    for poll in (single, multi):
+        await call(store.set_poll_status(sid, poll.id, PollStatus.open, HOST))
+    await call(store.set_poll_mode(sid, multi.id, PollMode.open, HOST))
+    for client in range(5):
+        await call(store.vote_poll(sid, single.id, single.options[client % 3].id, f"c{client}"))
+        await call(store.vote_poll(sid, multi.id, multi.options[client % 4].id, f"c{client}"))
+        await call(
+            store.vote_poll(sid, multi.id, multi.options[(client + 1) % 4].id, f"c{client}")
+        )
+    await call(store.vote_poll(sid, single.id, single.options[2].id, "c0"))
+    await call(store.vote_poll(sid, single.id, single.options[2].id, "c0"))
+    await call(store.vote_poll(sid, single.id, single.options[1].id, None))
+    await call(store.vote_poll(sid, single.id, "missing", "c0"))
+    await call(store.remove_poll_vote(sid, multi.id, multi.options[1].id, "c0"))
+    await call(store.remove_poll_vote(sid, multi.id, multi.options[1].id, "c0"))
+    await call(store.remove_poll_vote(sid, multi.id, multi.options[1].id, None))
+    await call(store.update_poll(sid, multi.id, HOST, allow_multiple=False))
+    await call(store.update_poll(sid, multi.id, HOST, add_options=["E", "F"]))
+    await call(
+        store.update_poll(
+            sid,
+            multi.id,
+            HOST,
+            question="Pick some",
+            option_labels={multi.options[0].id: "A2"},
+            remove_option_ids=[multi.options[1].id, "missing"],
+            add_options=["E"],
+        )
+    )
+    every_option = [option.id for option in single.options]
+    await call(store.update_poll(sid, single.id, HOST, remove_option_ids=every_option))
+    await call(store.session_session_stats(sid, HOST))
+    stats = await store.batch_session_stats([sid, other.id, "missing"], CO_HOST)
+    results.append((list(stats) == [sid], normalize(list(stats.values()))))
+    await call(store.host_dashboard_stats(HOST))
+    await call(store.host_dashboard_stats(CO_HOST))
+    await call(store.host_dashboard_stats(STRANGER))
+    await call(store.snapshot(sid, CO_HOST))
+
+    await call(store.reset_poll_votes(sid, single.id, HOST))
+    await call(store.vote_poll(sid, single.id, single.options[0].id, "c0"))
+    await call(store.set_poll_status(sid, single.id, PollStatus.closed, HOST))
+    await call(store.vote_poll(sid, single.id, single.options[0].id, "c9"))
+    await call(store.delete_poll(sid, multi.id, HOST))
+    # Removed question ids, as positions in creation order.
+    question_ids = [question.id for question in questions]
+    removed = await store.delete_prompt_questions(sid, prompt.id, HOST)
+    results.append([question_ids.index(qid) for qid in removed if qid in question_ids])
+    removed = await store.delete_audience_questions(sid, HOST)
+    results.append([question_ids.index(qid) for qid in removed if qid in question_ids])
+    await call(store.create_question(sid, "Again", prompt.id))
+    await call(store.delete_qna_prompt(sid, prompt.id, HOST))
+    await call(store.session_session_stats(sid, HOST))
+    await call(store.snapshot(sid))
+    await call(store.list_sessions(HOST))
+    await call(store.list_sessions(CO_HOST, SessionStatus.active, 1))
+    await call(store.delete_session(sid, CO_HOST))
+    await call(store.delete_session(other.id, HOST))
+    await call(store.snapshot(other.id))
+    await call(store.list_sessions(HOST))
+
+    await call(store.save_saved_theme(HOST, "Dark", {"bg": "#000"}))
+    await call(store.save_saved_theme(HOST, "Dark", {"bg": "#111"}))
+    await call(store.save_saved_theme(HOST, "Light", {"bg": "#fff"}))
+    await call(store.list_saved_themes(HOST))
+    await call(store.delete_saved_theme(HOST, "Light"))
+    await call(store.delete_saved_theme(HOST, "Light"))
+    await call(store.get_widget_preset_library(HOST))
+    await call(store.save_widget_preset_library(HOST, {"presets": [{"name": "a"}]}))
+    await call(store.get_widget_preset_library(HOST))
+    guidelines = {"colors": {"primary": "#123456"}, "typography": {"heading": "Inter"}}
+    await call(store.save_brand_profile(HOST, "Acme", "pdf", "acme.pdf", guidelines, "Acme"))
+    await call(store.save_brand_profile(HOST, "Acme", "url", "", guidelines, "Acme 2"))
+    await call(store.get_brand_profile(HOST, "Acme"))
+    await call(store.get_brand_profile(HOST, "Nope"))
+    await call(store.list_brand_profiles(HOST))
+    await call(store.delete_brand_profile(HOST, "Acme"))
+    await call(store.delete_brand_profile(HOST, "Acme"))
+    await call(store.save_saved_artifact(HOST, "Quiz", "<p>1</p>", None, "make", {}, None))
+    await call(store.save_saved_artifact(HOST, "Quiz", "<p>1</p>", None, "make", {}, None))
+    await call(
+        store.save_saved_artifact(
+            HOST, "Quiz", "<p>2</p>", None, "again", {"a": 1}, {"t": 1}, {"s": 1}, "qna"
+        )
+    )
+    await call(store.list_saved_artifacts(HOST))
+    await call(store.list_saved_artifact_versions(HOST, "Quiz"))
+    await call(store.list_saved_artifact_versions(HOST, "Quiz", limit=1))
+    await call(store.restore_saved_artifact_version(HOST, "Quiz", 1))
+    await call(store.restore_saved_artifact_version(HOST, "Quiz", 9))
+    await call(store.list_saved_artifact_versions(HOST, "Quiz"))
+    await call(store.delete_saved_artifact(HOST, "Quiz"))
+    await call(store.list_saved_artifact_versions(HOST, "Quiz"))
+    return results
+
+
+class SqliteStoreTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "prezo.db")
+
+    async def open_store(self, **kwargs: Any) -> SqliteStore:
+        store = SqliteStore(self.path, **kwargs)
+        self.addAsyncCleanup(store.close)
+        return store
+
+    async def test_matches_in_memory_store(self) -> None:
+        expected = await scenario(InMemoryStore())
+        actual = await scenario(await self.open_store())
+        self.assertEqual(len(actual), len(expected))
+        for index, (got, want) in enumerate(zip(actual, expected)):
+            self.assertEqual(got, want, f"result {index}")
+
+    async def test_sessions_survive_reopening_the_database(self) -> None:
+        store = SqliteStore(self.path)
+        session = await store.create_session("Talk", HOST)
+        poll = await store.create_poll(session.id, "Q?", ["A", "B"], False, HOST)
+        await store.set_poll_status(session.id, poll.id, PollStatus.open, HOST)
+        await store.vote_poll(session.id, poll.id, poll.options[0].id, "c1")
+        before = (await store.snapshot(session.id)).model_dump()
+        version = await store.snapshot_version(session.id)
+        await store.close()
+
+        reopened = await self.open_store()
+        self.assertEqual((await reopened.snapshot(session.id)).model_dump(), before)
+        self.assertEqual(await reopened.snapshot_version(session.id), version)
+        # The vote history came back too: a repeat vote is a no-op.
+        again = await reopened.vote_poll(session.id, poll.id, poll.options[0].id, "c1")
+        self.assertEqual([o.votes for o in again.options], [1, 0])
+
+    async def test_concurrent_votes_are_not_lost(self) -> None:
+        store = await self.open_store()
+        session = await store.create_session("Talk", HOST)
+        poll = await store.create_poll(session.id, "Q?", ["A", "B", "C"], False, HOST)
+        await store.set_poll_status(session.id, poll.id, PollStatus.open, HOST)
+        await store.set_qna_status(session.id, True, HOST)
+        question = await store.create_question(session.id, "Why?")
+
+        async def voter(index: int) -> None:
+            client = f"c{index}"
+            for option in poll.options:
+                await store.vote_poll(session.id, poll.id, option.id, client)
+            await store.vote_question(session.id, question.id, client)
+
+        await asyncio.gather(*(voter(index) for index in range(300)))
+        snapshot = await store.snapshot(session.id)
+        self.assertEqual([o.votes for o in snapshot.polls[0].options], [0, 0, 300])
+        self.assertEqual(snapshot.questions[0].votes, 300)
+        stats = await store.session_session_stats(session.id, HOST)
+        self.assertEqual(stats.unique_participants, 300)
+
+    async def test_failed_write_only_rolls_back_itself(self) -> None:
+        store = await self.open_store()
+        session = await store.create_session("Talk", HOST)
+        await store.set_qna_status(session.id, True, HOST)
+        # Queued together, these share one transaction.
+        results = await asyncio.gather(
+            store.create_question(session.id, "First"),
+            store.vote_question(session.id, "missing", "c1"),
+            store.create_question(session.id, "Second"),
+            return_exceptions=True,
+        )
+        self.assertIsInstance(results[1], NotFoundError)
+        snapshot = await store.snapshot(session.id)
+        self.assertEqual(sorted(q.text for q in snapshot.questions), ["First", "Second"])
+
+    async def test_snapshot_is_cached_until_a_write(self) -> None:
+        store = await self.open_store()
+        session = await store.create_session("Talk", HOST)
+        first = await store.snapshot(session.id)
+        self.assertIs(await store.snapshot(session.id), first)
+        await store.set_qna_status(session.id, True, HOST)
+        self.assertIsNot(await store.snapshot(session.id), first)
+        self.assertTrue((await store.snapshot(session.id)).session.qna_open)
+
+    async def test_worker_survives_another_process_holding_the_write_lock(self) -> None:
+        store = await self.open_store(busy_timeout_ms=100)
+        session = await store.create_session("Talk", HOST)
+        other = sqlite3.connect(self.path, isolation_level=None)
+        self.addCleanup(other.close)
+        other.execute("begin immediate")
+        with self.assertRaises(sqlite3.OperationalError):
+            await asyncio.wait_for(store.set_qna_status(session.id, True, HOST), 5)
+        other.execute("rollback")
+
+        updated = await asyncio.wait_for(store.set_qna_status(session.id, True, HOST), 5)
+        self.assertTrue(updated.qna_open)
+        fetched = await asyncio.wait_for(store.get_session(session.id), 5)
+        self.assertTrue(fetched.qna_open)
+
+
+
+if __name__ == "__main__":
+    unittest.main()
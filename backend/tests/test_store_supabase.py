@@ -1,12 +1,16 @@
 from __future__ import annotations
 
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import os
+import re
 import sys
 import time
 import types
 import unittest
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import Any
 from unittest.mock import AsyncMock
 
 import httpx
@@ -16,6 +20,16 @@ BACKEND_ROOT = Path(__file__).resolve().parents[1]
 if str(BACKEND_ROOT) not in sys.path:
     sys.path.insert(0, str(BACKEND_ROOT))
 
+REPO_ROOT = BACKEND_ROOT.parent
+# A disposable Postgres database for the tests that run the SQL functions
+# themselves; they are skipped without one (and without psycopg).
+POSTGRES_URL = os.environ.get("PREZO_TEST_POSTGRES_URL")
+
+try:
+    import psycopg
+except ImportError:
+    psycopg = None
+
 try:
     import pydantic_settings  # noqa: F401
 except ModuleNotFoundError:
@@ -38,8 +52,15 @@ except ModuleNotFoundError:
     stub_module.SettingsConfigDict = SettingsConfigDict
     sys.modules["pydantic_settings"] = stub_module
 
-from app.models import QnaMode, Session, SessionSnapshot, SessionStatus  # noqa: E402
+from app.models import PollStatus, QnaMode, Session, SessionSnapshot, SessionStatus  # noqa: E402
+from app.store import ConflictError, NotFoundError  # noqa: E402
 from app.store_supabase import SupabaseError, SupabaseStore  # noqa: E402
+from benchmarks.postgrest_standin import (  # noqa: E402
+    BASE_URL,
+    PostgrestStandin,
+    session_snapshot,
+    vote_question_atomic,
+)
 
 
 def build_snapshot(session_id: str = "session-1") -> SessionSnapshot:
@@ -150,5 +171,534 @@ class SupabaseStoreTransportTests(unittest.IsolatedAsyncioTestCase):
         self.assertIsNot(result, snapshot)
 
 
+class SupabaseStoreSnapshotRpcTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.standin = PostgrestStandin()
+        self.store = SupabaseStore(
+            BASE_URL, "service-role-key", transport=self.standin.transport()
+        )
+        self.addAsyncCleanup(self.store.close)
+        session = await self.store.create_session("Demo", "host-1")
+        self.session_id = session.id
+        await self.store.set_qna_status(session.id, True, "host-1")
+        for text in ("First?", "Second?"):
+            await self.store.create_question(session.id, text)
+        await self.store.create_qna_prompt(session.id, "Ideas", "host-1")
+        for question in ("Lunch?", "Dinner?"):
+            poll = await self.store.create_poll(
+                session.id, question, ["A", "B", "C"], False, "host-1"
+            )
+            await self.store.set_poll_status(session.id, poll.id, PollStatus.open, "host-1")
+            await self.store.vote_poll(session.id, poll.id, poll.options[1].id, "c1")
+        self.standin.calls.clear()
+
+    async def test_snapshot_is_one_rpc_and_matches_the_table_reads(self) -> None:
+        snapshot = await self.store._load_snapshot(self.session_id, "host-1")
+        self.assertEqual(dict(self.standin.calls), {"POST rpc/session_snapshot": 1})
+
+        expected = await self.store._load_snapshot_tables(self.session_id, "host-1")
+        self.assertEqual(snapshot.model_dump(), expected.model_dump())
+        self.assertEqual([q.text for q in snapshot.questions], ["Second?", "First?"])
+        self.assertEqual([p.options[1].votes for p in snapshot.polls], [1, 1])
+        self.assertTrue(snapshot.session.is_original_host)
+
+        with self.assertRaises(NotFoundError):
+            await self.store._load_snapshot("00000000-0000-0000-0000-000000000000")
+
+    async def test_falls_back_to_table_reads_while_the_function_is_missing(self) -> None:
+        expected = await self.store._load_snapshot(self.session_id)
+        self.standin.functions.pop("session_snapshot")
+        self.standin.calls.clear()
+
+        with self.assertLogs("prezo.supabase", "WARNING"):
+            snapshot = await self.store._load_snapshot(self.session_id)
+        self.assertEqual(snapshot.model_dump(), expected.model_dump())
+        self.assertEqual(self.standin.calls["POST rpc/session_snapshot"], 1)
+
+        await self.store._load_snapshot(self.session_id)
+        self.assertEqual(self.standin.calls["POST rpc/session_snapshot"], 1)
+        self.assertEqual(self.standin.calls["GET sessions"], 2)
+
+        # Asked again once the retry interval has passed.
+        self.store._missing_rpcs_until.clear()
+        self.standin.functions["session_snapshot"] = session_snapshot
+        await self.store._load_snapshot(self.session_id)
+        self.assertEqual(self.standin.calls["POST rpc/session_snapshot"], 2)
+        self.assertEqual(self.standin.calls["GET sessions"], 2)
+
+
+class SupabaseStoreQuestionVoteTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.standin = PostgrestStandin()
+        self.store = SupabaseStore(
+            BASE_URL, "service-role-key", transport=self.standin.transport()
+        )
+        self.addAsyncCleanup(self.store.close)
+        session = await self.store.create_session("Demo", "host-1")
+        await self.store.set_qna_status(session.id, True, "host-1")
+        self.session_id = session.id
+        self.question = await self.store.create_question(session.id, "Why?")
+        self.standin.calls.clear()
+
+    async def test_parallel_upvotes_all_count_once_per_client(self) -> None:
+        """Covers the store's side: one RPC per vote and no count written
+        back. The stand-in's vote_question_atomic is a Python copy of the
+        SQL function that serves one request at a time, so nothing here
+        contends; VoteQuestionAtomicSqlTests checks the function itself."""
+        clients = [f"client-{index}" for index in range(1000)]
+        await asyncio.gather(
+            *(
+                self.store.vote_question(self.session_id, self.question.id, client)
+                for client in clients + clients[:200]
+            )
+        )
+        snapshot = await self.store.snapshot(self.session_id)
+        self.assertEqual(snapshot.questions[0].votes, 1000)
+        self.assertEqual(self.standin.calls["POST rpc/vote_question_atomic"], 1200)
+        self.assertEqual(self.standin.calls["PATCH questions"], 0)
+
+    async def test_unknown_question_is_not_found(self) -> None:
+        with self.assertRaises(NotFoundError):
+            await self.store.vote_question(
+                self.session_id, "00000000-0000-0000-0000-000000000000", "client-1"
+            )
+
+    async def test_falls_back_to_table_writes_while_the_function_is_missing(self) -> None:
+        self.standin.functions.pop("vote_question_atomic")
+        with self.assertLogs("prezo.supabase", "WARNING"):
+            question = await self.store.vote_question(
+                self.session_id, self.question.id, "client-1"
+            )
+        self.assertEqual(question.votes, 1)
+        question = await self.store.vote_question(self.session_id, self.question.id, "client-1")
+        self.assertEqual(question.votes, 1)
+        self.assertEqual(self.standin.calls["POST rpc/vote_question_atomic"], 1)
+
+
+class VoteQuestionAtomicSqlTests(unittest.IsolatedAsyncioTestCase):
+    """sql/vote_question_atomic.sql against what the store and the stand-in
+    expect of it."""
+
+    def setUp(self) -> None:
+        self.sql = (REPO_ROOT / "sql" / "vote_question_atomic.sql").read_text()
+
+    async def test_store_sends_the_functions_parameters(self) -> None:
+        signature = re.search(
+            r"function public\.vote_question_atomic\((.*?)\)\s*returns", self.sql, re.S
+        )
+        self.assertIsNotNone(signature)
+        declared = re.findall(r"\b(p_\w+)\s", signature.group(1))
+
+        standin = PostgrestStandin()
+        sent: list[dict[str, Any]] = []
+
+        def recording(db, args: dict[str, Any]) -> Any:
+            sent.append(args)
+            return vote_question_atomic(db, args)
+
+        standin.functions["vote_question_atomic"] = recording
+        store = SupabaseStore(BASE_URL, "service-role-key", transport=standin.transport())
+        self.addAsyncCleanup(store.close)
+        session = await store.create_session("Demo", "host-1")
+        await store.set_qna_status(session.id, True, "host-1")
+        question = await store.create_question(session.id, "Why?")
+        await store.vote_question(session.id, question.id, "client-1")
+        self.assertEqual(sorted(sent[0]), sorted(declared))
+
+    def test_function_counts_in_the_database_once_per_client(self) -> None:
+        sql = " ".join(self.sql.lower().split())
+        self.assertIn("on conflict (question_id, client_id) do nothing", sql)
+        self.assertIn("set votes = votes + 1", sql)
+        self.assertIn("errcode = 'p0002'", sql)
+        self.assertIn(
+            "grant execute on function public.vote_question_atomic(uuid, uuid, text)"
+            " to service_role",
+            sql,
+        )
+        # The conflict target needs this unique constraint.
+        schema = (REPO_ROOT / "supabase" / "schema.sql").read_text().lower()
+        question_votes = re.search(
+            r"create table if not exists question_votes \((.*?)\n\);", schema, re.S
+        )
+        self.assertIsNotNone(question_votes)
+        self.assertIn("unique (question_id, client_id)", question_votes.group(1))
+
+
+# Just enough of supabase/schema.sql for vote_question_atomic.
+POSTGRES_SETUP = """
+do $$
+declare
+  v_role text;
+begin
+  foreach v_role in array array['anon', 'authenticated', 'service_role'] loop
+    if not exists (select 1 from pg_roles where rolname = v_role) then
+      execute format('create role %I nologin', v_role);
+    end if;
+  end loop;
+end $$;
+
+create table if not exists questions (
+  id uuid primary key default gen_random_uuid(),
+  session_id uuid not null,
+  text text not null default '',
+  votes integer not null default 0
+);
+
+create table if not exists question_votes (
+  id uuid primary key default gen_random_uuid(),
+  question_id uuid not null references questions(id) on delete cascade,
+  client_id text not null,
+  created_at timestamptz not null default now(),
+  unique (question_id, client_id)
+);
+"""
+
+
+@unittest.skipUnless(
+    psycopg is not None and POSTGRES_URL,
+    "needs psycopg and PREZO_TEST_POSTGRES_URL (a disposable database)",
+)
+class VoteQuestionAtomicPostgresTests(unittest.TestCase):
+    def setUp(self) -> None:
+        sql = (REPO_ROOT / "sql" / "vote_question_atomic.sql").read_text()
+        with psycopg.connect(POSTGRES_URL, autocommit=True) as db:
+            db.execute(POSTGRES_SETUP)
+            db.execute(sql)
+            self.question_id, self.session_id = db.execute(
+                "insert into questions (session_id) values (gen_random_uuid())"
+                " returning id, session_id"
+            ).fetchone()
+
+    def tearDown(self) -> None:
+        with psycopg.connect(POSTGRES_URL, autocommit=True) as db:
+            db.execute("delete from questions where id = %s", (self.question_id,))
+
+    def vote(self, client_id: str | None) -> dict[str, Any]:
+        with psycopg.connect(POSTGRES_URL, autocommit=True) as db:
+            return db.execute(
+                "select vote_question_atomic(%s, %s, %s)",
+                (self.session_id, self.question_id, client_id),
+            ).fetchone()[0]
+
+    def test_parallel_upvotes_count_once_per_client(self) -> None:
+        clients = [f"client-{index}" for index in range(200)]
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            list(pool.map(self.vote, clients + clients[:50]))
+        with psycopg.connect(POSTGRES_URL) as db:
+            votes = db.execute(
+                "select votes from questions where id = %s", (self.question_id,)
+            ).fetchone()[0]
+            voters = db.execute(
+                "select count(*) from question_votes where question_id = %s",
+                (self.question_id,),
+            ).fetchone()[0]
+        self.assertEqual((votes, voters), (200, 200))
+
+    def test_unknown_question_raises_p0002(self) -> None:
+        with psycopg.connect(POSTGRES_URL, autocommit=True) as db:
+            with self.assertRaises(psycopg.Error) as raised:
+                db.execute(
+                    "select vote_question_atomic(%s, gen_random_uuid(), 'client-1')",
+                    (self.session_id,),
+                )
+        self.assertEqual(raised.exception.sqlstate, "P0002")
+
+
+class SupabaseStoreStatsRpcTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.standin = PostgrestStandin()
+        self.store = SupabaseStore(
+            BASE_URL, "service-role-key", transport=self.standin.transport()
+        )
+        self.addAsyncCleanup(self.store.close)
+        store = self.store
+        owned = await store.create_session("Owned", "host-1")
+        await store.set_qna_status(owned.id, True, "host-1")
+        question = await store.create_question(owned.id, "Why?")
+        for client in ("client-1", "client-2"):
+            await store.vote_question(owned.id, question.id, client)
+        poll = await store.create_poll(owned.id, "Q?", ["A", "B"], False, "host-1")
+        await store.set_poll_status(owned.id, poll.id, PollStatus.open, "host-1")
+        for client in ("client-2", "client-3"):
+            await store.vote_poll(owned.id, poll.id, poll.options[0].id, client)
+        await store.create_qna_prompt(owned.id, "Ideas?", "host-1")
+
+        cohosted = await store.create_session("Co-hosted", "host-2")
+        await store.set_host_join_access(cohosted.id, True, "host-2")
+        await store.join_session_as_host(cohosted.code, "host-1")
+        poll = await store.create_poll(cohosted.id, "Q?", ["A"], False, "host-2")
+        await store.set_poll_status(cohosted.id, poll.id, PollStatus.open, "host-2")
+        await store.vote_poll(cohosted.id, poll.id, poll.options[0].id, "client-4")
+
+        foreign = await store.create_session("Foreign", "host-2")
+        self.session_ids = [owned.id, cohosted.id, foreign.id, "not-a-uuid"]
+        self.standin.calls.clear()
+
+    async def stats(self) -> tuple[Any, ...]:
+        store = self.store
+        return (
+            await store.host_dashboard_stats("host-1"),
+            await store.session_session_stats(self.session_ids[0], "host-1"),
+            await store.batch_session_stats(self.session_ids, "host-1"),
+        )
+
+    async def test_rpcs_count_like_the_table_reads_in_one_request_each(self) -> None:
+        dashboard, owned, batch = await self.stats()
+        self.assertEqual(self.standin.request_count, 3)
+        self.assertEqual(
+            dashboard.model_dump(),
+            {"active_sessions": 2, "active_activities": 3, "unique_participants": 4},
+        )
+        self.assertEqual(owned.model_dump(), {"unique_participants": 3, "active_activities": 2})
+        self.assertEqual(list(batch), self.session_ids[:2])
+
+        self.standin.functions.pop("host_dashboard_stats")
+        self.standin.functions.pop("session_stats")
+        self.store._missing_rpcs_until.clear()
+        with self.assertLogs("prezo.supabase", "WARNING"):
+            fallback = await self.stats()
+        self.assertEqual(fallback, (dashboard, owned, batch))
+
+    async def test_sessions_the_user_does_not_host_are_not_found(self) -> None:
+        with self.assertRaises(NotFoundError):
+            await self.store.session_session_stats(self.session_ids[2], "host-1")
+        with self.assertRaises(NotFoundError):
+            await self.store.session_session_stats("not-a-uuid", "host-1")
+        self.assertEqual(await self.store.batch_session_stats(["not-a-uuid"], "host-1"), {})
+        self.assertEqual(self.standin.request_count, 1)
+
+
+class SupabaseStoreWriteBehindVoteTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.standin = PostgrestStandin()
+        self.store = SupabaseStore(
+            BASE_URL,
+            "service-role-key",
+            transport=self.standin.transport(),
+            vote_flush_seconds=60.0,
+            vote_queue_size=5,
+        )
+        self.addAsyncCleanup(self.store.close)
+        session = await self.store.create_session("Demo", "host-1")
+        self.session_id = session.id
+        poll = await self.store.create_poll(session.id, "Q?", ["A", "B"], False, "host-1")
+        self.poll = await self.store.set_poll_status(
+            session.id, poll.id, PollStatus.open, "host-1"
+        )
+        self.option_a, self.option_b = (option.id for option in self.poll.options)
+        self.standin.calls.clear()
+
+    async def vote(self, option_id: str, client_id: str | None) -> list[int]:
+        poll = await self.store.vote_poll(self.session_id, self.poll.id, option_id, client_id)
+        return [option.votes for option in poll.options]
+
+    def stored_counts(self) -> list[int]:
+        rows = self.standin.db.execute(
+            "select votes from poll_option_vote_totals where poll_id = ? order by position",
+            (self.poll.id,),
+        )
+        return [row[0] for row in rows]
+
+    async def test_votes_are_answered_at_once_and_written_in_one_batch(self) -> None:
+        self.assertEqual(await self.vote(self.option_a, "client-1"), [1, 0])
+        self.assertEqual(await self.vote(self.option_a, "client-1"), [1, 0])
+        self.assertEqual(await self.vote(self.option_b, "client-1"), [0, 1])
+        self.assertEqual(await self.vote(self.option_a, None), [1, 1])
+        self.assertEqual(self.standin.calls["POST rpc/session_snapshot"], 1)
+        self.assertEqual(self.standin.request_count, 1)
+        self.assertEqual(self.stored_counts(), [0, 0])
+        snapshot = await self.store.snapshot(self.session_id)
+        self.assertEqual([option.votes for option in snapshot.polls[0].options], [1, 1])
+
+        await self.store._flush_votes()
+        self.assertEqual(self.standin.calls["POST rpc/vote_poll_batch"], 1)
+        self.assertEqual(self.stored_counts(), [1, 1])
+        self.assertEqual(self.store.memory_stats()["buffered_votes"], 0)
+
+    async def test_flush_corrects_counts_from_votes_this_process_did_not_see(self) -> None:
+        self.standin.db.execute(
+            "insert into poll_votes (id, poll_id, option_id, client_id, created_at)"
+            " values ('earlier', ?, ?, 'client-1', '2026-01-01T00:00:00+00:00')",
+            (self.poll.id, self.option_a),
+        )
+        self.standin.db.execute(
+            "update poll_options set votes = 1 where id = ?", (self.option_a,)
+        )
+        # Counted here, then deduped by the database when flushed.
+        self.assertEqual(await self.vote(self.option_a, "client-1"), [2, 0])
+        await self.store._flush_votes()
+        self.assertEqual(self.stored_counts(), [1, 0])
+        self.assertEqual(await self.vote(self.option_b, "client-2"), [1, 1])
+
+    async def test_poll_changes_write_buffered_votes_first(self) -> None:
+        await self.vote(self.option_a, "client-1")
+        closed = await self.store.set_poll_status(
+            self.session_id, self.poll.id, PollStatus.closed, "host-1"
+        )
+        self.assertEqual([option.votes for option in closed.options], [1, 0])
+        with self.assertRaises(ConflictError):
+            await self.vote(self.option_a, "client-2")
+        with self.assertRaises(NotFoundError):
+            await self.store.vote_poll(self.session_id, "missing", self.option_a, "client-2")
+
+    async def remove(self, option_id: str, client_id: str | None) -> list[int]:
+        poll = await self.store.remove_poll_vote(
+            self.session_id, self.poll.id, option_id, client_id
+        )
+        return [option.votes for option in poll.options]
+
+    async def test_removing_an_unwritten_vote_cancels_it_in_the_buffer(self) -> None:
+        self.assertEqual(await self.vote(self.option_a, "client-1"), [1, 0])
+        self.assertEqual(await self.remove(self.option_a, "client-1"), [0, 0])
+        self.assertEqual(self.standin.request_count, 1)
+        self.assertEqual(self.store.memory_stats()["buffered_votes"], 0)
+        self.assertEqual(await self.vote(self.option_a, "client-1"), [1, 0])
+        await self.store._flush_votes()
+        self.assertEqual(self.stored_counts(), [1, 0])
+
+    async def test_removing_a_stored_vote_keeps_the_cached_poll(self) -> None:
+        await self.vote(self.option_a, "client-1")
+        await self.store._flush_votes()
+        self.assertEqual(await self.remove(self.option_a, "client-1"), [0, 0])
+        self.assertEqual(self.standin.calls["POST rpc/remove_poll_vote_atomic"], 1)
+        self.assertEqual(self.stored_counts(), [0, 0])
+        self.assertEqual(await self.vote(self.option_b, "client-2"), [0, 1])
+        self.assertEqual(self.standin.calls["POST rpc/session_snapshot"], 1)
+
+    async def test_removing_a_moved_vote_writes_the_buffer_first(self) -> None:
+        await self.vote(self.option_a, "client-1")
+        self.assertEqual(await self.vote(self.option_b, "client-1"), [0, 1])
+        self.assertEqual(await self.remove(self.option_b, "client-1"), [0, 0])
+        self.assertEqual(self.standin.calls["POST rpc/vote_poll_batch"], 1)
+        self.assertEqual(self.stored_counts(), [0, 0])
+
+    async def test_poll_change_waits_for_votes_that_land_during_a_flush(self) -> None:
+        await self.vote(self.option_a, "client-1")
+        self.standin.latency = 0.05
+        flushing = asyncio.create_task(self.store._flush_votes())
+        await asyncio.sleep(0.01)
+        # Buffered after the flush took its batch.
+        self.assertEqual(await self.vote(self.option_b, "client-2"), [1, 1])
+        closed = await self.store.set_poll_status(
+            self.session_id, self.poll.id, PollStatus.closed, "host-1"
+        )
+        await flushing
+        self.assertEqual([option.votes for option in closed.options], [1, 1])
+        self.assertEqual(self.stored_counts(), [1, 1])
+
+    async def test_votes_wait_while_a_poll_change_writes_the_buffer(self) -> None:
+        await self.vote(self.option_a, "client-1")
+        self.standin.latency = 0.05
+        closing = asyncio.create_task(
+            self.store.set_poll_status(self.session_id, self.poll.id, PollStatus.closed, "host-1")
+        )
+        await asyncio.sleep(0.08)
+        with self.assertRaises(ConflictError):
+            await self.vote(self.option_b, "client-2")
+        closed = await closing
+        self.assertEqual([option.votes for option in closed.options], [1, 0])
+        self.assertEqual(self.stored_counts(), [1, 0])
+
+    async def test_full_buffer_waits_for_a_flush_and_fails_when_flushing_fails(self) -> None:
+        for index in range(5):
+            await self.vote(self.option_a, f"client-{index}")
+        waiting = asyncio.create_task(self.vote(self.option_a, "client-5"))
+        await asyncio.sleep(0)
+        self.assertFalse(waiting.done())
+        self.assertEqual(await waiting, [6, 0])
+        self.assertEqual(self.stored_counts(), [5, 0])
+
+        batch = self.standin.functions.pop("vote_poll_batch")
+        atomic = self.standin.functions.pop("vote_poll_atomic")
+        for index in range(6, 10):
+            await self.vote(self.option_a, f"client-{index}")
+        with self.assertLogs("prezo.supabase", "ERROR"):
+            with self.assertRaises(SupabaseError) as raised:
+                await self.vote(self.option_a, "client-10")
+        self.assertEqual(raised.exception.status_code, 503)
+        self.assertEqual(self.store.memory_stats()["buffered_votes"], 5)
+
+        self.standin.functions.update(vote_poll_batch=batch, vote_poll_atomic=atomic)
+        self.store._missing_rpcs_until.clear()
+        await self.store._flush_votes()
+        self.assertEqual(self.stored_counts(), [10, 0])
+
+    async def test_close_writes_what_is_buffered(self) -> None:
+        await self.vote(self.option_a, "client-1")
+        await self.vote(self.option_b, "client-2")
+        await self.store.close()
+        self.assertEqual(self.standin.calls["POST rpc/vote_poll_batch"], 1)
+        self.assertEqual(self.store.memory_stats()["buffered_votes"], 0)
+
+    async def test_falls_back_to_one_atomic_call_per_vote(self) -> None:
+        self.standin.functions.pop("vote_poll_batch")
+        await self.vote(self.option_a, "client-1")
+        await self.vote(self.option_b, "client-2")
+        with self.assertLogs("prezo.supabase", "WARNING"):
+            await self.store._flush_votes()
+        self.assertEqual(self.standin.calls["POST rpc/vote_poll_atomic"], 2)
+        self.assertEqual(self.stored_counts(), [1, 1])
+
+
+class SupabaseStoreShardedVoteCounterTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.standin = PostgrestStandin()
+        self.store = SupabaseStore(
+            BASE_URL, "service-role-key", transport=self.standin.transport()
+        )
+        self.addAsyncCleanup(self.store.close)
+        session = await self.store.create_session("Demo", "host-1")
+        self.session_id = session.id
+        poll = await self.store.create_poll(session.id, "Q?", ["A", "B"], False, "host-1")
+        self.poll = await self.store.set_poll_status(
+            session.id, poll.id, PollStatus.open, "host-1"
+        )
+
+    def counts(self, poll: Any) -> list[int]:
+        return [option.votes for option in poll.options]
+
+    async def test_votes_spread_over_shards_and_are_summed_on_read(self) -> None:
+        option_a, option_b = (option.id for option in self.poll.options)
+        await asyncio.gather(
+            *(
+                self.store.vote_poll(self.session_id, self.poll.id, option_a, f"client-{index}")
+                for index in range(200)
+            )
+        )
+        poll = await self.store.vote_poll(self.session_id, self.poll.id, option_b, "client-0")
+        self.assertEqual(self.counts(poll), [199, 1])
+        shards = self.standin.db.execute(
+            "select count(*) from poll_option_vote_shards where option_id = ?", (option_a,)
+        ).fetchone()[0]
+        self.assertGreater(shards, 1)
+        snapshot = await self.store.snapshot(self.session_id)
+        self.assertEqual(self.counts(snapshot.polls[0]), [199, 1])
+        closed = await self.store.set_poll_status(
+            self.session_id, self.poll.id, PollStatus.closed, "host-1"
+        )
+        self.assertEqual(self.counts(closed), [199, 1])
+
+        reset = await self.store.reset_poll_votes(self.session_id, self.poll.id, "host-1")
+        self.assertEqual(self.counts(reset), [0, 0])
+        self.assertEqual(
+            self.standin.db.execute("select count(*) from poll_option_vote_shards").fetchone()[0],
+            0,
+        )
+
+    async def test_reads_poll_options_while_the_view_is_missing(self) -> None:
+        self.standin.db.execute(
+            "update poll_options set votes = 3 where id = ?", (self.poll.options[0].id,)
+        )
+        self.standin._columns.pop("poll_option_vote_totals")
+        self.standin._columns.pop("poll_option_vote_shards")
+        with self.assertLogs("prezo.supabase", "WARNING"):
+            closed = await self.store.set_poll_status(
+                self.session_id, self.poll.id, PollStatus.closed, "host-1"
+            )
+        self.assertEqual(self.counts(closed), [3, 0])
+        reset = await self.store.reset_poll_votes(self.session_id, self.poll.id, "host-1")
+        self.assertEqual(self.counts(reset), [0, 0])
+
+
 if __name__ == "__main__":
     unittest.main()
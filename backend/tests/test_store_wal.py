@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.models import PollStatus, QnaPromptStatus, QuestionStatus
+from app.store import InMemoryStore
+from app.store_wal import WalUnavailableError
+
+HOST = "host-1"
+CO_HOST = "host-2"
+
+
+class StoreWalTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.wal_dir = self.tmp.name
+
+    def open_store(self, **kwargs) -> InMemoryStore:
+        kwargs.setdefault("wal_group_commit_seconds", 0)
+        return InMemoryStore(wal_dir=self.wal_dir, **kwargs)
+
+    async def state(self, store: InMemoryStore, session_ids: list[str]) -> dict:
+        return {
+            "snapshots": [
+                (await store.snapshot(sid, viewer_user_id=HOST)).model_dump()
+                for sid in session_ids
+            ],
+            "sessions": [s.model_dump() for s in await store.list_sessions(CO_HOST)],
+            "stats": (await store.host_dashboard_stats(HOST)).model_dump(),
+            "themes": [t.model_dump() for t in await store.list_saved_themes(HOST)],
+            "presets": (await store.get_widget_preset_library(HOST)).model_dump(),
+            "brands": [b.model_dump() for b in await store.list_brand_profiles(HOST)],
+            "artifacts": [a.model_dump() for a in await store.list_saved_artifacts(HOST)],
+            "versions": [
+                v.model_dump()
+                for v in await store.list_saved_artifact_versions(HOST, "Quiz")
+            ],
+        }
+
+    async def populate(self, store: InMemoryStore) -> list[str]:
+        session = await store.create_session("Talk", HOST)
+        doomed = await store.create_session("Gone", HOST)
+        await store.set_host_join_access(session.id, True, HOST)
+        await store.join_session_as_host(session.code, CO_HOST)
+        await store.set_qna_status(session.id, True, HOST)
+
+        prompt = await store.create_qna_prompt(session.id, "Ideas?", HOST)
+        await store.set_qna_prompt_status(session.id, prompt.id, QnaPromptStatus.open, HOST)
+        question = await store.create_question(session.id, "Why?")
+        await store.create_question(session.id, "Idea", prompt.id)
+        await store.set_question_status(session.id, question.id, QuestionStatus.approved, HOST)
+        await store.vote_question(session.id, question.id, "c1")
+        await store.vote_question(session.id, question.id, "c2")
+        cleared = await store.create_question(session.id, "Old")
+        await store.vote_question(session.id, cleared.id, "c9")
+        await store.delete_audience_questions(session.id, HOST)
+        await store.create_question(session.id, "New")
+
+        single = await store.create_poll(session.id, "One?", ["A", "B", "C"], False, HOST)
+        multi = await store.create_poll(session.id, "Many?", ["X", "Y"], True, HOST)
+        for poll in (single, multi):
+            await store.set_poll_status(session.id, poll.id, PollStatus.open, HOST)
+        a, b, c = (option.id for option in single.options)
+        await store.vote_poll(session.id, single.id, a, "c1")
+        await store.vote_poll(session.id, single.id, b, "c1")
+        await store.vote_poll(session.id, single.id, c, "c3")
+        await store.update_poll(
+            session.id, single.id, HOST, remove_option_ids=[c], add_options=["D"]
+        )
+        x, y = (option.id for option in multi.options)
+        await store.vote_poll(session.id, multi.id, x, "c4")
+        await store.vote_poll(session.id, multi.id, y, "c4")
+        await store.remove_poll_vote(session.id, multi.id, x, "c4")
+        reset = await store.create_poll(session.id, "Reset?", ["A", "B"], False, HOST)
+        await store.set_poll_status(session.id, reset.id, PollStatus.open, HOST)
+        await store.vote_poll(session.id, reset.id, reset.options[0].id, "c5")
+        await store.reset_poll_votes(session.id, reset.id, HOST)
+        deleted = await store.create_poll(session.id, "Drop?", ["A", "B"], False, HOST)
+        await store.delete_poll(session.id, deleted.id, HOST)
+        await store.create_poll(doomed.id, "Q?", ["A", "B"], False, HOST)
+        await store.delete_session(doomed.id, HOST)
+
+        await store.save_saved_theme(HOST, "Dark", {"bg": "#000"})
+        await store.save_saved_theme(HOST, "Light", {"bg": "#fff"})
+        await store.delete_saved_theme(HOST, "Light")
+        await store.save_widget_preset_library(HOST, {"presets": [1, 2]})
+        await store.save_brand_profile(HOST, "Acme", "manual", "", {}, "Acme brand")
+        await store.save_saved_artifact(HOST, "Quiz", "<p>1</p>", None, None, {}, None)
+        await store.save_saved_artifact(HOST, "Quiz", "<p>2</p>", None, "again", {}, None)
+        await store.restore_saved_artifact_version(HOST, "Quiz", 1)
+        return [session.id]
+
+    async def test_restart_rebuilds_sessions_and_libraries(self) -> None:
+        store = self.open_store()
+        session_ids = await self.populate(store)
+        before = await self.state(store, session_ids)
+        stats_before = await store.session_session_stats(session_ids[0], HOST)
+        await store.close()
+
+        recovered = self.open_store()
+        self.assertEqual(await self.state(recovered, session_ids), before)
+        # Derived state came back too: stats counters and per-client history.
+        session_id = session_ids[0]
+        stats = await recovered.session_session_stats(session_id, HOST)
+        self.assertEqual(stats, stats_before)
+        self.assertEqual(stats.unique_participants, 2)
+        poll = (await recovered.snapshot(session_id)).polls[0]
+        again = await recovered.vote_poll(session_id, poll.id, poll.options[1].id, "c1")
+        self.assertEqual([o.votes for o in again.options], [o.votes for o in poll.options])
+        await recovered.close()
+
+    async def test_acknowledged_writes_survive_without_close(self) -> None:
+        store = self.open_store()
+        session = await store.create_session("Talk", HOST)
+        poll = await store.create_poll(session.id, "Q?", ["A", "B"], False, HOST)
+        await store.set_poll_status(session.id, poll.id, PollStatus.open, HOST)
+        await asyncio.gather(*(
+            store.vote_poll(session.id, poll.id, poll.options[i % 2].id, f"c{i}")
+            for i in range(20)
+        ))
+        # Simulated crash: the first store is never closed.
+        recovered = self.open_store()
+        snapshot = await recovered.snapshot(session.id)
+        self.assertEqual([o.votes for o in snapshot.polls[0].options], [10, 10])
+        self.assertLess(store.memory_stats()["wal"]["batches"], 20)
+        await recovered.close()
+        await store.close()
+
+    async def test_torn_final_record_is_ignored(self) -> None:
+        store = self.open_store()
+        session = await store.create_session("Talk", HOST)
+        await store.close()
+        segment = max(name for name in os.listdir(self.wal_dir) if name.startswith("wal-"))
+        with open(os.path.join(self.wal_dir, segment), "ab") as file:
+            file.write(b'["session",["abc"')
+
+        with self.assertLogs("prezo.store", "WARNING"):
+            recovered = self.open_store()
+        self.assertEqual([s.id for s in await recovered.list_sessions(HOST)], [session.id])
+        # New writes go to a fresh segment, not after the torn line.
+        await recovered.create_session("Next", HOST)
+        await recovered.close()
+        with self.assertLogs("prezo.store", "WARNING"):
+            reopened = self.open_store()
+        self.assertEqual(len(await reopened.list_sessions(HOST)), 2)
+        await reopened.close()
+
+    async def test_failed_write_is_retried_before_its_writer_returns(self) -> None:
+        store = self.open_store()
+        session = await store.create_session("Talk", HOST)
+        wal = store._wal
+        wal.retry_seconds = 0.01
+        write = wal._write
+
+        def torn_write(file, data: bytes) -> None:
+            write(file, data[: len(data) // 2])
+            raise OSError("disk full")
+
+        wal._write = torn_write
+        with self.assertLogs("prezo.store", "ERROR"):
+            # The change is applied in memory, so its writer waits for the
+            # retry rather than being told it failed.
+            opening = asyncio.create_task(store.set_qna_status(session.id, True, HOST))
+            while wal.error is None:
+                await asyncio.sleep(0.005)
+            with self.assertRaises(WalUnavailableError):
+                await store.create_question(session.id, "Why?")
+            await asyncio.sleep(0.05)
+        self.assertIsNotNone(store.memory_stats()["wal"]["error"])
+        self.assertFalse(opening.done())
+
+        wal._write = write
+        self.assertTrue((await asyncio.wait_for(opening, 1)).qna_open)
+        self.assertIsNone(store.memory_stats()["wal"]["error"])
+        await store.create_question(session.id, "Why?")
+        await store.close()
+
+        with self.assertLogs("prezo.store", "WARNING"):
+            recovered = self.open_store()
+        snapshot = await recovered.snapshot(session.id)
+        self.assertTrue(snapshot.session.qna_open)
+        self.assertEqual([q.text for q in snapshot.questions], ["Why?"])
+        await recovered.close()
+
+    async def test_close_fails_writers_whose_batch_never_landed(self) -> None:
+        store = self.open_store()
+        session = await store.create_session("Talk", HOST)
+        wal = store._wal
+        wal.retry_seconds = 0.01
+
+        def failing_write(file, data: bytes) -> None:
+            raise OSError("disk full")
+
+        wal._write = failing_write
+        with self.assertLogs("prezo.store", "ERROR"):
+            opening = asyncio.create_task(store.set_qna_status(session.id, True, HOST))
+            while wal.error is None:
+                await asyncio.sleep(0.005)
+            with self.assertRaises(OSError):
+                await store.close()
+        with self.assertRaises(OSError):
+            await opening
+
+    async def test_compaction_replaces_old_segments_with_a_snapshot(self) -> None:
+        store = self.open_store(wal_snapshot_every=10)
+        session = await store.create_session("Talk", HOST)
+        await store.set_qna_status(session.id, True, HOST)
+        question = await store.create_question(session.id, "Why?")
+        for index in range(40):
+            await store.vote_question(session.id, question.id, f"c{index}")
+        await store.close()
+
+        files = sorted(os.listdir(self.wal_dir))
+        snapshots = [name for name in files if name.startswith("snapshot-")]
+        self.assertEqual(len(snapshots), 1)
+        self.assertGreater(store.memory_stats()["wal"]["snapshots"], 1)
+        self.assertTrue(all(name >= snapshots[0].replace("snapshot", "wal") for name in files
+                            if name.startswith("wal-")))
+
+        recovered = self.open_store()
+        snapshot = await recovered.snapshot(session.id)
+        self.assertEqual(snapshot.questions[0].votes, 40)
+        repeat = await recovered.vote_question(session.id, question.id, "c0")
+        self.assertEqual(repeat.votes, 40)
+        await recovered.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
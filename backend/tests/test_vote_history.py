@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.models import PollStatus
+from app.store import InMemoryStore
+from app.vote_history import ClientIds, PollHistories, QuestionVoters
+
+HOST = "host-1"
+
+
+class VoteHistoryStructureTests(unittest.TestCase):
+    def test_client_ids_intern_to_dense_indexes(self) -> None:
+        clients = ClientIds()
+        self.assertEqual([clients.intern(c) for c in ("a", "b", "a", "c")], [0, 1, 0, 2])
+        self.assertEqual(clients.names, ["a", "b", "c"])
+        self.assertEqual(clients.get("b"), 1)
+        self.assertIsNone(clients.get("z"))
+
+    def test_question_voters_behave_like_a_set(self) -> None:
+        voters = QuestionVoters([5, 1, 5])
+        self.assertTrue(voters.add(3))
+        self.assertFalse(voters.add(1))
+        self.assertEqual(list(voters), [1, 3, 5])
+        self.assertIn(3, voters)
+        self.assertNotIn(4, voters)
+        self.assertEqual(len(voters), 3)
+
+    def test_poll_histories_track_masks_and_widen(self) -> None:
+        histories = PollHistories(3)
+        histories.set(4, 0b101)
+        histories.set(2, 0b010)
+        histories.set(7, 0)
+        self.assertEqual(len(histories), 2)
+        self.assertEqual(histories.get(4), 0b101)
+        self.assertEqual(histories.get(100), 0)
+        histories.ensure_options(12)
+        histories.set(0, 1 << 11)
+        self.assertEqual(list(histories.items()), [(0, 1 << 11), (2, 0b010), (4, 0b101)])
+        histories.ensure_options(80)
+        histories.set(1, 1 << 79)
+        self.assertEqual(histories.get(1), 1 << 79)
+        histories.set(1, 0)
+        self.assertEqual(len(histories), 3)
+
+    def test_removing_options_shifts_later_bits_down(self) -> None:
+        histories = PollHistories(5)
+        histories.set(0, 0b00010)
+        histories.set(1, 0b10101)
+        histories.set(2, 0b01000)
+        emptied = histories.remove_options([1, 3])
+        self.assertEqual(emptied, [0, 2])
+        self.assertEqual(list(histories.items()), [(1, 0b111)])
+        self.assertEqual(len(histories), 1)
+
+
+class StoreVoteHistoryTests(unittest.IsolatedAsyncioTestCase):
+    async def open_poll(self, store: InMemoryStore, allow_multiple: bool):
+        session = await store.create_session("Talk", HOST)
+        poll = await store.create_poll(
+            session.id, "Q?", ["A", "B", "C", "D"], allow_multiple, HOST
+        )
+        await store.set_poll_status(session.id, poll.id, PollStatus.open, HOST)
+        return session.id, poll.id, [option.id for option in poll.options]
+
+    async def participants(self, store: InMemoryStore, session_id: str) -> int:
+        return (await store.session_session_stats(session_id, HOST)).unique_participants
+
+    async def test_single_choice_votes_move_between_options(self) -> None:
+        store = InMemoryStore()
+        sid, pid, options = await self.open_poll(store, False)
+        await store.vote_poll(sid, pid, options[0], "c1")
+        await store.vote_poll(sid, pid, options[1], "c2")
+        poll = await store.vote_poll(sid, pid, options[2], "c1")
+        self.assertEqual([o.votes for o in poll.options], [0, 1, 1, 0])
+        poll = await store.vote_poll(sid, pid, options[2], "c1")
+        self.assertEqual([o.votes for o in poll.options], [0, 1, 1, 0])
+        poll = await store.remove_poll_vote(sid, pid, options[2], "never-voted")
+        self.assertEqual([o.votes for o in poll.options], [0, 1, 1, 0])
+        self.assertIsNone(store._clients[sid].get("never-voted"))
+        await store.remove_poll_vote(sid, pid, options[1], "c2")
+        self.assertEqual(await self.participants(store, sid), 1)
+
+    async def test_removing_options_keeps_remaining_votes(self) -> None:
+        store = InMemoryStore()
+        sid, pid, options = await self.open_poll(store, True)
+        await store.vote_poll(sid, pid, options[1], "c1")
+        await store.vote_poll(sid, pid, options[3], "c1")
+        await store.vote_poll(sid, pid, options[1], "c2")
+        await store.vote_poll(sid, pid, options[2], "c3")
+        await store.update_poll(sid, pid, HOST, remove_option_ids=[options[1]])
+        self.assertEqual(await self.participants(store, sid), 2)
+        # c1's vote for D survived the shift; voting it again is a no-op.
+        poll = await store.vote_poll(sid, pid, options[3], "c1")
+        self.assertEqual([o.votes for o in poll.options], [0, 1, 1])
+        poll = await store.vote_poll(sid, pid, options[0], "c2")
+        self.assertEqual([o.votes for o in poll.options], [1, 1, 1])
+        poll = await store.remove_poll_vote(sid, pid, options[3], "c1")
+        self.assertEqual([o.votes for o in poll.options], [1, 1, 0])
+
+    async def test_reset_lets_previous_voters_vote_again(self) -> None:
+        store = InMemoryStore()
+        sid, pid, options = await self.open_poll(store, False)
+        await store.vote_poll(sid, pid, options[0], "c1")
+        await store.reset_poll_votes(sid, pid, HOST)
+        self.assertEqual(await self.participants(store, sid), 0)
+        poll = await store.vote_poll(sid, pid, options[0], "c1")
+        self.assertEqual([o.votes for o in poll.options], [1, 0, 0, 0])
+
+    async def test_histories_survive_a_wal_restart_after_option_edits(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            store = InMemoryStore(wal_dir=directory, wal_group_commit_seconds=0)
+            sid, pid, options = await self.open_poll(store, True)
+            await store.set_qna_status(sid, True, HOST)
+            question = await store.create_question(sid, "Why?")
+            await store.vote_question(sid, question.id, "c1")
+            await store.vote_poll(sid, pid, options[2], "c1")
+            await store.vote_poll(sid, pid, options[3], "c2")
+            await store.update_poll(
+                sid, pid, HOST, remove_option_ids=[options[0]], add_options=["E"]
+            )
+            await store.vote_poll(sid, pid, options[1], "c2")
+            expected = (await store.snapshot(sid)).model_dump()
+            await store.close()
+
+            recovered = InMemoryStore(wal_dir=directory, wal_group_commit_seconds=0)
+            self.assertEqual((await recovered.snapshot(sid)).model_dump(), expected)
+            self.assertEqual(await self.participants(recovered, sid), 2)
+            poll = await recovered.vote_poll(sid, pid, options[3], "c2")
+            expected_votes = [o["votes"] for o in expected["polls"][0]["options"]]
+            self.assertEqual([o.votes for o in poll.options], expected_votes)
+            question = await recovered.vote_question(sid, question.id, "c1")
+            self.assertEqual(question.votes, 1)
+            await recovered.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
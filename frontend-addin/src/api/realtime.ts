@@ -32,11 +32,21 @@ export type SessionSocketHandle = {
   close: () => void
 }
 
+/** Optional server-side filter, e.g. ['poll:<id>'] for an embed bound to
+ * one poll. Omit for every activity. */
+export type SessionSocketOptions = {
+  topics?: string[]
+}
+
 export function connectSessionSocket(
   sessionId: string,
   onActivity: (activity: SessionActivity) => void,
-  onStatus?: (status: SocketStatus) => void
+  onStatus?: (status: SocketStatus) => void,
+  options: SessionSocketOptions = {}
 ): SessionSocketHandle {
+  const query = options.topics?.length
+    ? `?topics=${encodeURIComponent(options.topics.join(','))}`
+    : ''
   let socket: WebSocket | null = null
   let stopped = false
   let reconnectDelayMs = RECONNECT_INITIAL_DELAY_MS
@@ -86,7 +96,7 @@ export function connectSessionSocket(
       return
     }
     onStatus?.('connecting')
-    const next = new WebSocket(`${WS_BASE_URL}/ws/sessions/${sessionId}`)
+    const next = new WebSocket(`${WS_BASE_URL}/ws/sessions/${sessionId}${query}`)
     socket = next
 
     next.addEventListener('open', () => {
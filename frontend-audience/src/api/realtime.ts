@@ -33,8 +33,10 @@ const CLOSE_CODE_SESSION_GONE = 1008
  * bare WebSocket leaves the audience staring at stale state until they
  * reload. This wrapper reconnects automatically (exponential backoff), and
  * reconnects *immediately* on the signals that mean "the user is back"
- * (visibilitychange/pageshow/online). Recovery is complete on reconnect
- * because the server sends a full session_snapshot to every new socket.
+ * (visibilitychange/pageshow/online). Recovery is complete on reconnect:
+ * the socket hands back the last seq it saw (plus the server epoch) and the
+ * server replays what was missed, or sends a full session_snapshot when it
+ * can't. A seq gap on a live socket asks for a resync snapshot.
  * A ping/pong heartbeat force-closes half-open sockets the OS never
  * reports as closed.
  */
@@ -49,6 +51,9 @@ export function connectSessionSocket(
   let retryTimer: ReturnType<typeof setTimeout> | null = null
   let heartbeatTimer: ReturnType<typeof setInterval> | null = null
   let heartbeatDeadline: ReturnType<typeof setTimeout> | null = null
+  /** Last frame seq applied and the server epoch it belongs to. */
+  let lastSeq: number | null = null
+  let epoch: string | null = null
 
   const stopHeartbeat = () => {
     if (heartbeatTimer !== null) {
@@ -126,7 +131,11 @@ export function connectSessionSocket(
       return
     }
     onStatus?.('connecting')
-    const ws = new WebSocket(`${WS_BASE_URL}/ws/sessions/${sessionId}`)
+    const resume =
+      lastSeq !== null && epoch !== null
+        ? `?resume_from=${lastSeq}&epoch=${encodeURIComponent(epoch)}`
+        : ''
+    const ws = new WebSocket(`${WS_BASE_URL}/ws/sessions/${sessionId}${resume}`)
     socket = ws
 
     ws.addEventListener('open', () => {
@@ -162,6 +171,26 @@ export function connectSessionSocket(
       if (data.type === 'pong') {
         return
       }
+      const frame = data as SessionActivity & { seq?: number; epoch?: string }
+      if (typeof frame.seq === 'number') {
+        if (frame.epoch) {
+          // Snapshot or resume marker: the seq chain restarts here.
+          epoch = frame.epoch
+          lastSeq = frame.seq
+        } else {
+          if (lastSeq !== null && frame.seq > lastSeq + 1) {
+            try {
+              ws.send(JSON.stringify({ type: 'resync' }))
+            } catch {
+              // The close handler reconnects and resumes.
+            }
+          }
+          lastSeq = Math.max(frame.seq, lastSeq ?? frame.seq)
+        }
+      }
+      if (data.type === 'session_resumed') {
+        return
+      }
       onActivity(data)
     })
   }
@@ -0,0 +1,120 @@
+-- Host dashboard and per-session stats counted in the database. Replaces
+-- SupabaseStore pulling every question id, poll id and voter client_id of a
+-- host's sessions into Python to count distinct participants, through
+-- in.(...) filters that outgrew URL limits for hosts with many sessions.
+--
+-- host_dashboard_stats(user): active sessions, active activities (open
+--   polls, open prompts and open Q&As) and distinct voters across every
+--   session the user owns or co-hosts.
+-- session_stats(session ids, user): one row per given session the user owns
+--   or co-hosts, with its distinct voters and active activities. This is
+--   the batch variant behind batch_session_stats; session_session_stats
+--   passes a single id. Sessions the user can't host are left out rather
+--   than raising, which is what both callers want.
+--
+-- SupabaseStore falls back to counting in Python while these are missing,
+-- so they can be applied before or after deploying the backend. Run in
+-- Supabase Dashboard → SQL.
+
+create index if not exists question_votes_question_id_idx on question_votes (question_id);
+create index if not exists poll_votes_poll_id_idx on poll_votes (poll_id);
+
+create or replace function public.host_dashboard_stats(p_user_id uuid)
+returns jsonb
+language sql
+stable
+security definer
+set search_path to 'public'
+as $function$
+  with hosted as (
+    select s.id, s.status, s.qna_open
+      from sessions s
+     where s.user_id = p_user_id
+    union
+    select s.id, s.status, s.qna_open
+      from sessions s
+      join session_hosts h on h.session_id = s.id
+     where h.user_id = p_user_id
+  )
+  select jsonb_build_object(
+    'active_sessions',
+    (select count(*) from hosted where hosted.status = 'active'),
+    'active_activities',
+    (
+      select count(*)
+        from polls p
+       where p.session_id in (select id from hosted) and p.status = 'open'
+    ) + (
+      select count(*)
+        from qna_prompts qp
+       where qp.session_id in (select id from hosted) and qp.status = 'open'
+    ) + (select count(*) from hosted where hosted.qna_open),
+    'unique_participants',
+    (
+      select count(distinct voters.client_id)
+        from (
+          select qv.client_id
+            from question_votes qv
+            join questions q on q.id = qv.question_id
+           where q.session_id in (select id from hosted)
+          union all
+          select pv.client_id
+            from poll_votes pv
+            join polls p on p.id = pv.poll_id
+           where p.session_id in (select id from hosted)
+        ) voters
+       where voters.client_id <> ''
+    )
+  );
+$function$;
+
+create or replace function public.session_stats(p_session_ids uuid[], p_user_id uuid)
+returns table (session_id uuid, unique_participants integer, active_activities integer)
+language sql
+stable
+security definer
+set search_path to 'public'
+as $function$
+  select
+    s.id,
+    (
+      select count(distinct voters.client_id)
+        from (
+          select qv.client_id
+            from question_votes qv
+            join questions q on q.id = qv.question_id
+           where q.session_id = s.id
+          union all
+          select pv.client_id
+            from poll_votes pv
+            join polls p on p.id = pv.poll_id
+           where p.session_id = s.id
+        ) voters
+       where voters.client_id <> ''
+    )::integer,
+    (
+      (select count(*) from polls p where p.session_id = s.id and p.status = 'open')
+      + (select count(*) from qna_prompts qp where qp.session_id = s.id and qp.status = 'open')
+      + case when s.qna_open then 1 else 0 end
+    )::integer
+    from sessions s
+   where s.id = any(p_session_ids)
+     and (
+       s.user_id = p_user_id
+       or exists (
+         select 1
+           from session_hosts h
+          where h.session_id = s.id and h.user_id = p_user_id
+       )
+     );
+$function$;
+
+revoke all on function public.host_dashboard_stats(uuid) from public;
+revoke all on function public.host_dashboard_stats(uuid) from anon;
+revoke all on function public.host_dashboard_stats(uuid) from authenticated;
+grant execute on function public.host_dashboard_stats(uuid) to service_role;
+
+revoke all on function public.session_stats(uuid[], uuid) from public;
+revoke all on function public.session_stats(uuid[], uuid) from anon;
+revoke all on function public.session_stats(uuid[], uuid) from authenticated;
+grant execute on function public.session_stats(uuid[], uuid) to service_role;
@@ -0,0 +1,448 @@
+-- Sharded poll vote counters. vote_poll_atomic used to lock the poll row
+-- for update and bump poll_options.votes, so every vote on a poll queued
+-- behind the previous one, and a popular poll ran at one row lock's rate.
+-- Now:
+--
+-- - votes add +1/-1 to one of 16 counter rows per option in
+--   poll_option_vote_shards, picked at random, instead of the option row;
+-- - poll_options.votes stays as the base count (whatever was counted before
+--   this migration, zeroed by a reset), and the poll_option_vote_totals view
+--   adds the shards to it. Snapshots, vote responses and SupabaseStore's
+--   poll reads all go through the view;
+-- - the poll row is only locked for share, so votes run side by side while
+--   a close or edit of the poll still waits for them. A per-(poll, client)
+--   advisory lock keeps each client's votes applying one at a time, so the
+--   per-client rules (one vote per option, a single-choice vote moves the
+--   earlier one) hold as before;
+-- - counter rows are always taken in option id order, one per option per
+--   transaction, so concurrent votes and batches can't deadlock on them.
+--
+-- Replaces vote_poll_atomic (supabase/schema.sql), remove_poll_vote_atomic,
+-- session_snapshot and vote_poll_batch, so apply it after those files.
+-- SupabaseStore reads poll_options directly while the view is missing. Run
+-- in Supabase Dashboard → SQL.
+
+create table if not exists public.poll_option_vote_shards (
+  option_id uuid not null references public.poll_options(id) on delete cascade,
+  shard smallint not null,
+  poll_id uuid not null references public.polls(id) on delete cascade,
+  votes integer not null default 0,
+  primary key (option_id, shard)
+);
+
+create index if not exists poll_option_vote_shards_poll_id_idx
+  on public.poll_option_vote_shards (poll_id);
+
+alter table public.poll_option_vote_shards enable row level security;
+
+create or replace view public.poll_option_vote_totals
+with (security_invoker = true)
+as
+select po.id,
+       po.poll_id,
+       po.label,
+       po.position,
+       greatest(0, po.votes + coalesce(sum(s.votes), 0))::integer as votes
+  from public.poll_options po
+  left join public.poll_option_vote_shards s on s.option_id = po.id
+ group by po.id;
+
+revoke all on public.poll_option_vote_shards from anon, authenticated;
+revoke all on public.poll_option_vote_totals from anon, authenticated;
+
+-- Adds each delta to a random counter row of its option, in option id order.
+create or replace function public.add_poll_option_votes(
+  p_option_ids uuid[],
+  p_deltas integer[]
+)
+returns void
+language sql
+security definer
+set search_path to 'public'
+as $function$
+  insert into poll_option_vote_shards as s (option_id, shard, poll_id, votes)
+  select d.option_id, floor(random() * 16)::smallint, po.poll_id, d.delta
+    from (
+      select deltas.option_id, sum(deltas.delta)::integer as delta
+        from unnest(p_option_ids, p_deltas) as deltas(option_id, delta)
+       group by deltas.option_id
+      having sum(deltas.delta) <> 0
+    ) d
+    join poll_options po on po.id = d.option_id
+   order by d.option_id
+  on conflict (option_id, shard) do update set votes = s.votes + excluded.votes;
+$function$;
+
+-- The poll in vote_poll_atomic's payload shape, with summed counts.
+create or replace function public.poll_with_vote_totals(p_poll_id uuid)
+returns jsonb
+language sql
+stable
+security definer
+set search_path to 'public'
+as $function$
+  select jsonb_build_object(
+    'id', p.id,
+    'session_id', p.session_id,
+    'question', p.question,
+    'status', p.status,
+    'allow_multiple', p.allow_multiple,
+    'created_at', p.created_at,
+    'options',
+    coalesce(
+      (
+        select jsonb_agg(
+                 jsonb_build_object('id', t.id, 'label', t.label, 'votes', t.votes)
+                 order by t.position asc
+               )
+          from poll_option_vote_totals t
+         where t.poll_id = p.id
+      ),
+      '[]'::jsonb
+    )
+  )
+    from polls p
+   where p.id = p_poll_id;
+$function$;
+
+-- Records one client's vote in poll_votes under the per-client rules and
+-- returns the count changes it makes. The caller has checked the poll is
+-- open and holds it for share.
+create or replace function public.record_poll_vote(
+  p_poll_id uuid,
+  p_allow_multiple boolean,
+  p_option_id uuid,
+  p_client_id text
+)
+returns table (option_id uuid, delta integer)
+language plpgsql
+security definer
+set search_path to 'public'
+as $function$
+#variable_conflict use_column
+begin
+  if p_client_id is null then
+    return query select p_option_id, 1;
+    return;
+  end if;
+
+  perform pg_advisory_xact_lock(hashtextextended(p_poll_id::text || ':' || p_client_id, 0));
+
+  if not p_allow_multiple then
+    if exists (
+      select 1
+        from poll_votes v
+       where v.poll_id = p_poll_id
+         and v.client_id = p_client_id
+         and v.option_id = p_option_id
+    ) then
+      return;
+    end if;
+
+    return query
+      delete from poll_votes v
+       where v.poll_id = p_poll_id and v.client_id = p_client_id
+      returning v.option_id, -1;
+  end if;
+
+  insert into poll_votes (poll_id, option_id, client_id)
+  values (p_poll_id, p_option_id, p_client_id)
+  on conflict (poll_id, client_id, option_id) do nothing;
+
+  if found then
+    return query select p_option_id, 1;
+  end if;
+end;
+$function$;
+
+create or replace function public.vote_poll_atomic(
+  p_session_id uuid,
+  p_poll_id uuid,
+  p_option_id uuid,
+  p_client_id text default null
+)
+returns jsonb
+language plpgsql
+security definer
+set search_path to 'public'
+as $function$
+declare
+  v_poll polls%rowtype;
+  v_option_ids uuid[];
+  v_deltas integer[];
+begin
+  select *
+    into v_poll
+    from polls
+   where id = p_poll_id and session_id = p_session_id
+     for share;
+
+  if not found then
+    raise exception 'poll not found' using errcode = 'P0002';
+  end if;
+
+  if v_poll.status <> 'open' then
+    raise exception 'poll is closed' using errcode = 'P0001';
+  end if;
+
+  perform 1
+     from poll_options
+    where id = p_option_id and poll_id = p_poll_id;
+
+  if not found then
+    raise exception 'option not found' using errcode = 'P0002';
+  end if;
+
+  select array_agg(d.option_id), array_agg(d.delta)
+    into v_option_ids, v_deltas
+    from record_poll_vote(
+      p_poll_id,
+      v_poll.allow_multiple,
+      p_option_id,
+      nullif(btrim(coalesce(p_client_id, '')), '')
+    ) d;
+
+  if v_option_ids is not null then
+    perform add_poll_option_votes(v_option_ids, v_deltas);
+  end if;
+
+  return poll_with_vote_totals(p_poll_id);
+end;
+$function$;
+
+create or replace function public.remove_poll_vote_atomic(
+  p_session_id uuid,
+  p_poll_id uuid,
+  p_option_id uuid,
+  p_client_id text default null::text
+)
+returns jsonb
+language plpgsql
+security definer
+set search_path to 'public'
+as $function$
+declare
+  v_poll polls%rowtype;
+  v_client_id text;
+  v_deleted_count integer := 0;
+begin
+  v_client_id := nullif(btrim(coalesce(p_client_id, '')), '');
+
+  select *
+    into v_poll
+    from polls
+   where id = p_poll_id and session_id = p_session_id
+     for share;
+
+  if not found then
+    raise exception 'poll not found' using errcode = 'P0002';
+  end if;
+
+  if v_poll.status <> 'open' then
+    raise exception 'poll is closed' using errcode = 'P0001';
+  end if;
+
+  perform 1
+     from poll_options
+    where id = p_option_id and poll_id = p_poll_id;
+
+  if not found then
+    raise exception 'option not found' using errcode = 'P0002';
+  end if;
+
+  if v_client_id is not null then
+    perform pg_advisory_xact_lock(hashtextextended(p_poll_id::text || ':' || v_client_id, 0));
+
+    delete from poll_votes
+     where poll_id = p_poll_id
+       and option_id = p_option_id
+       and client_id = v_client_id;
+
+    get diagnostics v_deleted_count = row_count;
+
+    if v_deleted_count > 0 then
+      perform add_poll_option_votes(array[p_option_id], array[-1]);
+    end if;
+  end if;
+
+  return poll_with_vote_totals(p_poll_id);
+end;
+$function$;
+
+create or replace function public.vote_poll_batch(p_votes jsonb)
+returns jsonb
+language plpgsql
+security definer
+set search_path to 'public'
+as $function$
+declare
+  v_vote record;
+  v_poll polls%rowtype;
+  v_poll_ids uuid[];
+  v_option_ids uuid[] := '{}'::uuid[];
+  v_deltas integer[] := '{}'::integer[];
+  v_rejected integer := 0;
+begin
+  select coalesce(array_agg(distinct (value ->> 'poll_id')::uuid), '{}'::uuid[])
+    into v_poll_ids
+    from jsonb_array_elements(coalesce(p_votes, '[]'::jsonb));
+
+  perform 1
+     from polls
+    where id = any(v_poll_ids)
+    order by id
+      for share;
+
+  -- Every client lock up front, in one order, before any counter row.
+  perform pg_advisory_xact_lock(keys.key)
+     from (
+       select distinct hashtextextended(
+                (value ->> 'poll_id')::uuid::text || ':' || btrim(value ->> 'client_id'),
+                0
+              ) as key
+         from jsonb_array_elements(coalesce(p_votes, '[]'::jsonb))
+        where nullif(btrim(coalesce(value ->> 'client_id', '')), '') is not null
+     ) keys
+    order by keys.key;
+
+  for v_vote in
+    select (votes.value ->> 'session_id')::uuid as session_id,
+           (votes.value ->> 'poll_id')::uuid as poll_id,
+           (votes.value ->> 'option_id')::uuid as option_id,
+           nullif(btrim(coalesce(votes.value ->> 'client_id', '')), '') as client_id
+      from jsonb_array_elements(coalesce(p_votes, '[]'::jsonb))
+           with ordinality as votes(value, position)
+     order by votes.position
+  loop
+    select *
+      into v_poll
+      from polls
+     where id = v_vote.poll_id and session_id = v_vote.session_id;
+
+    if not found
+       or v_poll.status <> 'open'
+       or not exists (
+         select 1
+           from poll_options po
+          where po.id = v_vote.option_id and po.poll_id = v_vote.poll_id
+       ) then
+      v_rejected := v_rejected + 1;
+      continue;
+    end if;
+
+    select v_option_ids || coalesce(array_agg(d.option_id), '{}'::uuid[]),
+           v_deltas || coalesce(array_agg(d.delta), '{}'::integer[])
+      into v_option_ids, v_deltas
+      from record_poll_vote(
+        v_vote.poll_id, v_poll.allow_multiple, v_vote.option_id, v_vote.client_id
+      ) d;
+  end loop;
+
+  perform add_poll_option_votes(v_option_ids, v_deltas);
+
+  return jsonb_build_object(
+    'rejected', v_rejected,
+    'polls',
+    coalesce(
+      (
+        select jsonb_agg(poll_with_vote_totals(p.id))
+          from polls p
+         where p.id = any(v_poll_ids)
+      ),
+      '[]'::jsonb
+    )
+  );
+end;
+$function$;
+
+create or replace function public.session_snapshot(p_session_id uuid)
+returns jsonb
+language sql
+stable
+security definer
+set search_path to 'public'
+as $function$
+  select jsonb_build_object(
+    'session', to_jsonb(s),
+    'questions',
+    coalesce(
+      (
+        select jsonb_agg(to_jsonb(q) order by q.created_at desc)
+          from questions q
+         where q.session_id = s.id
+      ),
+      '[]'::jsonb
+    ),
+    'prompts',
+    coalesce(
+      (
+        select jsonb_agg(to_jsonb(qp) order by qp.created_at desc)
+          from qna_prompts qp
+         where qp.session_id = s.id
+      ),
+      '[]'::jsonb
+    ),
+    'polls',
+    coalesce(
+      (
+        select jsonb_agg(
+                 to_jsonb(p) || jsonb_build_object(
+                   'options',
+                   coalesce(
+                     (
+                       select jsonb_agg(
+                                jsonb_build_object('id', t.id, 'label', t.label, 'votes', t.votes)
+                                order by t.position asc
+                              )
+                         from poll_option_vote_totals t
+                        where t.poll_id = p.id
+                     ),
+                     '[]'::jsonb
+                   )
+                 )
+                 order by p.created_at desc
+               )
+          from polls p
+         where p.session_id = s.id
+      ),
+      '[]'::jsonb
+    )
+  )
+    from sessions s
+   where s.id = p_session_id;
+$function$;
+
+revoke all on function public.add_poll_option_votes(uuid[], integer[]) from public;
+revoke all on function public.add_poll_option_votes(uuid[], integer[]) from anon;
+revoke all on function public.add_poll_option_votes(uuid[], integer[]) from authenticated;
+grant execute on function public.add_poll_option_votes(uuid[], integer[]) to service_role;
+
+revoke all on function public.poll_with_vote_totals(uuid) from public;
+revoke all on function public.poll_with_vote_totals(uuid) from anon;
+revoke all on function public.poll_with_vote_totals(uuid) from authenticated;
+grant execute on function public.poll_with_vote_totals(uuid) to service_role;
+
+revoke all on function public.record_poll_vote(uuid, boolean, uuid, text) from public;
+revoke all on function public.record_poll_vote(uuid, boolean, uuid, text) from anon;
+revoke all on function public.record_poll_vote(uuid, boolean, uuid, text) from authenticated;
+grant execute on function public.record_poll_vote(uuid, boolean, uuid, text) to service_role;
+
+revoke all on function public.vote_poll_atomic(uuid, uuid, uuid, text) from public;
+revoke all on function public.vote_poll_atomic(uuid, uuid, uuid, text) from anon;
+revoke all on function public.vote_poll_atomic(uuid, uuid, uuid, text) from authenticated;
+grant execute on function public.vote_poll_atomic(uuid, uuid, uuid, text) to service_role;
+
+revoke all on function public.remove_poll_vote_atomic(uuid, uuid, uuid, text) from public;
+revoke all on function public.remove_poll_vote_atomic(uuid, uuid, uuid, text) from anon;
+revoke all on function public.remove_poll_vote_atomic(uuid, uuid, uuid, text) from authenticated;
+grant execute on function public.remove_poll_vote_atomic(uuid, uuid, uuid, text) to service_role;
+
+revoke all on function public.vote_poll_batch(jsonb) from public;
+revoke all on function public.vote_poll_batch(jsonb) from anon;
+revoke all on function public.vote_poll_batch(jsonb) from authenticated;
+grant execute on function public.vote_poll_batch(jsonb) to service_role;
+
+revoke all on function public.session_snapshot(uuid) from public;
+revoke all on function public.session_snapshot(uuid) from anon;
+revoke all on function public.session_snapshot(uuid) from authenticated;
+grant execute on function public.session_snapshot(uuid) to service_role;
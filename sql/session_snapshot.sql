@@ -0,0 +1,71 @@
+-- Whole-session snapshot in one round trip. Returns the session row with its
+-- questions, Q&A prompts and polls (each poll carrying its options in
+-- position order) as one jsonb document, newest first like the five
+-- PostgREST reads it replaces, or null when the session does not exist.
+--
+-- SupabaseStore._load_snapshot calls this first and falls back to the five
+-- reads while it is missing (checking again every few minutes), so it can be
+-- applied before or after deploying the backend. Run in Supabase Dashboard →
+-- SQL.
+
+create or replace function public.session_snapshot(p_session_id uuid)
+returns jsonb
+language sql
+stable
+security definer
+set search_path to 'public'
+as $function$
+  select jsonb_build_object(
+    'session', to_jsonb(s),
+    'questions',
+    coalesce(
+      (
+        select jsonb_agg(to_jsonb(q) order by q.created_at desc)
+          from questions q
+         where q.session_id = s.id
+      ),
+      '[]'::jsonb
+    ),
+    'prompts',
+    coalesce(
+      (
+        select jsonb_agg(to_jsonb(qp) order by qp.created_at desc)
+          from qna_prompts qp
+         where qp.session_id = s.id
+      ),
+      '[]'::jsonb
+    ),
+    'polls',
+    coalesce(
+      (
+        select jsonb_agg(
+                 to_jsonb(p) || jsonb_build_object(
+                   'options',
+                   coalesce(
+                     (
+                       select jsonb_agg(
+                                jsonb_build_object('id', po.id, 'label', po.label, 'votes', po.votes)
+                                order by po.position asc
+                              )
+                         from poll_options po
+                        where po.poll_id = p.id
+                     ),
+                     '[]'::jsonb
+                   )
+                 )
+                 order by p.created_at desc
+               )
+          from polls p
+         where p.session_id = s.id
+      ),
+      '[]'::jsonb
+    )
+  )
+    from sessions s
+   where s.id = p_session_id;
+$function$;
+
+revoke all on function public.session_snapshot(uuid) from public;
+revoke all on function public.session_snapshot(uuid) from anon;
+revoke all on function public.session_snapshot(uuid) from authenticated;
+grant execute on function public.session_snapshot(uuid) to service_role;
@@ -0,0 +1,106 @@
+-- Many poll votes in one round trip, for SupabaseStore's write-behind mode
+-- (SUPABASE_VOTE_FLUSH_MS). p_votes is a jsonb array of
+-- {session_id, poll_id, option_id, client_id} objects, applied in order in
+-- one transaction through vote_poll_atomic, so each vote keeps its per-client
+-- rules: a client counts once per option, and a single-choice vote moves the
+-- client's earlier vote.
+--
+-- Votes for polls that are closed, missing, or not in the given session, or
+-- for options not in the poll, are skipped and counted as rejected rather
+-- than failing the batch. The polls are locked in id order up front, so
+-- concurrent batches and single votes can't deadlock. Returns
+-- {rejected, polls: [{id, status, options: [{id, label, votes}]}]} with the
+-- stored counts of every poll named in the batch.
+--
+-- SupabaseStore falls back to one vote_poll_atomic call per buffered vote
+-- while this function is missing. Run in Supabase Dashboard → SQL.
+
+create or replace function public.vote_poll_batch(p_votes jsonb)
+returns jsonb
+language plpgsql
+security definer
+set search_path to 'public'
+as $function$
+declare
+  v_vote record;
+  v_poll_ids uuid[];
+  v_open_poll_ids uuid[];
+  v_rejected integer := 0;
+begin
+  select coalesce(array_agg(distinct (value ->> 'poll_id')::uuid), '{}'::uuid[])
+    into v_poll_ids
+    from jsonb_array_elements(coalesce(p_votes, '[]'::jsonb));
+
+  perform 1
+     from polls
+    where id = any(v_poll_ids)
+    order by id
+      for update;
+
+  select coalesce(array_agg(id), '{}'::uuid[])
+    into v_open_poll_ids
+    from polls
+   where id = any(v_poll_ids) and status = 'open';
+
+  for v_vote in
+    select (votes.value ->> 'session_id')::uuid as session_id,
+           (votes.value ->> 'poll_id')::uuid as poll_id,
+           (votes.value ->> 'option_id')::uuid as option_id,
+           votes.value ->> 'client_id' as client_id
+      from jsonb_array_elements(coalesce(p_votes, '[]'::jsonb))
+           with ordinality as votes(value, position)
+     order by votes.position
+  loop
+    if v_vote.poll_id = any(v_open_poll_ids)
+       and exists (
+         select 1
+           from poll_options po
+           join polls p on p.id = po.poll_id
+          where po.id = v_vote.option_id
+            and po.poll_id = v_vote.poll_id
+            and p.session_id = v_vote.session_id
+       ) then
+      perform vote_poll_atomic(
+        v_vote.session_id, v_vote.poll_id, v_vote.option_id, v_vote.client_id
+      );
+    else
+      v_rejected := v_rejected + 1;
+    end if;
+  end loop;
+
+  return jsonb_build_object(
+    'rejected', v_rejected,
+    'polls',
+    coalesce(
+      (
+        select jsonb_agg(
+                 jsonb_build_object(
+                   'id', p.id,
+                   'status', p.status,
+                   'options',
+                   coalesce(
+                     (
+                       select jsonb_agg(
+                                jsonb_build_object('id', po.id, 'label', po.label, 'votes', po.votes)
+                                order by po.position asc
+                              )
+                         from poll_options po
+                        where po.poll_id = p.id
+                     ),
+                     '[]'::jsonb
+                   )
+                 )
+               )
+          from polls p
+         where p.id = any(v_poll_ids)
+      ),
+      '[]'::jsonb
+    )
+  );
+end;
+$function$;
+
+revoke all on function public.vote_poll_batch(jsonb) from public;
+revoke all on function public.vote_poll_batch(jsonb) from anon;
+revoke all on function public.vote_poll_batch(jsonb) from authenticated;
+grant execute on function public.vote_poll_batch(jsonb) to service_role;
@@ -0,0 +1,98 @@
+-- Q&A upvote in one round trip, safe under concurrent votes. Companion to
+-- vote_poll_atomic: records the (question, client) vote with an
+-- insert-on-conflict-do-nothing, so a client counts once, and increments
+-- questions.votes in the database in the same transaction instead of the
+-- client writing back a count it read earlier (which lost increments when
+-- upvotes raced). Votes without a client id always count, as before.
+-- Returns the question row; raises P0002 when the question is not in the
+-- session.
+--
+-- SupabaseStore.vote_question falls back to its old four-request path while
+-- this function is missing, so it can be applied before or after deploying
+-- the backend. Run in Supabase Dashboard → SQL.
+
+-- on conflict needs a unique index on (question_id, client_id). schema.sql
+-- declares one; databases created without it get it here, after dropping
+-- duplicate votes the old path could have recorded.
+do $$
+begin
+  if not exists (
+    select 1
+      from pg_index i
+     where i.indrelid = 'public.question_votes'::regclass
+       and i.indisunique
+       and i.indnkeyatts = 2
+       and (
+         select array_agg(a.attname::text order by a.attname::text)
+           from pg_attribute a
+          where a.attrelid = i.indrelid
+            and a.attnum = any(i.indkey)
+       ) = array['client_id', 'question_id']
+  ) then
+    delete from public.question_votes a
+     using public.question_votes b
+     where a.question_id = b.question_id
+       and a.client_id = b.client_id
+       and a.id > b.id;
+    create unique index question_votes_question_client_idx
+      on public.question_votes (question_id, client_id);
+  end if;
+end $$;
+
+create or replace function public.vote_question_atomic(
+  p_session_id uuid,
+  p_question_id uuid,
+  p_client_id text default null::text
+)
+returns jsonb
+language plpgsql
+security definer
+set search_path to 'public'
+as $function$
+declare
+  v_question questions%rowtype;
+  v_client_id text;
+  v_inserted_count integer := 1;
+begin
+  v_client_id := nullif(btrim(coalesce(p_client_id, '')), '');
+
+  perform 1
+     from questions
+    where id = p_question_id and session_id = p_session_id;
+
+  if not found then
+    raise exception 'question not found' using errcode = 'P0002';
+  end if;
+
+  if v_client_id is not null then
+    insert into question_votes (question_id, client_id)
+    values (p_question_id, v_client_id)
+    on conflict (question_id, client_id) do nothing;
+
+    get diagnostics v_inserted_count = row_count;
+  end if;
+
+  if v_inserted_count > 0 then
+    update questions
+       set votes = votes + 1
+     where id = p_question_id and session_id = p_session_id
+    returning * into v_question;
+  else
+    select *
+      into v_question
+      from questions
+     where id = p_question_id and session_id = p_session_id;
+  end if;
+
+  if not found then
+    raise exception 'question not found' using errcode = 'P0002';
+  end if;
+
+  return to_jsonb(v_question);
+end;
+$function$;
+
+revoke all on function public.vote_question_atomic(uuid, uuid, text) from public;
+revoke all on function public.vote_question_atomic(uuid, uuid, text) from anon;
+revoke all on function public.vote_question_atomic(uuid, uuid, text) from authenticated;
+grant execute on function public.vote_question_atomic(uuid, uuid, text) to service_role;